@@ -0,0 +1,49 @@
+"""
+Context processors du module accounts.
+"""
+
+from django.utils.functional import SimpleLazyObject
+
+from core.choices import UserRole
+
+
+class RoleFlags(frozenset):
+    """
+    Ensemble figé des codes de rôle de l'utilisateur courant,
+    avec des raccourcis booléens pour les templates :
+        {% if user_roles.is_commercial %} ... {% endif %}
+        {% if "ADMIN" in user_roles %} ... {% endif %}
+    """
+
+    is_superuser = False
+    is_staff = False
+
+    @classmethod
+    def for_user(cls, user):
+        if user is None or not user.is_authenticated or not hasattr(user, "get_role_codes"):
+            return cls()
+        flags = cls(user.get_role_codes())
+        flags.is_superuser = bool(user.is_superuser)
+        flags.is_staff = bool(user.is_staff)
+        return flags
+
+    @property
+    def is_client(self) -> bool:
+        return UserRole.CLIENT in self
+
+    @property
+    def is_commercial(self) -> bool:
+        return UserRole.COMMERCIAL in self
+
+    @property
+    def is_admin(self) -> bool:
+        return UserRole.ADMIN in self
+
+
+def user_roles(request):
+    """
+    Expose `user_roles` (RoleFlags) calculé une seule fois par requête,
+    et seulement si un template l'utilise.
+    """
+    user = getattr(request, "user", None)
+    return {"user_roles": SimpleLazyObject(lambda: RoleFlags.for_user(user))}
@@ -14,4 +14,4 @@ class RoleRequiredMixin(LoginRequiredMixin, UserPassesTestMixin):
             return True
         if not self.required_roles:
             return True
-        return user.roles.filter(code__in=[c.upper() for c in self.required_roles]).exists()
+        return any(user.has_role(code) for code in self.required_roles)
@@ -3,6 +3,8 @@ import uuid
 from django.contrib.auth.models import AbstractUser, UserManager
 from django.db import models
 
+from .services.role_service import RoleService
+
 
 class TimeStampedModel(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -48,22 +50,44 @@ class User(AbstractUser):
         verbose_name="Téléphone"
     )
     roles = models.ManyToManyField(Role, related_name="utilisateurs", blank=True)
+    role_version = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="Incrémentée à chaque changement de rôles (invalide les claims JWT)",
+    )
 
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = []
 
     objects = UserManager()
 
+    def save(self, *args, **kwargs):
+        # role_version n'est modifiée que par RoleService.invalidate (UPDATE F() + 1) : exclue
+        # des save() complets, qui réécriraient la valeur lue par une instance plus ancienne.
+        # Champs différés exclus aussi, comme le fait Django (instance partielle des jetons JWT).
+        if not self._state.adding and not kwargs.get("force_insert") and kwargs.get("update_fields") is None:
+            deferred = self.get_deferred_fields()
+            kwargs["update_fields"] = [
+                field.attname
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.attname not in deferred and field.attname != "role_version"
+            ]
+        super().save(*args, **kwargs)
+
     def __str__(self) -> str:
         full_name = self.get_full_name().strip()
         if full_name:
             return f"{full_name} <{self.email}>"
         return self.email
 
+    def get_role_codes(self) -> frozenset:
+        """Codes de rôle en majuscules, résolus une fois par requête (voir RoleService)."""
+        return RoleService.get_role_codes(self)
+
     def has_role(self, code: str) -> bool:
         if not code:
             return False
-        return self.roles.filter(code__iexact=code).exists()
+        return code.upper() in self.get_role_codes()
 
     @property
     def is_client(self) -> bool:
@@ -1,5 +1,8 @@
 from rest_framework.permissions import BasePermission, SAFE_METHODS
 
+from accounts.services.role_service import RoleService
+from core.querysets import get_owner_client_id
+
 
 class IsAdminScindongo(BasePermission):
     """Accès réservé aux utilisateurs ayant le rôle ADMIN."""
@@ -121,9 +124,9 @@ class IsClientOwnerOrAdminOrCommercial(BasePermission):
         if getattr(request.user, "is_admin_scindongo", False) or getattr(request.user, "is_commercial", False):
             return True
         
-        # Client doit être le propriétaire
-        client_profile = getattr(request.user, "client_profile", None)
-        if client_profile and obj.client == client_profile:
+        # Client doit être le propriétaire (comparaison d'ids, sans charger obj.client)
+        client_id = RoleService.get_client_id(request.user)
+        if client_id and get_owner_client_id(obj) == client_id:
             return True
         
         return False
@@ -144,8 +147,8 @@ class IsReservationOwnerOrAdminOrCommercial(BasePermission):
             return True
         
         # Client : doit être le client de la réservation
-        client_profile = getattr(request.user, "client_profile", None)
-        if client_profile and obj.client == client_profile:
+        client_id = RoleService.get_client_id(request.user)
+        if client_id and obj.client_id == client_id:
             return True
         
         return False
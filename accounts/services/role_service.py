@@ -0,0 +1,186 @@
+"""
+Service de résolution des rôles utilisateur avec cache.
+
+Ce service gère:
+- Chargement des codes de rôle en une seule requête par requête HTTP
+  (mémoïsation sur l'instance User)
+- Cache partagé entre requêtes et workers (Redis via le cache Django) ;
+  cache indisponible : lecture en base, sans erreur
+- Invalidation lors des modifications de User.roles (voir accounts.signals)
+- Version des rôles (User.role_version) embarquée dans les jetons JWT
+  pour détecter les jetons dont les claims sont périmés
+"""
+
+import logging
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+
+
+logger = logging.getLogger(__name__)
+
+
+def _cache_get(key):
+    try:
+        return cache.get(key)
+    except Exception:  # django-redis : ConnectionInterrupted, erreurs redis
+        logger.warning("Cache des rôles indisponible (lecture %s)", key, exc_info=True)
+        return None
+
+
+def _cache_set(key, value):
+    try:
+        cache.set(key, value, RoleService.ROLE_CACHE_TIMEOUT)
+    except Exception:
+        logger.warning("Cache des rôles indisponible (écriture %s)", key, exc_info=True)
+
+
+def _cache_delete_many(keys):
+    try:
+        cache.delete_many(keys)
+    except Exception:
+        # Entrées non supprimées : elles expirent après ROLE_CACHE_TIMEOUT
+        logger.error("Cache des rôles indisponible, invalidation impossible : %s", keys, exc_info=True)
+
+
+class RoleService:
+    """Service pour la résolution et la mise en cache des rôles."""
+
+    ROLE_CACHE_TIMEOUT = getattr(settings, "ROLE_CACHE_TIMEOUT", 3600)  # 1 heure
+    INSTANCE_ATTR = "_role_codes_cache"
+    CLIENT_ID_ATTR = "_client_profile_id_cache"
+
+    # Version du format en cache ({"roles", "client_id"}) : les entrées d'un ancien format sont ignorées
+    CACHE_FORMAT = 2
+
+    @staticmethod
+    def cache_key(user_id):
+        return f"user_roles_v{RoleService.CACHE_FORMAT}_{user_id}"
+
+    @staticmethod
+    def version_cache_key(user_id):
+        return f"user_role_version_{user_id}"
+
+    @staticmethod
+    def resolve(user):
+        """
+        Résoudre en une fois les codes de rôle et l'id du profil Client.
+
+        Ordre de résolution :
+        1. Mémo sur l'instance (déjà résolu pendant cette requête, ou posé
+           par l'authentification JWT depuis les claims du jeton)
+        2. Cache Redis partagé
+        3. Base de données : une seule requête (LEFT JOIN rôles + profil client),
+           puis mise en cache
+
+        Args:
+            user: Instance du modèle User
+
+        Returns:
+            tuple: (frozenset des codes de rôle en majuscules, id Client ou None)
+        """
+        if user is None or user.pk is None:
+            return frozenset(), None
+
+        memo = user.__dict__
+        if RoleService.INSTANCE_ATTR in memo and RoleService.CLIENT_ID_ATTR in memo:
+            return memo[RoleService.INSTANCE_ATTR], memo[RoleService.CLIENT_ID_ATTR]
+
+        cache_key = RoleService.cache_key(user.pk)
+        cached = _cache_get(cache_key)
+        if cached is not None:
+            codes = frozenset(cached["roles"])
+            client_id = cached["client_id"]
+        else:
+            User = apps.get_model(settings.AUTH_USER_MODEL)
+            rows = User.objects.filter(pk=user.pk).values_list("roles__code", "client_profile__id")
+            codes = frozenset(code.upper() for code, _ in rows if code)
+            client_id = next((cid for _, cid in rows if cid), None)
+            _cache_set(cache_key, {"roles": sorted(codes), "client_id": client_id})
+
+        memo.setdefault(RoleService.INSTANCE_ATTR, codes)
+        memo.setdefault(RoleService.CLIENT_ID_ATTR, client_id)
+        return memo[RoleService.INSTANCE_ATTR], memo[RoleService.CLIENT_ID_ATTR]
+
+    @staticmethod
+    def get_role_codes(user):
+        """
+        Retourner l'ensemble des codes de rôle (en majuscules) d'un utilisateur.
+        Les rôles préchargés via prefetch_related('roles') sont utilisés tels quels.
+
+        Returns:
+            frozenset: Codes de rôle en majuscules
+        """
+        if user is None or user.pk is None:
+            return frozenset()
+
+        codes = user.__dict__.get(RoleService.INSTANCE_ATTR)
+        if codes is not None:
+            return codes
+
+        prefetched = getattr(user, "_prefetched_objects_cache", {})
+        if "roles" in prefetched:
+            codes = frozenset(role.code.upper() for role in prefetched["roles"])
+            setattr(user, RoleService.INSTANCE_ATTR, codes)
+            return codes
+
+        return RoleService.resolve(user)[0]
+
+    @staticmethod
+    def get_client_id(user):
+        """
+        Retourner l'id du profil Client lié à l'utilisateur (ou None).
+        Résolu avec les rôles (voir resolve), sans charger le profil.
+        """
+        if user is None or user.pk is None:
+            return None
+
+        if RoleService.CLIENT_ID_ATTR in user.__dict__:
+            return user.__dict__[RoleService.CLIENT_ID_ATTR]
+
+        return RoleService.resolve(user)[1]
+
+    @staticmethod
+    def get_role_version(user_id):
+        """
+        Version courante des rôles d'un utilisateur (cache, sinon base).
+
+        Returns:
+            int or None: None si l'utilisateur n'existe pas
+        """
+        version_key = RoleService.version_cache_key(user_id)
+        version = _cache_get(version_key)
+        if version is None:
+            User = apps.get_model(settings.AUTH_USER_MODEL)
+            version = User.objects.filter(pk=user_id).values_list("role_version", flat=True).first()
+            if version is not None:
+                _cache_set(version_key, version)
+        return version
+
+    @staticmethod
+    def invalidate(user_ids):
+        """
+        Supprimer les entrées de cache des utilisateurs donnés et incrémenter
+        leur version de rôles (les jetons JWT émis avant deviennent périmés).
+
+        Args:
+            user_ids: Itérable d'identifiants utilisateur
+        """
+        user_ids = list(user_ids)
+        if not user_ids:
+            return
+        User = apps.get_model(settings.AUTH_USER_MODEL)
+        User.objects.filter(pk__in=user_ids).update(role_version=F("role_version") + 1)
+        keys = []
+        for user_id in user_ids:
+            keys.append(RoleService.cache_key(user_id))
+            keys.append(RoleService.version_cache_key(user_id))
+        _cache_delete_many(keys)
+
+    @staticmethod
+    def forget(user):
+        """Oublier le mémo porté par l'instance (rôles modifiés en cours de requête)."""
+        user.__dict__.pop(RoleService.INSTANCE_ATTR, None)
+        user.__dict__.pop(RoleService.CLIENT_ID_ATTR, None)
@@ -0,0 +1,87 @@
+"""
+Signaux pour l'invalidation du cache des rôles utilisateur
+et de la version de rôles embarquée dans les jetons JWT.
+"""
+
+from django.db.models.signals import m2m_changed, post_save, pre_save, post_delete, pre_delete
+from django.dispatch import receiver
+from accounts.models import User, Role
+from accounts.services.role_service import RoleService
+
+
+def _invalidate_instance(user):
+    RoleService.invalidate([user.pk])
+    RoleService.forget(user)
+
+
+@receiver(m2m_changed, sender=User.roles.through)
+def invalidate_user_roles_cache(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Quand les rôles d'un utilisateur changent (add/remove/clear),
+    invalider son entrée de cache.
+    - Sens direct  : user.roles.add(role)        → instance = User
+    - Sens inverse : role.utilisateurs.add(user) → instance = Role, pk_set = ids User
+    """
+    if action == "pre_clear" and reverse:
+        # Après le clear, on ne sait plus quels utilisateurs étaient concernés
+        RoleService.invalidate(instance.utilisateurs.values_list("pk", flat=True))
+        return
+
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+
+    if reverse:
+        if pk_set:
+            RoleService.invalidate(pk_set)
+    else:
+        _invalidate_instance(instance)
+
+
+@receiver(post_save, sender=Role)
+@receiver(pre_delete, sender=Role)
+def invalidate_role_holders_cache(sender, instance, **kwargs):
+    """Un code de rôle modifié/supprimé invalide le cache de ses détenteurs."""
+    if kwargs.get("created"):
+        return
+    RoleService.invalidate(
+        User.roles.through.objects.filter(role_id=instance.pk).values_list("user_id", flat=True)
+    )
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_claims_on_save(sender, instance, created, update_fields=None, **kwargs):
+    """
+    is_active / is_staff / is_superuser font partie des claims JWT :
+    toute modification de l'utilisateur périme les jetons déjà émis.
+    La simple mise à jour de last_login (connexion) est ignorée.
+    """
+    if created:
+        return
+    if update_fields is not None and set(update_fields) <= {"last_login"}:
+        return
+    _invalidate_instance(instance)
+
+
+@receiver(pre_save, sender="sales.Client")
+def remember_client_previous_user(sender, instance, **kwargs):
+    """Mémoriser l'ancien utilisateur lié pour invalider aussi ses claims."""
+    instance._previous_user_id = None
+    if not instance._state.adding:
+        instance._previous_user_id = (
+            sender.objects.filter(pk=instance.pk).values_list("user_id", flat=True).first()
+        )
+
+
+@receiver(post_save, sender="sales.Client")
+def invalidate_client_claims_on_save(sender, instance, created, **kwargs):
+    """Le claim client_id dépend du lien Client ↔ User."""
+    previous_user_id = getattr(instance, "_previous_user_id", None)
+    if not created and previous_user_id == instance.user_id:
+        return
+    RoleService.invalidate({instance.user_id, previous_user_id} - {None})
+
+
+@receiver(post_delete, sender="sales.Client")
+def invalidate_client_claims_on_delete(sender, instance, **kwargs):
+    if instance.user_id:
+        RoleService.invalidate([instance.user_id])
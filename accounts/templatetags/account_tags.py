@@ -9,6 +9,6 @@ def has_role(user, code: str) -> bool:
         return False
     if getattr(user, "is_superuser", False):
         return True
-    if not hasattr(user, "roles"):
+    if not hasattr(user, "has_role"):
         return False
-    return user.roles.filter(code__iexact=code).exists()
+    return user.has_role(code)
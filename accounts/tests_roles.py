@@ -0,0 +1,194 @@
+"""
+Tests pour le cache de résolution des rôles (RoleService).
+Inclut un benchmark du nombre de requêtes SQL sur un appel de liste API.
+"""
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.core.cache import cache
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts.models import User, Role
+from accounts.services.role_service import RoleService
+
+
+LOCMEM_CACHE = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+def _role_queries(captured):
+    return [q for q in captured.captured_queries if '"accounts_role"' in q["sql"]]
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class RoleServiceTests(TestCase):
+    """Tests pour la mémoïsation et l'invalidation du cache des rôles."""
+
+    def setUp(self):
+        cache.clear()
+        self.role_client = Role.objects.create(code="CLIENT", libelle="Client")
+        self.role_commercial = Role.objects.create(code="COMMERCIAL", libelle="Commercial")
+        self.user = User.objects.create_user(
+            username="commercial", email="commercial@example.com", password="pass123"
+        )
+        self.user.roles.add(self.role_commercial)
+
+    def test_roles_loaded_once_per_instance(self):
+        """Une seule requête pour toutes les vérifications de rôle sur une instance."""
+        user = User.objects.get(pk=self.user.pk)
+        cache.clear()
+        with self.assertNumQueries(1):
+            self.assertTrue(user.is_commercial)
+            self.assertFalse(user.is_client)
+            self.assertFalse(user.is_admin_scindongo)
+            self.assertTrue(user.has_role("commercial"))
+
+    def test_cache_shared_between_instances(self):
+        """Une nouvelle instance (nouvelle requête) lit le cache sans requête SQL."""
+        User.objects.get(pk=self.user.pk).get_role_codes()
+        user = User.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertTrue(user.is_commercial)
+
+    def test_cache_invalidated_on_roles_add_and_remove(self):
+        """m2m_changed invalide le cache dans les deux sens de la relation."""
+        self.assertFalse(User.objects.get(pk=self.user.pk).is_client)
+
+        self.user.roles.add(self.role_client)
+        self.assertTrue(User.objects.get(pk=self.user.pk).is_client)
+
+        self.role_client.utilisateurs.remove(self.user)
+        self.assertFalse(User.objects.get(pk=self.user.pk).is_client)
+
+        self.user.roles.clear()
+        self.assertFalse(User.objects.get(pk=self.user.pk).is_commercial)
+
+    def test_prefetched_roles_are_used(self):
+        """Les rôles préchargés (prefetch_related) ne déclenchent aucune requête."""
+        user = User.objects.prefetch_related("roles").get(pk=self.user.pk)
+        cache.clear()
+        with self.assertNumQueries(0):
+            self.assertTrue(user.is_commercial)
+
+    def test_legacy_cache_entries_ignored(self):
+        """Entrée en cache de l'ancien format (liste de codes) : clé différente, non lue."""
+        cache.set(f"user_roles_{self.user.pk}", ["CLIENT"])
+        user = User.objects.get(pk=self.user.pk)
+        self.assertTrue(user.is_commercial)
+        self.assertFalse(user.is_client)
+
+    def test_stale_instance_save_keeps_role_version(self):
+        """Un save() complet sur une instance ancienne ne réécrit pas role_version."""
+        stale = User.objects.get(pk=self.user.pk)
+        self.user.roles.add(self.role_client)
+        current = User.objects.values_list("role_version", flat=True).get(pk=self.user.pk)
+
+        stale.telephone = "770000000"
+        # UPDATE sans relecture de la ligne, puis incrément de role_version (signal)
+        with CaptureQueriesContext(connection) as captured:
+            stale.save()
+        self.assertFalse([q for q in captured.captured_queries if q["sql"].startswith("SELECT")])
+        # Modification de l'utilisateur : claims périmés, version encore incrémentée
+        self.assertEqual(User.objects.values_list("role_version", flat=True).get(pk=self.user.pk), current + 1)
+        self.assertEqual(User.objects.get(pk=self.user.pk).telephone, "770000000")
+
+    def test_cache_outage_falls_back_to_database(self):
+        """Cache indisponible : rôles et version lus en base, invalidation sans erreur."""
+        with mock.patch.object(cache, "get", side_effect=ConnectionError), \
+                mock.patch.object(cache, "set", side_effect=ConnectionError), \
+                mock.patch.object(cache, "delete_many", side_effect=ConnectionError):
+            self.assertTrue(User.objects.get(pk=self.user.pk).is_commercial)
+            self.assertEqual(
+                RoleService.get_role_version(self.user.pk),
+                User.objects.values_list("role_version", flat=True).get(pk=self.user.pk),
+            )
+            self.user.roles.add(self.role_client)
+            self.assertTrue(User.objects.get(pk=self.user.pk).is_client)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class RoleQueryCountBenchmark(TestCase):
+    """
+    Benchmark : requêtes sur les rôles pour GET /api/financements/ (commercial).
+    Avant : une requête EXISTS par appel à has_role (permissions + get_queryset).
+    Après : au plus une requête (cache froid), zéro avec le cache chaud.
+    """
+
+    def setUp(self):
+        cache.clear()
+        role = Role.objects.create(code="COMMERCIAL", libelle="Commercial")
+        self.user = User.objects.create_user(
+            username="commercial", email="commercial@example.com", password="pass123"
+        )
+        self.user.roles.add(role)
+        self.api = APIClient()
+        self.api.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(self.user).access_token}"
+        )
+
+    def _list_financements(self):
+        with CaptureQueriesContext(connection) as captured:
+            response = self.api.get("/api/financements/")
+        self.assertEqual(response.status_code, 200)
+        return captured
+
+    def test_role_query_count_before_and_after(self):
+        def legacy_has_role(user, code):
+            return bool(code) and user.roles.filter(code__iexact=code).exists()
+
+        def legacy_resolve(user):
+            codes = frozenset(c.upper() for c in user.roles.values_list("code", flat=True))
+            return codes, getattr(getattr(user, "client_profile", None), "pk", None)
+
+        with mock.patch.object(User, "has_role", legacy_has_role), \
+                mock.patch.object(RoleService, "resolve", staticmethod(legacy_resolve)):
+            before = self._list_financements()
+
+        cache.clear()
+        cold = self._list_financements()
+        warm = self._list_financements()
+
+        before_roles = len(_role_queries(before))
+        self.assertGreater(before_roles, 1)
+        self.assertEqual(len(_role_queries(cold)), 1)
+        self.assertEqual(len(_role_queries(warm)), 0)
+        self.assertLess(
+            len(warm.captured_queries),
+            len(before.captured_queries),
+            f"avant={len(before.captured_queries)} requêtes, après={len(warm.captured_queries)} requêtes",
+        )
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class UserRolesContextProcessorTests(TestCase):
+    """Rendu complet d'une page : les rôles sont résolus une seule fois."""
+
+    def setUp(self):
+        cache.clear()
+        role = Role.objects.create(code="COMMERCIAL", libelle="Commercial")
+        self.user = User.objects.create_user(
+            username="commercial", email="commercial@example.com", password="pass123"
+        )
+        self.user.roles.add(role)
+        self.client.force_login(self.user)
+        cache.clear()
+
+    def test_home_page_query_count(self):
+        """Session + utilisateur + rôles (cache froid) = 3 requêtes."""
+        with self.assertNumQueries(3):
+            response = self.client.get("/")
+        self.assertContains(response, "Espace commercial")
+        self.assertNotContains(response, "Mon espace client")
+
+    def test_home_page_query_count_warm_cache(self):
+        self.client.get("/")
+        with self.assertNumQueries(2):
+            self.client.get("/")
+
+    def test_dashboard_resolves_roles_once(self):
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get("/ventes/commercial/dashboard/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(_role_queries(captured)), 1)
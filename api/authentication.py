@@ -0,0 +1,50 @@
+"""
+Authentification JWT sans requête SQL pour les endpoints de lecture.
+
+Les claims ajoutés par RoleClaimsTokenObtainPairSerializer (rôles, client_id,
+is_active, is_staff, is_superuser, role_version) suffisent à construire l'utilisateur et à
+évaluer les permissions. Si la version de rôles du jeton ne correspond plus
+à User.role_version, on retombe sur le chargement classique depuis la base.
+"""
+
+import uuid
+
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+
+from accounts.services.role_service import RoleService
+
+
+class RoleClaimsJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication qui construit request.user depuis les claims du jeton."""
+
+    CLAIM_FIELDS = ("email", "is_active", "is_staff", "is_superuser")
+
+    def get_user(self, validated_token):
+        if "role_version" not in validated_token or "is_active" not in validated_token:
+            # Jeton émis avant l'ajout des claims
+            return super().get_user(validated_token)
+
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if (
+            user_id is None
+            or not validated_token["is_active"]
+            or RoleService.get_role_version(user_id) != validated_token["role_version"]
+        ):
+            # Rôles/statut modifiés depuis l'émission : source de vérité = base
+            return super().get_user(validated_token)
+
+        # Instance User partielle : les autres champs sont différés et chargés
+        # à la demande ; un save() n'écrit que les champs chargés.
+        field_names = [api_settings.USER_ID_FIELD, *self.CLAIM_FIELDS, "role_version"]
+        values = [
+            uuid.UUID(str(user_id)),
+            *(validated_token.get(name) for name in self.CLAIM_FIELDS),
+            validated_token["role_version"],
+        ]
+        user = self.user_model.from_db("default", field_names, values)
+
+        client_id = validated_token.get("client_id")
+        setattr(user, RoleService.INSTANCE_ATTR, frozenset(validated_token.get("roles", [])))
+        setattr(user, RoleService.CLIENT_ID_ATTR, uuid.UUID(client_id) if client_id else None)
+        return user
@@ -0,0 +1,158 @@
+"""
+Filtres de recherche DRF (catalogue, clients, géolocalisation).
+"""
+
+from rest_framework import filters
+from rest_framework.exceptions import ValidationError
+from rest_framework.settings import api_settings
+
+from catalog.services.search_service import SearchService
+from core.services.fuzzy_search_service import FuzzySearchService
+
+
+class FullTextSearchFilter(filters.BaseFilterBackend):
+    """
+    Remplace SearchFilter sur les endpoints du catalogue : recherche plein
+    texte (tsvector + index GIN) via SearchService.
+
+    Les résultats sont triés par pertinence, sauf si le client demande
+    explicitement un tri (?ordering=...). À placer après OrderingFilter.
+    """
+
+    search_param = api_settings.SEARCH_PARAM
+    ordering_param = api_settings.ORDERING_PARAM
+
+    def filter_queryset(self, request, queryset, view):
+        terms = request.query_params.get(self.search_param, "")
+        order_by_rank = not request.query_params.get(self.ordering_param)
+        return SearchService.search(queryset, terms, order_by_rank=order_by_rank)
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.search_param,
+                "required": False,
+                "in": "query",
+                "description": "Recherche plein texte (résultats classés par pertinence).",
+                "schema": {"type": "string"},
+            },
+        ]
+
+
+class FuzzySearchFilter(filters.BaseFilterBackend):
+    """
+    Recherche approximative par trigrammes (pg_trgm) via FuzzySearchService.
+
+    Attributs de la vue :
+        fuzzy_search_fields: champs texte comparés (obligatoire)
+        fuzzy_phone_field: champ téléphone normalisé, optionnel
+        fuzzy_search_param: paramètre de requête (défaut : "search")
+
+    Les résultats sont triés par similarité, sauf si le client demande
+    explicitement un tri (?ordering=...). À placer après OrderingFilter.
+    """
+
+    ordering_param = api_settings.ORDERING_PARAM
+
+    def get_search_param(self, view):
+        return getattr(view, "fuzzy_search_param", api_settings.SEARCH_PARAM)
+
+    def filter_queryset(self, request, queryset, view):
+        terms = request.query_params.get(self.get_search_param(view), "")
+        order_by_similarity = not request.query_params.get(self.ordering_param)
+        return FuzzySearchService.search(
+            queryset,
+            terms,
+            fields=view.fuzzy_search_fields,
+            phone_field=getattr(view, "fuzzy_phone_field", None),
+            order_by_similarity=order_by_similarity,
+        )
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.get_search_param(view),
+                "required": False,
+                "in": "query",
+                "description": "Recherche approximative (tolère les fautes de frappe).",
+                "schema": {"type": "string"},
+            },
+        ]
+
+
+class GeoFilter(filters.BaseFilterBackend):
+    """
+    Filtres géographiques sur gps_lat / gps_lng (modèles avec GeoQuerySet).
+
+        ?near=lat,lng&radius_km=10   rayon autour d'un point, trié par distance
+                                     (annotation distance_km), sauf ?ordering=...
+        ?bbox=ouest,sud,est,nord     vue de carte (ordre GeoJSON : lng/lat)
+
+    À placer après OrderingFilter.
+    """
+
+    ordering_param = api_settings.ORDERING_PARAM
+    default_radius_km = 10
+    max_radius_km = 500
+
+    def filter_queryset(self, request, queryset, view):
+        bbox = request.query_params.get("bbox")
+        if bbox:
+            west, south, east, north = self._parse_floats(bbox, 4, "bbox")
+            if south > north or west > east:
+                raise ValidationError({"bbox": "Attendu : ouest,sud,est,nord."})
+            queryset = queryset.within_bbox(south, west, north, east)
+
+        near = request.query_params.get("near")
+        if near:
+            lat, lng = self._parse_floats(near, 2, "near")
+            if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+                raise ValidationError({"near": "Coordonnées hors limites."})
+            radius_km = request.query_params.get("radius_km", self.default_radius_km)
+            try:
+                radius_km = float(radius_km)
+            except ValueError:
+                raise ValidationError({"radius_km": "Nombre attendu."})
+            if not 0 < radius_km <= self.max_radius_km:
+                raise ValidationError({"radius_km": f"Doit être compris entre 0 et {self.max_radius_km} km."})
+            ordering = queryset.query.order_by
+            queryset = queryset.near(lat, lng, radius_km)
+            if request.query_params.get(self.ordering_param):
+                queryset = queryset.order_by(*ordering)
+
+        return queryset
+
+    @staticmethod
+    def _parse_floats(value, count, param):
+        try:
+            numbers = [float(part) for part in value.split(",")]
+        except ValueError:
+            numbers = []
+        if len(numbers) != count:
+            raise ValidationError({param: f"{count} nombres séparés par des virgules attendus."})
+        return numbers
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": "near",
+                "required": False,
+                "in": "query",
+                "description": "Point de référence lat,lng (résultats triés par distance).",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": "radius_km",
+                "required": False,
+                "in": "query",
+                "description": f"Rayon autour de near en km (défaut {self.default_radius_km}).",
+                "schema": {"type": "number"},
+            },
+            {
+                "name": "bbox",
+                "required": False,
+                "in": "query",
+                "description": "Vue de carte : ouest,sud,est,nord.",
+                "schema": {"type": "string"},
+            },
+        ]
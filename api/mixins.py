@@ -0,0 +1,56 @@
+"""
+Mixins pour les viewsets DRF.
+"""
+
+from django.core.exceptions import ValidationError
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from core.services.conditional_get_service import ConditionalGetService
+
+
+class ConditionalGetMixin:
+    """
+    Requêtes conditionnelles (If-None-Match / If-Modified-Since) sur list et retrieve :
+    304 Not Modified avant toute sérialisation quand la réponse n'a pas changé.
+
+    `conditional_related_models` : labels ("app.Model") des modèles liés dont les écritures
+    modifient la réponse ; leurs signaux doivent appeler ConditionalGetService.touch
+    (voir api.signals), comme ceux du modèle principal.
+    """
+
+    conditional_related_models = ()
+
+    def conditional_response(self, request, queryset):
+        """Réponse 304/412 si les préconditions de la requête l'imposent, sinon None."""
+        variant = f"{request.get_full_path()}|{request.accepted_renderer.format}"
+        etag, last_modified = ConditionalGetService.validators(queryset, self.conditional_related_models, variant)
+        self._validators = (etag, last_modified)
+        return get_conditional_response(request, etag=etag, last_modified=last_modified)
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(request, self.filter_queryset(self.get_queryset())) or super().list(
+            request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.filter_queryset(self.get_queryset())
+        try:
+            conditional = self.conditional_response(
+                request, queryset.filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+            )
+        except (TypeError, ValueError, ValidationError):
+            # Identifiant invalide : 404 rendu par get_object
+            conditional = None
+        return conditional or super().retrieve(request, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        validators = getattr(self, "_validators", None)
+        if validators and response.status_code in (200, 304):
+            etag, last_modified = validators
+            response["ETag"] = etag
+            if last_modified is not None:
+                response["Last-Modified"] = http_date(last_modified)
+        return response
@@ -0,0 +1,13 @@
+"""
+Classes de pagination DRF.
+"""
+
+from rest_framework.pagination import PageNumberPagination
+
+
+class FacetSearchPagination(PageNumberPagination):
+    """Pagination de la recherche à facettes (/api/unites/search/)."""
+
+    page_size = 24
+    page_size_query_param = "page_size"
+    max_page_size = 100
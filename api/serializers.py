@@ -4,8 +4,11 @@ from datetime import datetime, timedelta
 
 from django.db import models
 from rest_framework import serializers
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 
 from accounts.models import User
+from accounts.services.role_service import RoleService
+from catalog.services.image_service import SIZES, ImageDerivativeService
 from sales.models import (
     Client,
     Reservation,
@@ -26,6 +29,7 @@ from catalog.models import (
     PhotoChantier,
     AvancementChantierUnite,
     PhotoChantierUnite,
+    PhotoUploadSession,
 )
 
 
@@ -34,6 +38,63 @@ from catalog.models import (
 # ============================
 
 
+class PhotoGpsValidationMixin:
+    """Coordonnées GPS des photos de chantier : fournies ensemble, dans les bornes."""
+
+    def gps_errors(self, attrs):
+        gps_lat = attrs.get("gps_lat")
+        gps_lng = attrs.get("gps_lng")
+        errors = {}
+
+        # Si une coordonnée est remplie, l'autre doit l'être aussi
+        if (gps_lat is None) != (gps_lng is None):
+            errors["gps"] = "gps_lat et gps_lng doivent être fournis ensemble ou laissés vides."
+
+        if gps_lat is not None:
+            if gps_lat < Decimal("-90") or gps_lat > Decimal("90"):
+                errors["gps_lat"] = "Latitude invalide (doit être entre -90 et 90)."
+
+        if gps_lng is not None:
+            if gps_lng < Decimal("-180") or gps_lng > Decimal("180"):
+                errors["gps_lng"] = "Longitude invalide (doit être entre -180 et 180)."
+
+        return errors
+
+    def validate(self, attrs):
+        errors = self.gps_errors(attrs)
+        if errors:
+            raise serializers.ValidationError(errors)
+        return attrs
+
+
+class ImageDerivativesField(serializers.Field):
+    """
+    Dérivés d'image en lecture seule (voir catalog.services.image_service) :
+    {"thumb": url, "medium": url, "large": url, "srcset": "... 320w, ...", "srcset_jpeg": ...}.
+    Les URL retombent sur l'original tant que les dérivés ne sont pas générés.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs["source"] = "*"
+        kwargs["read_only"] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, instance):
+        if not getattr(instance, ImageDerivativeService.field_name(instance)):
+            return None
+        request = self.context.get("request")
+
+        def absolute(url):
+            return request.build_absolute_uri(url) if request and url else url
+
+        data = {size_name: absolute(ImageDerivativeService.url(instance, size_name)) for size_name in SIZES}
+        for key, ext in (("srcset", "webp"), ("srcset_jpeg", "jpeg")):
+            data[key] = ", ".join(
+                f"{absolute(url)} {width}w" for url, width in ImageDerivativeService.srcset_entries(instance, ext)
+            )
+        return data
+
+
 class TypeBienSerializer(serializers.ModelSerializer):
     class Meta:
         model = TypeBien
@@ -47,15 +108,45 @@ class ModeleBienSerializer(serializers.ModelSerializer):
 
 
 class ProgrammeSerializer(serializers.ModelSerializer):
+    # Présent uniquement avec ?near= (voir api.filters.GeoFilter)
+    distance_km = serializers.FloatField(read_only=True)
+    image_principale_derives = ImageDerivativesField()
+
     class Meta:
         model = Programme
-        fields = "__all__"
+        exclude = ("search_vector", "image_derives")
+
+
+class MapClusterQuerySerializer(serializers.Serializer):
+    """Paramètres de /api/carte/clusters/."""
+
+    bbox = serializers.CharField(help_text="ouest,sud,est,nord")
+    zoom = serializers.IntegerField(min_value=0, max_value=20)
+    layer = serializers.ChoiceField(choices=["unites", "programmes"], default="unites")
+
+    def validate_bbox(self, value):
+        try:
+            west, south, east, north = (float(part) for part in value.split(","))
+        except ValueError:
+            raise serializers.ValidationError("4 nombres séparés par des virgules attendus.")
+        if south > north or west > east or not (-90 <= south and north <= 90 and -180 <= west and east <= 180):
+            raise serializers.ValidationError("Attendu : ouest,sud,est,nord.")
+        return south, west, north, east
 
 
 class UniteSerializer(serializers.ModelSerializer):
+    statut_reel = serializers.CharField(source="get_statut_reel", read_only=True)
+    distance_km = serializers.FloatField(read_only=True)
+    image_derives = ImageDerivativesField()
+    # Dernier avancement (Unite.objects.with_latest_avancement())
+    derniere_etape = serializers.CharField(read_only=True)
+    dernier_pourcentage = serializers.IntegerField(read_only=True)
+    dernier_pointage = serializers.DateField(read_only=True)
+    dernier_nb_photos = serializers.IntegerField(read_only=True)
+
     class Meta:
         model = Unite
-        fields = "__all__"
+        exclude = ("search_vector",)
 
 
 class EtapeChantierSerializer(serializers.ModelSerializer):
@@ -67,6 +158,7 @@ class EtapeChantierSerializer(serializers.ModelSerializer):
             "code",
             "libelle",
             "ordre",
+            "poids",
             "created_at",
             "updated_at",
         ]
@@ -93,38 +185,30 @@ class AvancementChantierSerializer(serializers.ModelSerializer):
         return value
 
 
-class PhotoChantierSerializer(serializers.ModelSerializer):
+class PhotoChantierSerializer(PhotoGpsValidationMixin, serializers.ModelSerializer):
+    image_derives = ImageDerivativesField()
+
     class Meta:
         model = PhotoChantier
         fields = [
             "id",
             "avancement",
             "image",
+            "image_derives",
             "gps_lat",
             "gps_lng",
             "pris_le",
+            "distance_programme_km",
+            "gps_hors_zone",
             "created_at",
             "updated_at",
         ]
-        read_only_fields = ("id", "created_at", "updated_at")
+        read_only_fields = ("id", "distance_programme_km", "gps_hors_zone", "created_at", "updated_at")
+        # Lue dans l'EXIF si absente (voir catalog.services.photo_metadata_service)
+        extra_kwargs = {"pris_le": {"required": False}}
 
     def validate(self, attrs):
-        gps_lat = attrs.get("gps_lat")
-        gps_lng = attrs.get("gps_lng")
-
-        errors = {}
-
-        # Si une coordonnée est remplie, l’autre doit l’être aussi
-        if (gps_lat is None) != (gps_lng is None):
-            errors["gps"] = "gps_lat et gps_lng doivent être fournis ensemble ou laissés vides."
-
-        if gps_lat is not None:
-            if gps_lat < Decimal("-90") or gps_lat > Decimal("90"):
-                errors["gps_lat"] = "Latitude invalide (doit être entre -90 et 90)."
-
-        if gps_lng is not None:
-            if gps_lng < Decimal("-180") or gps_lng > Decimal("180"):
-                errors["gps_lng"] = "Longitude invalide (doit être entre -180 et 180)."
+        errors = self.gps_errors(attrs)
 
         pris_le = attrs.get("pris_le")
         if pris_le is not None:
@@ -156,44 +240,61 @@ class PhotoChantierListSerializer(serializers.ModelSerializer):
 # ============================
 
 
-class PhotoChantierUniteSerializer(serializers.ModelSerializer):
+class PhotoChantierUniteSerializer(PhotoGpsValidationMixin, serializers.ModelSerializer):
     """Serializer pour photos d'avancement chantier unité."""
+    image_derives = ImageDerivativesField()
+
     class Meta:
         model = PhotoChantierUnite
         fields = [
             "id",
             "avancement",
             "image",
+            "image_derives",
             "gps_lat",
             "gps_lng",
             "pris_le",
+            "distance_programme_km",
+            "gps_hors_zone",
             "description",
             "created_at",
             "updated_at",
         ]
-        read_only_fields = ("id", "created_at", "updated_at")
+        read_only_fields = ("id", "distance_programme_km", "gps_hors_zone", "created_at", "updated_at")
+        # Lue dans l'EXIF si absente (voir catalog.services.photo_metadata_service)
+        extra_kwargs = {"pris_le": {"required": False}}
 
-    def validate(self, attrs):
-        gps_lat = attrs.get("gps_lat")
-        gps_lng = attrs.get("gps_lng")
-        errors = {}
 
-        # Si une coordonnée est remplie, l'autre doit l'être aussi
-        if (gps_lat is None) != (gps_lng is None):
-            errors["gps"] = "gps_lat et gps_lng doivent être fournis ensemble ou laissés vides."
+class PhotoUploadSessionSerializer(PhotoGpsValidationMixin, serializers.ModelSerializer):
+    """Serializer pour les sessions d'upload reprenable de photos d'avancement."""
 
-        if gps_lat is not None:
-            if gps_lat < Decimal("-90") or gps_lat > Decimal("90"):
-                errors["gps_lat"] = "Latitude invalide (doit être entre -90 et 90)."
-
-        if gps_lng is not None:
-            if gps_lng < Decimal("-180") or gps_lng > Decimal("180"):
-                errors["gps_lng"] = "Longitude invalide (doit être entre -180 et 180)."
+    class Meta:
+        model = PhotoUploadSession
+        fields = [
+            "id",
+            "avancement",
+            "nom_fichier",
+            "taille_totale",
+            "offset",
+            "sha256",
+            "gps_lat",
+            "gps_lng",
+            "pris_le",
+            "description",
+            "expire_le",
+        ]
+        read_only_fields = ("id", "offset", "expire_le")
 
-        if errors:
-            raise serializers.ValidationError(errors)
+    def validate_taille_totale(self, value):
+        if value <= 0:
+            raise serializers.ValidationError("Taille du fichier requise.")
+        return value
 
-        return attrs
+    def validate_sha256(self, value):
+        value = value.lower()
+        if value and (len(value) != 64 or any(char not in "0123456789abcdef" for char in value)):
+            raise serializers.ValidationError("Empreinte SHA-256 hexadécimale attendue.")
+        return value
 
 
 class AvancementChantierUniteSerializer(serializers.ModelSerializer):
@@ -595,3 +696,23 @@ class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = "__all__"
+
+
+class RoleClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """
+    Jetons JWT portant les rôles et le profil client de l'utilisateur,
+    lus par api.authentication.RoleClaimsJWTAuthentication sans requête SQL.
+    """
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        client_id = RoleService.get_client_id(user)
+        token["email"] = user.email
+        token["roles"] = sorted(RoleService.get_role_codes(user))
+        token["client_id"] = str(client_id) if client_id else None
+        token["is_active"] = user.is_active
+        token["is_staff"] = user.is_staff
+        token["is_superuser"] = user.is_superuser
+        token["role_version"] = user.role_version
+        return token
@@ -0,0 +1,25 @@
+"""
+Validateurs des requêtes conditionnelles de l'API : horodatage par modèle (voir ConditionalGetService).
+"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from catalog.models import AvancementChantierUnite, PhotoChantierUnite, Programme, Unite
+from core.services.conditional_get_service import ConditionalGetService
+
+
+@receiver(post_save, sender=Programme)
+@receiver(post_delete, sender=Programme)
+@receiver(post_save, sender=Unite)
+@receiver(post_delete, sender=Unite)
+@receiver(post_save, sender=AvancementChantierUnite)
+@receiver(post_delete, sender=AvancementChantierUnite)
+@receiver(post_save, sender=PhotoChantierUnite)
+@receiver(post_delete, sender=PhotoChantierUnite)
+@receiver(post_save, sender="sales.Reservation")
+@receiver(post_delete, sender="sales.Reservation")
+@receiver(post_save, sender="sales.Contrat")
+@receiver(post_delete, sender="sales.Contrat")
+def touch_conditional_get(sender, instance, raw=False, **kwargs):
+    if not raw:
+        ConditionalGetService.touch(sender._meta.label)
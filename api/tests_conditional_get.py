@@ -0,0 +1,128 @@
+"""
+Tests pour les requêtes conditionnelles (ETag / Last-Modified) des endpoints du catalogue.
+"""
+from datetime import date
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils.http import http_date
+from rest_framework.test import APIClient
+
+from accounts.models import Role, User
+from catalog.models import AvancementChantierUnite, ModeleBien, Programme, TypeBien, Unite
+from catalog.services.chantier_status_service import ChantierStatusService
+from catalog.services.image_service import ImageDerivativeService
+from core.choices import ContratStatus, StatutChantier
+from sales.models import Client, Contrat, Reservation
+
+
+LOCMEM_CACHE = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "etag-tests"}}
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class ConditionalGetTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.api = APIClient()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.programme = Programme.objects.create(nom="Cité Horizon", statut="actif")
+            self.autre = Programme.objects.create(nom="Les Almadies", statut="brouillon")
+            modele = ModeleBien.objects.create(
+                type_bien=TypeBien.objects.create(code="VILLA", libelle="Villa"), nom_marketing="F3", prix_base_ttc=1
+            )
+            self.unite = Unite.objects.create(programme=self.programme, modele_bien=modele, reference_lot="H1", prix_ttc=1)
+
+    def _write(self, write):
+        with self.captureOnCommitCallbacks(execute=True):
+            return write()
+
+    def test_list_not_modified_without_serialization(self):
+        commercial = User.objects.create_user(username="com", email="com@example.com", password="pass123")
+        commercial.roles.add(Role.objects.create(code="COMMERCIAL", libelle="Commercial"))
+        self.api.force_authenticate(commercial)
+        response = self.api.get("/api/programmes/")
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+
+        with mock.patch("api.views.ProgrammeSerializer.to_representation") as serialize:
+            response = self.api.get("/api/programmes/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+        serialize.assert_not_called()
+
+        # Validateur propre au filtre : une écriture hors filtre ne change pas la réponse filtrée
+        filtered = self.api.get("/api/programmes/", {"statut": "actif"})["ETag"]
+        self._write(lambda: Programme.objects.filter(pk=self.autre.pk).get().save())
+        self.assertEqual(self.api.get("/api/programmes/", {"statut": "actif"}, HTTP_IF_NONE_MATCH=filtered).status_code, 304)
+        self.assertEqual(self.api.get("/api/programmes/", HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        # Suppression : Last-Modified avance aussi
+        last_modified = self.api.get("/api/programmes/")["Last-Modified"]
+        with mock.patch("core.services.conditional_get_service.time.time", return_value=4102444800):
+            self._write(self.autre.delete)
+        response = self.api.get("/api/programmes/", HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Last-Modified"], http_date(4102444800))
+
+    def test_detail_revalidated_on_related_writes(self):
+        url = f"/api/unites/{self.unite.pk}/"
+        etag = self.api.get(url)["ETag"]
+        self.assertEqual(self.api.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # Statut réel : dépend des réservations, pas de updated_at de l'unité
+        user = User.objects.create_user(username="cli", email="cli@example.com", password="pass123")
+        client = Client.objects.create(user=user, nom="Diop", prenom="Awa", telephone="770000001", email="cli@example.com")
+        self._write(lambda: Reservation.objects.create(client=client, unite=self.unite))
+        response = self.api.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+        self.assertEqual(self.api.get("/api/unites/pas-un-uuid/").status_code, 404)
+
+    def test_revalidated_on_writes_without_signals(self):
+        commercial = User.objects.create_user(username="com", email="com@example.com", password="pass123")
+        commercial.roles.add(Role.objects.create(code="COMMERCIAL", libelle="Commercial"))
+        self.api.force_authenticate(commercial)
+        url = f"/api/unites/{self.unite.pk}/"
+
+        # Import en masse : bulk_create puis recalcul par update(), sans post_save
+        AvancementChantierUnite.objects.bulk_create([
+            AvancementChantierUnite(unite=self.unite, etape="Finitions", date_pointage=date(2025, 5, 1), pourcentage=100)
+        ])
+        etags = {path: self.api.get(path)["ETag"] for path in (url, "/api/avancements-unites/")}
+        self._write(lambda: ChantierStatusService.recompute(unite_ids=[self.unite.pk]))
+        self.assertEqual(Unite.objects.get(pk=self.unite.pk).statut_chantier, StatutChantier.TERMINE)
+        for path, etag in etags.items():
+            self.assertEqual(self.api.get(path, HTTP_IF_NONE_MATCH=etag).status_code, 200, path)
+
+        # Dérivés d'image enregistrés par update()
+        etags = {path: self.api.get(path)["ETag"] for path in (url, "/api/avancements-unites/")}
+        derives = {"source": "", "thumb": {"width": 320, "webp": "t.webp", "jpeg": "t.jpg"}}
+        with mock.patch.object(ImageDerivativeService, "generate", return_value=derives):
+            self._write(lambda: ImageDerivativeService.process(Unite._meta.label, self.unite.pk, force=True))
+        self.assertEqual(Unite.objects.get(pk=self.unite.pk).image_derives, derives)
+        for path, etag in etags.items():
+            self.assertEqual(self.api.get(path, HTTP_IF_NONE_MATCH=etag).status_code, 200, path)
+
+    def test_client_avancements_revalidated_when_contract_signed(self):
+        user = User.objects.create_user(username="cli", email="cli@example.com", password="pass123")
+        user.roles.add(Role.objects.create(code="CLIENT", libelle="Client"))
+        client = Client.objects.create(user=user, nom="Diop", prenom="Awa", telephone="770000001", email="cli@example.com")
+        reservation = Reservation.objects.create(client=client, unite=self.unite)
+        AvancementChantierUnite.objects.create(
+            unite=self.unite, reservation=reservation, etape="Fondations", date_pointage=date(2025, 5, 1), pourcentage=10
+        )
+        contrat = Contrat.objects.create(reservation=reservation, numero="C-001")
+        self.api.force_authenticate(user)
+
+        response = self.api.get("/api/avancements-unites/")
+        self.assertEqual(len(response.data), 0)
+        etag = response["ETag"]
+
+        contrat.statut = ContratStatus.SIGNE
+        self._write(contrat.save)
+        response = self.api.get("/api/avancements-unites/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 1)
@@ -0,0 +1,135 @@
+"""
+Tests pour les claims de rôles embarqués dans les jetons JWT.
+"""
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.models import User, Role
+from sales.models import Client
+
+
+LOCMEM_CACHE = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class RoleClaimsJWTTests(TestCase):
+    """Authentification + autorisation depuis les claims du jeton."""
+
+    def setUp(self):
+        cache.clear()
+        self.role_client = Role.objects.create(code="CLIENT", libelle="Client")
+        self.role_commercial = Role.objects.create(code="COMMERCIAL", libelle="Commercial")
+        self.user = User.objects.create_user(
+            username="client", email="client@example.com", password="pass123"
+        )
+        self.user.roles.add(self.role_client)
+        self.client_profile = Client.objects.create(
+            user=self.user, nom="Diop", prenom="Awa", telephone="771234567", email="client@example.com"
+        )
+        self.api = APIClient()
+
+    def _obtain_access(self):
+        response = self.api.post(
+            "/api/token/", {"email": "client@example.com", "password": "pass123"}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.data["access"]
+
+    def test_token_contains_role_claims(self):
+        token = AccessToken(self._obtain_access())
+        self.assertEqual(token["roles"], ["CLIENT"])
+        self.assertIs(token["is_active"], True)
+        self.assertEqual(token["client_id"], str(self.client_profile.pk))
+        self.assertEqual(token["role_version"], User.objects.get(pk=self.user.pk).role_version)
+
+    def test_list_without_user_or_role_queries(self):
+        """Seule la requête métier est exécutée (cache de version chaud)."""
+        self.api.credentials(HTTP_AUTHORIZATION=f"Bearer {self._obtain_access()}")
+        self.api.get("/api/reservations/")
+
+        with CaptureQueriesContext(connection) as captured:
+            response = self.api.get("/api/reservations/")
+        self.assertEqual(response.status_code, 200)
+        tables = " ".join(q["sql"] for q in captured.captured_queries)
+        self.assertNotIn('"accounts_user"', tables)
+        self.assertNotIn('"accounts_role"', tables)
+        self.assertNotIn('"sales_client"', tables)
+        self.assertEqual(len(captured.captured_queries), 1)
+
+    def test_stale_token_falls_back_to_database(self):
+        """Après un changement de rôles, les claims du jeton sont ignorés."""
+        self.api.credentials(HTTP_AUTHORIZATION=f"Bearer {self._obtain_access()}")
+        self.user.roles.add(self.role_commercial)
+
+        response = self.api.get("/api/financements/")
+        self.assertEqual(response.status_code, 200)
+
+    def test_inactive_user_rejected_despite_valid_token(self):
+        self.api.credentials(HTTP_AUTHORIZATION=f"Bearer {self._obtain_access()}")
+        version = User.objects.get(pk=self.user.pk).role_version
+        self.user.is_active = False
+        self.user.save(update_fields=["is_active"])
+        # La désactivation périme les claims des jetons déjà émis
+        self.assertEqual(User.objects.get(pk=self.user.pk).role_version, version + 1)
+
+        response = self.api.get("/api/reservations/")
+        self.assertEqual(response.status_code, 401)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class ForUserScopingTests(TestCase):
+    """Cloisonnement for_user : nombre de requêtes fixe quel que soit le rôle."""
+
+    ENDPOINTS = ["/api/reservations/", "/api/financements/", "/api/clients/", "/api/paiements/"]
+
+    def setUp(self):
+        cache.clear()
+        self.role_client = Role.objects.create(code="CLIENT", libelle="Client")
+        self.role_commercial = Role.objects.create(code="COMMERCIAL", libelle="Commercial")
+        self.client_user = User.objects.create_user(
+            username="client", email="client@example.com", password="pass123"
+        )
+        self.client_user.roles.add(self.role_client)
+        self.client_profile = Client.objects.create(
+            user=self.client_user, nom="Diop", prenom="Awa", telephone="771234567", email="client@example.com"
+        )
+        other = Client.objects.create(nom="Ndiaye", prenom="Moussa", telephone="781234567", email="m@example.com")
+        self.commercial = User.objects.create_user(
+            username="commercial", email="commercial@example.com", password="pass123"
+        )
+        self.commercial.roles.add(self.role_commercial)
+        self.other = other
+
+    def test_for_user_scopes_clients(self):
+        self.assertEqual(
+            list(Client.objects.for_user(User.objects.get(pk=self.client_user.pk))),
+            [self.client_profile],
+        )
+        self.assertEqual(Client.objects.for_user(User.objects.get(pk=self.commercial.pk)).count(), 2)
+
+    def test_roles_and_client_id_resolved_in_one_query(self):
+        user = User.objects.get(pk=self.client_user.pk)
+        cache.clear()
+        with self.assertNumQueries(1):
+            self.assertTrue(user.is_client)
+            self.assertEqual(user.get_role_codes(), frozenset({"CLIENT"}))
+            from accounts.services.role_service import RoleService
+            self.assertEqual(RoleService.get_client_id(user), self.client_profile.pk)
+
+    def test_session_list_query_count_is_fixed(self):
+        """
+        Session : session + user + rôles/client (1 requête) + liste = 4 requêtes,
+        quel que soit le rôle (3 si la permission refuse avant la liste).
+        """
+        for user in (self.client_user, self.commercial):
+            self.client.force_login(user)
+            for url in self.ENDPOINTS:
+                cache.clear()
+                with CaptureQueriesContext(connection) as captured:
+                    response = self.client.get(url)
+                expected = 4 if response.status_code == 200 else 3
+                self.assertEqual(len(captured.captured_queries), expected, url)
@@ -1,7 +1,10 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
-from .views_stats import StatsOverview
+from .views_stats import CacheStats, StatsOverview
+from .views_map import MapClustersView
+from .views_progress import ProgrammeProgressView, UniteProgressView
+from .views_uploads import PhotoUploadSessionViewSet
 from .views import (
     ProgrammeViewSet,
     UniteViewSet,
@@ -34,6 +37,7 @@ router.register("avancements-chantier", AvancementChantierViewSet)
 router.register("photos-chantier", PhotoChantierViewSet)
 router.register("avancements-unites", AvancementChantierUniteViewSet, basename="avancement-unite")
 router.register("photos-unites", PhotoChantierUniteViewSet, basename="photo-unite")
+router.register("uploads-photos", PhotoUploadSessionViewSet, basename="upload-photo")
 
 # Commercial
 router.register("clients", ClientViewSet)
@@ -52,5 +56,9 @@ urlpatterns = [
     path("token/", TokenObtainPairView.as_view(), name="token_obtain_pair"),
     path("token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
     path("stats/overview/", StatsOverview.as_view(), name="stats-overview"),
+    path("stats/cache/", CacheStats.as_view(), name="stats-cache"),
+    path("carte/clusters/", MapClustersView.as_view(), name="map-clusters"),
+    path("avancement/programmes/", ProgrammeProgressView.as_view(), name="programme-progress"),
+    path("avancement/programmes/<uuid:pk>/unites/", UniteProgressView.as_view(), name="unite-progress"),
     path("", include(router.urls)),
 ]
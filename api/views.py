@@ -4,6 +4,7 @@ from datetime import datetime, timedelta
 from rest_framework import viewsets, status, filters
 from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
 from rest_framework.decorators import action
+from rest_framework.generics import get_object_or_404
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 
@@ -15,7 +16,14 @@ from accounts.permissions import (
     IsReservationOwnerOrAdminOrCommercial,
     IsClientOwnerOrAdminOrCommercial,
 )
-
+from accounts.services.role_service import RoleService
+from catalog.services.avancement_import_service import AvancementImportError, AvancementImportService
+from catalog.services.facet_service import FacetSearchService
+from core.uploads import upload_errors
+
+from .filters import FullTextSearchFilter, FuzzySearchFilter, GeoFilter
+from .mixins import ConditionalGetMixin
+from .pagination import FacetSearchPagination
 from .serializers import (
     ProgrammeSerializer,
     UniteSerializer,
@@ -66,27 +74,45 @@ from sales.models import (
 # ============================
 
 
-class ProgrammeViewSet(viewsets.ModelViewSet):
+class ProgrammeViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Programme.objects.all()
     serializer_class = ProgrammeSerializer
     permission_classes = [IsAuthenticatedOrReadOnly, IsAdminOrCommercial]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, FullTextSearchFilter, GeoFilter]
     filterset_fields = ["statut"]
-    search_fields = ["nom", "description", "adresse"]
     ordering_fields = ["nom", "created_at"]
     ordering = ["-created_at"]
 
 
-class UniteViewSet(viewsets.ModelViewSet):
-    queryset = Unite.objects.all()
+class UniteViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
+    queryset = Unite.objects.with_statut_reel().with_latest_avancement()
+    # Statut réel (réservations) et dernier avancement annotés sur chaque unité
+    conditional_related_models = ("sales.Reservation", "catalog.AvancementChantierUnite", "catalog.PhotoChantierUnite")
     serializer_class = UniteSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, FullTextSearchFilter, FuzzySearchFilter, GeoFilter]
     filterset_fields = ["programme", "statut_disponibilite", "modele_bien"]
-    search_fields = ["reference_lot"]
+    # ?reference=A1O2 → recherche approximative sur la référence du lot
+    fuzzy_search_param = "reference"
+    fuzzy_search_fields = ["reference_lot"]
     ordering_fields = ["prix_ttc", "reference_lot", "created_at"]
     ordering = ["reference_lot"]
 
+    @action(detail=False, methods=["get"], url_path="search")
+    def search(self, request):
+        """
+        Recherche à facettes : page d'unités correspondantes + comptes par facette
+        (type, programme, statut, clés de caracteristiques, bornes prix/surface).
+        Voir FacetSearchService pour les paramètres.
+        """
+        queryset = FacetSearchService.filter(self.filter_queryset(self.get_queryset()), request.query_params)
+
+        paginator = FacetSearchPagination()
+        page = paginator.paginate_queryset(queryset.select_related("modele_bien"), request, view=self)
+        response = paginator.get_paginated_response(self.get_serializer(page, many=True).data)
+        response.data["facets"] = FacetSearchService.facets(queryset)
+        return response
+
 
 class TypeBienViewSet(viewsets.ModelViewSet):
     queryset = TypeBien.objects.all()
@@ -149,7 +175,7 @@ class PhotoChantierViewSet(viewsets.ModelViewSet):
 # ============================
 
 
-class AvancementChantierUniteViewSet(viewsets.ModelViewSet):
+class AvancementChantierUniteViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     ViewSet pour gérer l'avancement des chantiers par unité individuelle.
     
@@ -163,6 +189,10 @@ class AvancementChantierUniteViewSet(viewsets.ModelViewSet):
     search_fields = ["unite__reference_lot", "etape", "commentaire"]
     ordering_fields = ["date_pointage", "pourcentage", "created_at"]
     ordering = ["-date_pointage"]
+    # Référence du lot, nom du programme, photos ; visibilité client selon le contrat
+    conditional_related_models = (
+        "catalog.Unite", "catalog.Programme", "catalog.PhotoChantierUnite", "sales.Reservation", "sales.Contrat",
+    )
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -180,17 +210,15 @@ class AvancementChantierUniteViewSet(viewsets.ModelViewSet):
         
         # Client : seulement ses réservations avec contrat signé
         if user.is_client:
-            from sales.models import Client as ClientModel
             from core.choices import ContratStatus
-            try:
-                client_profile = ClientModel.objects.get(user=user)
+            client_id = RoleService.get_client_id(user)
+            if client_id:
                 # Avancements liés aux réservations du client avec contrat signé
                 return AvancementChantierUnite.objects.filter(
-                    reservation__client=client_profile,
+                    reservation__client_id=client_id,
                     reservation__contrat__statut=ContratStatus.SIGNE
                 ).select_related('unite', 'unite__programme', 'reservation')
-            except ClientModel.DoesNotExist:
-                return AvancementChantierUnite.objects.none()
+            return AvancementChantierUnite.objects.none()
         
         return AvancementChantierUnite.objects.none()
 
@@ -219,12 +247,55 @@ class AvancementChantierUniteViewSet(viewsets.ModelViewSet):
         Body: { image, gps_lat, gps_lng, pris_le, description }
         """
         avancement = self.get_object()
+        # Fichier refusé pendant la réception (taille, format réel), voir core.uploads
+        rejected = upload_errors(request)
+        if rejected:
+            return Response(rejected, status=status.HTTP_400_BAD_REQUEST)
         serializer = PhotoChantierUniteSerializer(data=request.data)
         if serializer.is_valid():
             serializer.save(avancement=avancement)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @action(
+        detail=False,
+        methods=['post'],
+        url_path='import',
+        url_name='import',
+        permission_classes=[IsAuthenticated, IsAdminOrCommercial],
+    )
+    def import_avancements(self, request):
+        """
+        Import en masse des avancements d'un programme.
+        POST /api/avancements-unites/import/
+        Multipart: { programme, fichier (CSV ou JSON), photos (zip, optionnel), dry_run }
+        ou JSON:   { programme, rows: [{reference_lot, etape, date_pointage, pourcentage,
+                     commentaire, photos}], dry_run }
+        Toutes les lignes sont validées avant écriture ; erreurs rapportées par ligne.
+        """
+        rejected = upload_errors(request)
+        if rejected:
+            return Response(rejected, status=status.HTTP_400_BAD_REQUEST)
+        programme = get_object_or_404(Programme, pk=request.data.get('programme'))
+        dry_run = str(request.data.get('dry_run', '')).lower() in ('1', 'true', 'on')
+
+        try:
+            fichier = request.FILES.get('fichier')
+            if fichier is not None:
+                rows = AvancementImportService.read_rows(fichier, fichier.name)
+            else:
+                rows = AvancementImportService.normalize_rows(request.data.get('rows'))
+            archive = request.FILES.get('photos')
+            if archive is not None:
+                archive = AvancementImportService.open_archive(archive)
+        except AvancementImportError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        report = AvancementImportService.import_rows(programme, rows, archive=archive, dry_run=dry_run)
+        if report["erreurs"]:
+            return Response(report, status=status.HTTP_400_BAD_REQUEST)
+        return Response(report, status=status.HTTP_200_OK if dry_run else status.HTTP_201_CREATED)
+
 
 class PhotoChantierUniteViewSet(viewsets.ModelViewSet):
     """
@@ -251,16 +322,14 @@ class PhotoChantierUniteViewSet(viewsets.ModelViewSet):
         
         # Client : photos des avancements de ses réservations confirmées
         if user.is_client:
-            from sales.models import Client as ClientModel
             from core.choices import ContratStatus
-            try:
-                client_profile = ClientModel.objects.get(user=user)
+            client_id = RoleService.get_client_id(user)
+            if client_id:
                 return PhotoChantierUnite.objects.filter(
-                    avancement__reservation__client=client_profile,
+                    avancement__reservation__client_id=client_id,
                     avancement__reservation__contrat__statut=ContratStatus.SIGNE
                 ).select_related('avancement', 'avancement__unite', 'avancement__reservation')
-            except ClientModel.DoesNotExist:
-                return PhotoChantierUnite.objects.none()
+            return PhotoChantierUnite.objects.none()
         
         return PhotoChantierUnite.objects.none()
 
@@ -284,24 +353,14 @@ class ClientViewSet(viewsets.ModelViewSet):
     queryset = Client.objects.all()
     serializer_class = ClientSerializer
     permission_classes = [IsAuthenticated, IsAdminOrCommercial]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
-    search_fields = ["nom", "prenom", "email", "telephone"]
+    filter_backends = [DjangoFilterBackend, FuzzySearchFilter]
+    fuzzy_search_fields = ["nom", "prenom", "email"]
+    fuzzy_phone_field = "telephone_normalise"
     filterset_fields = ["kyc_statut"]
 
     def get_queryset(self):
         """Admin et Commercial voient tous les clients. Client ne voit que son propre profil."""
-        qs = super().get_queryset()
-        user = self.request.user
-        
-        if getattr(user, "is_admin_scindongo", False) or getattr(user, "is_commercial", False):
-            return qs
-        
-        # Client : ne voir que son propre profil
-        client_profile = getattr(user, "client_profile", None)
-        if client_profile:
-            return qs.filter(pk=client_profile.pk)
-        
-        return qs.none()
+        return super().get_queryset().for_user(self.request.user)
 
 
 # ============================
@@ -311,7 +370,8 @@ class ClientViewSet(viewsets.ModelViewSet):
 
 class ReservationDocumentViewSet(viewsets.ModelViewSet):
     """ViewSet pour uploader et gérer documents de réservation"""
-    queryset = ReservationDocument.objects.all()
+    # select_related : la permission objet lit reservation.client_id sans requête
+    queryset = ReservationDocument.objects.select_related("reservation")
     serializer_class = ReservationDocumentSerializer
     permission_classes = [IsAuthenticated, IsClientOwnerOrAdminOrCommercial]
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
@@ -321,18 +381,7 @@ class ReservationDocumentViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         """Client voit QUE ses documents. Admin/Commercial voient tous."""
-        qs = super().get_queryset()
-        user = self.request.user
-        
-        if getattr(user, "is_admin_scindongo", False) or getattr(user, "is_commercial", False):
-            return qs
-        
-        # Client : ne voir que les documents de SES réservations
-        client_profile = getattr(user, "client_profile", None)
-        if client_profile:
-            return qs.filter(reservation__client=client_profile)
-        
-        return qs.none()
+        return super().get_queryset().for_user(self.request.user)
 
     def perform_create(self, serializer):
         """Log l'upload du document"""
@@ -353,18 +402,7 @@ class ReservationViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         """Admin/Commercial voient tout. Client ne voit que SES réservations."""
-        qs = super().get_queryset()
-        user = self.request.user
-        
-        if getattr(user, "is_admin_scindongo", False) or getattr(user, "is_commercial", False):
-            return qs
-        
-        # Client : ne voir que ses réservations
-        client_profile = getattr(user, "client_profile", None)
-        if client_profile:
-            return qs.filter(client=client_profile)
-        
-        return qs.none()
+        return super().get_queryset().for_user(self.request.user)
     
     @action(detail=True, methods=["post"], url_path="cancel")
     def cancel(self, request, pk=None):
@@ -512,18 +550,7 @@ class FinancementViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         """Admin/Commercial voient tout. Client voit SES financements."""
-        qs = super().get_queryset()
-        user = self.request.user
-        
-        if getattr(user, "is_admin_scindongo", False) or getattr(user, "is_commercial", False):
-            return qs
-        
-        # Client : ne voir que ses financements
-        client_profile = getattr(user, "client_profile", None)
-        if client_profile:
-            return qs.filter(reservation__client=client_profile)
-        
-        return qs.none()
+        return super().get_queryset().for_user(self.request.user)
 
     @action(detail=True, methods=["post"], url_path="generer-echeances")
     def generer_echeances(self, request, pk=None):
@@ -587,18 +614,7 @@ class EcheanceViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         """Admin/Commercial voient tout. Client voit SES échéances."""
-        qs = super().get_queryset()
-        user = self.request.user
-        
-        if getattr(user, "is_admin_scindongo", False) or getattr(user, "is_commercial", False):
-            return qs
-        
-        # Client : ne voir que ses échéances
-        client_profile = getattr(user, "client_profile", None)
-        if client_profile:
-            return qs.filter(financement__reservation__client=client_profile)
-        
-        return qs.none()
+        return super().get_queryset().for_user(self.request.user)
 
 
 # ============================
@@ -616,18 +632,7 @@ class ContratViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         """Admin/Commercial voient tout. Client voit SES contrats."""
-        qs = super().get_queryset()
-        user = self.request.user
-        
-        if getattr(user, "is_admin_scindongo", False) or getattr(user, "is_commercial", False):
-            return qs
-        
-        # Client : ne voir que ses contrats
-        client_profile = getattr(user, "client_profile", None)
-        if client_profile:
-            return qs.filter(reservation__client=client_profile)
-        
-        return qs.none()
+        return super().get_queryset().for_user(self.request.user)
 
 
 class PaiementViewSet(viewsets.ModelViewSet):
@@ -640,15 +645,4 @@ class PaiementViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         """Admin/Commercial voient tout. Client voit SES paiements."""
-        qs = super().get_queryset()
-        user = self.request.user
-        
-        if getattr(user, "is_admin_scindongo", False) or getattr(user, "is_commercial", False):
-            return qs
-        
-        # Client : ne voir que ses paiements
-        client_profile = getattr(user, "client_profile", None)
-        if client_profile:
-            return qs.filter(reservation__client=client_profile)
-        
-        return qs.none()
+        return super().get_queryset().for_user(self.request.user)
@@ -0,0 +1,30 @@
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import AllowAny
+from rest_framework.exceptions import ValidationError
+
+from catalog.services.map_cluster_service import MapClusterService
+from .serializers import MapClusterQuerySerializer
+
+
+class MapClustersView(APIView):
+    """
+    Clusters de la carte, calculés côté serveur.
+
+    GET /api/carte/clusters/?bbox=ouest,sud,est,nord&zoom=12&layer=unites|programmes
+    → [{"lat", "lng", "count", "statuts": {"disponible": n, ...}}]
+    """
+
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        params = MapClusterQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        south, west, north, east = params.validated_data["bbox"]
+        try:
+            clusters = MapClusterService.clusters(
+                params.validated_data["layer"], south, west, north, east, params.validated_data["zoom"]
+            )
+        except ValueError as exc:
+            raise ValidationError({"bbox": str(exc)})
+        return Response({"zoom": params.validated_data["zoom"], "clusters": clusters})
@@ -0,0 +1,49 @@
+from rest_framework.generics import get_object_or_404
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from catalog.models import Programme
+from catalog.services.progress_service import ProgressService
+from core.choices import ProgrammeStatus
+
+
+class ProgrammeProgressView(APIView):
+    """
+    Avancement global pondéré des programmes actifs.
+
+    GET /api/avancement/programmes/
+    → [{"programme", "nom", "avancement", "etapes", "etapes_terminees"}]
+    """
+
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        programmes = list(
+            Programme.objects.filter(statut=ProgrammeStatus.ACTIF).order_by("nom").values_list("pk", "nom")
+        )
+        progress = ProgressService.programme_progress([pk for pk, _ in programmes])
+        return Response([
+            {"programme": pk, "nom": nom, **progress[pk]}
+            for pk, nom in programmes
+        ])
+
+
+class UniteProgressView(APIView):
+    """
+    Avancement pondéré des unités d'un programme.
+
+    GET /api/avancement/programmes/{id}/unites/
+    → [{"unite", "reference_lot", "avancement"}]
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk):
+        programme = get_object_or_404(Programme, pk=pk)
+        unites = list(programme.unites.order_by("reference_lot").values_list("pk", "reference_lot"))
+        progress = ProgressService.unite_progress([unite_id for unite_id, _ in unites])
+        return Response([
+            {"unite": unite_id, "reference_lot": reference_lot, "avancement": progress[unite_id]}
+            for unite_id, reference_lot in unites
+        ])
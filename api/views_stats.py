@@ -1,11 +1,12 @@
 # ----- PATCH ÉTAPE 6 -----
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from django.db.models import Sum
 
 from sales.models import Reservation, Paiement
 from catalog.models import Unite
+from core.services.page_cache_service import PageCacheService
 
 
 class StatsOverview(APIView):
@@ -21,3 +22,11 @@ class StatsOverview(APIView):
             "unites_reservees": Unite.objects.filter(statut_disponibilite="reserve").count(),
             "unites_disponibles": Unite.objects.filter(statut_disponibilite="disponible").count(),
         })
+
+
+class CacheStats(APIView):
+    """Taux de succès du cache des pages publiques, par page (voir PageCacheService)."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(PageCacheService.stats())
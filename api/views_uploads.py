@@ -0,0 +1,112 @@
+from rest_framework import mixins, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.generics import get_object_or_404
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from accounts.permissions import IsAdminOrCommercial
+from catalog.models import PhotoUploadSession
+from catalog.services.chunked_upload_service import ChunkedUploadError, ChunkedUploadService
+from .serializers import PhotoChantierUniteSerializer, PhotoUploadSessionSerializer
+
+
+TUS_VERSION = "1.0.0"
+OFFSET_CONTENT_TYPE = "application/offset+octet-stream"
+
+
+class PhotoUploadSessionViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """
+    Upload reprenable des photos d'avancement (protocole inspiré de tus 1.0).
+
+    POST   /api/uploads-photos/                     ouvrir une session (taille, sha256, métadonnées)
+    HEAD   /api/uploads-photos/{id}/                 Upload-Offset : octets déjà reçus
+    PATCH  /api/uploads-photos/{id}/                 morceau brut (application/offset+octet-stream),
+                                                     en-têtes Upload-Offset et Upload-Checksum (optionnel)
+    POST   /api/uploads-photos/{id}/finalize/        créer la PhotoChantierUnite
+    POST   /api/uploads-photos/finalize/             lot {"sessions": [id, ...]}, une seule transaction
+    DELETE /api/uploads-photos/{id}/                 abandonner
+
+    Les sessions non finalisées expirent (CHUNKED_UPLOAD_EXPIRY_HOURS),
+    voir la commande purge_upload_sessions.
+    """
+
+    permission_classes = [IsAuthenticated, IsAdminOrCommercial]
+    serializer_class = PhotoUploadSessionSerializer
+
+    def get_queryset(self):
+        return PhotoUploadSession.objects.filter(cree_par=self.request.user)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, ChunkedUploadError):
+            response = Response({"detail": str(exc)}, status=exc.status_code)
+        else:
+            response = super().handle_exception(exc)
+        response["Tus-Resumable"] = TUS_VERSION
+        return response
+
+    def _with_upload_headers(self, response, session):
+        response["Tus-Resumable"] = TUS_VERSION
+        response["Upload-Offset"] = str(session.offset)
+        response["Upload-Length"] = str(session.taille_totale)
+        response["Upload-Expires"] = session.expire_le.strftime("%a, %d %b %Y %H:%M:%S GMT")
+        response["Cache-Control"] = "no-store"
+        return response
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = dict(serializer.validated_data)
+        session = ChunkedUploadService.create(request.user, data.pop("avancement"), **data)
+        response = Response(self.get_serializer(session).data, status=status.HTTP_201_CREATED)
+        response["Location"] = request.build_absolute_uri(f"{session.pk}/")
+        return self._with_upload_headers(response, session)
+
+    def retrieve(self, request, *args, **kwargs):
+        session = self.get_object()
+        return self._with_upload_headers(Response(self.get_serializer(session).data), session)
+
+    def partial_update(self, request, *args, **kwargs):
+        session = self.get_object()
+        if request.content_type.split(";")[0].strip() != OFFSET_CONTENT_TYPE:
+            return Response(
+                {"detail": f"Content-Type {OFFSET_CONTENT_TYPE} attendu."},
+                status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            )
+        try:
+            offset = int(request.headers["Upload-Offset"])
+            length = int(request.headers.get("Content-Length") or 0)
+        except (KeyError, ValueError):
+            raise ValidationError({"Upload-Offset": "En-tête entier requis."})
+
+        session = ChunkedUploadService.append(
+            session,
+            request.stream,
+            offset,
+            length,
+            checksum=ChunkedUploadService.parse_checksum(request.headers.get("Upload-Checksum")),
+        )
+        return self._with_upload_headers(Response(status=status.HTTP_204_NO_CONTENT), session)
+
+    def destroy(self, request, *args, **kwargs):
+        ChunkedUploadService.abort(self.get_object())
+        response = Response(status=status.HTTP_204_NO_CONTENT)
+        response["Tus-Resumable"] = TUS_VERSION
+        return response
+
+    @action(detail=True, methods=["post"])
+    def finalize(self, request, pk=None):
+        photos = ChunkedUploadService.finalize([self.get_object()])
+        serializer = PhotoChantierUniteSerializer(photos[0], context=self.get_serializer_context())
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=["post"], url_path="finalize")
+    def finalize_batch(self, request):
+        ids = request.data.get("sessions")
+        if not isinstance(ids, list) or not ids:
+            raise ValidationError({"sessions": "Liste d'identifiants de sessions attendue."})
+        queryset = self.get_queryset()
+        sessions = [get_object_or_404(queryset, pk=pk) for pk in ids]
+        photos = ChunkedUploadService.finalize(sessions)
+        serializer = PhotoChantierUniteSerializer(photos, many=True, context=self.get_serializer_context())
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -9,7 +9,10 @@ from .models import (
     PhotoChantier,
     AvancementChantierUnite,
     PhotoChantierUnite,
+    PhotoUploadSession,
     MessageChantier,
+    SuiviMessagesChantier,
+    ProgrammeInventory,
 )
 
 
@@ -60,12 +63,12 @@ class UniteAdmin(admin.ModelAdmin):
     list_filter = ("programme", "statut_disponibilite", "statut_chantier", "modele_bien__type_bien")
     search_fields = ("reference_lot",)
     autocomplete_fields = ("programme", "modele_bien")
-    readonly_fields = ("statut_chantier",)  # Auto-géré par signaux
+    readonly_fields = ("statut_chantier", "max_pourcentage", "dernier_avancement")  # Auto-gérés par signaux
 
 
 @admin.register(EtapeChantier)
 class EtapeChantierAdmin(admin.ModelAdmin):
-    list_display = ("programme", "code", "libelle", "ordre", "created_at")
+    list_display = ("programme", "code", "libelle", "ordre", "poids", "created_at")
     list_filter = ("programme",)
     search_fields = ("code", "libelle")
 
@@ -79,8 +82,8 @@ class AvancementChantierAdmin(admin.ModelAdmin):
 
 @admin.register(PhotoChantier)
 class PhotoChantierAdmin(admin.ModelAdmin):
-    list_display = ("avancement", "pris_le", "gps_lat", "gps_lng", "created_at")
-    list_filter = ("avancement__etape__programme", "pris_le")
+    list_display = ("avancement", "pris_le", "gps_lat", "gps_lng", "gps_hors_zone", "created_at")
+    list_filter = ("avancement__etape__programme", "gps_hors_zone", "pris_le")
 
 
 @admin.register(AvancementChantierUnite)
@@ -94,11 +97,19 @@ class AvancementChantierUniteAdmin(admin.ModelAdmin):
 
 @admin.register(PhotoChantierUnite)
 class PhotoChantierUniteAdmin(admin.ModelAdmin):
-    list_display = ("avancement", "pris_le", "gps_lat", "gps_lng", "created_at")
-    list_filter = ("avancement__unite__programme", "pris_le")
+    list_display = ("avancement", "pris_le", "gps_lat", "gps_lng", "gps_hors_zone", "created_at")
+    list_filter = ("avancement__unite__programme", "gps_hors_zone", "pris_le")
     search_fields = ("description", "avancement__unite__reference_lot")
     autocomplete_fields = ("avancement",)
-    readonly_fields = ("created_at", "updated_at")
+    readonly_fields = ("distance_programme_km", "gps_hors_zone", "created_at", "updated_at")
+
+
+@admin.register(PhotoUploadSession)
+class PhotoUploadSessionAdmin(admin.ModelAdmin):
+    list_display = ("nom_fichier", "avancement", "cree_par", "offset", "taille_totale", "expire_le")
+    list_filter = ("expire_le",)
+    search_fields = ("nom_fichier", "avancement__unite__reference_lot")
+    readonly_fields = ("offset", "expire_le", "created_at", "updated_at")
 
 
 @admin.register(MessageChantier)
@@ -112,3 +123,17 @@ class MessageChantierAdmin(admin.ModelAdmin):
     def message_preview(self, obj):
         return obj.message[:50] + "..." if len(obj.message) > 50 else obj.message
     message_preview.short_description = "Message"
+
+
+@admin.register(SuiviMessagesChantier)
+class SuiviMessagesChantierAdmin(admin.ModelAdmin):
+    list_display = ("user", "avancement", "vide_jusqu_au", "lu_jusqu_au", "updated_at")
+    search_fields = ("user__email", "avancement__unite__reference_lot")
+    autocomplete_fields = ("avancement", "user")
+    readonly_fields = ("created_at", "updated_at")
+
+
+@admin.register(ProgrammeInventory)
+class ProgrammeInventoryAdmin(admin.ModelAdmin):
+    list_display = ("programme", "nb_disponible", "nb_reserve", "nb_vendu", "nb_livre", "updated_at")
+    readonly_fields = ("programme", "nb_disponible", "nb_reserve", "nb_vendu", "nb_livre", "updated_at")
@@ -0,0 +1,68 @@
+"""
+Prérend le catalogue public (pages programmes et unités, flux JSON) dans un répertoire statique.
+
+Seuls les programmes modifiés depuis la construction précédente (programme, unités,
+modèles, réservations) sont reconstruits ; à planifier (cron) pendant les campagnes.
+Avec --nginx, écrit aussi la configuration servant ces fichiers aux visiteurs anonymes
+sans passer par Django.
+
+Usage :
+    python manage.py build_catalogue_snapshot
+    python manage.py build_catalogue_snapshot --output /srv/catalogue --force
+    python manage.py build_catalogue_snapshot --nginx --upstream 127.0.0.1:8000
+"""
+
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from catalog.services.catalogue_snapshot_service import CatalogueSnapshotError, CatalogueSnapshotService
+
+
+class Command(BaseCommand):
+    help = "Exporte les pages publiques du catalogue et un flux JSON en fichiers statiques."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output",
+            help="Répertoire de sortie (défaut : CATALOGUE_SNAPSHOT_ROOT).",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Tout reconstruire, même les programmes inchangés.",
+        )
+        parser.add_argument(
+            "--host",
+            help="En-tête Host des pages rendues (défaut : premier ALLOWED_HOSTS).",
+        )
+        parser.add_argument(
+            "--nginx",
+            action="store_true",
+            help="Écrire nginx.conf (à inclure dans le bloc server) dans le répertoire de sortie.",
+        )
+        parser.add_argument(
+            "--upstream",
+            default="127.0.0.1:8000",
+            help="Adresse de Django (gunicorn) pour les requêtes non servies par l'export.",
+        )
+
+    def handle(self, *args, **options):
+        root = Path(options["output"] or CatalogueSnapshotService.root())
+        try:
+            report = CatalogueSnapshotService.build(root, force=options["force"], host=options["host"])
+        except (CatalogueSnapshotError, OSError) as exc:
+            raise CommandError(str(exc))
+
+        for url in report["manquants"]:
+            self.stdout.write(self.style.WARNING(f"⚠️ Fichier introuvable, référence conservée : {url}"))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {report['programmes']} programme(s) et {report['unites']} unité(s) prérendus, "
+            f"{report['inchanges']} programme(s) inchangés, {report['supprimes']} supprimé(s) → {root}"
+        ))
+
+        if options["nginx"]:
+            config = root / "nginx.conf"
+            config.write_text(CatalogueSnapshotService.nginx_config(root, options["upstream"]), encoding="utf-8")
+            self.stdout.write(self.style.SUCCESS(f"✅ Configuration nginx : {config}"))
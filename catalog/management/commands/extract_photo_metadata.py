@@ -0,0 +1,97 @@
+"""
+Renseigne pris_le et le GPS des photos de chantier existantes à partir de leur EXIF,
+puis vérifie leur position par rapport au programme (gps_hors_zone).
+
+Les nouvelles photos sont traitées à l'enregistrement (voir catalog.signals) ;
+cette commande rattrape l'historique. La lecture des fichiers est répartie sur
+un pool de processus.
+
+Usage :
+    python manage.py extract_photo_metadata
+    python manage.py extract_photo_metadata --workers 4
+    python manage.py extract_photo_metadata --model catalog.PhotoChantierUnite --force
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import Q
+
+from catalog.services.photo_metadata_service import PROGRAMME_PATHS, PhotoMetadataService
+
+
+def _init_worker():
+    """Processus fils : Django prêt (démarrage spawn) et connexions propres."""
+    import django
+
+    if not apps.ready:
+        django.setup()
+    connections.close_all()
+
+
+def _process(label, pk):
+    return PhotoMetadataService.process(label, pk)
+
+
+class Command(BaseCommand):
+    help = "Extrait la date et le GPS (EXIF) des photos de chantier et vérifie leur position."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Nombre de processus (défaut : nombre de CPU ; 1 = sans pool).",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Retraiter toutes les photos (sinon : sans GPS ou jamais vérifiées).",
+        )
+        parser.add_argument(
+            "--model",
+            choices=sorted(PROGRAMME_PATHS),
+            action="append",
+            help="Limiter à un modèle (répétable).",
+        )
+
+    def handle(self, *args, **options):
+        workers = options["workers"]
+        if workers < 1:
+            raise CommandError("--workers doit être supérieur ou égal à 1.")
+
+        jobs = []
+        for label in options["model"] or PROGRAMME_PATHS:
+            queryset = apps.get_model(label).objects.exclude(image="")
+            if not options["force"]:
+                queryset = queryset.filter(Q(gps_lat__isnull=True) | Q(gps_hors_zone__isnull=True))
+            jobs.extend((label, pk) for pk in queryset.values_list("pk", flat=True).order_by().iterator())
+
+        if not jobs:
+            self.stdout.write(self.style.SUCCESS("✅ Aucune photo à traiter."))
+            return
+
+        self.stdout.write(f"{len(jobs)} photo(s) à traiter ({workers} processus)...")
+        if workers == 1:
+            results = [_process(label, pk) for label, pk in jobs]
+        else:
+            # Les connexions ne doivent pas être partagées avec les processus fils
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+                results = list(executor.map(
+                    _process,
+                    [label for label, _ in jobs],
+                    [pk for _, pk in jobs],
+                    chunksize=16,
+                ))
+
+        self.stdout.write(self.style.SUCCESS(f"✅ {results.count(True)} photo(s) mise(s) à jour."))
+        hors_zone = sum(
+            apps.get_model(label).objects.filter(gps_hors_zone=True).count()
+            for label in options["model"] or PROGRAMME_PATHS
+        )
+        if hors_zone:
+            self.stdout.write(self.style.WARNING(f"⚠️ {hors_zone} photo(s) prise(s) hors de la zone du programme."))
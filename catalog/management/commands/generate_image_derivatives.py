@@ -0,0 +1,96 @@
+"""
+Génère les dérivés WebP/JPEG (vignette, moyenne, grande) des images existantes.
+
+Les nouvelles images sont traitées automatiquement après enregistrement
+(voir catalog.signals) ; cette commande sert au rattrapage de l'historique
+et à la régénération après un changement de tailles ou de qualité.
+Le travail est réparti sur un pool de processus (Pillow est lié au CPU).
+
+Usage :
+    python manage.py generate_image_derivatives
+    python manage.py generate_image_derivatives --workers 4
+    python manage.py generate_image_derivatives --model catalog.PhotoChantierUnite --force
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from catalog.services.image_service import IMAGE_FIELDS, ImageDerivativeService
+
+
+def _init_worker():
+    """Processus fils : Django prêt (démarrage spawn) et connexions propres."""
+    import django
+
+    if not apps.ready:
+        django.setup()
+    connections.close_all()
+
+
+def _process(label, pk, force):
+    return ImageDerivativeService.process(label, pk, force=force)
+
+
+class Command(BaseCommand):
+    help = "Génère les dérivés WebP/JPEG des images du catalogue et des chantiers."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Nombre de processus (défaut : nombre de CPU ; 1 = sans pool).",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Régénérer même si les dérivés sont à jour.",
+        )
+        parser.add_argument(
+            "--model",
+            choices=sorted(IMAGE_FIELDS),
+            action="append",
+            help="Limiter à un modèle (répétable).",
+        )
+
+    def handle(self, *args, **options):
+        force = options["force"]
+        workers = options["workers"]
+        if workers < 1:
+            raise CommandError("--workers doit être supérieur ou égal à 1.")
+
+        jobs = []
+        for label in options["model"] or IMAGE_FIELDS:
+            field = IMAGE_FIELDS[label]
+            queryset = apps.get_model(label).objects.exclude(**{field: ""}).exclude(**{f"{field}__isnull": True})
+            for pk, name, derives in queryset.values_list("pk", field, "image_derives").order_by().iterator():
+                if force or (derives or {}).get("source") != name:
+                    jobs.append((label, pk))
+
+        if not jobs:
+            self.stdout.write(self.style.SUCCESS("✅ Dérivés à jour, rien à générer."))
+            return
+
+        self.stdout.write(f"{len(jobs)} image(s) à traiter ({workers} processus)...")
+        if workers == 1:
+            results = [_process(label, pk, force) for label, pk in jobs]
+        else:
+            # Les connexions ne doivent pas être partagées avec les processus fils
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+                results = list(executor.map(
+                    _process,
+                    [label for label, _ in jobs],
+                    [pk for _, pk in jobs],
+                    [force] * len(jobs),
+                    chunksize=16,
+                ))
+
+        failed = results.count(False)
+        self.stdout.write(self.style.SUCCESS(f"✅ {len(jobs) - failed} image(s) traitée(s)."))
+        if failed:
+            self.stdout.write(self.style.WARNING(f"⚠️ {failed} image(s) en échec ou introuvable(s), voir les logs."))
@@ -0,0 +1,68 @@
+"""
+Importe en masse les avancements de chantier d'un programme depuis un fichier CSV ou JSON.
+
+Colonnes : reference_lot, etape, date_pointage (AAAA-MM-JJ ou JJ/MM/AAAA), pourcentage,
+commentaire, photos (noms de fichiers séparés par | dans l'archive --photos).
+Toutes les lignes sont validées avant écriture : une seule erreur et rien n'est importé.
+
+Usage :
+    python manage.py import_avancements pointage.csv --programme <uuid>
+    python manage.py import_avancements pointage.csv --programme <uuid> --photos photos.zip
+    python manage.py import_avancements pointage.json --programme <uuid> --dry-run
+"""
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from catalog.models import Programme
+from catalog.services.avancement_import_service import AvancementImportError, AvancementImportService
+
+
+class Command(BaseCommand):
+    help = "Importe des avancements de chantier (CSV/JSON, photos en zip)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("fichier", help="Fichier CSV ou JSON des avancements.")
+        parser.add_argument("--programme", required=True, help="Id du programme des lots référencés.")
+        parser.add_argument("--photos", help="Archive zip des photos listées dans le fichier.")
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Valider le fichier sans rien importer.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            programme = Programme.objects.get(pk=options["programme"])
+        except (Programme.DoesNotExist, ValidationError):
+            raise CommandError("Programme introuvable.")
+
+        try:
+            with open(options["fichier"], "rb") as handle:
+                rows = AvancementImportService.read_rows(handle, options["fichier"])
+            archive = None
+            if options["photos"]:
+                archive = AvancementImportService.open_archive(options["photos"])
+        except (AvancementImportError, OSError) as exc:
+            raise CommandError(str(exc))
+
+        report = AvancementImportService.import_rows(programme, rows, archive=archive, dry_run=options["dry_run"])
+
+        for erreur in report["erreurs"]:
+            details = "; ".join(
+                ", ".join(message) if isinstance(message, list) else message
+                for message in erreur["erreurs"].values()
+            )
+            self.stdout.write(f"  - ligne {erreur['ligne']} ({erreur['reference_lot'] or '?'}) : {details}")
+
+        if report["erreurs"]:
+            self.stdout.write(
+                self.style.WARNING(f"⚠️ {len(report['erreurs'])} ligne(s) en erreur sur {report['lignes']}, rien importé.")
+            )
+        elif options["dry_run"]:
+            self.stdout.write(self.style.SUCCESS(f"✅ {report['lignes']} ligne(s) valides (dry-run)."))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f"✅ {report['avancements']} avancement(s) et {report['photos']} photo(s) importés, "
+                f"{report['unites']} unité(s) mises à jour."
+            ))
@@ -0,0 +1,21 @@
+"""
+Supprime les sessions d'upload reprenable expirées et leurs fichiers partiels.
+
+À planifier (cron), par exemple toutes les heures :
+    python manage.py purge_upload_sessions
+"""
+
+from django.core.management.base import BaseCommand
+
+from catalog.services.chunked_upload_service import ChunkedUploadService
+
+
+class Command(BaseCommand):
+    help = "Supprime les sessions d'upload de photos expirées (et les morceaux reçus sur disque)."
+
+    def handle(self, *args, **options):
+        count = ChunkedUploadService.purge_expired()
+        if count:
+            self.stdout.write(self.style.SUCCESS(f"✅ {count} session(s) expirée(s) supprimée(s)."))
+        else:
+            self.stdout.write(self.style.SUCCESS("✅ Aucune session expirée."))
@@ -0,0 +1,24 @@
+"""
+Reconstruit les colonnes de recherche plein texte (search_vector) du catalogue.
+
+Usage :
+    python manage.py rebuild_search_index
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from catalog.services.search_service import SearchService
+
+
+class Command(BaseCommand):
+    help = "Recalcule l'index de recherche plein texte des programmes et des unités."
+
+    def handle(self, *args, **options):
+        if not SearchService.is_available():
+            raise CommandError("La recherche plein texte nécessite PostgreSQL.")
+
+        nb_programmes = SearchService.refresh_programmes()
+        nb_unites = SearchService.refresh_unites()
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Index reconstruit : {nb_programmes} programme(s), {nb_unites} unité(s)."
+        ))
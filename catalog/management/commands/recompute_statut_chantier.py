@@ -0,0 +1,45 @@
+"""
+Recalcule en masse le statut de chantier des unités à partir de leurs avancements
+(max_pourcentage, dernier_avancement, statut_chantier), une requête UPDATE par programme.
+
+À utiliser après un import ou une correction en masse des avancements
+(update(), bulk_create, SQL direct) qui ne déclenchent pas les signaux.
+
+Usage :
+    python manage.py recompute_statut_chantier
+    python manage.py recompute_statut_chantier --programme <uuid> --programme <uuid>
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from catalog.models import Programme
+from catalog.services.chantier_status_service import ChantierStatusService
+
+
+class Command(BaseCommand):
+    help = "Recalcule le statut de chantier des unités, par programme."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--programme",
+            action="append",
+            dest="programmes",
+            help="Id d'un programme à recalculer (répétable, défaut : tous).",
+        )
+
+    def handle(self, *args, **options):
+        programmes = Programme.objects.order_by("nom")
+        if options["programmes"]:
+            programmes = programmes.filter(pk__in=options["programmes"])
+            if len(programmes) != len(set(options["programmes"])):
+                raise CommandError("Programme introuvable parmi les ids fournis.")
+
+        total = 0
+        for programme in programmes:
+            with transaction.atomic():
+                count = ChantierStatusService.recompute(programme_ids=[programme.pk])
+            total += count
+            self.stdout.write(f"  - {programme.nom} : {count} unité(s)")
+
+        self.stdout.write(self.style.SUCCESS(f"✅ {total} unité(s) recalculée(s) sur {len(programmes)} programme(s)."))
@@ -0,0 +1,40 @@
+"""
+Recalcule les compteurs ProgrammeInventory et corrige les écarts.
+
+Usage :
+    python manage.py reconcile_inventory
+    python manage.py reconcile_inventory --dry-run
+"""
+
+from django.core.management.base import BaseCommand
+
+from catalog.models import Programme
+from catalog.services.inventory_service import InventoryService
+
+
+class Command(BaseCommand):
+    help = "Répare les compteurs de stock par programme (ProgrammeInventory)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Lister les programmes en écart sans rien corriger.",
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options["dry_run"]
+        drifted = InventoryService.reconcile(dry_run=dry_run)
+
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS("✅ Inventaire cohérent, aucun écart."))
+            return
+
+        noms = dict(Programme.objects.filter(pk__in=drifted).values_list("pk", "nom"))
+        for programme_id in drifted:
+            self.stdout.write(f"  - {noms.get(programme_id, programme_id)}")
+
+        if dry_run:
+            self.stdout.write(self.style.WARNING(f"⚠️ {len(drifted)} programme(s) en écart (dry-run)."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"✅ {len(drifted)} programme(s) corrigé(s)."))
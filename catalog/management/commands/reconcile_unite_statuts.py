@@ -0,0 +1,88 @@
+"""
+Aligne Unite.statut_disponibilite sur le statut réel (réservations).
+
+Le statut réel est calculé en SQL par Unite.objects.with_statut_reel() ;
+les unités en écart sont mises à jour en masse, une requête UPDATE par
+statut cible et par lot. Les unités livrées ne sont jamais réécrites :
+une réservation confirmée en ferait des unités vendues.
+
+Usage :
+    python manage.py reconcile_unite_statuts
+    python manage.py reconcile_unite_statuts --dry-run
+    python manage.py reconcile_unite_statuts --batch-size 1000
+"""
+
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from catalog.models import Unite
+from catalog.services.map_cluster_service import MapClusterService
+from core.choices import UniteStatus
+from core.services.conditional_get_service import ConditionalGetService
+from core.services.page_cache_service import PageCacheService
+
+
+class Command(BaseCommand):
+    help = "Réécrit en masse statut_disponibilite des unités à partir de leurs réservations."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Lister les unités en écart sans rien corriger.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Nombre d'unités par requête UPDATE (défaut : 500).",
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options["dry_run"]
+        batch_size = options["batch_size"]
+
+        drifted = (
+            Unite.objects.with_statut_reel()
+            # Livrée : état final, que le statut réel (règle d'affichage) ne connaît pas
+            .exclude(statut_disponibilite=UniteStatus.LIVRE)
+            .exclude(statut_disponibilite=F("statut_reel"))
+            .values_list("pk", "reference_lot", "statut_disponibilite", "statut_reel")
+            .order_by()
+        )
+
+        ids_par_statut = defaultdict(list)
+        for pk, reference_lot, stocke, reel in drifted:
+            ids_par_statut[reel].append(pk)
+            self.stdout.write(f"  - {reference_lot} : {stocke} → {reel}")
+
+        total = sum(len(ids) for ids in ids_par_statut.values())
+        if not total:
+            self.stdout.write(self.style.SUCCESS("✅ Statuts cohérents, aucun écart."))
+            return
+
+        if dry_run:
+            self.stdout.write(self.style.WARNING(f"⚠️ {total} unité(s) en écart (dry-run)."))
+            return
+
+        # update() ne déclenche pas les signaux : les compteurs ProgrammeInventory
+        # reposent déjà sur le statut réel, qui ne change pas ici, mais les caches
+        # du catalogue (clusters de la carte, pages publiques, ETag de l'API) sont
+        # invalidés explicitement.
+        now = timezone.now()
+        with transaction.atomic():
+            for statut, ids in ids_par_statut.items():
+                for start in range(0, len(ids), batch_size):
+                    Unite.objects.filter(pk__in=ids[start:start + batch_size]).update(
+                        statut_disponibilite=statut,
+                        updated_at=now,
+                    )
+            ConditionalGetService.touch(Unite._meta.label)
+        MapClusterService.invalidate()
+        PageCacheService.bump()
+
+        self.stdout.write(self.style.SUCCESS(f"✅ {total} unité(s) corrigée(s)."))
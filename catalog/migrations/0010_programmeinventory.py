@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def populate_inventory(apps, schema_editor):
+    """Initialiser les compteurs (même règle que Unite.get_statut_reel)."""
+    Programme = apps.get_model('catalog', 'Programme')
+    Unite = apps.get_model('catalog', 'Unite')
+    Reservation = apps.get_model('sales', 'Reservation')
+    ProgrammeInventory = apps.get_model('catalog', 'ProgrammeInventory')
+
+    vendues = set(Reservation.objects.filter(statut='confirmee').values_list('unite_id', flat=True))
+    reservees = set(Reservation.objects.filter(statut='en_cours').values_list('unite_id', flat=True))
+    fields = {'disponible': 'nb_disponible', 'reserve': 'nb_reserve', 'vendu': 'nb_vendu', 'livre': 'nb_livre'}
+
+    counters = {pk: dict.fromkeys(fields.values(), 0) for pk in Programme.objects.values_list('pk', flat=True)}
+    for unite_id, programme_id, statut in Unite.objects.values_list('pk', 'programme_id', 'statut_disponibilite'):
+        if unite_id in vendues:
+            statut = 'vendu'
+        elif unite_id in reservees:
+            statut = 'reserve'
+        if statut in fields:
+            counters[programme_id][fields[statut]] += 1
+
+    ProgrammeInventory.objects.bulk_create(
+        ProgrammeInventory(programme_id=programme_id, **values)
+        for programme_id, values in counters.items()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0009_messagechantier_supprime_par'),
+        ('sales', '0007_add_reservation_cancellation_fields'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProgrammeInventory',
+            fields=[
+                ('programme', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='inventaire', serialize=False, to='catalog.programme')),
+                ('nb_disponible', models.PositiveIntegerField(default=0)),
+                ('nb_reserve', models.PositiveIntegerField(default=0)),
+                ('nb_vendu', models.PositiveIntegerField(default=0)),
+                ('nb_livre', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Inventaire programme',
+                'verbose_name_plural': 'Inventaires programmes',
+            },
+        ),
+        migrations.RunPython(populate_inventory, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,82 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:13
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.search import SearchVector, SearchVectorField
+from django.db import migrations
+from django.db.models import Func, OuterRef, Subquery
+
+
+def populate_search_vectors(apps, schema_editor):
+    """Initialiser les colonnes tsvector (PostgreSQL uniquement, mêmes poids que SearchService)."""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    Programme = apps.get_model('catalog', 'Programme')
+    ModeleBien = apps.get_model('catalog', 'ModeleBien')
+    Unite = apps.get_model('catalog', 'Unite')
+
+    Programme.objects.update(search_vector=(
+        SearchVector('nom', weight='A', config='french')
+        + SearchVector('adresse', weight='B', config='french')
+        + SearchVector('description', weight='C', config='french')
+    ))
+
+    programme = Programme.objects.filter(pk=OuterRef('programme_id')).order_by()
+    modele = ModeleBien.objects.filter(pk=OuterRef('modele_bien_id')).order_by()
+    Unite.objects.update(search_vector=Func(
+        SearchVector('reference_lot', weight='A', config='french'),
+        SearchVector(
+            Subquery(modele.values('nom_marketing')[:1]),
+            Subquery(programme.values('nom')[:1]),
+            weight='B',
+            config='french',
+        ),
+        SearchVector(
+            Subquery(programme.values('adresse')[:1]),
+            Subquery(modele.values('type_bien__libelle')[:1]),
+            weight='C',
+            config='french',
+        ),
+        Func(
+            'caracteristiques',
+            template=(
+                "setweight(jsonb_to_tsvector('french'::regconfig, "
+                "COALESCE(%(expressions)s, '{}'::jsonb), '[\"string\"]'), 'C')"
+            ),
+            output_field=SearchVectorField(),
+        ),
+        SearchVector(Subquery(modele.values('description')[:1]), weight='D', config='french'),
+        arg_joiner=' || ',
+        template='(%(expressions)s)',
+        output_field=SearchVectorField(),
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0010_programmeinventory'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='programme',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='unite',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='programme',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='programme_search_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='unite',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='unite_search_gin'),
+        ),
+        migrations.RunPython(populate_search_vectors, migrations.RunPython.noop),
+    ]
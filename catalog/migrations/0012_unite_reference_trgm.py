@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:16
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0011_search_vector'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='unite',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['reference_lot'], name='unite_reference_trgm_gin', opclasses=['gin_trgm_ops']),
+        ),
+    ]
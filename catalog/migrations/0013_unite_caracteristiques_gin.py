@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:18
+
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0012_unite_reference_trgm'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='unite',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['caracteristiques'], name='unite_carac_gin', opclasses=['jsonb_path_ops']),
+        ),
+    ]
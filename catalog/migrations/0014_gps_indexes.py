@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:19
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0013_unite_caracteristiques_gin'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='programme',
+            index=models.Index(fields=['gps_lat', 'gps_lng'], name='programme_gps_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='unite',
+            index=models.Index(fields=['gps_lat', 'gps_lng'], name='unite_gps_idx'),
+        ),
+    ]
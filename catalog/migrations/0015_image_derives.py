@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0014_gps_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='photochantier',
+            name='image_derives',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='photochantierunite',
+            name='image_derives',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='programme',
+            name='image_derives',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='unite',
+            name='image_derives',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:30
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0015_image_derives'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PhotoUploadSession',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('nom_fichier', models.CharField(max_length=255)),
+                ('taille_totale', models.PositiveBigIntegerField(help_text='Taille annoncée du fichier (octets)')),
+                ('offset', models.PositiveBigIntegerField(default=0, help_text='Octets reçus')),
+                ('sha256', models.CharField(blank=True, help_text='Empreinte attendue du fichier complet (hex)', max_length=64)),
+                ('gps_lat', models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True)),
+                ('gps_lng', models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True)),
+                ('pris_le', models.DateTimeField()),
+                ('description', models.TextField(blank=True)),
+                ('expire_le', models.DateTimeField(db_index=True)),
+                ('avancement', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='upload_sessions', to='catalog.avancementchantierunite')),
+                ('cree_par', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='photo_upload_sessions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': "Session d'upload photo",
+                'verbose_name_plural': "Sessions d'upload photo",
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0016_photo_upload_session'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='photochantier',
+            name='distance_programme_km',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='photochantier',
+            name='gps_hors_zone',
+            field=models.BooleanField(blank=True, editable=False, help_text='GPS à plus de PHOTO_GEO_RADIUS_KM du programme (vide : non vérifiable)', null=True),
+        ),
+        migrations.AddField(
+            model_name='photochantierunite',
+            name='distance_programme_km',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='photochantierunite',
+            name='gps_hors_zone',
+            field=models.BooleanField(blank=True, editable=False, help_text='GPS à plus de PHOTO_GEO_RADIUS_KM du programme (vide : non vérifiable)', null=True),
+        ),
+    ]
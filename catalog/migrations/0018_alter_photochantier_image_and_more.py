@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:36
+
+import core.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0017_photo_exif_geo_check'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='photochantier',
+            name='image',
+            field=models.ImageField(storage=core.storage.dedup_storage, upload_to='chantiers/'),
+        ),
+        migrations.AlterField(
+            model_name='photochantierunite',
+            name='image',
+            field=models.ImageField(storage=core.storage.dedup_storage, upload_to='chantiers/unites/'),
+        ),
+    ]
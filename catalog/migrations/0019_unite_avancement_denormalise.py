@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Case, OuterRef, Subquery, Value, When
+from django.db.models.lookups import GreaterThanOrEqual, IsNull
+
+
+def populate_avancement_denormalise(apps, schema_editor):
+    """Initialiser max_pourcentage / dernier_avancement / statut_chantier (même règle que ChantierStatusService)."""
+    Unite = apps.get_model('catalog', 'Unite')
+    AvancementChantierUnite = apps.get_model('catalog', 'AvancementChantierUnite')
+
+    avancements = AvancementChantierUnite.objects.filter(unite=OuterRef('pk'))
+    max_pourcentage = Subquery(avancements.order_by('-pourcentage').values('pourcentage')[:1])
+    Unite.objects.update(
+        max_pourcentage=max_pourcentage,
+        dernier_avancement=Subquery(avancements.order_by('-date_pointage', '-created_at').values('pk')[:1]),
+        statut_chantier=Case(
+            When(IsNull(max_pourcentage, True), then=Value('non_commence')),
+            When(GreaterThanOrEqual(max_pourcentage, 100), then=Value('termine')),
+            default=Value('en_cours'),
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0018_alter_photochantier_image_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='unite',
+            name='dernier_avancement',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='catalog.avancementchantierunite'),
+        ),
+        migrations.AddField(
+            model_name='unite',
+            name='max_pourcentage',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(populate_avancement_denormalise, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0019_unite_avancement_denormalise'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='etapechantier',
+            name='poids',
+            field=models.PositiveIntegerField(default=1, help_text="Poids de l'étape dans l'avancement global du programme"),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:53
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0020_etapechantier_poids'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SuiviMessagesChantier',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('vide_jusqu_au', models.DateTimeField(blank=True, help_text='Messages antérieurs ou égaux masqués (chat vidé)', null=True)),
+                ('lu_jusqu_au', models.DateTimeField(blank=True, help_text='Messages antérieurs ou égaux considérés comme lus', null=True)),
+            ],
+            options={
+                'verbose_name': 'Suivi des messages chantier',
+                'verbose_name_plural': 'Suivis des messages chantier',
+            },
+        ),
+        migrations.AlterField(
+            model_name='messagechantier',
+            name='supprime_par',
+            field=models.ManyToManyField(blank=True, help_text='Messages supprimés isolément (un chat vidé passe par SuiviMessagesChantier)', related_name='messages_chantier_supprimes', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='messagechantier',
+            index=models.Index(fields=['avancement', 'created_at'], name='message_chantier_date_idx'),
+        ),
+        migrations.AddField(
+            model_name='suivimessageschantier',
+            name='avancement',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='suivis_messages', to='catalog.avancementchantierunite'),
+        ),
+        migrations.AddField(
+            model_name='suivimessageschantier',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='suivis_messages_chantier', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterUniqueTogether(
+            name='suivimessageschantier',
+            unique_together={('user', 'avancement')},
+        ),
+    ]
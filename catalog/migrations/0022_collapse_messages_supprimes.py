@@ -0,0 +1,68 @@
+from django.db import migrations
+
+
+def collapse_supprime_par(apps, schema_editor):
+    """
+    Remplacer les suppressions (supprime_par) couvrant le début d'une conversation
+    par un repère vide_jusqu_au ; seules les suppressions isolées restent dans la M2M.
+    """
+    MessageChantier = apps.get_model('catalog', 'MessageChantier')
+    SuiviMessagesChantier = apps.get_model('catalog', 'SuiviMessagesChantier')
+    Through = MessageChantier.supprime_par.through
+
+    supprimes = {}
+    for user_id, avancement_id, message_id in Through.objects.values_list(
+        'user_id', 'messagechantier__avancement_id', 'messagechantier_id'
+    ).iterator():
+        supprimes.setdefault(avancement_id, {}).setdefault(user_id, set()).add(message_id)
+
+    suivis, absorbes = [], {}
+    for avancement_id, par_user in supprimes.items():
+        messages = list(
+            MessageChantier.objects.filter(avancement_id=avancement_id)
+            .order_by('created_at').values_list('pk', 'created_at')
+        )
+        for user_id, message_ids in par_user.items():
+            repere = None
+            for message_id, created_at in messages:
+                if message_id not in message_ids:
+                    break
+                repere = created_at
+                absorbes.setdefault(user_id, []).append(message_id)
+            if repere is not None:
+                suivis.append(SuiviMessagesChantier(
+                    user_id=user_id, avancement_id=avancement_id, vide_jusqu_au=repere, lu_jusqu_au=repere,
+                ))
+
+    SuiviMessagesChantier.objects.bulk_create(suivis, batch_size=1000)
+    for user_id, message_ids in absorbes.items():
+        for start in range(0, len(message_ids), 1000):
+            Through.objects.filter(user_id=user_id, messagechantier_id__in=message_ids[start:start + 1000]).delete()
+
+
+def expand_supprime_par(apps, schema_editor):
+    """Retour arrière : un repère vide_jusqu_au redevient une ligne supprime_par par message."""
+    MessageChantier = apps.get_model('catalog', 'MessageChantier')
+    SuiviMessagesChantier = apps.get_model('catalog', 'SuiviMessagesChantier')
+    Through = MessageChantier.supprime_par.through
+
+    lignes = []
+    for suivi in SuiviMessagesChantier.objects.filter(vide_jusqu_au__isnull=False).iterator():
+        lignes += [
+            Through(user_id=suivi.user_id, messagechantier_id=message_id)
+            for message_id in MessageChantier.objects.filter(
+                avancement_id=suivi.avancement_id, created_at__lte=suivi.vide_jusqu_au
+            ).values_list('pk', flat=True)
+        ]
+    Through.objects.bulk_create(lignes, batch_size=1000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0021_suivi_messages_chantier'),
+    ]
+
+    operations = [
+        migrations.RunPython(collapse_supprime_par, expand_supprime_par),
+    ]
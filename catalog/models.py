@@ -1,8 +1,17 @@
 import uuid
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models.functions import Coalesce
 from django.conf import settings
 from core.models import TimeStampedModel
-from core.choices import ProgrammeStatus, UniteStatus, StatutChantier
+from core.querysets import GeoQuerySet
+from core.storage import dedup_storage
+from core.choices import ProgrammeStatus, UniteStatus, StatutChantier, ReservationStatus
+
+
+# Dernier avancement d'une unité : pointage le plus récent, puis saisie la plus récente
+AVANCEMENT_LATEST_ORDERING = ("-date_pointage", "-created_at")
 
 
 class Programme(TimeStampedModel):
@@ -10,9 +19,13 @@ class Programme(TimeStampedModel):
     Programme immobilier (ex : Résidences Mame Diarra – Bayakh).
     """
 
+    objects = GeoQuerySet.as_manager()
+
     nom = models.CharField(max_length=255)
     description = models.TextField(blank=True)
     image_principale = models.ImageField(upload_to="programmes/", null=True, blank=True)
+    # Dérivés WebP/JPEG (voir catalog.services.image_service)
+    image_derives = models.JSONField(default=dict, blank=True, editable=False)
 
     # Localisation
     adresse = models.CharField(max_length=255, blank=True)
@@ -40,10 +53,17 @@ class Programme(TimeStampedModel):
 
     date_livraison_prevue = models.DateField(null=True, blank=True)
 
+    # Recherche plein texte (maintenu par catalog.signals / SearchService)
+    search_vector = SearchVectorField(null=True, editable=False)
+
     class Meta:
         verbose_name = "Programme"
         verbose_name_plural = "Programmes"
         ordering = ("nom",)
+        indexes = [
+            GinIndex(fields=["search_vector"], name="programme_search_gin"),
+            models.Index(fields=["gps_lat", "gps_lng"], name="programme_gps_idx"),
+        ]
 
     def __str__(self) -> str:
         return self.nom
@@ -91,11 +111,72 @@ class ModeleBien(TimeStampedModel):
         return f"{self.nom_marketing} ({self.type_bien.code})"
 
 
+class UniteQuerySet(GeoQuerySet):
+
+    def with_statut_reel(self):
+        """
+        Annoter chaque unité avec `statut_reel`, calculé en SQL
+        (même règle que Unite.get_statut_reel, sans requête par unité).
+        """
+        from sales.models import Reservation
+
+        reservations = Reservation.objects.filter(unite=models.OuterRef("pk"))
+        return self.annotate(
+            statut_reel=models.Case(
+                models.When(
+                    models.Exists(reservations.filter(statut=ReservationStatus.CONFIRMEE)),
+                    then=models.Value(UniteStatus.VENDU),
+                ),
+                models.When(
+                    models.Exists(reservations.filter(statut=ReservationStatus.EN_COURS)),
+                    then=models.Value(UniteStatus.RESERVE),
+                ),
+                default="statut_disponibilite",
+                output_field=models.CharField(),
+            )
+        )
+
+    def with_latest_avancement(self):
+        """
+        Annoter chaque unité avec son dernier avancement, en SQL (listes sans
+        requête par unité) : dernier_avancement_ref (id), derniere_etape,
+        dernier_pourcentage, dernier_pointage et dernier_nb_photos.
+
+        Lit Unite.dernier_avancement (maintenu à l'écriture) ; tant qu'il n'est
+        pas renseigné, prend l'avancement le plus récent par date_pointage.
+        """
+        latest = AvancementChantierUnite.objects.filter(unite=models.OuterRef("pk")).order_by(
+            *AVANCEMENT_LATEST_ORDERING
+        )
+        avancement = AvancementChantierUnite.objects.filter(pk=models.OuterRef("dernier_avancement_ref")).order_by()
+        photos = (
+            PhotoChantierUnite.objects.filter(avancement=models.OuterRef("dernier_avancement_ref"))
+            .order_by()
+            .values("avancement")
+            .annotate(n=models.Count("pk"))
+            .values("n")
+        )
+        return self.annotate(
+            dernier_avancement_ref=Coalesce(
+                "dernier_avancement_id",
+                models.Subquery(latest.values("pk")[:1]),
+                output_field=models.UUIDField(),
+            ),
+        ).annotate(
+            derniere_etape=models.Subquery(avancement.values("etape")[:1]),
+            dernier_pourcentage=models.Subquery(avancement.values("pourcentage")[:1]),
+            dernier_pointage=models.Subquery(avancement.values("date_pointage")[:1]),
+            dernier_nb_photos=Coalesce(models.Subquery(photos), 0),
+        )
+
+
 class Unite(TimeStampedModel):
     """
     Bien/unité physique : lot, appartement, villa, etc.
     """
 
+    objects = UniteQuerySet.as_manager()
+
     programme = models.ForeignKey(
         Programme,
         on_delete=models.PROTECT,
@@ -124,6 +205,16 @@ class Unite(TimeStampedModel):
         default=StatutChantier.NON_COMMENCE,
         help_text="Suivi de la progression de construction de l'unité"
     )
+    # Dénormalisés depuis les avancements (voir catalog.services.chantier_status_service)
+    max_pourcentage = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    dernier_avancement = models.ForeignKey(
+        "AvancementChantierUnite",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name="+",
+    )
 
     # Caractéristiques techniques / commerciales dynamiques
     gps_lat = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
@@ -131,12 +222,23 @@ class Unite(TimeStampedModel):
     caracteristiques = models.JSONField(default=dict, blank=True)
 
     image = models.ImageField(upload_to="unites/", null=True, blank=True)
+    # Dérivés WebP/JPEG (voir catalog.services.image_service)
+    image_derives = models.JSONField(default=dict, blank=True, editable=False)
+
+    # Recherche plein texte (maintenu par catalog.signals / SearchService)
+    search_vector = SearchVectorField(null=True, editable=False)
 
     class Meta:
         verbose_name = "Unité"
         verbose_name_plural = "Unités"
         unique_together = ("programme", "reference_lot")
         ordering = ("programme", "reference_lot")
+        indexes = [
+            GinIndex(fields=["search_vector"], name="unite_search_gin"),
+            GinIndex(fields=["reference_lot"], name="unite_reference_trgm_gin", opclasses=["gin_trgm_ops"]),
+            GinIndex(fields=["caracteristiques"], name="unite_carac_gin", opclasses=["jsonb_path_ops"]),
+            models.Index(fields=["gps_lat", "gps_lng"], name="unite_gps_idx"),
+        ]
 
     def __str__(self) -> str:
         return f"{self.programme.nom} - {self.reference_lot}"
@@ -147,9 +249,13 @@ class Unite(TimeStampedModel):
         - Si réservation CONFIRMÉE : "vendu" (même si statut_disponibilite dit autre chose)
         - Si réservation en_cours/reserve : "reserve"
         - Sinon : retourner statut_disponibilite
+
+        Si l'unité provient de Unite.objects.with_statut_reel(), la valeur
+        annotée est utilisée directement (aucune requête).
         """
-        from sales.models import Reservation
-        
+        if "statut_reel" in self.__dict__:
+            return self.statut_reel
+
         # Vérifier si cette unité a une réservation confirmée
         if self.reservations.filter(statut='confirmee').exists():
             return 'vendu'
@@ -162,6 +268,37 @@ class Unite(TimeStampedModel):
         return self.statut_disponibilite
 
 
+class ProgrammeInventory(models.Model):
+    """
+    Compteurs de stock par programme, selon le statut réel des unités
+    (voir Unite.get_statut_reel). Maintenus par catalog.signals et réparables
+    avec la commande reconcile_inventory.
+    """
+
+    programme = models.OneToOneField(
+        Programme,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="inventaire",
+    )
+    nb_disponible = models.PositiveIntegerField(default=0)
+    nb_reserve = models.PositiveIntegerField(default=0)
+    nb_vendu = models.PositiveIntegerField(default=0)
+    nb_livre = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Inventaire programme"
+        verbose_name_plural = "Inventaires programmes"
+
+    def __str__(self):
+        return f"{self.programme_id} - {self.total} unités"
+
+    @property
+    def total(self) -> int:
+        return self.nb_disponible + self.nb_reserve + self.nb_vendu + self.nb_livre
+
+
 class EtapeChantier(TimeStampedModel):
     """
     Étapes du chantier pour un programme donné.
@@ -175,6 +312,11 @@ class EtapeChantier(TimeStampedModel):
     code = models.CharField(max_length=50)
     libelle = models.CharField(max_length=255)
     ordre = models.PositiveIntegerField()
+    # Part de l'étape dans l'avancement global (voir catalog.services.progress_service)
+    poids = models.PositiveIntegerField(
+        default=1,
+        help_text="Poids de l'étape dans l'avancement global du programme",
+    )
 
     class Meta:
         verbose_name = "Étape de chantier"
@@ -219,10 +361,20 @@ class PhotoChantier(TimeStampedModel):
         on_delete=models.CASCADE,
         related_name="photos",
     )
-    image = models.ImageField(upload_to="chantiers/")
+    image = models.ImageField(upload_to="chantiers/", storage=dedup_storage)
+    # Dérivés WebP/JPEG (voir catalog.services.image_service)
+    image_derives = models.JSONField(default=dict, blank=True, editable=False)
     gps_lat = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
     gps_lng = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
     pris_le = models.DateTimeField()
+    # Vérification géographique (voir catalog.services.photo_metadata_service)
+    distance_programme_km = models.FloatField(null=True, blank=True, editable=False)
+    gps_hors_zone = models.BooleanField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="GPS à plus de PHOTO_GEO_RADIUS_KM du programme (vide : non vérifiable)",
+    )
 
     class Meta:
         verbose_name = "Photo de chantier"
@@ -284,11 +436,21 @@ class PhotoChantierUnite(TimeStampedModel):
         on_delete=models.CASCADE,
         related_name="photos",
     )
-    image = models.ImageField(upload_to="chantiers/unites/")
+    image = models.ImageField(upload_to="chantiers/unites/", storage=dedup_storage)
+    # Dérivés WebP/JPEG (voir catalog.services.image_service)
+    image_derives = models.JSONField(default=dict, blank=True, editable=False)
     gps_lat = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
     gps_lng = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
     pris_le = models.DateTimeField()
     description = models.TextField(blank=True, help_text="Description de la photo")
+    # Vérification géographique (voir catalog.services.photo_metadata_service)
+    distance_programme_km = models.FloatField(null=True, blank=True, editable=False)
+    gps_hors_zone = models.BooleanField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="GPS à plus de PHOTO_GEO_RADIUS_KM du programme (vide : non vérifiable)",
+    )
 
     class Meta:
         verbose_name = "Photo chantier unité"
@@ -299,6 +461,46 @@ class PhotoChantierUnite(TimeStampedModel):
         return f"Photo {self.id} - {self.avancement}"
 
 
+class PhotoUploadSession(TimeStampedModel):
+    """
+    Upload reprenable d'une photo d'avancement (envoi par morceaux, style tus).
+    Les octets reçus sont stockés sur disque local (voir catalog.services.chunked_upload_service)
+    jusqu'à la finalisation en PhotoChantierUnite.
+    """
+
+    avancement = models.ForeignKey(
+        AvancementChantierUnite,
+        on_delete=models.CASCADE,
+        related_name="upload_sessions",
+    )
+    cree_par = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="photo_upload_sessions",
+    )
+    nom_fichier = models.CharField(max_length=255)
+    taille_totale = models.PositiveBigIntegerField(help_text="Taille annoncée du fichier (octets)")
+    offset = models.PositiveBigIntegerField(default=0, help_text="Octets reçus")
+    sha256 = models.CharField(max_length=64, blank=True, help_text="Empreinte attendue du fichier complet (hex)")
+    # Métadonnées de la future PhotoChantierUnite
+    gps_lat = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    gps_lng = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    pris_le = models.DateTimeField()
+    description = models.TextField(blank=True)
+    expire_le = models.DateTimeField(db_index=True)
+
+    class Meta:
+        verbose_name = "Session d'upload photo"
+        verbose_name_plural = "Sessions d'upload photo"
+
+    def __str__(self):
+        return f"{self.nom_fichier} ({self.offset}/{self.taille_totale})"
+
+    @property
+    def est_complete(self):
+        return self.offset == self.taille_totale
+
+
 class MessageChantier(TimeStampedModel):
     """
     Messages entre client et commercial concernant un avancement de chantier.
@@ -340,13 +542,53 @@ class MessageChantier(TimeStampedModel):
         settings.AUTH_USER_MODEL,
         blank=True,
         related_name="messages_chantier_supprimes",
-        help_text="Utilisateurs qui ont supprimé ce message (soft delete)"
+        help_text="Messages supprimés isolément (un chat vidé passe par SuiviMessagesChantier)"
     )
 
     class Meta:
         verbose_name = "Message chantier"
         verbose_name_plural = "Messages chantier"
         ordering = ("created_at",)
+        indexes = [
+            # Visibilité / non-lus : comparaison aux repères de SuiviMessagesChantier
+            models.Index(fields=["avancement", "created_at"], name="message_chantier_date_idx"),
+        ]
 
     def __str__(self):
         return f"Message de {self.auteur.email} - {self.created_at.strftime('%d/%m/%Y %H:%M')}"
+
+
+class SuiviMessagesChantier(TimeStampedModel):
+    """
+    Repères de lecture d'un utilisateur sur les messages d'un avancement :
+    messages vidés jusqu'à vide_jusqu_au (masqués), lus jusqu'à lu_jusqu_au.
+    Une ligne par (utilisateur, avancement), mise à jour par upsert.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="suivis_messages_chantier",
+    )
+    avancement = models.ForeignKey(
+        AvancementChantierUnite,
+        on_delete=models.CASCADE,
+        related_name="suivis_messages",
+    )
+    vide_jusqu_au = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Messages antérieurs ou égaux masqués (chat vidé)"
+    )
+    lu_jusqu_au = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Messages antérieurs ou égaux considérés comme lus"
+    )
+
+    class Meta:
+        verbose_name = "Suivi des messages chantier"
+        verbose_name_plural = "Suivis des messages chantier"
+        unique_together = ("user", "avancement")
+
+    def __str__(self):
+        return f"{self.user} - {self.avancement}"
@@ -0,0 +1,313 @@
+"""
+Service d'import en masse des avancements de chantier par unité.
+
+Ce service gère:
+- Lecture des lignes CSV (séparateur ; ou ,) ou JSON :
+  reference_lot, etape, date_pointage, pourcentage, commentaire, photos
+- Photos optionnelles fournies dans une archive zip (noms listés dans la colonne photos)
+- Validation de toutes les lignes avant toute écriture, erreurs rapportées par ligne
+- Insertion par bulk_create, puis recalcul ensembliste du statut de chantier
+  des unités touchées (pas de signal par ligne)
+"""
+
+import csv
+import io
+import json
+import os
+import zipfile
+from datetime import datetime
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+
+from catalog.models import AvancementChantierUnite, PhotoChantierUnite, Unite
+from catalog.services.chantier_event_service import ChantierEventService
+from catalog.services.chantier_status_service import ChantierStatusService
+from catalog.services.image_service import ImageDerivativeService
+from catalog.services.photo_metadata_service import PhotoMetadataService
+from catalog.services.progress_service import ProgressService
+from core.choices import ReservationStatus
+from core.services.conditional_get_service import ConditionalGetService
+from core.services.media_blob_service import MediaBlobService
+from core.uploads import SNIFF_BYTES, sniff_content_type
+from sales.models import Reservation
+
+
+DEFAULT_MAX_ROWS = 2000
+DEFAULT_PHOTO_MAX_SIZE = 20 * 1024 * 1024
+DATE_FORMATS = ("%Y-%m-%d", "%d/%m/%Y")
+PHOTO_CONTENT_TYPES = ("image/jpeg", "image/png", "image/webp")
+PHOTO_SEPARATOR = "|"
+
+# Colonnes acceptées → champ
+COLUMN_ALIASES = {
+    "reference_lot": "reference_lot",
+    "unite": "reference_lot",
+    "lot": "reference_lot",
+    "etape": "etape",
+    "étape": "etape",
+    "date_pointage": "date_pointage",
+    "date": "date_pointage",
+    "pourcentage": "pourcentage",
+    "commentaire": "commentaire",
+    "photos": "photos",
+}
+
+
+class AvancementImportError(ValueError):
+    """Fichier d'import inexploitable dans son ensemble (format, taille, archive)."""
+
+
+def _parse_date(value):
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format).date()
+        except ValueError:
+            continue
+    return None
+
+
+class AvancementImportService:
+    """Service pour l'import en masse des avancements de chantier."""
+
+    @staticmethod
+    def max_rows():
+        return getattr(settings, "AVANCEMENT_IMPORT_MAX_ROWS", DEFAULT_MAX_ROWS)
+
+    @staticmethod
+    def photo_max_size():
+        """Même limite qu'un ajout de photo unitaire (UPLOAD_POLICIES)."""
+        policy = getattr(settings, "UPLOAD_POLICIES", {}).get("avancement-unite-add-photo", {})
+        return policy.get("max_size", DEFAULT_PHOTO_MAX_SIZE)
+
+    @staticmethod
+    def read_rows(fileobj, name=""):
+        """
+        Lire un fichier CSV ou JSON (liste d'objets, ou {"rows": [...]}).
+
+        Returns:
+            list: [(numéro de ligne, {champ: valeur})]
+        """
+        raw = fileobj.read()
+        if isinstance(raw, bytes):
+            try:
+                raw = raw.decode("utf-8-sig")
+            except UnicodeDecodeError:
+                raise AvancementImportError("Fichier illisible : encodage UTF-8 attendu.")
+
+        if name.lower().endswith(".json") or raw.lstrip()[:1] in ("[", "{"):
+            try:
+                data = json.loads(raw)
+            except ValueError:
+                raise AvancementImportError("JSON invalide.")
+            return AvancementImportService.normalize_rows(data)
+
+        lines = raw.splitlines()
+        header = lines[0] if lines else ""
+        delimiter = ";" if header.count(";") > header.count(",") else ","
+        reader = csv.DictReader(io.StringIO(raw, newline=""), delimiter=delimiter)
+        rows = []
+        for record in reader:
+            if not any((value or "").strip() for value in record.values() if isinstance(value, str)):
+                continue
+            rows.append((reader.line_num, AvancementImportService._normalize(record)))
+        AvancementImportService._check_row_count(rows)
+        return rows
+
+    @staticmethod
+    def normalize_rows(data):
+        """Lignes JSON déjà décodées (corps d'une requête API) → [(numéro, {champ: valeur})]."""
+        if isinstance(data, dict):
+            data = data.get("rows")
+        if not isinstance(data, list) or not all(isinstance(record, dict) for record in data):
+            raise AvancementImportError("Liste d'objets attendue (ou {\"rows\": [...]}).")
+        rows = [(index, AvancementImportService._normalize(record)) for index, record in enumerate(data, start=1)]
+        AvancementImportService._check_row_count(rows)
+        return rows
+
+    @staticmethod
+    def _normalize(record):
+        row = {}
+        for key, value in record.items():
+            field = COLUMN_ALIASES.get(str(key or "").strip().lower())
+            if field is None:
+                continue
+            if field == "photos":
+                if isinstance(value, str):
+                    value = [part.strip() for part in value.split(PHOTO_SEPARATOR)]
+                value = [str(part).strip() for part in value or [] if str(part).strip()]
+            elif value is None:
+                value = ""
+            else:
+                value = str(value).strip()
+            row[field] = value
+        return row
+
+    @staticmethod
+    def _check_row_count(rows):
+        if not rows:
+            raise AvancementImportError("Aucune ligne à importer.")
+        if len(rows) > AvancementImportService.max_rows():
+            raise AvancementImportError(
+                f"Trop de lignes ({len(rows)}), maximum {AvancementImportService.max_rows()} par import."
+            )
+
+    @staticmethod
+    def open_archive(fileobj):
+        """Archive zip des photos → (ZipFile, {nom de fichier: ZipInfo})."""
+        try:
+            archive = zipfile.ZipFile(fileobj)
+        except (zipfile.BadZipFile, OSError):
+            raise AvancementImportError("Archive de photos invalide : fichier zip attendu.")
+        members = {}
+        for info in archive.infolist():
+            if info.is_dir() or info.filename.startswith("__MACOSX/"):
+                continue
+            members.setdefault(os.path.basename(info.filename), info)
+        return archive, members
+
+    @staticmethod
+    def validate(programme, rows, archive=None):
+        """
+        Valider toutes les lignes (2 requêtes quel que soit leur nombre).
+
+        Returns:
+            tuple: (lignes valides préparées, erreurs [{"ligne", "reference_lot", "erreurs"}])
+        """
+        zip_file, members = archive if archive else (None, {})
+        references = {row.get("reference_lot") for _, row in rows if row.get("reference_lot")}
+        unites = {
+            unite.reference_lot: unite
+            for unite in Unite.objects.filter(programme=programme, reference_lot__in=references).select_related("programme")
+        }
+        # Réservation active de l'unité (confirmée de préférence), comme le formulaire d'ajout
+        reservations = {}
+        actives = (
+            Reservation.objects.filter(
+                unite__in=unites.values(),
+                statut__in=[ReservationStatus.CONFIRMEE, ReservationStatus.EN_COURS],
+            )
+            .order_by("statut", "-created_at")
+            .values_list("unite_id", "pk")
+        )
+        for unite_id, reservation_id in actives:
+            reservations.setdefault(unite_id, reservation_id)
+
+        max_length = AvancementChantierUnite._meta.get_field("etape").max_length
+        photo_max_size = AvancementImportService.photo_max_size()
+        valid, errors = [], []
+        for line, row in rows:
+            row_errors = {}
+            reference = row.get("reference_lot", "")
+            unite = unites.get(reference)
+            if not reference:
+                row_errors["reference_lot"] = "Référence de lot requise."
+            elif unite is None:
+                row_errors["reference_lot"] = f"Lot {reference} introuvable dans ce programme."
+
+            etape = row.get("etape", "")
+            if not etape:
+                row_errors["etape"] = "Étape requise."
+            elif len(etape) > max_length:
+                row_errors["etape"] = f"Étape trop longue ({max_length} caractères maximum)."
+
+            date_pointage = _parse_date(row.get("date_pointage", ""))
+            if date_pointage is None:
+                row_errors["date_pointage"] = "Date invalide (AAAA-MM-JJ ou JJ/MM/AAAA)."
+
+            try:
+                pourcentage = int(row.get("pourcentage", ""))
+            except ValueError:
+                pourcentage = None
+            if pourcentage is None or not 0 <= pourcentage <= 100:
+                row_errors["pourcentage"] = "Le pourcentage doit être un entier entre 0 et 100."
+
+            photos = row.get("photos", [])
+            photo_errors = []
+            for photo in photos:
+                info = members.get(os.path.basename(photo))
+                if zip_file is None:
+                    photo_errors.append(f"{photo} : aucune archive de photos fournie.")
+                elif info is None:
+                    photo_errors.append(f"{photo} : absente de l'archive.")
+                elif info.file_size > photo_max_size:
+                    photo_errors.append(f"{photo} : fichier trop volumineux.")
+                else:
+                    with zip_file.open(info) as handle:
+                        if sniff_content_type(handle.read(SNIFF_BYTES)) not in PHOTO_CONTENT_TYPES:
+                            photo_errors.append(f"{photo} : format non autorisé (JPG, PNG, WEBP).")
+            if photo_errors:
+                row_errors["photos"] = photo_errors
+
+            if row_errors:
+                errors.append({"ligne": line, "reference_lot": reference, "erreurs": row_errors})
+                continue
+            valid.append({
+                "unite": unite,
+                "reservation_id": reservations.get(unite.pk),
+                "etape": etape,
+                "date_pointage": date_pointage,
+                "pourcentage": pourcentage,
+                "commentaire": row.get("commentaire", ""),
+                "photos": [members[os.path.basename(photo)] for photo in photos],
+            })
+        return valid, errors
+
+    @staticmethod
+    def import_rows(programme, rows, archive=None, dry_run=False):
+        """
+        Valider puis importer les lignes ; rien n'est écrit si une ligne est en erreur.
+
+        Args:
+            programme: Programme des lots référencés
+            rows: [(numéro de ligne, {champ: valeur})] (voir read_rows / normalize_rows)
+            archive: (ZipFile, membres) de open_archive, ou None
+            dry_run: Valider sans rien écrire
+
+        Returns:
+            dict: {"lignes", "avancements", "photos", "unites", "erreurs"}
+        """
+        valid, errors = AvancementImportService.validate(programme, rows, archive)
+        report = {"lignes": len(rows), "avancements": 0, "photos": 0, "unites": 0, "erreurs": errors}
+        if errors or dry_run:
+            return report
+
+        zip_file = archive[0] if archive else None
+        avancements, photos = [], []
+        for row in valid:
+            avancement = AvancementChantierUnite(
+                unite=row["unite"],
+                reservation_id=row["reservation_id"],
+                etape=row["etape"],
+                date_pointage=row["date_pointage"],
+                pourcentage=row["pourcentage"],
+                commentaire=row["commentaire"],
+            )
+            avancements.append(avancement)
+            for info in row["photos"]:
+                content = ContentFile(zip_file.read(info), name=os.path.basename(info.filename))
+                photo = PhotoChantierUnite(avancement=avancement, image=content, description=f"Photo {avancement.etape}")
+                # bulk_create ne déclenche pas pre_save : EXIF et contrôle GPS appliqués ici
+                PhotoMetadataService.populate(photo)
+                # Fichier stocké tout de suite (une photo en mémoire à la fois) ; en cas d'échec
+                # de la transaction, il reste sans référence et gc_media le supprime
+                photo.image.save(content.name, content, save=False)
+                photos.append(photo)
+
+        unite_ids = {avancement.unite_id for avancement in avancements}
+        with transaction.atomic():
+            AvancementChantierUnite.objects.bulk_create(avancements, batch_size=500)
+            PhotoChantierUnite.objects.bulk_create(photos, batch_size=100)
+            # bulk_create ne déclenche pas post_save : ETag de l'API revalidé explicitement
+            ConditionalGetService.touch(AvancementChantierUnite._meta.label)
+            ConditionalGetService.touch(PhotoChantierUnite._meta.label)
+            MediaBlobService.adjust([photo.image.name for photo in photos], +1)
+            ChantierStatusService.recompute(unite_ids=unite_ids)
+            ProgressService.invalidate_unites(unite_ids)
+            for photo in photos:
+                ImageDerivativeService.schedule(photo)
+            ChantierEventService.photos_added(photos)
+
+        report.update(avancements=len(avancements), photos=len(photos), unites=len(unite_ids))
+        return report
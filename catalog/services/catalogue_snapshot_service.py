@@ -0,0 +1,310 @@
+"""
+Service d'export statique du catalogue public (CDN, diffusion hors ligne).
+
+Ce service gère:
+- Prérendu des pages publiques (liste des programmes, fiches programme et unité) telles
+  que servies à un visiteur anonyme, et flux JSON du catalogue
+- Copie des fichiers locaux référencés (static, media) sous un nom haché par leur contenu,
+  références réécrites dans les pages et le flux
+- Reconstruction incrémentale : signature par programme (dernières modifications du
+  programme, de ses unités, de leurs modèles et réservations) comparée au manifeste de
+  la construction précédente
+- Configuration nginx servant ces fichiers aux visiteurs anonymes, Django sinon
+"""
+
+import hashlib
+import json
+import os
+import posixpath
+import re
+from pathlib import Path
+from urllib.parse import unquote
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.files.storage import default_storage
+from django.db.models import Count, Max
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from api.serializers import ProgrammeSerializer, UniteSerializer
+from catalog.models import Programme, Unite
+
+
+MANIFEST_NAME = "manifest.json"
+ASSETS_URL = "/catalogue/assets/"
+FEED_URL = "/catalogue/feed.json"
+
+NGINX_TEMPLATE = """\
+# Catalogue statique (généré par build_catalogue_snapshot), à inclure dans le bloc server.
+# Visiteurs anonymes : fichiers de %(root)s ; sinon, ou page absente : Django.
+
+location %(assets_url)s {
+    root %(root)s;
+    expires max;
+    add_header Cache-Control "public, immutable";
+}
+
+location = %(feed_url)s {
+    root %(root)s;
+    add_header Cache-Control "public, max-age=60";
+}
+
+location ~ ^/catalogue/(programmes|unites)/ {
+    error_page 418 = @django_catalogue;
+    if ($cookie_%(session_cookie)s) { return 418; }
+    if ($request_method !~ ^(GET|HEAD)$) { return 418; }
+    if ($args) { return 418; }
+    root %(root)s;
+    add_header Cache-Control "public, max-age=60";
+    try_files ${uri}index.html @django_catalogue;
+}
+
+location @django_catalogue {
+    proxy_pass http://%(upstream)s;
+    proxy_set_header Host $host;
+    proxy_set_header X-Forwarded-For $proxy_add_x_forwarded_for;
+    proxy_set_header X-Forwarded-Proto $scheme;
+}
+"""
+
+
+class CatalogueSnapshotError(RuntimeError):
+    """Page du catalogue impossible à prérendre."""
+
+
+def _file_path(url):
+    """Chemin relatif du fichier servi pour une URL (les pages se terminent par /)."""
+    path = url.lstrip("/")
+    return f"{path}index.html" if url.endswith("/") else path
+
+
+def _write(root, relative, content):
+    """Écriture atomique : nginx ne sert jamais un fichier partiel."""
+    target = root / relative
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_name(f".{target.name}.tmp")
+    tmp.write_bytes(content)
+    os.replace(tmp, target)
+
+
+def _remove(root, url):
+    target = root / _file_path(url)
+    if target.exists():
+        target.unlink()
+    # Répertoires devenus vides (catalogue/unites/<pk>/)
+    parent = target.parent
+    while parent != root and parent.exists() and not any(parent.iterdir()):
+        parent.rmdir()
+        parent = parent.parent
+
+
+class _Assets:
+    """Fichiers static / media référencés, copiés une fois par construction sous un nom haché."""
+
+    def __init__(self, root):
+        self.root = root
+        self.names = {}
+        self.missing = set()
+        prefixes = "|".join(re.escape(prefix) for prefix in (settings.STATIC_URL, settings.MEDIA_URL))
+        # URL en début d'attribut, de srcset, de url(...) ou de chaîne JSON
+        self.pattern = re.compile(rf"(?<=[\"'(\s,=])(?:{prefixes})[^\"'\s,)?#<>]+")
+
+    def _read(self, url):
+        if url.startswith(settings.STATIC_URL):
+            path = finders.find(unquote(url[len(settings.STATIC_URL):]))
+            if path:
+                with open(path, "rb") as handle:
+                    return handle.read()
+            return None
+        name = unquote(url[len(settings.MEDIA_URL):])
+        if default_storage.exists(name):
+            with default_storage.open(name, "rb") as handle:
+                return handle.read()
+        return None
+
+    def name(self, url):
+        if url not in self.names:
+            content = self._read(url)
+            if content is None:
+                self.missing.add(url)
+                self.names[url] = None
+            else:
+                stem, ext = posixpath.splitext(posixpath.basename(url))
+                name = f"{stem}.{hashlib.md5(content).hexdigest()[:12]}{ext}"
+                if not (self.root / _file_path(ASSETS_URL + name)).exists():
+                    _write(self.root, _file_path(ASSETS_URL + name), content)
+                self.names[url] = name
+        return self.names[url]
+
+    def rewrite(self, text):
+        """
+        Returns:
+            tuple: (texte réécrit, noms des fichiers hachés référencés)
+        """
+        used = set()
+
+        def replace(match):
+            name = self.name(match.group(0))
+            if name is None:
+                return match.group(0)
+            used.add(name)
+            return ASSETS_URL + name
+
+        return self.pattern.sub(replace, text), sorted(used)
+
+
+class CatalogueSnapshotService:
+    """Service pour l'export statique du catalogue public."""
+
+    @staticmethod
+    def root():
+        return Path(settings.CATALOGUE_SNAPSHOT_ROOT)
+
+    @staticmethod
+    def default_host():
+        hosts = [host for host in settings.ALLOWED_HOSTS if host and "*" not in host and not host.startswith(".")]
+        return hosts[0] if hosts else "localhost"
+
+    @staticmethod
+    def programmes():
+        """Programmes du catalogue et leur signature de dernière modification."""
+        programmes = Programme.objects.order_by("nom").annotate(
+            derniere_unite=Max("unites__updated_at"),
+            dernier_modele=Max("unites__modele_bien__updated_at"),
+            derniere_reservation=Max("unites__reservations__updated_at"),
+            nb_unites=Count("unites", distinct=True),
+        )
+        for programme in programmes:
+            programme.signature = "|".join(str(value) for value in (
+                programme.updated_at, programme.derniere_unite, programme.dernier_modele,
+                programme.derniere_reservation, programme.nb_unites,
+            ))
+        return programmes
+
+    @staticmethod
+    def render(client, url):
+        """HTML de la page pour un visiteur anonyme (pile de middlewares complète)."""
+        response = client.get(url)
+        if response.status_code != 200:
+            raise CatalogueSnapshotError(f"{url} : réponse {response.status_code}.")
+        return response.content.decode(response.charset or "utf-8")
+
+    @staticmethod
+    def feed():
+        """Flux JSON : programmes et leurs unités (mêmes champs que l'API publique)."""
+        unites = {}
+        for unite in Unite.objects.with_statut_reel().order_by("reference_lot"):
+            data = UniteSerializer(unite).data
+            data["url"] = reverse("unite_detail", args=[unite.pk])
+            unites.setdefault(unite.programme_id, []).append(data)
+
+        programmes = []
+        for programme in Programme.objects.order_by("nom"):
+            data = ProgrammeSerializer(programme).data
+            data["url"] = reverse("programme_detail", args=[programme.pk])
+            data["unites"] = unites.get(programme.pk, [])
+            programmes.append(data)
+        return JSONRenderer().render({"genere_le": timezone.now(), "programmes": programmes}).decode("utf-8")
+
+    @staticmethod
+    def build(root=None, force=False, host=None):
+        """
+        Construire (ou mettre à jour) l'export statique dans root.
+
+        Args:
+            root: répertoire de sortie (défaut : CATALOGUE_SNAPSHOT_ROOT)
+            force: tout reconstruire, sans tenir compte du manifeste
+            host: en-tête Host des requêtes de rendu (défaut : premier ALLOWED_HOSTS)
+
+        Returns:
+            dict: {"programmes", "unites", "inchanges", "supprimes", "manquants"}
+        """
+        root = Path(root or CatalogueSnapshotService.root())
+        root.mkdir(parents=True, exist_ok=True)
+        manifest = {} if force else CatalogueSnapshotService.load_manifest(root)
+        previous = manifest.get("programmes", {})
+        pages = manifest.get("pages", {})  # URL -> fichiers hachés référencés
+        previous_urls = {url for entry in previous.values() for url in entry["pages"]}
+
+        client = Client(HTTP_HOST=host or CatalogueSnapshotService.default_host())
+        assets = _Assets(root)
+        report = {"programmes": 0, "unites": 0, "inchanges": 0, "supprimes": 0}
+
+        def export(url, content):
+            text, used = assets.rewrite(content)
+            _write(root, _file_path(url), text.encode("utf-8"))
+            pages[url] = used
+
+        programmes = {}
+        for programme in CatalogueSnapshotService.programmes():
+            key = str(programme.pk)
+            entry = previous.get(key)
+            if (
+                entry
+                and entry["signature"] == programme.signature
+                and all((root / _file_path(url)).exists() for url in entry["pages"])
+            ):
+                programmes[key] = entry
+                report["inchanges"] += 1
+                continue
+
+            urls = [reverse("programme_detail", args=[programme.pk])]
+            urls += [reverse("unite_detail", args=[pk]) for pk in programme.unites.order_by().values_list("pk", flat=True)]
+            for url in urls:
+                export(url, CatalogueSnapshotService.render(client, url))
+            programmes[key] = {"signature": programme.signature, "pages": urls}
+            report["programmes"] += 1
+            report["unites"] += len(urls) - 1
+
+        # Programmes supprimés, unités supprimées ou rattachées à un autre programme
+        current_urls = {url for entry in programmes.values() for url in entry["pages"]}
+        for url in previous_urls - current_urls:
+            _remove(root, url)
+            pages.pop(url, None)
+        report["supprimes"] = len(set(previous) - set(programmes))
+
+        # Liste et flux : dépendent de tous les programmes
+        list_url = reverse("programme_list")
+        if (
+            report["programmes"] or report["supprimes"]
+            or not (root / _file_path(list_url)).exists() or not (root / _file_path(FEED_URL)).exists()
+        ):
+            export(list_url, CatalogueSnapshotService.render(client, list_url))
+            export(FEED_URL, CatalogueSnapshotService.feed())
+
+        # Fichiers hachés qui ne sont plus référencés
+        used = {name for names in pages.values() for name in names}
+        assets_dir = root / ASSETS_URL.strip("/")
+        if assets_dir.exists():
+            for path in assets_dir.iterdir():
+                if path.name not in used:
+                    path.unlink()
+
+        _write(root, MANIFEST_NAME, json.dumps({
+            "construit_le": timezone.now().isoformat(),
+            "programmes": programmes,
+            "pages": pages,
+        }, indent=2, sort_keys=True).encode("utf-8"))
+        report["manquants"] = sorted(assets.missing)
+        return report
+
+    @staticmethod
+    def load_manifest(root):
+        try:
+            with open(Path(root) / MANIFEST_NAME, encoding="utf-8") as handle:
+                return json.load(handle)
+        except (OSError, ValueError):
+            return {}
+
+    @staticmethod
+    def nginx_config(root=None, upstream="127.0.0.1:8000"):
+        return NGINX_TEMPLATE % {
+            "root": Path(root or CatalogueSnapshotService.root()).resolve(),
+            "assets_url": ASSETS_URL,
+            "feed_url": FEED_URL,
+            "session_cookie": settings.SESSION_COOKIE_NAME,
+            "upstream": upstream,
+        }
@@ -0,0 +1,240 @@
+"""
+Service des événements temps réel du suivi de chantier (Server-Sent Events).
+
+Ce service gère:
+- Sérialisation des événements : nouveau message, réponse, nouvelle photo
+- Publication Redis pub/sub après commit, sur le canal de l'avancement et sur ceux
+  des destinataires (client de la réservation, commercial du programme) : tous les
+  workers ASGI abonnés reçoivent l'événement
+- Rattrapage depuis la base à la reconnexion (curseur `since` / Last-Event-ID)
+- Flux SSE asynchrone (catalog.views_events), avec battement de cœur, servi sous ASGI uniquement
+"""
+
+import json
+import logging
+import time
+from datetime import timezone as dt_timezone
+
+import redis
+import redis.asyncio as redis_async
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+from catalog.models import AvancementChantierUnite, MessageChantier, PhotoChantierUnite
+from catalog.services.image_service import ImageDerivativeService
+from catalog.services.message_chantier_service import MessageChantierService
+
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = "chantier"
+DEFAULT_HEARTBEAT = 15
+DEFAULT_MAX_DURATION = 300
+DEFAULT_BACKLOG_LIMIT = 200
+
+_publisher = None
+
+
+def avancement_channel(avancement_id):
+    return f"{CHANNEL_PREFIX}:avancement:{avancement_id}"
+
+
+def user_channel(user_id):
+    return f"{CHANNEL_PREFIX}:user:{user_id}"
+
+
+def cursor(moment):
+    """Curseur d'un événement : horodatage UTC ISO-8601 (ordre lexicographique = chronologique)."""
+    return moment.astimezone(dt_timezone.utc).isoformat(timespec="microseconds")
+
+
+def parse_cursor(value):
+    """Curseur reçu (?since= ou Last-Event-ID) ; None s'il est absent ou invalide."""
+    try:
+        moment = parse_datetime(value or "")
+    except ValueError:
+        return None
+    if moment is None or moment.tzinfo is None:
+        return None
+    return cursor(moment)
+
+
+def format_sse(event):
+    data = json.dumps(event, ensure_ascii=False, separators=(",", ":"))
+    return f"id: {event['cursor']}\nevent: {event['type']}\ndata: {data}\n\n"
+
+
+def redis_url():
+    return getattr(settings, "CHANTIER_EVENTS_REDIS_URL", None) or settings.REDIS_URL
+
+
+class ChantierEventService:
+    """Service pour la diffusion des messages et photos de chantier en temps réel."""
+
+    @staticmethod
+    def flux_disponible(request):
+        """
+        Flux servis uniquement sous ASGI (uvicorn) : sous WSGI (gunicorn), chaque connexion
+        ouverte bloquerait un worker pendant toute sa durée.
+        """
+        return isinstance(request, ASGIRequest)
+
+    @staticmethod
+    def avancements_accessibles(user):
+        """Avancements dont user reçoit les événements (client de la réservation, commercial, admin)."""
+        avancements = AvancementChantierUnite.objects.all()
+        if user.is_staff or user.is_superuser or user.has_role("ADMIN"):
+            return avancements
+        return avancements.filter(
+            Q(unite__programme__contact_commercial=user) | Q(reservation__client__user=user)
+        )
+
+    @staticmethod
+    def peut_acceder(user, avancement):
+        return ChantierEventService.avancements_accessibles(user).filter(pk=avancement.pk).exists()
+
+    @staticmethod
+    def destinataires(avancement_ids):
+        """Utilisateurs notifiés sur leur canal personnel, par avancement : client de la réservation et commercial."""
+        destinataires = {}
+        for avancement_id, commercial_id, client_user_id in AvancementChantierUnite.objects.filter(
+            pk__in=avancement_ids
+        ).values_list("pk", "unite__programme__contact_commercial", "reservation__client__user"):
+            destinataires[str(avancement_id)] = {commercial_id, client_user_id} - {None}
+        return destinataires
+
+    @staticmethod
+    def message_event(message, event_type="message"):
+        """`reponse` : réponse ajoutée à un message existant ; curseur sur updated_at."""
+        auteur = message.auteur
+        return {
+            "type": event_type,
+            "id": str(message.pk),
+            "avancement": str(message.avancement_id),
+            "auteur_id": str(auteur.pk),
+            "auteur": auteur.get_full_name() or auteur.email,
+            "auteur_client": auteur.is_client,
+            "message": message.message,
+            "reponse": message.reponse or "",
+            "created_at": message.created_at.isoformat(),
+            "cursor": cursor(message.updated_at),
+        }
+
+    @staticmethod
+    def photo_event(photo):
+        return {
+            "type": "photo",
+            "id": str(photo.pk),
+            "avancement": str(photo.avancement_id),
+            "description": photo.description or "",
+            "thumb": ImageDerivativeService.url(photo, "thumb", "jpeg"),
+            "image": photo.image.url if photo.image else "",
+            "pris_le": photo.pris_le.isoformat() if photo.pris_le else None,
+            "cursor": cursor(photo.created_at),
+        }
+
+    @staticmethod
+    def send(channels, payload):
+        """Publier payload sur chaque canal ; une panne Redis ne fait jamais échouer l'écriture."""
+        global _publisher
+        try:
+            if _publisher is None:
+                _publisher = redis.Redis.from_url(redis_url())
+            pipe = _publisher.pipeline(transaction=False)
+            for channel in channels:
+                pipe.publish(channel, payload)
+            pipe.execute()
+        except redis.RedisError:
+            logger.warning("Publication des événements chantier impossible (%s)", ", ".join(channels), exc_info=True)
+
+    @staticmethod
+    def publish(build_events):
+        """
+        Après commit : chaque événement de build_events() est publié sur le canal de son
+        avancement et sur ceux de ses destinataires.
+        """
+        def run():
+            events = build_events()
+            destinataires = ChantierEventService.destinataires({event["avancement"] for event in events})
+            for event in events:
+                channels = [avancement_channel(event["avancement"])]
+                channels += [user_channel(user_id) for user_id in destinataires.get(event["avancement"], ())]
+                ChantierEventService.send(channels, json.dumps(event, ensure_ascii=False))
+
+        transaction.on_commit(run)
+
+    @staticmethod
+    def message_saved(message, event_type="message"):
+        ChantierEventService.publish(lambda: [ChantierEventService.message_event(message, event_type)])
+
+    @staticmethod
+    def photos_added(photos):
+        """Nouvelles photos d'avancement (unitaires ou importées en masse)."""
+        photos = list(photos)
+        if photos:
+            ChantierEventService.publish(lambda: [ChantierEventService.photo_event(photo) for photo in photos])
+
+    @staticmethod
+    def backlog(user, since, avancement=None):
+        """Événements postérieurs au curseur since (messages visibles pour user, photos)."""
+        limit = getattr(settings, "CHANTIER_EVENTS_BACKLOG_LIMIT", DEFAULT_BACKLOG_LIMIT)
+        if avancement is not None:
+            avancements = AvancementChantierUnite.objects.filter(pk=avancement.pk)
+        else:
+            avancements = ChantierEventService.avancements_accessibles(user)
+        since = parse_datetime(since)
+
+        messages = MessageChantierService.filtrer_visibles(
+            user, MessageChantier.objects.filter(avancement__in=avancements, updated_at__gt=since)
+        ).select_related("auteur").order_by("updated_at")[:limit]
+        photos = PhotoChantierUnite.objects.filter(
+            avancement__in=avancements, created_at__gt=since
+        ).order_by("created_at")[:limit]
+
+        events = [
+            ChantierEventService.message_event(message, "reponse" if message.reponse else "message")
+            for message in messages
+        ]
+        events += [ChantierEventService.photo_event(photo) for photo in photos]
+        return sorted(events, key=lambda event: event["cursor"])[:limit]
+
+    @staticmethod
+    async def stream(user, channel, since=None, avancement=None):
+        """
+        Flux SSE : abonnement Redis, puis rattrapage depuis since, puis événements en direct.
+        Fermé après CHANTIER_EVENTS_MAX_DURATION ; EventSource se reconnecte avec Last-Event-ID.
+        """
+        heartbeat = getattr(settings, "CHANTIER_EVENTS_HEARTBEAT", DEFAULT_HEARTBEAT)
+        fin = time.monotonic() + getattr(settings, "CHANTIER_EVENTS_MAX_DURATION", DEFAULT_MAX_DURATION)
+
+        client = redis_async.Redis.from_url(redis_url())
+        pubsub = client.pubsub()
+        try:
+            # Abonné avant le rattrapage : aucun événement perdu entre les deux
+            await pubsub.subscribe(channel)
+            yield f"retry: {heartbeat * 1000}\n\n"
+
+            deja_envoyes = set()
+            if since is not None:
+                for event in await sync_to_async(ChantierEventService.backlog)(user, since, avancement):
+                    deja_envoyes.add((event["type"], event["id"], event["cursor"]))
+                    yield format_sse(event)
+
+            while time.monotonic() < fin:
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=heartbeat)
+                if message is None:
+                    yield ": ping\n\n"
+                    continue
+                event = json.loads(message["data"])
+                if (event["type"], event["id"], event["cursor"]) in deja_envoyes:
+                    continue
+                yield format_sse(event)
+        except redis.RedisError:
+            logger.warning("Flux des événements chantier interrompu (%s)", channel, exc_info=True)
+        finally:
+            await pubsub.aclose()
+            await client.aclose()
@@ -0,0 +1,122 @@
+"""
+Service de maintenance du statut de chantier des unités.
+
+Ce service gère:
+- Mise à jour incrémentale à l'ajout (ou à la hausse) d'un avancement :
+  un seul UPDATE conditionnel sur max_pourcentage / dernier_avancement / statut_chantier
+- Recalcul par agrégat SQL après une suppression ou une baisse, regroupé
+  en fin de transaction (un seul recalcul quel que soit le nombre d'écritures)
+- Recalcul en masse par programme (commande recompute_statut_chantier)
+
+Règle : aucun avancement → non commencé ; max(pourcentage) >= 100 → terminé ;
+sinon en cours. Le dernier avancement est le plus récent par date_pointage.
+
+Les UPDATE ne déclenchent pas post_save sur Unite : updated_at est avancé explicitement
+(tableau de bord commercial trié par updated_at, export statique du catalogue, ETag de
+l'API des unités) et l'horodatage du modèle pour les requêtes conditionnelles aussi
+(ETag des avancements). Index de recherche, clusters de la carte, compteurs de stock et
+cache des pages publiques n'utilisent pas ces champs.
+"""
+
+from django.db import models
+from django.db.models import Case, Exists, F, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce, Greatest, Now
+from django.db.models.lookups import GreaterThanOrEqual, IsNull
+
+from catalog.models import AVANCEMENT_LATEST_ORDERING, AvancementChantierUnite, Unite
+from core.choices import StatutChantier
+from core.services.conditional_get_service import ConditionalGetService
+from core.transactions import on_commit_batch
+
+
+POURCENTAGE_TERMINE = 100
+LATEST_ORDERING = AVANCEMENT_LATEST_ORDERING
+
+
+def statut_expression(max_pourcentage):
+    """Expression SQL du statut de chantier à partir du pourcentage maximal."""
+    return Case(
+        When(IsNull(max_pourcentage, True), then=Value(StatutChantier.NON_COMMENCE)),
+        When(GreaterThanOrEqual(max_pourcentage, POURCENTAGE_TERMINE), then=Value(StatutChantier.TERMINE)),
+        default=Value(StatutChantier.EN_COURS),
+    )
+
+
+class ChantierStatusService:
+    """Service pour le statut de chantier dénormalisé des unités."""
+
+    @staticmethod
+    def apply_avancement(avancement):
+        """
+        Répercuter un avancement ajouté (ou revu à la hausse) sur son unité.
+
+        Un seul UPDATE, sans effet si l'unité a déjà un pourcentage supérieur
+        et un dernier avancement plus récent.
+
+        Returns:
+            int: 1 si l'unité a été mise à jour, 0 sinon
+        """
+        pourcentage = Value(avancement.pourcentage)
+        plus_recent = AvancementChantierUnite.objects.filter(
+            pk=OuterRef("dernier_avancement_id"),
+            date_pointage__gt=avancement.date_pointage,
+        )
+        est_dernier = Q(dernier_avancement__isnull=True) | ~Exists(plus_recent)
+        nouveau_max = Greatest(Coalesce("max_pourcentage", pourcentage), pourcentage)
+
+        count = (
+            Unite.objects.filter(pk=avancement.unite_id)
+            .filter(Q(max_pourcentage__isnull=True) | Q(max_pourcentage__lt=avancement.pourcentage) | est_dernier)
+            .update(
+                max_pourcentage=nouveau_max,
+                statut_chantier=statut_expression(nouveau_max),
+                dernier_avancement=Case(
+                    When(est_dernier, then=Value(avancement.pk)),
+                    default=F("dernier_avancement"),
+                    output_field=models.UUIDField(),
+                ),
+                updated_at=Now(),
+            )
+        )
+        if count:
+            ConditionalGetService.touch(Unite._meta.label)
+        return count
+
+    @staticmethod
+    def schedule_recompute(unite_ids):
+        """
+        Recalculer les unités données après commit. Les appels d'une même
+        transaction sont regroupés en un seul recalcul.
+        """
+        on_commit_batch("statut_chantier", unite_ids, lambda ids: ChantierStatusService.recompute(unite_ids=ids))
+
+    @staticmethod
+    def recompute(unite_ids=None, programme_ids=None):
+        """
+        Recalculer max_pourcentage, dernier_avancement et statut_chantier
+        par agrégat SQL (un seul UPDATE pour toutes les unités visées).
+
+        Args:
+            unite_ids: Itérable d'ids d'unité
+            programme_ids: Itérable d'ids de programme (les deux à None = toutes les unités)
+
+        Returns:
+            int: Nombre d'unités recalculées
+        """
+        unites = Unite.objects.all()
+        if unite_ids is not None:
+            unites = unites.filter(pk__in=unite_ids)
+        if programme_ids is not None:
+            unites = unites.filter(programme_id__in=programme_ids)
+
+        avancements = AvancementChantierUnite.objects.filter(unite=OuterRef("pk"))
+        max_pourcentage = Subquery(avancements.order_by("-pourcentage").values("pourcentage")[:1])
+        count = unites.update(
+            max_pourcentage=max_pourcentage,
+            dernier_avancement=Subquery(avancements.order_by(*LATEST_ORDERING).values("pk")[:1]),
+            statut_chantier=statut_expression(max_pourcentage),
+            updated_at=Now(),
+        )
+        if count:
+            ConditionalGetService.touch(Unite._meta.label)
+        return count
@@ -0,0 +1,261 @@
+"""
+Service d'upload reprenable (par morceaux) des photos de chantier.
+
+Ce service gère:
+- Création d'une session (taille annoncée, empreinte attendue, métadonnées de la photo)
+- Ajout de morceaux à un offset donné, écrits sur disque local (reprise après coupure)
+- Contrôle d'intégrité : empreinte SHA-256 par morceau (en-tête Upload-Checksum)
+  et du fichier complet à la finalisation
+- Finalisation d'une ou plusieurs sessions en PhotoChantierUnite, dans une seule transaction
+- Expiration et purge des sessions abandonnées
+"""
+
+import base64
+import hashlib
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+
+from catalog.models import PhotoChantierUnite, PhotoUploadSession
+from core.uploads import sniff_content_type
+
+
+READ_BLOCK_SIZE = 64 * 1024
+ALLOWED_CONTENT_TYPES = ("image/jpeg", "image/png", "image/webp")
+
+# Codes HTTP du protocole tus
+CHECKSUM_MISMATCH = 460
+
+
+class ChunkedUploadError(ValueError):
+    """Erreur d'upload, avec le code HTTP à renvoyer au client."""
+
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def _settings_value(name, default):
+    return getattr(settings, name, default)
+
+
+class ChunkedUploadService:
+    """Service pour les uploads reprenables de photos d'avancement."""
+
+    @staticmethod
+    def upload_dir():
+        """Dossier local des fichiers en cours de réception (hors MEDIA_ROOT servi)."""
+        directory = _settings_value("CHUNKED_UPLOAD_DIR", os.path.join(settings.BASE_DIR, "tmp", "uploads"))
+        os.makedirs(directory, exist_ok=True)
+        return directory
+
+    @staticmethod
+    def part_path(session):
+        return os.path.join(ChunkedUploadService.upload_dir(), f"{session.pk}.part")
+
+    @staticmethod
+    def max_size():
+        return _settings_value("CHUNKED_UPLOAD_MAX_SIZE", 20 * 1024 * 1024)
+
+    @staticmethod
+    def expiry():
+        return timedelta(hours=_settings_value("CHUNKED_UPLOAD_EXPIRY_HOURS", 24))
+
+    @staticmethod
+    def create(user, avancement, **fields):
+        """
+        Ouvrir une session d'upload.
+
+        Args:
+            user: Auteur de l'upload
+            avancement: AvancementChantierUnite de la future photo
+            **fields: nom_fichier, taille_totale, sha256, pris_le, gps_lat, gps_lng, description
+
+        Returns:
+            PhotoUploadSession
+        """
+        if fields["taille_totale"] > ChunkedUploadService.max_size():
+            raise ChunkedUploadError("Fichier trop volumineux.", status_code=413)
+        session = PhotoUploadSession.objects.create(
+            avancement=avancement,
+            cree_par=user,
+            expire_le=timezone.now() + ChunkedUploadService.expiry(),
+            **fields,
+        )
+        open(ChunkedUploadService.part_path(session), "wb").close()
+        return session
+
+    @staticmethod
+    def parse_checksum(header):
+        """En-tête Upload-Checksum "sha256 <base64>" → empreinte binaire (None si absent)."""
+        if not header:
+            return None
+        algorithm, _, value = header.partition(" ")
+        if algorithm.lower() != "sha256":
+            raise ChunkedUploadError("Algorithme d'empreinte non supporté (sha256 attendu).")
+        try:
+            return base64.b64decode(value.strip(), validate=True)
+        except ValueError:
+            raise ChunkedUploadError("Empreinte Upload-Checksum invalide.")
+
+    @staticmethod
+    def append(session, stream, offset, length, checksum=None):
+        """
+        Écrire un morceau reçu à la suite du fichier.
+
+        Args:
+            session: PhotoUploadSession
+            stream: Flux du corps de la requête (lu par blocs, jamais entièrement en mémoire)
+            offset: Position annoncée par le client (en-tête Upload-Offset)
+            length: Taille du morceau (Content-Length)
+            checksum: Empreinte SHA-256 binaire attendue du morceau, optionnelle
+
+        Returns:
+            PhotoUploadSession mise à jour (offset, expire_le)
+        """
+        if length > _settings_value("CHUNKED_UPLOAD_MAX_CHUNK_SIZE", 5 * 1024 * 1024):
+            raise ChunkedUploadError("Morceau trop volumineux.", status_code=413)
+        ChunkedUploadService._check_offset(session, offset, length)
+
+        # Réception dans un fichier à part, sans verrou : la lecture du réseau peut être lente
+        hasher = hashlib.sha256()
+        received = 0
+        with tempfile.NamedTemporaryFile(dir=ChunkedUploadService.upload_dir(), suffix=".chunk") as chunk:
+            while received < length:
+                block = stream.read(min(READ_BLOCK_SIZE, length - received)) if stream else b""
+                if not block:
+                    break
+                chunk.write(block)
+                hasher.update(block)
+                received += len(block)
+            if checksum is not None and (received != length or hasher.digest() != checksum):
+                # Morceau corrompu ou incomplet : rejeté en entier
+                raise ChunkedUploadError("Empreinte du morceau incorrecte.", status_code=CHECKSUM_MISMATCH)
+            chunk.seek(0)
+
+            with transaction.atomic():
+                # Verrou : deux PATCH concurrents sur la même session s'excluent ; seul le
+                # premier arrivé à cet offset recopie son morceau (disque local)
+                session = PhotoUploadSession.objects.select_for_update().get(pk=session.pk)
+                ChunkedUploadService._check_offset(session, offset, length)
+                with open(ChunkedUploadService.part_path(session), "r+b") as part:
+                    part.seek(offset)
+                    part.truncate()
+                    shutil.copyfileobj(chunk, part, READ_BLOCK_SIZE)
+
+                # Sans empreinte, les octets reçus avant une coupure sont conservés (reprise)
+                session.offset = offset + received
+                session.expire_le = timezone.now() + ChunkedUploadService.expiry()
+                session.save(update_fields=["offset", "expire_le", "updated_at"])
+        return session
+
+    @staticmethod
+    def _check_offset(session, offset, length):
+        if session.expire_le <= timezone.now():
+            raise ChunkedUploadError("Session d'upload expirée.", status_code=410)
+        if offset != session.offset:
+            raise ChunkedUploadError(
+                f"Offset {offset} incorrect, {session.offset} octet(s) déjà reçu(s).", status_code=409
+            )
+        if offset + length > session.taille_totale:
+            raise ChunkedUploadError("Le morceau dépasse la taille annoncée.", status_code=413)
+
+    @staticmethod
+    def finalize(sessions):
+        """
+        Transformer des sessions complètes en PhotoChantierUnite, tout ou rien.
+
+        Args:
+            sessions: Sessions d'upload (un lot de photos)
+
+        Returns:
+            list: PhotoChantierUnite créées, dans l'ordre des sessions
+        """
+        pks = [session.pk for session in sessions]
+        with transaction.atomic():
+            locked = PhotoUploadSession.objects.select_for_update().in_bulk(pks)
+            for pk in pks:
+                if pk not in locked:
+                    raise ChunkedUploadError("Session d'upload introuvable.", status_code=404)
+                # Tout le lot est vérifié avant d'écrire la moindre photo dans le stockage
+                ChunkedUploadService._verify(locked[pk])
+            photos = [ChunkedUploadService._create_photo(locked[pk]) for pk in pks]
+
+            paths = [ChunkedUploadService.part_path(locked[pk]) for pk in pks]
+            PhotoUploadSession.objects.filter(pk__in=pks).delete()
+            transaction.on_commit(lambda: ChunkedUploadService._remove_files(paths))
+        return photos
+
+    @staticmethod
+    def _verify(session):
+        if session.expire_le <= timezone.now():
+            raise ChunkedUploadError(f"{session.nom_fichier} : session expirée.", status_code=410)
+        if not session.est_complete:
+            raise ChunkedUploadError(
+                f"{session.nom_fichier} : upload incomplet ({session.offset}/{session.taille_totale}).",
+                status_code=409,
+            )
+
+        path = ChunkedUploadService.part_path(session)
+        hasher = hashlib.sha256()
+        with open(path, "rb") as part:
+            head = part.read(READ_BLOCK_SIZE)
+            block = head
+            while block:
+                hasher.update(block)
+                block = part.read(READ_BLOCK_SIZE)
+        if session.sha256 and hasher.hexdigest() != session.sha256.lower():
+            raise ChunkedUploadError(
+                f"{session.nom_fichier} : empreinte du fichier incorrecte.", status_code=CHECKSUM_MISMATCH
+            )
+        if sniff_content_type(head) not in ALLOWED_CONTENT_TYPES:
+            raise ChunkedUploadError(f"{session.nom_fichier} : format non autorisé. Accepté: JPG, PNG, WEBP", status_code=415)
+
+    @staticmethod
+    def _create_photo(session):
+        with open(ChunkedUploadService.part_path(session), "rb") as part:
+            return PhotoChantierUnite.objects.create(
+                avancement=session.avancement,
+                image=File(part, name=os.path.basename(session.nom_fichier)),
+                gps_lat=session.gps_lat,
+                gps_lng=session.gps_lng,
+                pris_le=session.pris_le,
+                description=session.description,
+            )
+
+    @staticmethod
+    def abort(session):
+        """Abandon explicite par le client (DELETE)."""
+        path = ChunkedUploadService.part_path(session)
+        session.delete()
+        transaction.on_commit(lambda: ChunkedUploadService._remove_files([path]))
+
+    @staticmethod
+    def purge_expired(now=None):
+        """
+        Supprimer les sessions expirées et leurs fichiers.
+
+        Returns:
+            int: Nombre de sessions supprimées
+        """
+        pks = list(
+            PhotoUploadSession.objects.filter(expire_le__lte=now or timezone.now()).values_list("pk", flat=True)
+        )
+        count, _ = PhotoUploadSession.objects.filter(pk__in=pks).delete()
+        upload_dir = ChunkedUploadService.upload_dir()
+        ChunkedUploadService._remove_files([os.path.join(upload_dir, f"{pk}.part") for pk in pks])
+        return count
+
+    @staticmethod
+    def _remove_files(paths):
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,211 @@
+"""
+Service de recherche à facettes sur les unités (caractéristiques JSON, prix, surface).
+
+Ce service gère:
+- Filtres sur les clés de Unite.caracteristiques (égalité, intervalles, booléens)
+- Filtres prix / surface / type de bien
+- Comptage des facettes en une seule requête : un GROUP BY par dimension, réunis par UNION ALL
+
+Paramètres reconnus (query string) :
+    carac.<clé>=valeur        égalité (répétable = OU), ex: carac.terrasse=true
+    carac.<clé>.min=n         borne basse numérique, ex: carac.chambres.min=3
+    carac.<clé>.max=n         borne haute numérique
+    prix_min, prix_max        prix TTC
+    surface_min, surface_max  surface habitable du modèle
+    type                      code du type de bien (répétable)
+"""
+
+import json
+import re
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count, F, JSONField, Max, Min, Q, Value
+from django.db.models.fields.json import KeyTransform
+from django.db.models.functions import Cast
+
+
+CARAC_PREFIX = "carac."
+CARAC_KEY_PATTERN = re.compile(r"^\w+$")
+
+# En jsonb : chaînes < nombres < booléens. Les deux bornes sont toujours posées
+# pour qu'un intervalle ne retienne que des valeurs numériques.
+RANGE_LIMIT = 10 ** 12
+
+DEFAULT_FACET_KEYS = ["chambres", "etage", "terrasse"]
+
+
+def _parse_json_value(raw):
+    """'3' → 3, 'true' → True, 'RDC' → 'RDC'."""
+    try:
+        return json.loads(raw)
+    except ValueError:
+        return raw
+
+
+def _null_column(expression):
+    """NULL du même type que expression, converti de la même façon à la lecture (clés JSON comprises)."""
+    if isinstance(expression, KeyTransform):
+        return KeyTransform(expression.key_name, Cast(Value(None), JSONField()))
+    return Value(None, output_field=expression.output_field)
+
+
+def _parse_decimal(raw):
+    try:
+        return Decimal(raw)
+    except (InvalidOperation, TypeError):
+        return None
+
+
+class FacetSearchService:
+    """Service pour la recherche à facettes du catalogue."""
+
+    @staticmethod
+    def facet_keys():
+        """Clés de caracteristiques exposées comme facettes (settings.CATALOGUE_FACET_KEYS)."""
+        return getattr(settings, "CATALOGUE_FACET_KEYS", DEFAULT_FACET_KEYS)
+
+    @staticmethod
+    def filter(queryset, params):
+        """
+        Appliquer les filtres à facettes.
+
+        Args:
+            queryset: QuerySet d'Unite
+            params: QueryDict (request.query_params)
+
+        Returns:
+            QuerySet filtré
+        """
+        equalities = {}
+        ranges = {}
+        for name in params:
+            if not name.startswith(CARAC_PREFIX):
+                continue
+            key, _, bound = name[len(CARAC_PREFIX):].partition(".")
+            if not CARAC_KEY_PATTERN.match(key):
+                continue
+            if bound in ("min", "max"):
+                value = _parse_decimal(params.get(name))
+                if value is not None:
+                    # Comparé à une valeur JSON : float sérialisable
+                    ranges.setdefault(key, {})[bound] = float(value)
+            elif not bound:
+                equalities[key] = [_parse_json_value(raw) for raw in params.getlist(name)]
+
+        # Containment @> : servi par l'index GIN jsonb_path_ops (PostgreSQL)
+        use_contains = connection.features.supports_json_field_contains
+        for key, values in equalities.items():
+            condition = Q()
+            for value in values:
+                if use_contains:
+                    condition |= Q(caracteristiques__contains={key: value})
+                else:
+                    condition |= Q(**{f"caracteristiques__{key}": value})
+            queryset = queryset.filter(condition)
+
+        for key, bounds in ranges.items():
+            queryset = queryset.filter(**{
+                f"caracteristiques__{key}__gte": bounds.get("min", -RANGE_LIMIT),
+                f"caracteristiques__{key}__lte": bounds.get("max", RANGE_LIMIT),
+            })
+
+        for param, lookup in (
+            ("prix_min", "prix_ttc__gte"),
+            ("prix_max", "prix_ttc__lte"),
+            ("surface_min", "modele_bien__surface_hab_m2__gte"),
+            ("surface_max", "modele_bien__surface_hab_m2__lte"),
+        ):
+            value = _parse_decimal(params.get(param))
+            if value is not None:
+                queryset = queryset.filter(**{lookup: value})
+
+        types = params.getlist("type")
+        if types:
+            queryset = queryset.filter(modele_bien__type_bien__code__in=types)
+
+        return queryset
+
+    @staticmethod
+    def facets(queryset):
+        """
+        Compter les unités par valeur pour chaque dimension.
+
+        Une branche GROUP BY par dimension (les colonnes des autres dimensions
+        valent NULL), réunies en une seule requête UNION ALL : chaque unité est
+        comptée une fois par dimension, quel que soit le nombre de dimensions.
+
+        Args:
+            queryset: QuerySet d'Unite annoté avec with_statut_reel()
+
+        Returns:
+            dict: {"type": [{"value": ..., "count": n}], ..., "prix_ttc": {"min", "max"}, "surface": {...}}
+        """
+        dimensions = {
+            "type": "modele_bien__type_bien__code",
+            "programme": "programme_id",
+            "statut": "statut_reel",
+        }
+        for key in FacetSearchService.facet_keys():
+            dimensions[key] = f"caracteristiques__{key}"
+
+        queryset = queryset.order_by()
+        columns = {name: f"facet_{index}" for index, name in enumerate(dimensions)}
+        # Colonnes résolues : modèle des NULL des autres branches
+        resolved = queryset.annotate(
+            **{columns[name]: F(lookup) for name, lookup in dimensions.items()}
+        ).query.annotations
+        branches = []
+        for name in dimensions:
+            branch = (
+                queryset.annotate(
+                    facet=Value(name),
+                    **{
+                        columns[other]: F(lookup) if other == name else _null_column(resolved[columns[other]])
+                        for other, lookup in dimensions.items()
+                    },
+                )
+                .values("facet", *columns.values())
+                .annotate(
+                    n=Count("pk"),
+                    prix_min=Min("prix_ttc"),
+                    prix_max=Max("prix_ttc"),
+                    surface_min=Min("modele_bien__surface_hab_m2"),
+                    surface_max=Max("modele_bien__surface_hab_m2"),
+                )
+            )
+            branches.append(branch)
+        rows = branches[0].union(*branches[1:], all=True)
+
+        counts = {name: {} for name in dimensions}
+        bounds = {"prix_ttc": {"min": None, "max": None}, "surface": {"min": None, "max": None}}
+        for row in rows:
+            name = row["facet"]
+            value = row[columns[name]]
+            if value is not None:
+                if name == "programme":
+                    value = str(value)
+                # Les valeurs JSON non hachables (listes, objets) sont comptées sous leur forme texte ;
+                # le type fait partie de la clé pour ne pas confondre true et 1
+                if not isinstance(value, (str, int, float, bool)):
+                    value = json.dumps(value)
+                bucket = (type(value).__name__, value)
+                counts[name][bucket] = counts[name].get(bucket, 0) + row["n"]
+            # Chaque branche couvre toutes les unités : bornes identiques d'une dimension à l'autre
+            for name, prefix in (("prix_ttc", "prix"), ("surface", "surface")):
+                low, high = row[f"{prefix}_min"], row[f"{prefix}_max"]
+                if low is not None and (bounds[name]["min"] is None or low < bounds[name]["min"]):
+                    bounds[name]["min"] = low
+                if high is not None and (bounds[name]["max"] is None or high > bounds[name]["max"]):
+                    bounds[name]["max"] = high
+
+        facets = {
+            name: [
+                {"value": value, "count": count}
+                for (_, value), count in sorted(values.items(), key=lambda item: (-item[1], str(item[0][1])))
+            ]
+            for name, values in counts.items()
+        }
+        facets.update(bounds)
+        return facets
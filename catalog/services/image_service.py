@@ -0,0 +1,250 @@
+"""
+Service de génération des dérivés d'images (vignette, moyenne, grande) en WebP et JPEG.
+
+Ce service gère:
+- Redimensionnement avec Pillow, orientation EXIF appliquée, métadonnées supprimées
+- Enregistrement des chemins des dérivés dans le champ `image_derives` du modèle
+- Exécution en arrière-plan après commit (pool de threads), hors de la requête
+- Construction des attributs srcset pour les templates et l'API
+"""
+
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+from django.db.models import Q
+from django.db.models.functions import Now
+from PIL import Image, ImageOps
+
+from core.services.conditional_get_service import ConditionalGetService
+
+
+logger = logging.getLogger(__name__)
+
+# Largeur maximale (px) de chaque dérivé, sans agrandissement
+SIZES = {
+    "thumb": 320,
+    "medium": 800,
+    "large": 1600,
+}
+
+FORMATS = {
+    "webp": ("WEBP", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", {"quality": 82, "optimize": True, "progressive": True}),
+}
+
+# Modèle → champ image traité
+IMAGE_FIELDS = {
+    "catalog.Programme": "image_principale",
+    "catalog.Unite": "image",
+    "catalog.PhotoChantier": "image",
+    "catalog.PhotoChantierUnite": "image",
+}
+
+DERIVATIVES_DIR = "derives"
+
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, "IMAGE_DERIVATIVES_WORKERS", 2),
+            thread_name_prefix="image-derives",
+        )
+    return _executor
+
+
+def _flatten(image):
+    """RGB sans transparence (fond blanc), requis pour le JPEG."""
+    if image.mode in ("RGBA", "LA", "P"):
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel("A"))
+        return background
+    return image.convert("RGB")
+
+
+def _paths(derives):
+    """Chemins des fichiers dérivés enregistrés dans derives."""
+    paths = set()
+    for size_name in SIZES:
+        entry = derives.get(size_name) or {}
+        paths.update(entry[ext] for ext in FORMATS if entry.get(ext))
+    return paths
+
+
+def _delete_files(derives, keep=()):
+    for path in _paths(derives) - set(keep):
+        default_storage.delete(path)
+
+
+class ImageDerivativeService:
+    """Service pour les dérivés d'images du catalogue et des chantiers."""
+
+    @staticmethod
+    def field_name(instance):
+        return IMAGE_FIELDS[instance._meta.label]
+
+    @staticmethod
+    def needs_processing(instance):
+        """Vrai si l'image a changé depuis la dernière génération."""
+        field_file = getattr(instance, ImageDerivativeService.field_name(instance))
+        return (field_file.name or "") != (instance.image_derives or {}).get("source", "")
+
+    @staticmethod
+    def schedule(instance):
+        """
+        Planifier la génération après le commit de la transaction courante.
+        En arrière-plan si settings.IMAGE_DERIVATIVES_ASYNC (défaut), sinon immédiatement.
+        """
+        label, pk = instance._meta.label, instance.pk
+
+        def run():
+            if getattr(settings, "IMAGE_DERIVATIVES_ASYNC", True):
+                _get_executor().submit(ImageDerivativeService._process_in_background, label, pk)
+            else:
+                ImageDerivativeService.process(label, pk)
+
+        transaction.on_commit(run)
+
+    @staticmethod
+    def _process_in_background(label, pk):
+        try:
+            ImageDerivativeService.process(label, pk)
+        finally:
+            # Connexions propres à ce thread du pool
+            connections.close_all()
+
+    @staticmethod
+    def process(label, pk, force=False):
+        """
+        Générer (ou supprimer) les dérivés d'un objet. Point d'entrée des tâches
+        d'arrière-plan et de la commande generate_image_derivatives.
+
+        Returns:
+            bool: True si des dérivés ont été (re)générés
+        """
+        model = apps.get_model(label)
+        instance = model.objects.filter(pk=pk).first()
+        if instance is None:
+            return False
+        if not force and not ImageDerivativeService.needs_processing(instance):
+            return False
+        field_name = ImageDerivativeService.field_name(instance)
+        source = getattr(instance, field_name).name
+        previous = instance.image_derives or {}
+        try:
+            derives = ImageDerivativeService.generate(instance)
+        except Exception:
+            logger.exception("Échec de génération des dérivés pour %s %s", label, pk)
+            return False
+        # Enregistrés seulement si l'image traitée est toujours celle de l'objet : une tâche
+        # plus ancienne, terminée après une plus récente, n'écrase pas ses dérivés
+        same_image = Q(**{field_name: source}) if source else Q(**{field_name: ""}) | Q(**{f"{field_name}__isnull": True})
+        if not model.objects.filter(same_image, pk=pk).update(image_derives=derives, updated_at=Now()):
+            if not ImageDerivativeService.source_in_use(source):
+                _delete_files(derives)
+            return False
+        # Anciens dérivés supprimés une fois les nouveaux enregistrés (mêmes chemins si même image),
+        # sauf si l'ancienne image, dédupliquée, est encore celle d'une autre ligne
+        if not ImageDerivativeService.source_in_use(previous.get("source")):
+            _delete_files(previous, keep=_paths(derives))
+        # update() sans post_save : ETag de l'API revalidé explicitement
+        ConditionalGetService.touch(label)
+        return bool(derives)
+
+    @staticmethod
+    def generate(instance):
+        """
+        Écrire les dérivés de l'image de l'objet dans son stockage. Les dérivés
+        enregistrés sur l'objet ne sont pas supprimés (voir process).
+
+        Returns:
+            dict: {"source": nom, "thumb": {"width", "webp", "jpeg"}, "medium": {...}, "large": {...}}
+                  ({} si l'objet n'a pas d'image)
+        """
+        field_file = getattr(instance, ImageDerivativeService.field_name(instance))
+        # Dérivés recalculables : stockage par défaut, même si l'original est dédupliqué
+        storage = default_storage
+        if not field_file.name:
+            return {}
+
+        with field_file.open("rb") as source:
+            image = Image.open(source)
+            image = ImageOps.exif_transpose(image)
+            image.load()
+
+        stem = os.path.splitext(field_file.name)[0]
+        derives = {"source": field_file.name}
+        for size_name, max_width in SIZES.items():
+            resized = image.copy()
+            resized.thumbnail((max_width, max_width), Image.Resampling.LANCZOS)
+            resized = _flatten(resized)
+            entry = {"width": resized.width}
+            for ext, (pil_format, options) in FORMATS.items():
+                buffer = BytesIO()
+                # Aucune métadonnée transmise : EXIF (GPS, appareil...) supprimé
+                resized.save(buffer, pil_format, **options)
+                path = f"{DERIVATIVES_DIR}/{stem}_{size_name}.{ext}"
+                if storage.exists(path):
+                    storage.delete(path)
+                entry[ext] = storage.save(path, ContentFile(buffer.getvalue()))
+            derives[size_name] = entry
+        return derives
+
+    @staticmethod
+    def source_in_use(name):
+        """
+        Vrai si une ligne, de l'un des modèles à dérivés, a name pour image. Les chemins
+        des dérivés dépendent du nom de l'image : une image dédupliquée (core.storage)
+        partage ses dérivés entre toutes les lignes qui l'utilisent.
+        """
+        return bool(name) and any(
+            apps.get_model(label).objects.filter(**{field_name: name}).exists()
+            for label, field_name in IMAGE_FIELDS.items()
+        )
+
+    @staticmethod
+    def delete(instance):
+        """Supprimer les fichiers dérivés enregistrés sur l'objet."""
+        _delete_files(instance.image_derives or {})
+
+    @staticmethod
+    def current_derives(instance):
+        """Dérivés de l'image actuelle de l'objet ({} tant qu'ils n'ont pas été générés pour elle)."""
+        field_file = getattr(instance, ImageDerivativeService.field_name(instance))
+        derives = instance.image_derives or {}
+        return derives if field_file.name and derives.get("source") == field_file.name else {}
+
+    @staticmethod
+    def srcset_entries(instance, ext="webp"):
+        """[(url, largeur), ...] des dérivés générés, du plus petit au plus grand."""
+        derives = ImageDerivativeService.current_derives(instance)
+        return [
+            (default_storage.url(derives[size_name][ext]), derives[size_name]["width"])
+            for size_name in SIZES
+            if (derives.get(size_name) or {}).get(ext)
+        ]
+
+    @staticmethod
+    def srcset(instance, ext="webp"):
+        """Attribut srcset ("url 320w, url 800w, ...") ou "" sans dérivés."""
+        return ", ".join(f"{url} {width}w" for url, width in ImageDerivativeService.srcset_entries(instance, ext))
+
+    @staticmethod
+    def url(instance, size_name="medium", ext="jpeg"):
+        """URL d'un dérivé, ou de l'original s'il n'a pas encore été généré."""
+        field_file = getattr(instance, ImageDerivativeService.field_name(instance))
+        if not field_file.name:
+            return ""
+        # Image remplacée, dérivés pas encore régénérés : original
+        path = (ImageDerivativeService.current_derives(instance).get(size_name) or {}).get(ext)
+        return default_storage.url(path) if path else field_file.url
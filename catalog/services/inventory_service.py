@@ -0,0 +1,145 @@
+"""
+Service de maintenance des compteurs de stock par programme (ProgrammeInventory).
+
+Ce service gère:
+- Recalcul des compteurs d'un ou plusieurs programmes en une requête groupée
+- Recalculs regroupés en fin de transaction (unités, réservations)
+- Totaux globaux pour la page publique des biens (lecture de la table d'inventaire)
+- Réconciliation complète (commande reconcile_inventory)
+"""
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from catalog.models import Programme, ProgrammeInventory, Unite
+from core.choices import UniteStatus
+from core.transactions import on_commit_batch
+
+
+COUNTER_FIELDS = {
+    UniteStatus.DISPONIBLE: "nb_disponible",
+    UniteStatus.RESERVE: "nb_reserve",
+    UniteStatus.VENDU: "nb_vendu",
+    UniteStatus.LIVRE: "nb_livre",
+}
+
+
+class InventoryService:
+    """Service pour les compteurs de stock par programme."""
+
+    @staticmethod
+    def compute(programme_ids=None):
+        """
+        Calculer les compteurs à partir des unités (une requête GROUP BY).
+
+        Args:
+            programme_ids: Itérable d'ids de programme (None = tous)
+
+        Returns:
+            dict: {programme_id: {"nb_disponible": n, ...}}
+        """
+        unites = Unite.objects.with_statut_reel()
+        if programme_ids is not None:
+            unites = unites.filter(programme_id__in=programme_ids)
+
+        counters = {}
+        rows = (
+            unites.values("programme_id", "statut_reel")
+            .annotate(n=Count("pk"))
+            .order_by()
+        )
+        for row in rows:
+            field = COUNTER_FIELDS.get(row["statut_reel"])
+            if field is None:
+                continue
+            programme_counters = counters.setdefault(row["programme_id"], dict.fromkeys(COUNTER_FIELDS.values(), 0))
+            programme_counters[field] += row["n"]
+        return counters
+
+    @staticmethod
+    def schedule_refresh(programme_ids=(), unite_ids=()):
+        """
+        Recalculer après commit les programmes donnés et ceux des unités données.
+        Les appels d'une même transaction sont regroupés en un seul recalcul.
+        """
+        items = [("programme", pk) for pk in programme_ids if pk] + [("unite", pk) for pk in unite_ids if pk]
+        on_commit_batch("inventory", items, InventoryService._refresh_batch)
+
+    @staticmethod
+    def _refresh_batch(items):
+        # Une requête pour tout le lot : programmes des unités, programmes supprimés depuis écartés
+        programmes = Programme.objects.filter(
+            Q(pk__in=[pk for kind, pk in items if kind == "programme"])
+            | Q(unites__in=[pk for kind, pk in items if kind == "unite"])
+        )
+        InventoryService.refresh(programmes.values_list("pk", flat=True).distinct())
+
+    @staticmethod
+    def refresh(programme_ids):
+        """
+        Recalculer et enregistrer les compteurs des programmes donnés.
+        S'exécute dans la transaction de l'appelant s'il y en a une.
+
+        Les lignes d'inventaire sont verrouillées avant le calcul : deux écritures
+        concurrentes sur un même programme se succèdent, et la seconde compte à
+        partir de l'état validé par la première.
+        """
+        programme_ids = {pid for pid in programme_ids if pid}
+        if not programme_ids:
+            return
+        empty = dict.fromkeys(COUNTER_FIELDS.values(), 0)
+        with transaction.atomic():
+            ProgrammeInventory.objects.bulk_create(
+                [ProgrammeInventory(programme_id=programme_id) for programme_id in programme_ids],
+                ignore_conflicts=True,
+            )
+            # Ordre stable des verrous : pas d'interblocage entre rafraîchissements multi-programmes
+            inventories = list(
+                ProgrammeInventory.objects.select_for_update()
+                .filter(programme_id__in=programme_ids)
+                .order_by("programme_id")
+            )
+            counters = InventoryService.compute(programme_ids)
+            now = timezone.now()
+            for inventory in inventories:
+                for field, value in counters.get(inventory.programme_id, empty).items():
+                    setattr(inventory, field, value)
+                inventory.updated_at = now
+            ProgrammeInventory.objects.bulk_update(inventories, [*empty, "updated_at"])
+
+    @staticmethod
+    def reconcile(dry_run=False):
+        """
+        Comparer les compteurs stockés au recalcul complet et corriger les écarts.
+
+        Returns:
+            list: ids des programmes dont les compteurs étaient faux ou absents
+        """
+        counters = InventoryService.compute()
+        stored = {
+            inv.programme_id: {field: getattr(inv, field) for field in COUNTER_FIELDS.values()}
+            for inv in ProgrammeInventory.objects.all()
+        }
+        empty = dict.fromkeys(COUNTER_FIELDS.values(), 0)
+        drifted = [
+            programme_id
+            for programme_id in Programme.objects.values_list("pk", flat=True)
+            if stored.get(programme_id) != counters.get(programme_id, empty)
+        ]
+        if drifted and not dry_run:
+            InventoryService.refresh(drifted)
+        return drifted
+
+    @staticmethod
+    def totals():
+        """
+        Totaux pour la page publique, lus dans la table d'inventaire.
+
+        Returns:
+            dict: nb_disponible, nb_reserve, nb_vendu, nb_livre, total
+        """
+        totals = ProgrammeInventory.objects.aggregate(**{field: Sum(field) for field in COUNTER_FIELDS.values()})
+        totals = {field: value or 0 for field, value in totals.items()}
+        totals["total"] = sum(totals.values())
+        return totals
@@ -0,0 +1,169 @@
+"""
+Service de regroupement (clustering) cartographique des unités et des programmes.
+
+Ce service gère:
+- Découpage en tuiles "slippy map" (Web Mercator) et en grille de cellules par tuile
+- Calcul des clusters en SQL (GROUP BY cellule) : centroïde, nombre, répartition par statut
+- Cache par (couche, zoom, tuile), invalidé par compteur de génération
+"""
+
+import math
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, F, FloatField, Sum, Value
+from django.db.models.functions import Cast, Cos, Floor, Ln, Radians, Tan
+
+from catalog.models import Programme, Unite
+from core.choices import UniteStatus
+
+
+CELLS_PER_TILE = 4
+MAX_TILES = 64
+MAX_LATITUDE = 85.05112878
+GENERATION_CACHE_KEY = "map_clusters_generation"
+LAYERS = ("unites", "programmes")
+
+# Compteurs ProgrammeInventory cumulés pour la couche "programmes"
+INVENTORY_FIELDS = {
+    UniteStatus.DISPONIBLE: "inventaire__nb_disponible",
+    UniteStatus.RESERVE: "inventaire__nb_reserve",
+    UniteStatus.VENDU: "inventaire__nb_vendu",
+    UniteStatus.LIVRE: "inventaire__nb_livre",
+}
+
+
+def tile_x(lng, zoom):
+    return int(math.floor((lng + 180.0) / 360.0 * (2 ** zoom)))
+
+
+def tile_y(lat, zoom):
+    lat = max(min(lat, MAX_LATITUDE), -MAX_LATITUDE)
+    lat_rad = math.radians(lat)
+    return int(math.floor((1.0 - math.asinh(math.tan(lat_rad)) / math.pi) / 2.0 * (2 ** zoom)))
+
+
+def tile_bounds(x, y, zoom):
+    """(south, west, north, east) d'une tuile."""
+    n = 2 ** zoom
+
+    def lat(row):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / n))))
+
+    return lat(y + 1), x / n * 360.0 - 180.0, lat(y), (x + 1) / n * 360.0 - 180.0
+
+
+def _cell_expressions(zoom):
+    """Indices de cellule (x, y) en SQL, à la résolution zoom + CELLS_PER_TILE."""
+    cells = float(2 ** zoom * CELLS_PER_TILE)
+    lat_rad = Radians(Cast("gps_lat", FloatField()))
+    cell_x = Floor((Cast("gps_lng", FloatField()) + 180.0) / 360.0 * cells)
+    # y Mercator : ln(tan(φ) + sec(φ))
+    mercator = Ln(Tan(lat_rad) + Value(1.0) / Cos(lat_rad))
+    cell_y = Floor((Value(1.0) - mercator / math.pi) / 2.0 * cells)
+    return cell_x, cell_y
+
+
+class MapClusterService:
+    """Service pour les clusters de la carte."""
+
+    @staticmethod
+    def generation():
+        """Compteur de génération courant (fait partie des clés de cache)."""
+        cache.add(GENERATION_CACHE_KEY, 1, None)
+        return cache.get(GENERATION_CACHE_KEY, 1)
+
+    @staticmethod
+    def invalidate():
+        """Rendre obsolètes tous les clusters en cache (changement de statut, de position...)."""
+        try:
+            cache.incr(GENERATION_CACHE_KEY)
+        except ValueError:
+            cache.set(GENERATION_CACHE_KEY, 2, None)
+
+    @staticmethod
+    def tiles_for_bbox(south, west, north, east, zoom):
+        """Tuiles (x, y) couvrant le rectangle ; ValueError au-delà de MAX_TILES."""
+        x_min, x_max = tile_x(west, zoom), min(tile_x(east, zoom), 2 ** zoom - 1)
+        y_min, y_max = tile_y(north, zoom), min(tile_y(south, zoom), 2 ** zoom - 1)
+        count = (x_max - x_min + 1) * (y_max - y_min + 1)
+        if count > MAX_TILES:
+            raise ValueError(f"Zone trop large pour ce zoom ({count} tuiles, maximum {MAX_TILES}).")
+        return [(x, y) for x in range(x_min, x_max + 1) for y in range(y_min, y_max + 1)]
+
+    @staticmethod
+    def clusters(layer, south, west, north, east, zoom):
+        """
+        Clusters de la couche ("unites" ou "programmes") dans le rectangle.
+
+        Returns:
+            list: [{"lat", "lng", "count", "statuts": {statut: n}}]
+        """
+        tiles = MapClusterService.tiles_for_bbox(south, west, north, east, zoom)
+        generation = MapClusterService.generation()
+        keys = {tile: f"map_clusters_{layer}_{generation}_{zoom}_{tile[0]}_{tile[1]}" for tile in tiles}
+
+        cached = cache.get_many(list(keys.values()))
+        missing = [tile for tile in tiles if keys[tile] not in cached]
+        if missing:
+            computed = MapClusterService._compute(layer, missing, zoom)
+            timeout = getattr(settings, "MAP_CLUSTER_CACHE_TIMEOUT", 600)
+            cache.set_many({keys[tile]: computed.get(tile, []) for tile in missing}, timeout)
+            cached.update({keys[tile]: computed.get(tile, []) for tile in missing})
+
+        return [cluster for tile in tiles for cluster in cached[keys[tile]]]
+
+    @staticmethod
+    def _compute(layer, tiles, zoom):
+        """Une requête GROUP BY sur l'emprise des tuiles manquantes → {tuile: clusters}."""
+        xs = [x for x, _ in tiles]
+        ys = [y for _, y in tiles]
+        south, west, _, _ = tile_bounds(min(xs), max(ys), zoom)
+        _, _, north, east = tile_bounds(max(xs), min(ys), zoom)
+
+        model = Unite if layer == "unites" else Programme
+        cell_x, cell_y = _cell_expressions(zoom)
+        queryset = (
+            model.objects.within_bbox(south, west, north, east)
+            .order_by()
+            .annotate(cell_x=cell_x, cell_y=cell_y)
+        )
+        totals = {
+            "n": Count("pk"),
+            "lat_sum": Sum(Cast("gps_lat", FloatField())),
+            "lng_sum": Sum(Cast("gps_lng", FloatField())),
+        }
+        if layer == "unites":
+            rows = queryset.values("cell_x", "cell_y", statut=F("statut_disponibilite")).annotate(**totals)
+        else:
+            totals.update({statut: Sum(field) for statut, field in INVENTORY_FIELDS.items()})
+            rows = queryset.values("cell_x", "cell_y").annotate(**totals)
+
+        cells = {}
+        for row in rows:
+            cell = cells.setdefault(
+                (int(row["cell_x"]), int(row["cell_y"])),
+                {"n": 0, "lat_sum": 0.0, "lng_sum": 0.0, "statuts": {}},
+            )
+            cell["n"] += row["n"]
+            cell["lat_sum"] += row["lat_sum"]
+            cell["lng_sum"] += row["lng_sum"]
+            if layer == "unites":
+                cell["statuts"][row["statut"]] = cell["statuts"].get(row["statut"], 0) + row["n"]
+            else:
+                for statut in INVENTORY_FIELDS:
+                    cell["statuts"][statut] = cell["statuts"].get(statut, 0) + (row[statut] or 0)
+
+        wanted = set(tiles)
+        result = {}
+        for (cx, cy), cell in cells.items():
+            tile = (cx // CELLS_PER_TILE, cy // CELLS_PER_TILE)
+            if tile not in wanted:
+                continue
+            result.setdefault(tile, []).append({
+                "lat": round(cell["lat_sum"] / cell["n"], 6),
+                "lng": round(cell["lng_sum"] / cell["n"], 6),
+                "count": cell["n"],
+                "statuts": cell["statuts"],
+            })
+        return result
@@ -0,0 +1,115 @@
+"""
+Service des messages de chantier (client <-> commercial).
+
+Ce service gère:
+- Visibilité : messages postérieurs au repère vide_jusqu_au de l'utilisateur
+  (SuiviMessagesChantier), hors suppressions isolées (MessageChantier.supprime_par)
+- Vider un chat : un seul upsert du repère, quel que soit le nombre de messages
+- Lecture : repère lu_jusqu_au, avancé à l'ouverture de la conversation
+- Non-lus par avancement en une requête groupée (tableaux de bord)
+"""
+
+from django.db.models import Count, F, FilteredRelation, Q
+from django.utils import timezone
+
+from catalog.models import MessageChantier, SuiviMessagesChantier
+
+
+def avec_suivi(queryset, user):
+    """Joindre (LEFT JOIN) le suivi de user sur l'avancement de chaque message, sous le nom `suivi`."""
+    return queryset.annotate(
+        suivi=FilteredRelation(
+            "avancement__suivis_messages", condition=Q(avancement__suivis_messages__user=user)
+        )
+    )
+
+
+def non_vide():
+    """Messages postérieurs au repère vide_jusqu_au (requiert avec_suivi)."""
+    return Q(suivi__vide_jusqu_au__isnull=True) | Q(created_at__gt=F("suivi__vide_jusqu_au"))
+
+
+class MessageChantierService:
+    """Service pour la visibilité, la suppression et la lecture des messages de chantier."""
+
+    @staticmethod
+    def _upsert(user, avancement, **reperes):
+        """Créer ou mettre à jour les repères (user, avancement) en une requête."""
+        SuiviMessagesChantier.objects.bulk_create(
+            [SuiviMessagesChantier(user=user, avancement=avancement, **reperes)],
+            update_conflicts=True,
+            unique_fields=["user", "avancement"],
+            update_fields=[*reperes, "updated_at"],
+        )
+
+    @staticmethod
+    def filtrer_visibles(user, messages):
+        """Restreindre un queryset de messages à ceux visibles pour user (non vidés, non supprimés)."""
+        return avec_suivi(messages, user).filter(non_vide()).exclude(supprime_par=user)
+
+    @staticmethod
+    def visibles(user, avancement):
+        """Messages de l'avancement visibles pour user."""
+        return MessageChantierService.filtrer_visibles(user, avancement.messages.all())
+
+    @staticmethod
+    def vider(user, avancement):
+        """Masquer tous les messages actuels de l'avancement pour user (et les marquer lus)."""
+        maintenant = timezone.now()
+        MessageChantierService._upsert(user, avancement, vide_jusqu_au=maintenant, lu_jusqu_au=maintenant)
+        # Suppressions isolées désormais couvertes par le repère
+        MessageChantier.supprime_par.through.objects.filter(
+            user=user, messagechantier__avancement=avancement
+        ).delete()
+
+    @staticmethod
+    def supprimer(user, message):
+        """
+        Masquer un message pour user. Le plus ancien message visible fait avancer le
+        repère (avec les suppressions isolées qui le suivent) ; sinon ligne supprime_par.
+        """
+        visibles = MessageChantierService.visibles(user, message.avancement).order_by("created_at")
+        if visibles.filter(created_at__lt=message.created_at).exists():
+            message.supprime_par.add(user)
+            return
+
+        suivant = visibles.exclude(pk=message.pk).filter(created_at__gt=message.created_at).first()
+        deja_supprimes = MessageChantier.supprime_par.through.objects.filter(
+            user=user, messagechantier__avancement=message.avancement
+        )
+        if suivant is not None:
+            deja_supprimes = deja_supprimes.filter(messagechantier__created_at__lt=suivant.created_at)
+        repere = max(
+            [message.created_at, *deja_supprimes.values_list("messagechantier__created_at", flat=True)]
+        )
+        MessageChantierService._upsert(user, message.avancement, vide_jusqu_au=repere)
+        deja_supprimes.delete()
+
+    @staticmethod
+    def marquer_lu(user, avancement):
+        """Tous les messages actuels de l'avancement sont lus par user."""
+        MessageChantierService._upsert(user, avancement, lu_jusqu_au=timezone.now())
+
+    @staticmethod
+    def non_lus(user, avancements=None):
+        """
+        Messages non lus par user, par avancement (une requête groupée) : visibles,
+        d'un autre auteur et postérieurs à son repère lu_jusqu_au.
+
+        Args:
+            avancements: queryset d'AvancementChantierUnite limitant le périmètre (optionnel)
+
+        Returns:
+            dict: {avancement_id: nombre de messages non lus}
+        """
+        messages = MessageChantier.objects.all()
+        if avancements is not None:
+            messages = messages.filter(avancement__in=avancements)
+        return dict(
+            MessageChantierService.filtrer_visibles(user, messages.exclude(auteur=user))
+            .filter(Q(suivi__lu_jusqu_au__isnull=True) | Q(created_at__gt=F("suivi__lu_jusqu_au")))
+            .order_by()
+            .values("avancement")
+            .annotate(n=Count("pk"))
+            .values_list("avancement", "n")
+        )
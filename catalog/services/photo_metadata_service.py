@@ -0,0 +1,175 @@
+"""
+Service d'extraction des métadonnées EXIF des photos de chantier.
+
+Ce service gère:
+- Lecture de la date de prise de vue (DateTimeOriginal + OffsetTimeOriginal)
+  et des coordonnées GPS enregistrées par l'appareil
+- Remplissage de pris_le / gps_lat / gps_lng laissés vides à l'enregistrement d'une nouvelle image
+- Vérification géographique : distance au programme et drapeau gps_hors_zone
+  au-delà de settings.PHOTO_GEO_RADIUS_KM
+"""
+
+import logging
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.apps import apps
+from django.conf import settings
+from django.utils import timezone
+from PIL import ExifTags, Image
+
+from core.querysets import distance_km
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_GEO_RADIUS_KM = 2
+EXIF_DATE_FORMAT = "%Y:%m:%d %H:%M:%S"
+
+# Chemin de la photo vers son programme
+PROGRAMME_PATHS = {
+    "catalog.PhotoChantier": ("avancement", "etape", "programme"),
+    "catalog.PhotoChantierUnite": ("avancement", "unite", "programme"),
+}
+
+
+def _parse_datetime(value, offset=None):
+    """'2025:03:14 09:26:53' (+ '+01:00') → datetime aware, ou None."""
+    try:
+        parsed = datetime.strptime(str(value).strip("\x00 "), EXIF_DATE_FORMAT)
+    except (TypeError, ValueError):
+        return None
+    if offset:
+        try:
+            sign = -1 if offset.startswith("-") else 1
+            hours, minutes = offset.lstrip("+-").split(":")
+            tz = dt_timezone(sign * timedelta(hours=int(hours), minutes=int(minutes)))
+            return parsed.replace(tzinfo=tz)
+        except ValueError:
+            pass
+    # Sans décalage enregistré : heure locale du chantier
+    return timezone.make_aware(parsed)
+
+
+def _parse_coordinate(values, ref, limit):
+    """((deg, min, sec), 'N'|'S'|'E'|'W') → Decimal signé à 6 décimales, ou None."""
+    try:
+        degrees, minutes, seconds = (float(value) for value in values)
+    except (TypeError, ValueError, ZeroDivisionError):
+        return None
+    coordinate = degrees + minutes / 60 + seconds / 3600
+    if coordinate != coordinate or coordinate > limit:  # NaN (dénominateur nul) ou hors limites
+        return None
+    if str(ref).strip("\x00 ").upper() in ("S", "W"):
+        coordinate = -coordinate
+    return Decimal(f"{coordinate:.6f}")
+
+
+class PhotoMetadataService:
+    """Service pour les métadonnées EXIF et la vérification GPS des photos de chantier."""
+
+    @staticmethod
+    def radius_km():
+        return getattr(settings, "PHOTO_GEO_RADIUS_KM", DEFAULT_GEO_RADIUS_KM)
+
+    @staticmethod
+    def extract(fileobj):
+        """
+        Lire les métadonnées EXIF d'une image (en-têtes uniquement, sans décoder les pixels).
+
+        Returns:
+            dict: {"pris_le": datetime|None, "gps_lat": Decimal|None, "gps_lng": Decimal|None}
+        """
+        metadata = {"pris_le": None, "gps_lat": None, "gps_lng": None}
+        try:
+            with Image.open(fileobj) as image:
+                exif = image.getexif()
+        except Exception:
+            logger.warning("EXIF illisible", exc_info=True)
+            return metadata
+
+        details = exif.get_ifd(ExifTags.IFD.Exif)
+        metadata["pris_le"] = _parse_datetime(
+            details.get(ExifTags.Base.DateTimeOriginal) or exif.get(ExifTags.Base.DateTime),
+            details.get(ExifTags.Base.OffsetTimeOriginal),
+        )
+
+        gps = exif.get_ifd(ExifTags.IFD.GPSInfo)
+        lat = _parse_coordinate(gps.get(ExifTags.GPS.GPSLatitude), gps.get(ExifTags.GPS.GPSLatitudeRef), 90)
+        lng = _parse_coordinate(gps.get(ExifTags.GPS.GPSLongitude), gps.get(ExifTags.GPS.GPSLongitudeRef), 180)
+        # (0, 0) : GPS non verrouillé au moment de la prise de vue
+        if lat is not None and lng is not None and (lat, lng) != (0, 0):
+            metadata["gps_lat"], metadata["gps_lng"] = lat, lng
+        return metadata
+
+    @staticmethod
+    def programme_of(photo):
+        obj = photo
+        for attr in PROGRAMME_PATHS[photo._meta.label]:
+            obj = getattr(obj, attr, None)
+            if obj is None:
+                return None
+        return obj
+
+    @staticmethod
+    def verify_location(photo):
+        """Renseigner distance_programme_km et gps_hors_zone (None si non vérifiable)."""
+        programme = PhotoMetadataService.programme_of(photo) if photo.gps_lat is not None else None
+        if photo.gps_lng is None or programme is None or programme.gps_lat is None or programme.gps_lng is None:
+            photo.distance_programme_km = None
+            photo.gps_hors_zone = None
+            return
+        distance = distance_km(photo.gps_lat, photo.gps_lng, programme.gps_lat, programme.gps_lng)
+        photo.distance_programme_km = round(distance, 3)
+        photo.gps_hors_zone = distance > PhotoMetadataService.radius_km()
+
+    @staticmethod
+    def populate(photo, overwrite=False):
+        """
+        Appliquer l'EXIF de l'image à la photo : la date et la position enregistrées
+        par l'appareil remplissent les champs laissés vides à l'upload (tous avec
+        overwrite). Sans date EXIF ni date fournie, pris_le prend l'heure courante.
+        """
+        field_file = photo.image
+        if field_file._committed:
+            with field_file.open("rb") as handle:
+                metadata = PhotoMetadataService.extract(handle)
+        else:
+            # Fichier en cours d'upload : relu depuis le début puis rembobiné pour le stockage
+            upload = field_file.file
+            upload.seek(0)
+            metadata = PhotoMetadataService.extract(upload)
+            upload.seek(0)
+
+        if photo.pris_le is None or (overwrite and metadata["pris_le"] is not None):
+            photo.pris_le = metadata["pris_le"] or timezone.now()
+        if metadata["gps_lat"] is not None and (overwrite or (photo.gps_lat is None and photo.gps_lng is None)):
+            photo.gps_lat, photo.gps_lng = metadata["gps_lat"], metadata["gps_lng"]
+        PhotoMetadataService.verify_location(photo)
+
+    @staticmethod
+    def process(label, pk):
+        """
+        Réappliquer l'EXIF à une photo existante (commande extract_photo_metadata) :
+        pris_le, obligatoire, a pu être rempli à l'upload sans EXIF, d'où overwrite.
+
+        Returns:
+            bool: True si la photo a été mise à jour
+        """
+        model = apps.get_model(label)
+        related = "__".join(PROGRAMME_PATHS[label])
+        photo = model.objects.select_related(related).filter(pk=pk).first()
+        if photo is None or not photo.image:
+            return False
+        fields = ("pris_le", "gps_lat", "gps_lng", "distance_programme_km", "gps_hors_zone")
+        before = [getattr(photo, field) for field in fields]
+        try:
+            PhotoMetadataService.populate(photo, overwrite=True)
+        except OSError:
+            logger.exception("Image introuvable pour %s %s", label, pk)
+            return False
+        values = {field: getattr(photo, field) for field in fields}
+        if list(values.values()) == before:
+            return False
+        model.objects.filter(pk=pk).update(**values)
+        return True
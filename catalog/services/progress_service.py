@@ -0,0 +1,155 @@
+"""
+Service de calcul de l'avancement global pondéré des chantiers.
+
+Ce service gère:
+- Dernier avancement de chaque étape (DISTINCT ON sous PostgreSQL)
+- Avancement du programme : moyenne des étapes (EtapeChantier) pondérée par leur poids,
+  une étape sans avancement comptant pour 0
+- Avancement d'une unité : ses étapes (AvancementChantierUnite.etape) rapprochées des
+  étapes du programme par libellé ou code ; à défaut, son pourcentage maximal
+- Cache (Redis) par programme et par unité, invalidé à chaque écriture d'avancement
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import OuterRef, Subquery
+
+from catalog.models import AvancementChantier, AvancementChantierUnite, EtapeChantier, Unite
+from core.transactions import on_commit_batch
+
+
+DEFAULT_CACHE_TIMEOUT = 3600
+PROGRAMME_CACHE_PREFIX = "progress_programme_"
+UNITE_CACHE_PREFIX = "progress_unite_"
+LATEST_ORDERING = ("-date_pointage", "-created_at")
+
+
+def latest_per(queryset, *keys):
+    """Dernier pointage (date_pointage, puis created_at) par valeur de keys."""
+    if connection.features.can_distinct_on_fields:
+        return queryset.order_by(*keys, *LATEST_ORDERING).distinct(*keys)
+    # Bases sans DISTINCT ON (tests SQLite) : même résultat par sous-requête corrélée
+    latest = (
+        queryset.model.objects.filter(**{key: OuterRef(key) for key in keys})
+        .order_by(*LATEST_ORDERING)
+        .values("pk")[:1]
+    )
+    return queryset.filter(pk=Subquery(latest))
+
+
+def weighted(poids_par_etape, pourcentages):
+    """Moyenne pondérée (arrondie à 0,1) ; None si aucune étape pondérée."""
+    total = sum(poids_par_etape.values())
+    if not total:
+        return None
+    cumul = sum(poids * min(pourcentages.get(etape, 0), 100) for etape, poids in poids_par_etape.items())
+    return round(cumul / total, 1)
+
+
+class ProgressService:
+    """Service pour l'avancement global des programmes et des unités."""
+
+    @staticmethod
+    def cache_timeout():
+        return getattr(settings, "PROGRESS_CACHE_TIMEOUT", DEFAULT_CACHE_TIMEOUT)
+
+    @staticmethod
+    def _cached(prefix, ids, compute):
+        """Valeurs en cache pour ids ; les manquantes sont calculées en un seul lot."""
+        keys = {pk: f"{prefix}{pk}" for pk in ids}
+        cached = cache.get_many(list(keys.values()))
+        missing = [pk for pk in ids if keys[pk] not in cached]
+        if missing:
+            computed = compute(missing)
+            values = {keys[pk]: computed[pk] for pk in missing}
+            cache.set_many(values, ProgressService.cache_timeout())
+            cached.update(values)
+        return {pk: cached[keys[pk]] for pk in ids}
+
+    @staticmethod
+    def programme_progress(programme_ids):
+        """
+        Avancement pondéré des programmes (2 requêtes pour les programmes absents du cache).
+
+        Returns:
+            dict: {programme_id: {"avancement": float|None, "etapes": n, "etapes_terminees": n}}
+        """
+        return ProgressService._cached(PROGRAMME_CACHE_PREFIX, list(programme_ids), ProgressService.compute_programmes)
+
+    @staticmethod
+    def compute_programmes(programme_ids):
+        poids = {pk: {} for pk in programme_ids}
+        for etape_id, programme_id, etape_poids in EtapeChantier.objects.filter(
+            programme_id__in=programme_ids
+        ).values_list("pk", "programme_id", "poids"):
+            poids[programme_id][etape_id] = etape_poids
+
+        pourcentages = dict(
+            latest_per(AvancementChantier.objects.filter(etape__programme_id__in=programme_ids), "etape_id")
+            .values_list("etape_id", "pourcentage")
+        )
+        return {
+            programme_id: {
+                "avancement": weighted(etapes, pourcentages),
+                "etapes": len(etapes),
+                "etapes_terminees": sum(1 for etape_id in etapes if pourcentages.get(etape_id, 0) >= 100),
+            }
+            for programme_id, etapes in poids.items()
+        }
+
+    @staticmethod
+    def unite_progress(unite_ids):
+        """
+        Avancement pondéré des unités (3 requêtes pour les unités absentes du cache).
+
+        Returns:
+            dict: {unite_id: float|None}
+        """
+        return ProgressService._cached(UNITE_CACHE_PREFIX, list(unite_ids), ProgressService.compute_unites)
+
+    @staticmethod
+    def compute_unites(unite_ids):
+        unites = list(Unite.objects.filter(pk__in=unite_ids).values_list("pk", "programme_id", "max_pourcentage"))
+
+        # Étapes du programme, retrouvées par libellé ou par code
+        poids, alias = {}, {}
+        for etape_id, programme_id, code, libelle, etape_poids in EtapeChantier.objects.filter(
+            programme_id__in={programme_id for _, programme_id, _ in unites}
+        ).values_list("pk", "programme_id", "code", "libelle", "poids"):
+            poids.setdefault(programme_id, {})[etape_id] = etape_poids
+            for name in (code, libelle):
+                alias[(programme_id, name.strip().lower())] = etape_id
+
+        pointages = {}
+        for unite_id, etape, pourcentage in latest_per(
+            AvancementChantierUnite.objects.filter(unite_id__in=unite_ids), "unite_id", "etape"
+        ).values_list("unite_id", "etape", "pourcentage"):
+            pointages.setdefault(unite_id, []).append((etape.strip().lower(), pourcentage))
+
+        progress = {pk: None for pk in unite_ids}
+        for unite_id, programme_id, max_pourcentage in unites:
+            pourcentages = {}
+            for etape, pourcentage in pointages.get(unite_id, []):
+                etape_id = alias.get((programme_id, etape))
+                if etape_id is not None:
+                    pourcentages[etape_id] = max(pourcentage, pourcentages.get(etape_id, 0))
+            if pourcentages:
+                progress[unite_id] = weighted(poids[programme_id], pourcentages)
+            else:
+                # Pointages hors des étapes du programme : pourcentage global saisi
+                progress[unite_id] = float(max_pourcentage or 0)
+        return progress
+
+    @staticmethod
+    def invalidate_programmes(programme_ids):
+        """Après commit ; les invalidations d'une même transaction sont regroupées."""
+        on_commit_batch("progress_programmes", programme_ids, lambda ids: cache.delete_many(
+            [f"{PROGRAMME_CACHE_PREFIX}{pk}" for pk in ids]
+        ))
+
+    @staticmethod
+    def invalidate_unites(unite_ids):
+        on_commit_batch("progress_unites", unite_ids, lambda ids: cache.delete_many(
+            [f"{UNITE_CACHE_PREFIX}{pk}" for pk in ids]
+        ))
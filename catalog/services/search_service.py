@@ -0,0 +1,161 @@
+"""
+Service de recherche plein texte du catalogue (PostgreSQL, configuration "french").
+
+Ce service gère:
+- Construction des colonnes tsvector de Programme et Unite (requêtes UPDATE ensemblistes)
+- Recherche classée (SearchRank) sur ces colonnes, indexées en GIN
+- Repli sur des filtres icontains hors PostgreSQL (développement local)
+"""
+
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, SearchVectorField
+from django.db import connection
+from django.db.models import F, Func, OuterRef, Q, Subquery
+
+from catalog.models import ModeleBien, Programme, Unite
+
+
+SEARCH_CONFIG = "french"
+
+# Champs utilisés quand la recherche plein texte n'est pas disponible
+FALLBACK_FIELDS = {
+    Programme: ["nom", "adresse", "description"],
+    Unite: ["reference_lot", "programme__nom", "modele_bien__nom_marketing"],
+}
+
+
+class TsvectorConcat(Func):
+    """Concaténation de plusieurs tsvector (opérateur ||)."""
+
+    arg_joiner = " || "
+    template = "(%(expressions)s)"
+    output_field = SearchVectorField()
+
+
+class JsonbStringsTsvector(Func):
+    """tsvector pondéré des valeurs texte d'une colonne jsonb (clés ignorées)."""
+
+    template = (
+        "setweight(jsonb_to_tsvector('" + SEARCH_CONFIG + "'::regconfig, "
+        "COALESCE(%(expressions)s, '{}'::jsonb), '[\"string\"]'), '%(weight)s')"
+    )
+    output_field = SearchVectorField()
+
+    def __init__(self, expression, weight="C", **extra):
+        super().__init__(expression, weight=weight, **extra)
+
+
+def programme_vector():
+    """Expression tsvector d'un programme : nom (A), adresse (B), description (C)."""
+    return (
+        SearchVector("nom", weight="A", config=SEARCH_CONFIG)
+        + SearchVector("adresse", weight="B", config=SEARCH_CONFIG)
+        + SearchVector("description", weight="C", config=SEARCH_CONFIG)
+    )
+
+
+def unite_vector(programme_model=Programme, modele_model=ModeleBien):
+    """
+    Expression tsvector d'une unité : référence du lot (A), modèle et programme (B),
+    adresse, type de bien et valeurs texte des caractéristiques (C),
+    description du modèle (D).
+
+    Les modèles sont paramétrables pour être utilisables depuis une migration.
+    """
+    programme = programme_model.objects.filter(pk=OuterRef("programme_id")).order_by()
+    modele = modele_model.objects.filter(pk=OuterRef("modele_bien_id")).order_by()
+    return TsvectorConcat(
+        SearchVector("reference_lot", weight="A", config=SEARCH_CONFIG),
+        SearchVector(
+            Subquery(modele.values("nom_marketing")[:1]),
+            Subquery(programme.values("nom")[:1]),
+            weight="B",
+            config=SEARCH_CONFIG,
+        ),
+        SearchVector(
+            Subquery(programme.values("adresse")[:1]),
+            Subquery(modele.values("type_bien__libelle")[:1]),
+            weight="C",
+            config=SEARCH_CONFIG,
+        ),
+        JsonbStringsTsvector("caracteristiques", weight="C"),
+        SearchVector(Subquery(modele.values("description")[:1]), weight="D", config=SEARCH_CONFIG),
+    )
+
+
+class SearchService:
+    """Service pour la recherche plein texte du catalogue."""
+
+    @staticmethod
+    def is_available():
+        """La recherche plein texte nécessite PostgreSQL."""
+        return connection.vendor == "postgresql"
+
+    @staticmethod
+    def refresh_programmes(**filters):
+        """
+        Recalculer la colonne search_vector des programmes filtrés (un seul UPDATE).
+
+        Exemple: SearchService.refresh_programmes(pk=programme.pk)
+        """
+        if not SearchService.is_available():
+            return 0
+        return Programme.objects.filter(**filters).update(search_vector=programme_vector())
+
+    @staticmethod
+    def refresh_unites(**filters):
+        """
+        Recalculer la colonne search_vector des unités filtrées (un seul UPDATE).
+
+        Exemple: SearchService.refresh_unites(programme_id=programme.pk)
+        """
+        if not SearchService.is_available():
+            return 0
+        return Unite.objects.filter(**filters).update(search_vector=unite_vector())
+
+    @staticmethod
+    def build_query(terms):
+        """
+        Construire la requête tsquery : chaque mot est obligatoire et
+        reconnu par préfixe (recherche au fil de la saisie).
+
+        Returns:
+            SearchQuery ou None si aucun mot exploitable
+        """
+        words = re.findall(r"\w+", terms or "")
+        if not words:
+            return None
+        raw = " & ".join(f"{word}:*" for word in words)
+        return SearchQuery(raw, search_type="raw", config=SEARCH_CONFIG)
+
+    @staticmethod
+    def search(queryset, terms, order_by_rank=True):
+        """
+        Filtrer un queryset Programme/Unite par recherche plein texte.
+
+        Args:
+            queryset: QuerySet de Programme ou d'Unite
+            terms: Texte saisi par l'utilisateur
+            order_by_rank: Trier par pertinence décroissante (annotation `rank`)
+
+        Returns:
+            QuerySet filtré (inchangé si aucun mot exploitable)
+        """
+        terms = (terms or "").strip()
+        if not terms:
+            return queryset
+
+        if not SearchService.is_available():
+            condition = Q()
+            for field in FALLBACK_FIELDS[queryset.model]:
+                condition |= Q(**{f"{field}__icontains": terms})
+            return queryset.filter(condition)
+
+        query = SearchService.build_query(terms)
+        if query is None:
+            return queryset
+        queryset = queryset.filter(search_vector=query)
+        if order_by_rank:
+            queryset = queryset.annotate(rank=SearchRank(F("search_vector"), query)).order_by("-rank", "pk")
+        return queryset
@@ -0,0 +1,22 @@
+"""
+Signaux du catalogue, un module par préoccupation : statuts de chantier,
+avancement global, compteurs de stock, index de recherche, clusters de la
+carte, métadonnées des photos, dérivés d'images, événements temps réel et
+cache des pages publiques.
+
+Les validateurs des requêtes conditionnelles de l'API vivent dans api.signals.
+"""
+
+# Ordre d'enregistrement significatif : progress lit l'avancement précédent
+# mémorisé par le pre_save de chantier_status.
+from catalog.signals import (  # noqa: F401
+    chantier_status,
+    progress,
+    inventory,
+    search,
+    map_clusters,
+    photo_metadata,
+    image_derivatives,
+    chantier_events,
+    page_cache,
+)
@@ -0,0 +1,25 @@
+"""
+Événements temps réel du suivi de chantier : messages et photos (voir ChantierEventService).
+"""
+
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from catalog.models import MessageChantier, PhotoChantierUnite
+from catalog.services.chantier_event_service import ChantierEventService
+
+
+@receiver(post_save, sender=MessageChantier)
+def publish_message_chantier(sender, instance, created, raw=False, **kwargs):
+    """Nouveau message, ou réponse du commercial enregistrée sur le message."""
+    if raw:
+        return
+    if created:
+        ChantierEventService.message_saved(instance)
+    elif instance.reponse:
+        ChantierEventService.message_saved(instance, "reponse")
+
+
+@receiver(post_save, sender=PhotoChantierUnite)
+def publish_photo_chantier(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        ChantierEventService.photos_added([instance])
@@ -0,0 +1,54 @@
+"""
+Statut de chantier des unités, maintenu de façon incrémentale (voir ChantierStatusService).
+"""
+
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from catalog.models import AvancementChantierUnite
+from catalog.services.chantier_status_service import ChantierStatusService
+
+
+AVANCEMENT_STATUT_FIELDS = {"unite", "unite_id", "pourcentage", "date_pointage"}
+
+
+@receiver(pre_save, sender=AvancementChantierUnite)
+def remember_avancement_previous_values(sender, instance, update_fields=None, **kwargs):
+    """Mémoriser unité / pourcentage / date avant modification."""
+    instance._previous_avancement = None
+    if instance._state.adding:
+        return
+    if update_fields is not None and not AVANCEMENT_STATUT_FIELDS.intersection(update_fields):
+        return
+    instance._previous_avancement = (
+        AvancementChantierUnite.objects.filter(pk=instance.pk)
+        .values_list("unite_id", "pourcentage", "date_pointage")
+        .first()
+    )
+
+
+@receiver(post_save, sender=AvancementChantierUnite)
+def update_unite_statut_chantier(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """
+    Avancement ajouté ou revu à la hausse → UPDATE conditionnel de l'unité ;
+    baisse, changement de date antérieure ou d'unité → recalcul après commit.
+    """
+    if raw:
+        return
+    if update_fields is not None and not AVANCEMENT_STATUT_FIELDS.intersection(update_fields):
+        return
+    previous = getattr(instance, "_previous_avancement", None)
+    if previous is not None:
+        unite_id, pourcentage, date_pointage = previous
+        if unite_id != instance.unite_id:
+            ChantierStatusService.schedule_recompute({unite_id, instance.unite_id})
+            return
+        if instance.pourcentage < pourcentage or instance.date_pointage < date_pointage:
+            ChantierStatusService.schedule_recompute({instance.unite_id})
+            return
+    ChantierStatusService.apply_avancement(instance)
+
+
+@receiver(post_delete, sender=AvancementChantierUnite)
+def update_unite_statut_chantier_on_delete(sender, instance, **kwargs):
+    """Suppression → recalcul par agrégat après commit."""
+    ChantierStatusService.schedule_recompute({instance.unite_id})
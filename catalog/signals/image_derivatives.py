@@ -0,0 +1,32 @@
+"""
+Dérivés d'images : vignette / moyenne / grande, WebP + JPEG (voir ImageDerivativeService).
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from catalog.models import PhotoChantier, PhotoChantierUnite, Programme, Unite
+from catalog.services.image_service import ImageDerivativeService
+
+
+@receiver(post_save, sender=Programme)
+@receiver(post_save, sender=Unite)
+@receiver(post_save, sender=PhotoChantier)
+@receiver(post_save, sender=PhotoChantierUnite)
+def schedule_image_derivatives(sender, instance, raw=False, **kwargs):
+    """Nouvelle image (ou image retirée) → génération en arrière-plan après commit."""
+    if raw or not ImageDerivativeService.needs_processing(instance):
+        return
+    ImageDerivativeService.schedule(instance)
+
+
+@receiver(post_delete, sender=Programme)
+@receiver(post_delete, sender=Unite)
+@receiver(post_delete, sender=PhotoChantier)
+@receiver(post_delete, sender=PhotoChantierUnite)
+def delete_image_derivatives(sender, instance, **kwargs):
+    # Image dédupliquée (core.storage) encore utilisée par une autre ligne, de ce modèle ou d'un
+    # autre (PhotoChantier / PhotoChantierUnite) : dérivés partagés conservés
+    if ImageDerivativeService.source_in_use(getattr(instance, ImageDerivativeService.field_name(instance)).name):
+        return
+    transaction.on_commit(lambda: ImageDerivativeService.delete(instance))
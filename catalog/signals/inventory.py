@@ -0,0 +1,44 @@
+"""
+Compteurs de stock par programme, recalculés après commit (voir InventoryService).
+"""
+
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from catalog.models import Unite
+from catalog.services.inventory_service import InventoryService
+
+
+INVENTORY_FIELDS = {"statut_disponibilite", "programme", "programme_id"}
+
+
+@receiver(pre_save, sender=Unite)
+def remember_unite_previous_programme(sender, instance, update_fields=None, **kwargs):
+    """Mémoriser l'ancien programme si l'unité peut en changer."""
+    instance._previous_programme_id = None
+    if instance._state.adding:
+        return
+    if update_fields is not None and "programme" not in update_fields:
+        return
+    instance._previous_programme_id = (
+        Unite.objects.filter(pk=instance.pk).values_list("programme_id", flat=True).first()
+    )
+
+
+@receiver(post_save, sender=Unite)
+def update_inventory_on_unite_save(sender, instance, created, update_fields=None, **kwargs):
+    """Statut/programme modifié → recalcul des compteurs du (des) programme(s) après commit."""
+    if update_fields is not None and not INVENTORY_FIELDS.intersection(update_fields):
+        return
+    InventoryService.schedule_refresh({instance.programme_id, getattr(instance, "_previous_programme_id", None)})
+
+
+@receiver(post_delete, sender=Unite)
+def update_inventory_on_unite_delete(sender, instance, **kwargs):
+    InventoryService.schedule_refresh({instance.programme_id})
+
+
+@receiver(post_save, sender="sales.Reservation")
+@receiver(post_delete, sender="sales.Reservation")
+def update_inventory_on_reservation_change(sender, instance, **kwargs):
+    """Le statut réel d'une unité dépend de ses réservations (programme résolu après commit)."""
+    InventoryService.schedule_refresh(unite_ids={instance.unite_id})
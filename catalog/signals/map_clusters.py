@@ -0,0 +1,41 @@
+"""
+Cache des clusters de la carte (voir MapClusterService).
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from catalog.models import Programme, Unite
+from catalog.services.map_cluster_service import MapClusterService
+
+
+MAP_UNITE_FIELDS = {"statut_disponibilite", "gps_lat", "gps_lng", "programme", "programme_id"}
+MAP_PROGRAMME_FIELDS = {"gps_lat", "gps_lng"}
+
+
+def invalidate_map_clusters():
+    """Après commit, pour ne pas remettre en cache un état non validé."""
+    transaction.on_commit(MapClusterService.invalidate)
+
+
+@receiver(post_save, sender=Unite)
+def invalidate_map_on_unite_save(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not MAP_UNITE_FIELDS.intersection(update_fields):
+        return
+    invalidate_map_clusters()
+
+
+@receiver(post_save, sender=Programme)
+def invalidate_map_on_programme_save(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not MAP_PROGRAMME_FIELDS.intersection(update_fields):
+        return
+    invalidate_map_clusters()
+
+
+@receiver(post_delete, sender=Unite)
+@receiver(post_delete, sender=Programme)
+@receiver(post_save, sender="sales.Reservation")
+@receiver(post_delete, sender="sales.Reservation")
+def invalidate_map_on_change(sender, instance, **kwargs):
+    """Suppression, ou réservation (compteurs de la couche "programmes")."""
+    invalidate_map_clusters()
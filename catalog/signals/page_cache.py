@@ -0,0 +1,21 @@
+"""
+Cache des pages publiques du catalogue, par génération incrémentée (voir PageCacheService).
+"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from catalog.models import ModeleBien, Programme, Unite
+from core.services.page_cache_service import PageCacheService
+
+
+@receiver(post_save, sender=Programme)
+@receiver(post_delete, sender=Programme)
+@receiver(post_save, sender=Unite)
+@receiver(post_delete, sender=Unite)
+@receiver(post_save, sender=ModeleBien)
+@receiver(post_delete, sender=ModeleBien)
+@receiver(post_save, sender="sales.Reservation")
+@receiver(post_delete, sender="sales.Reservation")
+def invalidate_page_cache(sender, instance, raw=False, **kwargs):
+    if not raw:
+        PageCacheService.bump()
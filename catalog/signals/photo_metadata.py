@@ -0,0 +1,41 @@
+"""
+Métadonnées des photos de chantier : EXIF et vérification GPS (voir PhotoMetadataService).
+"""
+
+from django.db.models.signals import post_init, post_save, pre_save
+from django.dispatch import receiver
+from catalog.models import PhotoChantier, PhotoChantierUnite
+from catalog.services.photo_metadata_service import PhotoMetadataService
+
+
+PHOTO_LOCATION_FIELDS = ("avancement_id", "gps_lat", "gps_lng")
+
+
+def _photo_location(instance):
+    return tuple(instance.__dict__.get(attname) for attname in PHOTO_LOCATION_FIELDS)
+
+
+@receiver(post_init, sender=PhotoChantier)
+@receiver(post_init, sender=PhotoChantierUnite)
+@receiver(post_save, sender=PhotoChantier)
+@receiver(post_save, sender=PhotoChantierUnite)
+def remember_photo_location(sender, instance, **kwargs):
+    """Position enregistrée, pour ne revérifier la distance qu'après un changement."""
+    instance._saved_location = _photo_location(instance)
+
+
+@receiver(pre_save, sender=PhotoChantier)
+@receiver(pre_save, sender=PhotoChantierUnite)
+def extract_photo_metadata(sender, instance, raw=False, update_fields=None, **kwargs):
+    """
+    Nouvelle image → date et GPS lus dans l'EXIF, pour les champs laissés vides ;
+    position ou avancement modifié → distance au programme recalculée.
+    """
+    if raw:
+        return
+    if instance.image and not instance.image._committed:
+        PhotoMetadataService.populate(instance)
+    elif update_fields is None and (
+        instance._state.adding or _photo_location(instance) != getattr(instance, "_saved_location", None)
+    ):
+        PhotoMetadataService.verify_location(instance)
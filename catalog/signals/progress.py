@@ -0,0 +1,37 @@
+"""
+Cache de l'avancement global pondéré des programmes et des unités (voir ProgressService).
+
+L'unité précédente d'un avancement déplacé est mémorisée par chantier_status.
+"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from catalog.models import AvancementChantier, AvancementChantierUnite, EtapeChantier, Unite
+from catalog.services.progress_service import ProgressService
+
+
+@receiver(post_save, sender=AvancementChantier)
+@receiver(post_delete, sender=AvancementChantier)
+def invalidate_programme_progress(sender, instance, **kwargs):
+    programme_id = EtapeChantier.objects.filter(pk=instance.etape_id).values_list("programme_id", flat=True).first()
+    ProgressService.invalidate_programmes([programme_id])
+
+
+@receiver(post_save, sender=EtapeChantier)
+@receiver(post_delete, sender=EtapeChantier)
+def invalidate_progress_on_etape_change(sender, instance, **kwargs):
+    """Poids ou libellé modifié : avancement du programme et de ses unités."""
+    ProgressService.invalidate_programmes([instance.programme_id])
+    ProgressService.invalidate_unites(
+        Unite.objects.filter(programme_id=instance.programme_id).values_list("pk", flat=True)
+    )
+
+
+@receiver(post_save, sender=AvancementChantierUnite)
+@receiver(post_delete, sender=AvancementChantierUnite)
+def invalidate_unite_progress(sender, instance, **kwargs):
+    unite_ids = {instance.unite_id}
+    previous = getattr(instance, "_previous_avancement", None)
+    if previous is not None:
+        unite_ids.add(previous[0])
+    ProgressService.invalidate_unites(unite_ids)
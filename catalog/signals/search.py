@@ -0,0 +1,41 @@
+"""
+Index de recherche plein texte des programmes et des unités (voir SearchService).
+"""
+
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from catalog.models import ModeleBien, Programme, TypeBien, Unite
+from catalog.services.search_service import SearchService
+
+
+PROGRAMME_SEARCH_FIELDS = {"nom", "adresse", "description"}
+UNITE_SEARCH_FIELDS = {"reference_lot", "caracteristiques", "programme", "programme_id", "modele_bien", "modele_bien_id"}
+
+
+@receiver(post_save, sender=Programme)
+def update_search_vector_on_programme_save(sender, instance, created, update_fields=None, **kwargs):
+    """Le nom et l'adresse du programme font aussi partie de l'index de ses unités."""
+    if update_fields is not None and not PROGRAMME_SEARCH_FIELDS.intersection(update_fields):
+        return
+    SearchService.refresh_programmes(pk=instance.pk)
+    if not created:
+        SearchService.refresh_unites(programme_id=instance.pk)
+
+
+@receiver(post_save, sender=Unite)
+def update_search_vector_on_unite_save(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields is not None and not UNITE_SEARCH_FIELDS.intersection(update_fields):
+        return
+    SearchService.refresh_unites(pk=instance.pk)
+
+
+@receiver(post_save, sender=ModeleBien)
+def update_search_vector_on_modele_save(sender, instance, created, **kwargs):
+    if not created:
+        SearchService.refresh_unites(modele_bien_id=instance.pk)
+
+
+@receiver(post_save, sender=TypeBien)
+def update_search_vector_on_type_bien_save(sender, instance, created, **kwargs):
+    if not created:
+        SearchService.refresh_unites(modele_bien__type_bien_id=instance.pk)
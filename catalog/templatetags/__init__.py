@@ -0,0 +1 @@
+# catalog/templatetags/__init__.py
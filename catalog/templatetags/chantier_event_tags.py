@@ -0,0 +1,18 @@
+# catalog/templatetags/chantier_event_tags.py
+from django import template
+
+from catalog.services.chantier_event_service import ChantierEventService
+
+register = template.Library()
+
+
+@register.filter
+def flux_disponible(request):
+    """
+    Vrai si la page est servie sous ASGI, seul cas où les flux SSE le sont aussi.
+
+    Usage dans les templates :
+        {% load chantier_event_tags %}
+        {% if request|flux_disponible %}...{% endif %}
+    """
+    return ChantierEventService.flux_disponible(request)
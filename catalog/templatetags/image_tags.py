@@ -0,0 +1,42 @@
+# catalog/templatetags/image_tags.py
+from django import template
+from django.utils.html import format_html
+
+from catalog.services.image_service import ImageDerivativeService
+
+register = template.Library()
+
+
+@register.simple_tag
+def responsive_image(instance, alt="", css_class="", style="", sizes="100vw", size="medium"):
+    """
+    Image responsive (WebP + repli JPEG, srcset, chargement différé).
+
+    Usage dans les templates :
+        {% load image_tags %}
+        {% responsive_image bien alt=bien.reference_lot css_class="card-img-top" sizes="(min-width: 992px) 33vw, 100vw" %}
+
+    Tant que les dérivés ne sont pas générés, l'image originale est servie.
+    """
+    src = ImageDerivativeService.url(instance, size, "jpeg")
+    if not src:
+        return ""
+    webp_srcset = ImageDerivativeService.srcset(instance, "webp")
+    jpeg_srcset = ImageDerivativeService.srcset(instance, "jpeg")
+    img = format_html(
+        '<img src="{}"{} sizes="{}" alt="{}" class="{}" style="{}" loading="lazy" decoding="async">',
+        src,
+        format_html(' srcset="{}"', jpeg_srcset) if jpeg_srcset else "",
+        sizes,
+        alt,
+        css_class,
+        style,
+    )
+    if not webp_srcset:
+        return img
+    return format_html(
+        '<picture><source type="image/webp" srcset="{}" sizes="{}">{}</picture>',
+        webp_srcset,
+        sizes,
+        img,
+    )
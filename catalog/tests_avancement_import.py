@@ -0,0 +1,159 @@
+"""
+Tests pour l'import en masse des avancements de chantier (/api/avancements-unites/import/).
+"""
+import os
+import tempfile
+import zipfile
+from io import BytesIO, StringIO
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+from rest_framework.test import APIClient
+
+from accounts.models import Role, User
+from catalog.models import AvancementChantierUnite, ModeleBien, PhotoChantierUnite, Programme, TypeBien, Unite
+from core.choices import ReservationStatus, StatutChantier
+from core.models import MediaBlob
+from sales.models import Client, Reservation
+
+
+def jpeg_bytes(color=(10, 120, 200)):
+    buffer = BytesIO()
+    Image.new("RGB", (40, 30), color).save(buffer, "JPEG")
+    return buffer.getvalue()
+
+
+def zip_bytes(files):
+    buffer = BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, content in files.items():
+            archive.writestr(name, content)
+    return buffer.getvalue()
+
+
+@override_settings(IMAGE_DERIVATIVES_ASYNC=False)
+class AvancementImportTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # Répertoire média temporaire créé et supprimé avec la classe
+        cls.media_root = cls.enterClassContext(tempfile.TemporaryDirectory())
+        cls.enterClassContext(override_settings(MEDIA_ROOT=cls.media_root))
+        super().setUpClass()
+
+    def setUp(self):
+        self.programme = Programme.objects.create(nom="Cité Import")
+        modele = ModeleBien.objects.create(
+            type_bien=TypeBien.objects.create(code="APPT", libelle="Appartement"), nom_marketing="T3", prix_base_ttc=1
+        )
+        self.unites = [
+            Unite.objects.create(programme=self.programme, modele_bien=modele, reference_lot=f"B{i}", prix_ttc=1)
+            for i in range(1, 4)
+        ]
+        commercial = User.objects.create_user(username="chef", email="chef@example.com", password="pass123")
+        commercial.roles.add(Role.objects.create(code="COMMERCIAL", libelle="Commercial"))
+        self.api = APIClient()
+        self.api.force_authenticate(commercial)
+
+    def _post(self, csv_text, photos=None, **extra):
+        data = {
+            "programme": str(self.programme.pk),
+            "fichier": SimpleUploadedFile("pointage.csv", csv_text.encode("utf-8"), content_type="text/csv"),
+            **extra,
+        }
+        if photos is not None:
+            data["photos"] = SimpleUploadedFile("photos.zip", zip_bytes(photos), content_type="application/zip")
+        return self.api.post("/api/avancements-unites/import/", data, format="multipart")
+
+    def test_csv_import_with_photos(self):
+        client = Client.objects.create(nom="Ba", prenom="Modou", telephone="770000000", email="modou@example.com")
+        reservation = Reservation.objects.create(
+            client=client, unite=self.unites[0], statut=ReservationStatus.CONFIRMEE
+        )
+        csv_text = (
+            "reference_lot;etape;date_pointage;pourcentage;commentaire;photos\n"
+            "B1;Gros œuvre;2025-03-10;40;Dalle coulée;facade.jpg|pignon.jpg\n"
+            "B1;Finitions;20/04/2025;100;;\n"
+            "B2;Fondations;2025-03-12;15;;facade.jpg\n"
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self._post(csv_text, photos={
+                "chantier/facade.jpg": jpeg_bytes(), "chantier/pignon.jpg": jpeg_bytes((200, 10, 10)),
+            })
+
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(
+            {k: response.data[k] for k in ("lignes", "avancements", "photos", "unites")},
+            {"lignes": 3, "avancements": 3, "photos": 3, "unites": 2},
+        )
+        b1 = Unite.objects.get(pk=self.unites[0].pk)
+        self.assertEqual((b1.statut_chantier, b1.max_pourcentage), (StatutChantier.TERMINE, 100))
+        self.assertEqual(b1.dernier_avancement.etape, "Finitions")
+        self.assertEqual(Unite.objects.get(pk=self.unites[1].pk).statut_chantier, StatutChantier.EN_COURS)
+        self.assertEqual(Unite.objects.get(pk=self.unites[2].pk).statut_chantier, StatutChantier.NON_COMMENCE)
+        # Avancements rattachés à la réservation active du lot (visibles du client)
+        self.assertFalse(AvancementChantierUnite.objects.filter(unite=self.unites[0]).exclude(reservation=reservation).exists())
+
+        # Même photo pour B1 et B2 : un seul fichier, deux références ; dérivés générés
+        facade = PhotoChantierUnite.objects.filter(avancement__unite=self.unites[1]).get()
+        self.assertEqual(MediaBlob.objects.get(name=facade.image.name).ref_count, 2)
+        self.assertTrue(facade.pris_le)
+        self.assertIn("thumb", PhotoChantierUnite.objects.get(pk=facade.pk).image_derives)
+
+    def test_invalid_rows_reported_and_nothing_imported(self):
+        csv_text = (
+            "reference_lot,etape,date_pointage,pourcentage,photos\n"
+            "B1,Gros œuvre,2025-03-10,40,\n"
+            "Z9,Gros œuvre,2025-03-10,40,\n"
+            "B2,,10-03-2025,140,absente.jpg\n"
+        )
+        response = self._post(csv_text, photos={"facade.jpg": jpeg_bytes()})
+
+        self.assertEqual(response.status_code, 400)
+        erreurs = {erreur["ligne"]: erreur["erreurs"] for erreur in response.data["erreurs"]}
+        self.assertEqual(set(erreurs), {3, 4})
+        self.assertIn("reference_lot", erreurs[3])
+        self.assertEqual(set(erreurs[4]), {"etape", "date_pointage", "pourcentage", "photos"})
+        self.assertFalse(AvancementChantierUnite.objects.exists())
+
+    def test_json_rows_and_dry_run(self):
+        rows = [{"reference_lot": "B3", "etape": "Toiture", "date_pointage": "2025-05-01", "pourcentage": 70}]
+        response = self.api.post(
+            "/api/avancements-unites/import/",
+            {"programme": str(self.programme.pk), "rows": rows, "dry_run": True},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertFalse(AvancementChantierUnite.objects.exists())
+
+        response = self.api.post(
+            "/api/avancements-unites/import/", {"programme": str(self.programme.pk), "rows": rows}, format="json"
+        )
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(Unite.objects.get(pk=self.unites[2].pk).max_pourcentage, 70)
+
+    def test_bulk_import_constant_queries(self):
+        lines = ["reference_lot,etape,date_pointage,pourcentage"]
+        lines += [f"B{1 + i % 3},Étape {i},2025-01-{1 + i % 28:02d},{i % 101}" for i in range(500)]
+        with CaptureQueriesContext(connection) as queries:
+            response = self._post("\n".join(lines) + "\n")
+
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(AvancementChantierUnite.objects.count(), 500)
+        # Lookups + bulk_create + recalcul ensembliste : indépendant du nombre de lignes
+        self.assertLess(len(queries), 20)
+        self.assertEqual(Unite.objects.get(pk=self.unites[0].pk).max_pourcentage, 100)
+
+    def test_management_command(self):
+        path = os.path.join(self.media_root, "pointage.csv")
+        with open(path, "w", encoding="utf-8") as handle:
+            handle.write("reference_lot,etape,date_pointage,pourcentage\nB2,Fondations,2025-02-01,25\n")
+
+        out = StringIO()
+        call_command("import_avancements", path, "--programme", str(self.programme.pk), stdout=out)
+        self.assertIn("1 avancement(s) et 0 photo(s) importés", out.getvalue())
+        self.assertEqual(Unite.objects.get(pk=self.unites[1].pk).statut_chantier, StatutChantier.EN_COURS)
@@ -0,0 +1,95 @@
+"""
+Tests pour l'export statique du catalogue (CatalogueSnapshotService, build_catalogue_snapshot).
+"""
+import json
+import re
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from catalog.models import ModeleBien, Programme, TypeBien, Unite
+from catalog.services.catalogue_snapshot_service import CatalogueSnapshotService
+
+
+LOCMEM_CACHE = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "snapshot-tests"}}
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class CatalogueSnapshotTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        output = tempfile.TemporaryDirectory()
+        self.addCleanup(output.cleanup)
+        self.root = Path(output.name)
+        settings_override = override_settings(MEDIA_ROOT=media.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        (Path(media.name) / "unites").mkdir()
+        (Path(media.name) / "unites" / "h1.jpg").write_bytes(b"jpeg")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.programme = Programme.objects.create(nom="Cité Horizon", statut="actif")
+            self.autre = Programme.objects.create(nom="Les Almadies", statut="actif")
+            modele = ModeleBien.objects.create(
+                type_bien=TypeBien.objects.create(code="VILLA", libelle="Villa"), nom_marketing="F3", prix_base_ttc=1
+            )
+            self.unite = Unite.objects.create(programme=self.programme, modele_bien=modele, reference_lot="H1", prix_ttc=1)
+        Unite.objects.filter(pk=self.unite.pk).update(image="unites/h1.jpg")
+
+    def _page(self, url):
+        return (self.root / url.lstrip("/") / "index.html").read_text(encoding="utf-8")
+
+    def test_pages_feed_and_hashed_assets(self):
+        report = CatalogueSnapshotService.build(self.root)
+        self.assertEqual((report["programmes"], report["unites"], report["inchanges"]), (2, 1, 0))
+
+        page = self._page(f"/catalogue/unites/{self.unite.pk}/")
+        self.assertIn("H1", page)
+        self.assertNotIn("/media/unites/h1.jpg", page)
+        self.assertNotIn("/static/css/style.css", page)
+        for asset in re.findall(r"/catalogue/assets/[^\"']+", page):
+            self.assertTrue((self.root / asset.lstrip("/")).exists())
+        self.assertRegex(page, r"/catalogue/assets/style\.[0-9a-f]{12}\.css")
+        self.assertIn("Les Almadies", self._page("/catalogue/programmes/"))
+
+        feed = json.loads((self.root / "catalogue" / "feed.json").read_text(encoding="utf-8"))
+        self.assertEqual([programme["nom"] for programme in feed["programmes"]], ["Cité Horizon", "Les Almadies"])
+        [unite] = feed["programmes"][0]["unites"]
+        self.assertEqual(unite["url"], f"/catalogue/unites/{self.unite.pk}/")
+        self.assertRegex(unite["image"], r"^/catalogue/assets/h1\.[0-9a-f]{12}\.jpg$")
+
+    def test_incremental_rebuild(self):
+        CatalogueSnapshotService.build(self.root)
+        self.assertEqual(CatalogueSnapshotService.build(self.root)["inchanges"], 2)
+
+        # Modification d'une unité : seul son programme est reconstruit
+        self.unite.prix_ttc = 2
+        with self.captureOnCommitCallbacks(execute=True):
+            self.unite.save()
+        report = CatalogueSnapshotService.build(self.root)
+        self.assertEqual((report["programmes"], report["unites"], report["inchanges"]), (1, 1, 1))
+
+        # Suppression : pages retirées de l'export et de la liste
+        with self.captureOnCommitCallbacks(execute=True):
+            self.autre.delete()
+        report = CatalogueSnapshotService.build(self.root)
+        self.assertEqual((report["programmes"], report["inchanges"], report["supprimes"]), (0, 1, 1))
+        self.assertFalse((self.root / "catalogue" / "programmes" / str(self.autre.pk)).exists())
+        self.assertNotIn("Les Almadies", self._page("/catalogue/programmes/"))
+
+    def test_command_writes_nginx_config(self):
+        out = StringIO()
+        call_command("build_catalogue_snapshot", output=str(self.root), nginx=True, upstream="web:8000", stdout=out)
+        self.assertIn("2 programme(s) et 1 unité(s) prérendus", out.getvalue())
+        config = (self.root / "nginx.conf").read_text(encoding="utf-8")
+        self.assertIn("proxy_pass http://web:8000;", config)
+        self.assertIn("if ($cookie_sessionid) { return 418; }", config)
+        self.assertIn(f"root {self.root.resolve()};", config)
@@ -0,0 +1,126 @@
+"""
+Tests pour les événements temps réel du suivi de chantier (ChantierEventService, flux SSE).
+"""
+import json
+from datetime import date, timedelta
+from unittest import mock
+
+from django.template import Context, Template
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import Role, User
+from catalog.models import AvancementChantierUnite, MessageChantier, ModeleBien, PhotoChantierUnite, Programme, TypeBien, Unite
+from catalog.services.chantier_event_service import (
+    ChantierEventService,
+    avancement_channel,
+    cursor,
+    parse_cursor,
+    user_channel,
+)
+from catalog.services.message_chantier_service import MessageChantierService
+from sales.models import Client, Reservation
+
+
+class ChantierEventTests(TestCase):
+
+    def setUp(self):
+        self.commercial = User.objects.create_user(username="com", email="com@example.com", password="pass123")
+        self.commercial.roles.add(Role.objects.create(code="COMMERCIAL", libelle="Commercial"))
+        self.client_user = User.objects.create_user(username="cli", email="cli@example.com", password="pass123")
+        client = Client.objects.create(
+            user=self.client_user, nom="Diop", prenom="Awa", telephone="770000001", email="cli@example.com"
+        )
+        programme = Programme.objects.create(nom="Cité Horizon", contact_commercial=self.commercial)
+        modele = ModeleBien.objects.create(
+            type_bien=TypeBien.objects.create(code="VILLA", libelle="Villa"), nom_marketing="F3", prix_base_ttc=1
+        )
+        unite = Unite.objects.create(programme=programme, modele_bien=modele, reference_lot="H1", prix_ttc=1)
+        self.avancement = AvancementChantierUnite.objects.create(
+            unite=unite, reservation=Reservation.objects.create(client=client, unite=unite),
+            etape="Fondations", date_pointage=date(2025, 5, 1), pourcentage=10,
+        )
+
+    def _published(self, write):
+        with mock.patch.object(ChantierEventService, "send") as send:
+            with self.captureOnCommitCallbacks(execute=True):
+                result = write()
+        return result, [(channels, json.loads(payload)) for (channels, payload), _ in send.call_args_list]
+
+    def test_message_and_reply_published_to_avancement_and_recipients(self):
+        message, published = self._published(lambda: MessageChantier.objects.create(
+            avancement=self.avancement, auteur=self.client_user, message="Date de livraison ?"
+        ))
+        [(channels, event)] = published
+        self.assertEqual(set(channels), {
+            avancement_channel(self.avancement.pk), user_channel(self.commercial.pk), user_channel(self.client_user.pk),
+        })
+        self.assertEqual(
+            (event["type"], event["id"], event["message"], event["auteur_client"]),
+            ("message", str(message.pk), "Date de livraison ?", False),
+        )
+
+        message.reponse = "Fin juin"
+        _, [(_, event)] = self._published(message.save)
+        self.assertEqual((event["type"], event["reponse"]), ("reponse", "Fin juin"))
+
+    def test_photo_published(self):
+        photo, [(_, event)] = self._published(lambda: PhotoChantierUnite.objects.create(
+            avancement=self.avancement, image="chantier/dalle.jpg", pris_le=timezone.now()
+        ))
+        self.assertEqual((event["type"], event["id"], event["cursor"]), ("photo", str(photo.pk), cursor(photo.created_at)))
+
+    def test_backlog_since_cursor_respects_visibility(self):
+        debut = timezone.now() - timedelta(hours=1)
+        for minutes, texte in ((0, "Ancien"), (10, "Vidé"), (20, "Nouveau")):
+            message = MessageChantier.objects.create(avancement=self.avancement, auteur=self.client_user, message=texte)
+            MessageChantier.objects.filter(pk=message.pk).update(
+                created_at=debut + timedelta(minutes=minutes), updated_at=debut + timedelta(minutes=minutes)
+            )
+        MessageChantierService.vider(self.commercial, self.avancement)
+        MessageChantier.objects.filter(message="Nouveau").update(created_at=timezone.now(), updated_at=timezone.now())
+
+        since = parse_cursor((debut + timedelta(minutes=5)).isoformat())
+        events = ChantierEventService.backlog(self.commercial, since, self.avancement)
+        self.assertEqual([event["message"] for event in events], ["Nouveau"])
+        # Flux personnel du client : tous ses avancements, sans son repère de vidage
+        events = ChantierEventService.backlog(self.client_user, since)
+        self.assertEqual([event["message"] for event in events], ["Vidé", "Nouveau"])
+
+    def test_cursor_parsing(self):
+        self.assertEqual(parse_cursor("2025-05-01T10:00:00+02:00"), "2025-05-01T08:00:00.000000+00:00")
+        self.assertIsNone(parse_cursor("2025-05-01T10:00:00"))  # sans fuseau
+        self.assertIsNone(parse_cursor("pas-une-date"))
+        self.assertIsNone(parse_cursor(None))
+
+    def test_wsgi_requests_refused_and_script_omitted(self):
+        # Sous WSGI (client de test synchrone), un flux bloquerait un worker
+        self.client.force_login(self.client_user)
+        response = self.client.get(reverse("avancement_events", args=[self.avancement.pk]))
+        self.assertEqual(response.status_code, 204)
+
+        html = Template("{% include 'catalog/_chantier_events.html' %}").render(Context({
+            "request": response.wsgi_request, "avancement": self.avancement,
+        }))
+        self.assertNotIn("EventSource", html)
+
+    async def test_stream_access(self):
+        url = reverse("avancement_events", args=[self.avancement.pk])
+        self.assertEqual((await self.async_client.get(url)).status_code, 401)
+
+        intrus = await User.objects.acreate(username="x", email="x@example.com")
+        await self.async_client.aforce_login(intrus)
+        self.assertEqual((await self.async_client.get(url)).status_code, 404)
+
+        # Flux non consommé ici : aucune connexion Redis n'est ouverte
+        await self.async_client.aforce_login(self.client_user)
+        response = await self.async_client.get(url, HTTP_LAST_EVENT_ID="2025-05-01T08:00:00+00:00")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        self.assertTrue(response.streaming)
+
+        html = Template("{% include 'catalog/_chantier_events.html' %}").render(Context({
+            "request": response.asgi_request, "avancement": self.avancement,
+        }))
+        self.assertIn("new EventSource", html)
@@ -0,0 +1,114 @@
+"""
+Tests pour le statut de chantier incrémental des unités (ChantierStatusService).
+"""
+from datetime import date
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase
+
+from catalog.models import AvancementChantierUnite, ModeleBien, Programme, TypeBien, Unite
+from catalog.services.chantier_status_service import ChantierStatusService
+from core.choices import StatutChantier
+
+
+class ChantierStatusTests(TestCase):
+
+    def setUp(self):
+        self.programme = Programme.objects.create(nom="Résidences Chantier", statut="actif")
+        type_bien = TypeBien.objects.create(code="VILLA", libelle="Villa")
+        modele = ModeleBien.objects.create(type_bien=type_bien, nom_marketing="Villa F4", prix_base_ttc=1000)
+        self.unite = Unite.objects.create(
+            programme=self.programme, modele_bien=modele, reference_lot="A1", prix_ttc=1000
+        )
+        self.autre = Unite.objects.create(
+            programme=self.programme, modele_bien=modele, reference_lot="A2", prix_ttc=1000
+        )
+
+    def _avancement(self, pourcentage, jour, unite=None):
+        return AvancementChantierUnite.objects.create(
+            unite=unite or self.unite,
+            etape="Gros œuvre",
+            date_pointage=date(2025, 3, jour),
+            pourcentage=pourcentage,
+        )
+
+    def _etat(self, unite=None):
+        unite = Unite.objects.get(pk=(unite or self.unite).pk)
+        return unite.statut_chantier, unite.max_pourcentage, unite.dernier_avancement_id
+
+    def test_insert_single_conditional_update(self):
+        updated_at = self.unite.updated_at
+        with self.assertNumQueries(2):  # INSERT + UPDATE conditionnel
+            premier = self._avancement(40, 10)
+        self.assertEqual(self._etat(), (StatutChantier.EN_COURS, 40, premier.pk))
+
+        # Pointage antérieur plus faible : ni le max ni le dernier avancement ne changent
+        self._avancement(20, 1)
+        self.assertEqual(self._etat(), (StatutChantier.EN_COURS, 40, premier.pk))
+
+        final = self._avancement(100, 20)
+        self.assertEqual(self._etat(), (StatutChantier.TERMINE, 100, final.pk))
+        # update() sans signaux : updated_at avancé explicitement (tableau de bord, export statique)
+        self.assertGreater(Unite.objects.get(pk=self.unite.pk).updated_at, updated_at)
+
+    def test_delete_and_decrease_recompute_from_aggregate(self):
+        premier = self._avancement(40, 10)
+        final = self._avancement(100, 20)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            final.pourcentage = 60
+            final.save()
+        self.assertEqual(self._etat(), (StatutChantier.EN_COURS, 60, final.pk))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            final.delete()
+        self.assertEqual(self._etat(), (StatutChantier.EN_COURS, 40, premier.pk))
+
+        updated_at = Unite.objects.get(pk=self.unite.pk).updated_at
+        with self.captureOnCommitCallbacks(execute=True):
+            premier.delete()
+        self.assertEqual(self._etat(), (StatutChantier.NON_COMMENCE, None, None))
+        self.assertGreater(Unite.objects.get(pk=self.unite.pk).updated_at, updated_at)
+
+    def test_moving_avancement_recomputes_both_units(self):
+        avancement = self._avancement(100, 10)
+        with self.captureOnCommitCallbacks(execute=True):
+            avancement.unite = self.autre
+            avancement.save()
+        self.assertEqual(self._etat(), (StatutChantier.NON_COMMENCE, None, None))
+        self.assertEqual(self._etat(self.autre), (StatutChantier.TERMINE, 100, avancement.pk))
+
+    def test_recomputes_coalesced_per_transaction(self):
+        avancements = [self._avancement(10 * i, i) for i in range(1, 6)]
+        with self.captureOnCommitCallbacks() as callbacks:
+            with transaction.atomic():
+                for avancement in avancements[2:]:
+                    avancement.delete()
+        recomputes = [callback for callback in callbacks if getattr(callback, "name", None) == "statut_chantier"]
+        # Un seul lot (enregistré à chaque écriture) : le premier appel recalcule tout, les suivants rien
+        self.assertEqual(len({id(callback) for callback in recomputes}), 1)
+
+        with self.assertNumQueries(1):
+            for callback in recomputes:
+                callback()
+        self.assertEqual(self._etat(), (StatutChantier.EN_COURS, 20, avancements[1].pk))
+
+    def test_recompute_command_repairs_bulk_writes(self):
+        AvancementChantierUnite.objects.bulk_create([
+            AvancementChantierUnite(unite=self.unite, etape="Finitions", date_pointage=date(2025, 4, 1), pourcentage=100),
+            AvancementChantierUnite(unite=self.autre, etape="Fondations", date_pointage=date(2025, 4, 1), pourcentage=30),
+        ])
+        self.assertEqual(self._etat()[0], StatutChantier.NON_COMMENCE)
+
+        out = StringIO()
+        call_command("recompute_statut_chantier", "--programme", str(self.programme.pk), stdout=out)
+        self.assertIn("2 unité(s) recalculée(s) sur 1 programme(s)", out.getvalue())
+        self.assertEqual(self._etat()[:2], (StatutChantier.TERMINE, 100))
+        self.assertEqual(self._etat(self.autre)[:2], (StatutChantier.EN_COURS, 30))
+
+    def test_older_lower_avancement_leaves_unit_untouched(self):
+        self._avancement(50, 10)
+        ancien = self._avancement(10, 1)
+        self.assertEqual(ChantierStatusService.apply_avancement(ancien), 0)
@@ -0,0 +1,183 @@
+"""
+Tests pour l'upload reprenable des photos d'avancement (/api/uploads-photos/).
+"""
+import base64
+import hashlib
+import os
+import tempfile
+from datetime import date, timedelta
+from io import BytesIO, StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIClient
+
+from accounts.models import Role, User
+from catalog.models import (
+    AvancementChantierUnite,
+    ModeleBien,
+    PhotoChantierUnite,
+    PhotoUploadSession,
+    Programme,
+    TypeBien,
+    Unite,
+)
+from catalog.services.chunked_upload_service import ChunkedUploadError, ChunkedUploadService
+
+
+def jpeg_bytes():
+    buffer = BytesIO()
+    Image.effect_noise((200, 150), 60).convert("RGB").save(buffer, "JPEG", quality=95)
+    return buffer.getvalue()
+
+
+@override_settings(IMAGE_DERIVATIVES_ASYNC=False)
+class ChunkedUploadTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # Répertoires temporaires créés et supprimés avec la classe
+        cls.media_root = cls.enterClassContext(tempfile.TemporaryDirectory())
+        cls.upload_dir = cls.enterClassContext(tempfile.TemporaryDirectory())
+        cls.enterClassContext(override_settings(MEDIA_ROOT=cls.media_root, CHUNKED_UPLOAD_DIR=cls.upload_dir))
+        super().setUpClass()
+
+    def setUp(self):
+        programme = Programme.objects.create(nom="Plateau")
+        modele = ModeleBien.objects.create(
+            type_bien=TypeBien.objects.create(code="APPT", libelle="Appartement"), nom_marketing="T2", prix_base_ttc=1
+        )
+        unite = Unite.objects.create(programme=programme, modele_bien=modele, reference_lot="A1", prix_ttc=1)
+        self.avancement = AvancementChantierUnite.objects.create(
+            unite=unite, etape="Gros oeuvre", date_pointage=date.today(), pourcentage=10
+        )
+        commercial = User.objects.create_user(username="com", email="com@example.com", password="pass123")
+        commercial.roles.add(Role.objects.create(code="COMMERCIAL", libelle="Commercial"))
+        self.api = APIClient()
+        self.api.force_authenticate(commercial)
+        self.content = jpeg_bytes()
+
+    def _create(self, content=None):
+        content = content or self.content
+        response = self.api.post("/api/uploads-photos/", {
+            "avancement": self.avancement.pk,
+            "nom_fichier": "facade.jpg",
+            "taille_totale": len(content),
+            "sha256": hashlib.sha256(content).hexdigest(),
+            "pris_le": timezone.now().isoformat(),
+            "description": "Façade nord",
+        }, format="json")
+        self.assertEqual(response.status_code, 201, response.data)
+        return response.data["id"]
+
+    def _patch(self, session_id, chunk, offset, checksum=None):
+        headers = {"HTTP_UPLOAD_OFFSET": str(offset)}
+        if checksum is not None:
+            headers["HTTP_UPLOAD_CHECKSUM"] = f"sha256 {base64.b64encode(checksum).decode()}"
+        return self.api.generic(
+            "PATCH", f"/api/uploads-photos/{session_id}/", chunk,
+            content_type="application/offset+octet-stream", **headers,
+        )
+
+    def _upload(self, session_id, content=None):
+        content = content or self.content
+        middle = len(content) // 2
+        self._patch(session_id, content[:middle], 0)
+        self._patch(session_id, content[middle:], middle)
+
+    def test_resumable_upload_and_finalize(self):
+        session_id = self._create()
+        middle = len(self.content) // 2
+
+        response = self._patch(session_id, self.content[:middle], 0, checksum=hashlib.sha256(self.content[:middle]).digest())
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(response["Upload-Offset"], str(middle))
+
+        # Reprise après coupure : le client demande où en est le serveur
+        response = self.api.head(f"/api/uploads-photos/{session_id}/")
+        self.assertEqual(response["Upload-Offset"], str(middle))
+
+        self.assertEqual(self._patch(session_id, self.content[middle:], middle).status_code, 204)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.api.post(f"/api/uploads-photos/{session_id}/finalize/")
+
+        self.assertEqual(response.status_code, 201, response.data)
+        photo = PhotoChantierUnite.objects.get(avancement=self.avancement)
+        self.assertEqual(photo.description, "Façade nord")
+        with photo.image.open("rb") as handle:
+            self.assertEqual(handle.read(), self.content)
+        self.assertFalse(PhotoUploadSession.objects.exists())
+        self.assertFalse(os.path.exists(os.path.join(self.upload_dir, f"{session_id}.part")))
+
+    def test_wrong_offset_and_corrupted_chunk_rejected(self):
+        session_id = self._create()
+
+        self.assertEqual(self._patch(session_id, self.content[:100], 50).status_code, 409)
+
+        # Mêmes contrôles GPS que les photos (PhotoGpsValidationMixin)
+        response = self.api.post("/api/uploads-photos/", {
+            "avancement": self.avancement.pk, "nom_fichier": "a.jpg", "taille_totale": 10,
+            "pris_le": timezone.now().isoformat(), "gps_lat": "14.7",
+        }, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("gps", response.data)
+
+        response = self._patch(session_id, self.content[:100], 0, checksum=hashlib.sha256(b"autre").digest())
+        self.assertEqual(response.status_code, 460)
+        self.assertEqual(PhotoUploadSession.objects.get(pk=session_id).offset, 0)
+        self.assertEqual(os.path.getsize(os.path.join(self.upload_dir, f"{session_id}.part")), 0)
+
+    def test_concurrent_chunk_received_before_locking(self):
+        session = PhotoUploadSession.objects.get(pk=self._create())
+        first, other = self.content[:100], b"\0" * 100
+
+        class SlowStream(BytesIO):
+            def read(stream, size=-1):
+                # Un autre PATCH au même offset aboutit pendant la réception de celui-ci
+                if stream.tell() == 0:
+                    ChunkedUploadService.append(session, BytesIO(first), 0, len(first))
+                return super().read(size)
+
+        with self.assertRaises(ChunkedUploadError) as error:
+            ChunkedUploadService.append(session, SlowStream(other), 0, len(other))
+        self.assertEqual(error.exception.status_code, 409)
+        with open(os.path.join(self.upload_dir, f"{session.pk}.part"), "rb") as part:
+            self.assertEqual(part.read(), first)
+        # Morceau rejeté : fichier de réception supprimé
+        self.assertFalse([name for name in os.listdir(self.upload_dir) if name.endswith(".chunk")])
+
+    def test_batch_finalize_is_all_or_nothing(self):
+        complete = self._create()
+        self._upload(complete)
+        incomplete = self._create()
+        self._patch(incomplete, self.content[:100], 0)
+
+        response = self.api.post("/api/uploads-photos/finalize/", {"sessions": [complete, incomplete]}, format="json")
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(PhotoChantierUnite.objects.exists())
+
+        self._patch(incomplete, self.content[100:], 100)
+        response = self.api.post("/api/uploads-photos/finalize/", {"sessions": [complete, incomplete]}, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(PhotoChantierUnite.objects.filter(avancement=self.avancement).count(), 2)
+
+    def test_finalize_checks_real_file_type(self):
+        fake = b"%PDF-1.4 " + b"0" * 500
+        session_id = self._create(fake)
+        self._upload(session_id, fake)
+
+        response = self.api.post(f"/api/uploads-photos/{session_id}/finalize/")
+        self.assertEqual(response.status_code, 415)
+        self.assertFalse(PhotoChantierUnite.objects.exists())
+
+    def test_expired_sessions_refused_and_purged(self):
+        session_id = self._create()
+        PhotoUploadSession.objects.filter(pk=session_id).update(expire_le=timezone.now() - timedelta(minutes=1))
+
+        self.assertEqual(self._patch(session_id, self.content[:100], 0).status_code, 410)
+
+        call_command("purge_upload_sessions", stdout=StringIO())
+        self.assertFalse(PhotoUploadSession.objects.exists())
+        self.assertFalse(os.path.exists(ChunkedUploadService.part_path(PhotoUploadSession(pk=session_id))))
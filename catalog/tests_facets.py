@@ -0,0 +1,65 @@
+"""
+Tests pour la recherche à facettes (/api/unites/search/).
+"""
+from django.test import override_settings
+from rest_framework.test import APITestCase
+
+from catalog.models import Programme, TypeBien, ModeleBien, Unite
+
+
+@override_settings(CATALOGUE_FACET_KEYS=["chambres", "terrasse"])
+class FacetSearchTests(APITestCase):
+
+    def setUp(self):
+        self.programme = Programme.objects.create(nom="Résidences Test", statut="actif")
+        villa = TypeBien.objects.create(code="VILLA", libelle="Villa")
+        appt = TypeBien.objects.create(code="APPT", libelle="Appartement")
+        f4 = ModeleBien.objects.create(type_bien=villa, nom_marketing="Villa F4", prix_base_ttc=1, surface_hab_m2=120)
+        t2 = ModeleBien.objects.create(type_bien=appt, nom_marketing="Appt T2", prix_base_ttc=1, surface_hab_m2=55)
+        for ref, modele, prix, carac in [
+            ("V1", f4, 40_000_000, {"chambres": 3, "terrasse": True}),
+            ("V2", f4, 45_000_000, {"chambres": 4, "terrasse": True}),
+            ("A1", t2, 20_000_000, {"chambres": 1, "terrasse": False, "etage": "RDC"}),
+            ("A2", t2, 22_000_000, {"chambres": 1}),
+        ]:
+            Unite.objects.create(
+                programme=self.programme, modele_bien=modele, reference_lot=ref, prix_ttc=prix, caracteristiques=carac
+            )
+
+    def _refs(self, response):
+        return sorted(u["reference_lot"] for u in response.data["results"])
+
+    def test_facets_without_filters(self):
+        response = self.client.get("/api/unites/search/")
+        self.assertEqual(response.data["count"], 4)
+        facets = response.data["facets"]
+        self.assertEqual(facets["type"], [{"value": "APPT", "count": 2}, {"value": "VILLA", "count": 2}])
+        self.assertEqual(facets["chambres"][0], {"value": 1, "count": 2})
+        self.assertEqual(
+            sorted((f["value"], f["count"]) for f in facets["terrasse"]), [(False, 1), (True, 2)]
+        )
+        self.assertEqual(facets["statut"], [{"value": "disponible", "count": 4}])
+        self.assertEqual(int(facets["prix_ttc"]["min"]), 20_000_000)
+        self.assertEqual(int(facets["surface"]["max"]), 120)
+
+    def test_json_equality_range_and_boolean_filters(self):
+        self.assertEqual(self._refs(self.client.get("/api/unites/search/", {"carac.terrasse": "true"})), ["V1", "V2"])
+        self.assertEqual(self._refs(self.client.get("/api/unites/search/", {"carac.chambres.min": "3"})), ["V1", "V2"])
+        self.assertEqual(
+            self._refs(self.client.get("/api/unites/search/", {"carac.chambres": ["1", "4"]})), ["A1", "A2", "V2"]
+        )
+
+    def test_price_surface_and_type_filters_restrict_facets(self):
+        response = self.client.get("/api/unites/search/", {"type": "APPT", "prix_max": "21000000"})
+        self.assertEqual(self._refs(response), ["A1"])
+        self.assertEqual(response.data["facets"]["type"], [{"value": "APPT", "count": 1}])
+
+        response = self.client.get("/api/unites/search/", {"surface_min": "100"})
+        self.assertEqual(self._refs(response), ["V1", "V2"])
+
+    def test_facets_computed_in_one_query(self):
+        # 1 count + 1 page + 1 facettes
+        with self.assertNumQueries(3) as queries:
+            self.client.get("/api/unites/search/", {"carac.chambres.min": "1"})
+        # Un GROUP BY par dimension (type, programme, statut, chambres, terrasse)
+        self.assertEqual(queries.captured_queries[-1]["sql"].count("UNION ALL"), 4)
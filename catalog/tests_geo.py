@@ -0,0 +1,50 @@
+"""
+Tests pour les requêtes géographiques (GeoQuerySet, GeoFilter).
+"""
+from decimal import Decimal
+
+from rest_framework.test import APITestCase
+
+from catalog.models import Programme, TypeBien, ModeleBien, Unite
+from core.querysets import haversine_km
+
+
+class GeoQueryTests(APITestCase):
+
+    def setUp(self):
+        # Dakar Plateau, Bayakh (~45 km), Saint-Louis (~200 km)
+        self.dakar = Programme.objects.create(nom="Plateau", gps_lat=Decimal("14.669300"), gps_lng=Decimal("-17.437700"))
+        self.bayakh = Programme.objects.create(nom="Bayakh", gps_lat=Decimal("14.868000"), gps_lng=Decimal("-17.130000"))
+        self.saint_louis = Programme.objects.create(nom="Saint-Louis", gps_lat=Decimal("16.026000"), gps_lng=Decimal("-16.489000"))
+        Programme.objects.create(nom="Sans coordonnées")
+        modele = ModeleBien.objects.create(
+            type_bien=TypeBien.objects.create(code="VILLA", libelle="Villa"), nom_marketing="Villa", prix_base_ttc=1
+        )
+        for programme, ref in [(self.dakar, "D1"), (self.bayakh, "B1")]:
+            Unite.objects.create(
+                programme=programme, modele_bien=modele, reference_lot=ref, prix_ttc=1,
+                gps_lat=programme.gps_lat, gps_lng=programme.gps_lng,
+            )
+
+    def test_haversine_distance(self):
+        distance = Programme.objects.annotate(d=haversine_km(14.6693, -17.4377)).get(pk=self.saint_louis.pk).d
+        self.assertAlmostEqual(distance, 182, delta=5)
+
+    def test_near_filters_and_orders_by_distance(self):
+        resultats = list(Programme.objects.near(14.70, -17.40, 60))
+        self.assertEqual(resultats, [self.dakar, self.bayakh])
+        self.assertLess(resultats[0].distance_km, resultats[1].distance_km)
+
+    def test_api_near_and_bbox(self):
+        response = self.client.get("/api/unites/", {"near": "14.87,-17.13", "radius_km": "5"})
+        self.assertEqual([u["reference_lot"] for u in response.data], ["B1"])
+        self.assertLess(response.data[0]["distance_km"], 1)
+
+        response = self.client.get("/api/unites/", {"bbox": "-17.6,14.5,-17.3,14.8"})
+        self.assertEqual([u["reference_lot"] for u in response.data], ["D1"])
+        self.assertNotIn("distance_km", response.data[0])
+
+    def test_api_rejects_invalid_parameters(self):
+        self.assertEqual(self.client.get("/api/unites/", {"near": "14.8"}).status_code, 400)
+        self.assertEqual(self.client.get("/api/unites/", {"near": "14.8,-17.1", "radius_km": "-2"}).status_code, 400)
+        self.assertEqual(self.client.get("/api/unites/", {"bbox": "-17.3,14.8,-17.6,14.5"}).status_code, 400)
@@ -0,0 +1,227 @@
+"""
+Tests pour les dérivés d'images (ImageDerivativeService, balise responsive_image).
+"""
+import tempfile
+from datetime import date
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+
+from catalog.models import (
+    AvancementChantier,
+    AvancementChantierUnite,
+    EtapeChantier,
+    ModeleBien,
+    PhotoChantier,
+    PhotoChantierUnite,
+    Programme,
+    TypeBien,
+    Unite,
+)
+from catalog.services.image_service import ImageDerivativeService
+
+
+def make_jpeg(width=2000, height=1000, orientation=None):
+    """JPEG de test, avec balise EXIF d'orientation et modèle d'appareil."""
+    exif = Image.Exif()
+    exif[0x0110] = "Appareil test"
+    if orientation:
+        exif[0x0112] = orientation
+    buffer = BytesIO()
+    Image.new("RGB", (width, height), (200, 30, 30)).save(buffer, "JPEG", exif=exif)
+    return SimpleUploadedFile("photo.jpg", buffer.getvalue(), content_type="image/jpeg")
+
+
+@override_settings(IMAGE_DERIVATIVES_ASYNC=False)
+class ImageDerivativeTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # Répertoire média temporaire créé et supprimé avec la classe
+        cls.media_root = cls.enterClassContext(tempfile.TemporaryDirectory())
+        cls.enterClassContext(override_settings(MEDIA_ROOT=cls.media_root))
+        super().setUpClass()
+
+    def setUp(self):
+        programme = Programme.objects.create(nom="Plateau")
+        modele = ModeleBien.objects.create(
+            type_bien=TypeBien.objects.create(code="APPT", libelle="Appartement"), nom_marketing="T2", prix_base_ttc=1
+        )
+        self.unite = Unite.objects.create(programme=programme, modele_bien=modele, reference_lot="A1", prix_ttc=1)
+
+    def _open(self, instance, size_name, ext):
+        with default_storage.open(instance.image_derives[size_name][ext]) as handle:
+            image = Image.open(handle)
+            image.load()
+        return image
+
+    def test_derivatives_generated_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.unite.image = make_jpeg()
+            self.unite.save()
+
+        self.unite.refresh_from_db()
+        derives = self.unite.image_derives
+        self.assertEqual(derives["source"], self.unite.image.name)
+        self.assertEqual([derives[size]["width"] for size in ("thumb", "medium", "large")], [320, 800, 1600])
+
+        webp = self._open(self.unite, "thumb", "webp")
+        self.assertEqual((webp.format, webp.size), ("WEBP", (320, 160)))
+        jpeg = self._open(self.unite, "large", "jpeg")
+        self.assertEqual(jpeg.format, "JPEG")
+        self.assertEqual(len(jpeg.getexif()), 0)
+
+    def test_exif_orientation_applied_and_small_images_not_upscaled(self):
+        avancement = AvancementChantierUnite.objects.create(
+            unite=self.unite, etape="Gros oeuvre", date_pointage=date.today(), pourcentage=10
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            # Orientation 6 : rotation de 90°, la photo paysage devient portrait
+            photo = PhotoChantierUnite.objects.create(
+                avancement=avancement, image=make_jpeg(600, 300, orientation=6), pris_le=timezone.now()
+            )
+
+        photo.refresh_from_db()
+        self.assertEqual(self._open(photo, "thumb", "jpeg").size, (160, 320))
+        self.assertEqual(self._open(photo, "large", "jpeg").size, (300, 600))
+
+    def test_unchanged_image_not_reprocessed(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.unite.image = make_jpeg()
+            self.unite.save()
+        self.unite.refresh_from_db()
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.unite.prix_ttc = 2
+            self.unite.save()
+        self.assertFalse(any(
+            "ImageDerivativeService" in getattr(callback, "__qualname__", "") for callback in callbacks
+        ))
+
+    def test_stale_job_does_not_overwrite_newer_image(self):
+        with self.captureOnCommitCallbacks():
+            self.unite.image = make_jpeg()
+            self.unite.save()
+        generate = ImageDerivativeService.generate
+        generated = []
+
+        def replaced_during_generation(instance):
+            generated.append(generate(instance))
+            # Nouvelle image enregistrée pendant la génération (tâche plus récente)
+            Unite.objects.filter(pk=instance.pk).update(image="unites/autre.jpg")
+            return generated[0]
+
+        with mock.patch.object(ImageDerivativeService, "generate", side_effect=replaced_during_generation):
+            self.assertFalse(ImageDerivativeService.process("catalog.Unite", self.unite.pk))
+        self.unite.refresh_from_db()
+        self.assertEqual(self.unite.image_derives, {})
+        # Dérivés de l'ancienne image supprimés
+        self.assertFalse(default_storage.exists(generated[0]["thumb"]["webp"]))
+
+    def test_previous_derivatives_kept_until_new_ones_saved(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.unite.image = make_jpeg()
+            self.unite.save()
+        self.unite.refresh_from_db()
+        previous = self.unite.image_derives
+
+        # Échec de génération pour la nouvelle image : anciens dérivés intacts, original servi
+        with self.assertLogs("catalog.services.image_service", "ERROR"):
+            with mock.patch("catalog.services.image_service.ImageOps.exif_transpose", side_effect=OSError):
+                with self.captureOnCommitCallbacks(execute=True):
+                    self.unite.image = make_jpeg(1200, 600)
+                    self.unite.save()
+        self.unite.refresh_from_db()
+        self.assertEqual(self.unite.image_derives, previous)
+        self.assertTrue(default_storage.exists(previous["thumb"]["webp"]))
+        self.assertEqual(ImageDerivativeService.url(self.unite), self.unite.image.url)
+        self.assertEqual(ImageDerivativeService.srcset(self.unite), "")
+
+        # Génération réussie : anciens dérivés supprimés après l'enregistrement des nouveaux
+        self.assertTrue(ImageDerivativeService.process("catalog.Unite", self.unite.pk))
+        self.unite.refresh_from_db()
+        self.assertEqual(self.unite.image_derives["source"], self.unite.image.name)
+        self.assertTrue(default_storage.exists(self.unite.image_derives["thumb"]["webp"]))
+        self.assertFalse(default_storage.exists(previous["thumb"]["webp"]))
+
+    def test_shared_image_keeps_derivatives_across_models(self):
+        avancement = AvancementChantierUnite.objects.create(
+            unite=self.unite, etape="Gros oeuvre", date_pointage=date.today(), pourcentage=10
+        )
+        etape = EtapeChantier.objects.create(programme=self.unite.programme, code="GO", libelle="Gros oeuvre", ordre=1)
+        content = make_jpeg(400, 200).read()
+        with self.captureOnCommitCallbacks(execute=True):
+            photo_unite = PhotoChantierUnite.objects.create(
+                avancement=avancement, image=SimpleUploadedFile("a.jpg", content), pris_le=timezone.now()
+            )
+            photo = PhotoChantier.objects.create(
+                avancement=AvancementChantier.objects.create(etape=etape, date_pointage=date.today(), pourcentage=10),
+                image=SimpleUploadedFile("b.jpg", content),
+                pris_le=timezone.now(),
+            )
+        photo.refresh_from_db()
+        self.assertEqual(photo.image.name, photo_unite.image.name)
+
+        # Même fichier dédupliqué, donc mêmes dérivés : conservés tant que l'autre modèle l'utilise
+        with self.captureOnCommitCallbacks(execute=True):
+            photo_unite.delete()
+        self.assertTrue(default_storage.exists(photo.image_derives["thumb"]["webp"]))
+
+    def test_replaced_shared_image_keeps_derivatives_of_other_rows(self):
+        avancement = AvancementChantierUnite.objects.create(
+            unite=self.unite, etape="Gros oeuvre", date_pointage=date.today(), pourcentage=10
+        )
+        content = make_jpeg(400, 200).read()
+        with self.captureOnCommitCallbacks(execute=True):
+            photos = [
+                PhotoChantierUnite.objects.create(
+                    avancement=avancement, image=SimpleUploadedFile(name, content), pris_le=timezone.now()
+                )
+                for name in ("a.jpg", "b.jpg")
+            ]
+        for photo in photos:
+            photo.refresh_from_db()
+        self.assertEqual(photos[0].image.name, photos[1].image.name)
+        shared = photos[1].image_derives
+
+        # Nouvelle image sur la première ligne : dérivés du fichier partagé conservés pour la seconde
+        with self.captureOnCommitCallbacks(execute=True):
+            photos[0].image = make_jpeg(500, 250)
+            photos[0].save()
+        photos[0].refresh_from_db()
+        self.assertNotEqual(photos[0].image_derives["source"], shared["source"])
+        self.assertTrue(default_storage.exists(shared["thumb"]["webp"]))
+        self.assertTrue(default_storage.exists(photos[0].image_derives["thumb"]["webp"]))
+
+    def test_responsive_image_tag(self):
+        template = Template('{% load image_tags %}{% responsive_image unite alt="Lot" sizes="50vw" %}')
+        self.assertEqual(template.render(Context({"unite": self.unite})), "")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.unite.image = make_jpeg()
+            self.unite.save()
+        self.unite.refresh_from_db()
+
+        html = template.render(Context({"unite": self.unite}))
+        self.assertIn('<source type="image/webp" srcset="', html)
+        self.assertIn("_thumb.webp 320w", html)
+        self.assertIn("_large.jpeg 1600w", html)
+        self.assertIn(f'src="{ImageDerivativeService.url(self.unite)}"', html)
+        self.assertIn('loading="lazy"', html)
+
+    def test_backfill_command(self):
+        # Image enregistrée sans passer par les signaux (historique)
+        self.unite.image = make_jpeg()
+        self.unite.save()
+        Unite.objects.filter(pk=self.unite.pk).update(image_derives={})
+
+        call_command("generate_image_derivatives", workers=1, model=["catalog.Unite"], stdout=StringIO())
+        self.unite.refresh_from_db()
+        self.assertIn("medium", self.unite.image_derives)
@@ -0,0 +1,175 @@
+"""
+Tests pour les compteurs de stock par programme (ProgrammeInventory).
+"""
+from io import StringIO
+from unittest import mock, skipUnless
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from catalog.models import Programme, TypeBien, ModeleBien, Unite, ProgrammeInventory
+from catalog.services.inventory_service import InventoryService
+from catalog.services.map_cluster_service import MapClusterService
+from core.services.conditional_get_service import ConditionalGetService
+from core.services.page_cache_service import PageCacheService
+from sales.models import Client, Reservation
+from core.choices import ReservationStatus, UniteStatus
+
+
+LOCMEM_CACHE = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "inventory-tests"}}
+
+
+class ProgrammeInventoryTests(TestCase):
+
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.programme = Programme.objects.create(nom="Résidences Test", statut="actif")
+            type_bien = TypeBien.objects.create(code="VILLA", libelle="Villa")
+            modele = ModeleBien.objects.create(type_bien=type_bien, nom_marketing="Villa F4", prix_base_ttc=1000)
+            self.unites = [
+                Unite.objects.create(
+                    programme=self.programme, modele_bien=modele, reference_lot=f"L{i}", prix_ttc=1000
+                )
+                for i in range(4)
+            ]
+        self.client_profile = Client.objects.create(
+            nom="Diop", prenom="Awa", telephone="771234567", email="awa@example.com"
+        )
+
+    def _inventaire(self):
+        return ProgrammeInventory.objects.get(programme=self.programme)
+
+    def _write(self, write):
+        with self.captureOnCommitCallbacks(execute=True):
+            return write()
+
+    def test_counters_follow_unites_and_reservations(self):
+        self.assertEqual(self._inventaire().nb_disponible, 4)
+
+        reservation = self._write(lambda: Reservation.objects.create(
+            client=self.client_profile, unite=self.unites[0], statut=ReservationStatus.EN_COURS
+        ))
+        self.assertEqual(self._inventaire().nb_reserve, 1)
+
+        reservation.statut = ReservationStatus.CONFIRMEE
+        self._write(reservation.save)
+        inventaire = self._inventaire()
+        self.assertEqual((inventaire.nb_reserve, inventaire.nb_vendu), (0, 1))
+
+        self.unites[1].statut_disponibilite = UniteStatus.LIVRE
+        self._write(self.unites[1].save)
+        inventaire = self._inventaire()
+        self.assertEqual((inventaire.nb_disponible, inventaire.nb_livre, inventaire.total), (2, 1, 4))
+
+    def test_refreshes_batched_per_transaction(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            with CaptureQueriesContext(connection) as writes:
+                for unite in self.unites[:3]:
+                    Reservation.objects.create(client=self.client_profile, unite=unite, statut=ReservationStatus.EN_COURS)
+        # Aucune lecture de l'unité ni recalcul pendant les écritures
+        self.assertFalse([q for q in writes if '"catalog_unite"' in q["sql"] or "COUNT(" in q["sql"]])
+
+        with CaptureQueriesContext(connection) as refresh:
+            for callback in callbacks:
+                callback()
+        self.assertEqual(len([q for q in refresh if "COUNT(" in q["sql"]]), 1)
+        self.assertEqual(self._inventaire().nb_reserve, 3)
+
+    @skipUnless(connection.features.has_select_for_update, "Verrous de ligne (SELECT ... FOR UPDATE)")
+    def test_refresh_locks_inventory_before_counting(self):
+        with CaptureQueriesContext(connection) as captured:
+            InventoryService.refresh([self.programme.pk])
+        sqls = [query["sql"] for query in captured]
+        lock = next(i for i, sql in enumerate(sqls) if "FOR UPDATE" in sql)
+        count = next(i for i, sql in enumerate(sqls) if "COUNT(" in sql)
+        self.assertLess(lock, count)
+
+    def test_reconcile_repairs_drift(self):
+        ProgrammeInventory.objects.filter(programme=self.programme).update(nb_disponible=0)
+        out = StringIO()
+        call_command("reconcile_inventory", stdout=out)
+        self.assertIn("1 programme(s) corrigé(s)", out.getvalue())
+        self.assertEqual(self._inventaire().nb_disponible, 4)
+
+    @override_settings(PAGE_CACHE_TIMEOUT=0)  # contexte du rendu inspecté
+    def test_biens_page_stats_single_read(self):
+        self._write(lambda: Reservation.objects.create(
+            client=self.client_profile, unite=self.unites[0], statut=ReservationStatus.CONFIRMEE
+        ))
+        response = self.client.get("/catalogue/biens/")
+        self.assertEqual(response.context["total_biens"], 4)
+        self.assertEqual(response.context["biens_vendus"], 1)
+        self.assertEqual(response.context["biens_disponibles"], 3)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class UniteStatutReelTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.programme = Programme.objects.create(nom="Résidences Test", statut="actif")
+            type_bien = TypeBien.objects.create(code="APPT", libelle="Appartement")
+            modele = ModeleBien.objects.create(type_bien=type_bien, nom_marketing="Appt T2", prix_base_ttc=1000)
+            self.unites = [
+                Unite.objects.create(
+                    programme=self.programme, modele_bien=modele, reference_lot=f"A{i}", prix_ttc=1000
+                )
+                for i in range(3)
+            ]
+            client_profile = Client.objects.create(
+                nom="Fall", prenom="Moussa", telephone="770000000", email="moussa@example.com"
+            )
+            Reservation.objects.create(client=client_profile, unite=self.unites[0], statut=ReservationStatus.CONFIRMEE)
+            Reservation.objects.create(client=client_profile, unite=self.unites[1], statut=ReservationStatus.EN_COURS)
+            # Statut stocké volontairement désynchronisé
+            Unite.objects.filter(pk__in=[self.unites[0].pk, self.unites[1].pk]).update(
+                statut_disponibilite=UniteStatus.DISPONIBLE
+            )
+
+    def test_annotation_matches_get_statut_reel(self):
+        with self.assertNumQueries(1):
+            annotes = {u.pk: u.get_statut_reel() for u in Unite.objects.with_statut_reel()}
+        for unite in Unite.objects.all():
+            self.assertEqual(annotes[unite.pk], unite.get_statut_reel())
+        self.assertEqual(annotes[self.unites[0].pk], UniteStatus.VENDU)
+        self.assertEqual(annotes[self.unites[1].pk], UniteStatus.RESERVE)
+
+    @override_settings(PAGE_CACHE_TIMEOUT=0)  # requêtes du rendu mesurées, hors cache des pages
+    def test_programme_detail_has_no_per_unit_queries(self):
+        url = f"/catalogue/programmes/{self.programme.pk}/"
+        self.client.get(url)
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertContains(response, "A0")
+
+    def test_reconcile_unite_statuts(self):
+        out = StringIO()
+        call_command("reconcile_unite_statuts", "--dry-run", stdout=out)
+        self.assertIn("2 unité(s) en écart", out.getvalue())
+
+        call_command("reconcile_unite_statuts", stdout=StringIO())
+        statuts = dict(Unite.objects.values_list("reference_lot", "statut_disponibilite"))
+        self.assertEqual(statuts, {"A0": UniteStatus.VENDU, "A1": UniteStatus.RESERVE, "A2": UniteStatus.DISPONIBLE})
+
+    def test_reconcile_keeps_delivered_units(self):
+        # Réservation confirmée : statut réel vendu, mais la livraison n'est pas annulée
+        Unite.objects.filter(pk=self.unites[0].pk).update(statut_disponibilite=UniteStatus.LIVRE)
+        out = StringIO()
+        call_command("reconcile_unite_statuts", stdout=out)
+        self.assertIn("1 unité(s) corrigée(s)", out.getvalue())
+        self.assertEqual(Unite.objects.get(pk=self.unites[0].pk).statut_disponibilite, UniteStatus.LIVRE)
+
+    def test_reconcile_unite_statuts_invalidates_caches(self):
+        # update() sans signaux : clusters, pages publiques et ETag de l'API invalidés par la commande
+        carte, pages = MapClusterService.generation(), PageCacheService.generation()
+        ConditionalGetService.changed_at([Unite._meta.label])
+        with mock.patch("core.services.conditional_get_service.time.time", return_value=4102444800):
+            with self.captureOnCommitCallbacks(execute=True):
+                call_command("reconcile_unite_statuts", stdout=StringIO())
+        self.assertNotEqual(MapClusterService.generation(), carte)
+        self.assertNotEqual(PageCacheService.generation(), pages)
+        self.assertEqual(ConditionalGetService.changed_at([Unite._meta.label])[Unite._meta.label], 4102444800)
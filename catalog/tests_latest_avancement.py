@@ -0,0 +1,95 @@
+"""
+Tests pour le dernier avancement des unités annoté en SQL (Unite.objects.with_latest_avancement()).
+"""
+from datetime import date
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import Role, User
+from catalog.models import AvancementChantierUnite, ModeleBien, PhotoChantierUnite, Programme, TypeBien, Unite
+from core.choices import UniteStatus
+
+
+class LatestAvancementTests(TestCase):
+
+    def setUp(self):
+        self.programme = Programme.objects.create(nom="Cité Baobab", statut="actif")
+        self.modele = ModeleBien.objects.create(
+            type_bien=TypeBien.objects.create(code="VILLA", libelle="Villa"), nom_marketing="F5", prix_base_ttc=1
+        )
+        self.commercial = User.objects.create_user(username="com", email="com@example.com", password="pass123")
+        self.commercial.roles.add(Role.objects.create(code="COMMERCIAL", libelle="Commercial"))
+
+    def _unite(self, reference, pointages=()):
+        unite = Unite.objects.create(
+            programme=self.programme, modele_bien=self.modele, reference_lot=reference,
+            prix_ttc=1, statut_disponibilite=UniteStatus.RESERVE,
+        )
+        avancements = [
+            AvancementChantierUnite.objects.create(
+                unite=unite, etape=etape, date_pointage=date(2025, 4, jour), pourcentage=pourcentage
+            )
+            for etape, jour, pourcentage in pointages
+        ]
+        return unite, avancements
+
+    def test_annotation_returns_latest_pointage(self):
+        unite, (_, toiture, _) = self._unite("V1", [("Fondations", 1, 20), ("Toiture", 20, 60), ("Dalle", 10, 40)])
+        PhotoChantierUnite.objects.create(avancement=toiture, image="chantier/toiture.jpg", pris_le=timezone.now())
+        vide, _ = self._unite("V2")
+
+        annotated = {u.pk: u for u in Unite.objects.with_latest_avancement()}
+        self.assertEqual(
+            (annotated[unite.pk].dernier_avancement_ref, annotated[unite.pk].derniere_etape,
+             annotated[unite.pk].dernier_pourcentage, annotated[unite.pk].dernier_pointage,
+             annotated[unite.pk].dernier_nb_photos),
+            (toiture.pk, "Toiture", 60, date(2025, 4, 20), 1),
+        )
+        self.assertIsNone(annotated[vide.pk].dernier_avancement_ref)
+        self.assertEqual(annotated[vide.pk].dernier_nb_photos, 0)
+
+    def test_annotation_falls_back_when_pointer_missing(self):
+        unite, (_, dernier) = self._unite("V1", [("Fondations", 1, 20), ("Dalle", 5, 35)])
+        # Pointeur pas encore renseigné (données antérieures au recalcul)
+        Unite.objects.filter(pk=unite.pk).update(dernier_avancement=None)
+
+        annotated = Unite.objects.with_latest_avancement().get(pk=unite.pk)
+        self.assertEqual((annotated.dernier_avancement_ref, annotated.derniere_etape), (dernier.pk, "Dalle"))
+
+    def _count_queries(self, url):
+        self.client.force_login(self.commercial)
+        self.client.get(url)  # sessions, rôles en cache
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response
+
+    def test_chantier_list_and_dashboard_in_constant_queries(self):
+        self._unite("V1", [("Fondations", 1, 20)])
+        url_list, url_dashboard = reverse("chantiers_unites_list"), reverse("commercial_dashboard")
+        list_queries, _ = self._count_queries(url_list)
+        dashboard_queries, _ = self._count_queries(url_dashboard)
+
+        for index in range(2, 8):
+            self._unite(f"V{index}", [("Fondations", 1, 10), ("Gros œuvre", index, 10 * index)])
+
+        count, response = self._count_queries(url_list)
+        self.assertEqual(count, list_queries)
+        self.assertContains(response, "Gros œuvre")
+        self.assertContains(response, "70%")
+        self.assertEqual(self._count_queries(url_dashboard)[0], dashboard_queries)
+
+    def test_api_exposes_latest_avancement(self):
+        unite, _ = self._unite("V1", [("Fondations", 1, 20), ("Dalle", 5, 35)])
+        api = APIClient()
+        api.force_authenticate(self.commercial)
+        data = api.get(f"/api/unites/{unite.pk}/").data
+        self.assertEqual(
+            (data["derniere_etape"], data["dernier_pourcentage"], data["dernier_pointage"], data["dernier_nb_photos"]),
+            ("Dalle", 35, "2025-04-05", 0),
+        )
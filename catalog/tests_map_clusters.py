@@ -0,0 +1,87 @@
+"""
+Tests pour les clusters de la carte (MapClusterService, /api/carte/clusters/).
+"""
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework.test import APITestCase
+
+from catalog.models import Programme, TypeBien, ModeleBien, Unite
+from catalog.services.map_cluster_service import MapClusterService, tile_bounds, tile_x, tile_y
+from core.choices import UniteStatus
+
+
+LOCMEM_CACHE = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "map-tests"}}
+DAKAR_BBOX = "-17.60,14.60,-17.30,14.80"
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class MapClusterTests(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        # Compteurs de stock recalculés après commit
+        with self.captureOnCommitCallbacks(execute=True):
+            self.programme = Programme.objects.create(nom="Plateau", gps_lat=Decimal("14.6693"), gps_lng=Decimal("-17.4377"))
+            modele = ModeleBien.objects.create(
+                type_bien=TypeBien.objects.create(code="APPT", libelle="Appartement"), nom_marketing="T2", prix_base_ttc=1
+            )
+            self.unites = [
+                Unite.objects.create(
+                    programme=self.programme, modele_bien=modele, reference_lot=f"A{i}", prix_ttc=1,
+                    gps_lat=Decimal("14.6690") + Decimal(i) / 10000, gps_lng=Decimal("-17.4380"),
+                )
+                for i in range(3)
+            ]
+            # Loin de Dakar : hors de la zone demandée
+            Unite.objects.create(
+                programme=self.programme, modele_bien=modele, reference_lot="SL1", prix_ttc=1,
+                gps_lat=Decimal("16.0260"), gps_lng=Decimal("-16.4890"),
+            )
+
+    def test_tile_math_round_trip(self):
+        x, y = tile_x(-17.4377, 12), tile_y(14.6693, 12)
+        south, west, north, east = tile_bounds(x, y, 12)
+        self.assertTrue(south <= 14.6693 <= north and west <= -17.4377 <= east)
+
+    def test_unit_clusters_with_status_breakdown(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.unites[0].statut_disponibilite = UniteStatus.RESERVE
+            self.unites[0].save()
+
+        response = self.client.get("/api/carte/clusters/", {"bbox": DAKAR_BBOX, "zoom": 10})
+        self.assertEqual(response.status_code, 200)
+        [cluster] = response.data["clusters"]
+        self.assertEqual(cluster["count"], 3)
+        self.assertEqual(cluster["statuts"], {"disponible": 2, "reserve": 1})
+        self.assertAlmostEqual(cluster["lat"], 14.6691, places=4)
+
+    def test_programme_layer_uses_inventory(self):
+        response = self.client.get("/api/carte/clusters/", {"bbox": DAKAR_BBOX, "zoom": 10, "layer": "programmes"})
+        [cluster] = response.data["clusters"]
+        self.assertEqual(cluster["count"], 1)
+        self.assertEqual(cluster["statuts"]["disponible"], 4)
+
+    def test_cached_per_tile_and_invalidated_on_status_change(self):
+        params = {"bbox": DAKAR_BBOX, "zoom": 10}
+        self.client.get("/api/carte/clusters/", params)
+        with self.assertNumQueries(0):
+            self.client.get("/api/carte/clusters/", params)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.unites[1].statut_disponibilite = UniteStatus.VENDU
+            self.unites[1].save(update_fields=["statut_disponibilite"])
+
+        [cluster] = self.client.get("/api/carte/clusters/", params).data["clusters"]
+        self.assertEqual(cluster["statuts"], {"disponible": 2, "vendu": 1})
+
+    def test_rejects_invalid_or_too_large_requests(self):
+        self.assertEqual(self.client.get("/api/carte/clusters/", {"bbox": "1,2,3", "zoom": 10}).status_code, 400)
+        response = self.client.get("/api/carte/clusters/", {"bbox": "-18,12,-11,17", "zoom": 14})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("tuiles", str(response.data["bbox"]))
+
+    def test_tiles_for_bbox_limit(self):
+        with self.assertRaises(ValueError):
+            MapClusterService.tiles_for_bbox(12, -18, 17, -11, 14)
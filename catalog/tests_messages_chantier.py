@@ -0,0 +1,131 @@
+"""
+Tests pour les repères de lecture / suppression des messages de chantier (MessageChantierService).
+"""
+import importlib
+from datetime import date, timedelta
+
+from django.apps import apps
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import Role, User
+from catalog.models import (
+    AvancementChantierUnite,
+    MessageChantier,
+    ModeleBien,
+    Programme,
+    SuiviMessagesChantier,
+    TypeBien,
+    Unite,
+)
+from catalog.services.message_chantier_service import MessageChantierService
+
+
+class MessageChantierTests(TestCase):
+
+    def setUp(self):
+        self.commercial = User.objects.create_user(username="com", email="com@example.com", password="pass123")
+        self.commercial.roles.add(Role.objects.create(code="COMMERCIAL", libelle="Commercial"))
+        self.client_user = User.objects.create_user(username="cli", email="cli@example.com", password="pass123")
+        programme = Programme.objects.create(nom="Cité Fleurie", contact_commercial=self.commercial)
+        modele = ModeleBien.objects.create(
+            type_bien=TypeBien.objects.create(code="APPT", libelle="Appartement"), nom_marketing="T2", prix_base_ttc=1
+        )
+        unite = Unite.objects.create(programme=programme, modele_bien=modele, reference_lot="A1", prix_ttc=1)
+        self.avancement = AvancementChantierUnite.objects.create(
+            unite=unite, etape="Fondations", date_pointage=date(2025, 5, 1), pourcentage=10
+        )
+        self.debut = timezone.now() - timedelta(hours=1)
+
+    def _message(self, minutes, auteur=None):
+        message = MessageChantier.objects.create(
+            avancement=self.avancement, auteur=auteur or self.client_user, message=f"Message {minutes}"
+        )
+        # Dates distinctes et ordonnées, indépendamment de la résolution de l'horloge
+        MessageChantier.objects.filter(pk=message.pk).update(created_at=self.debut + timedelta(minutes=minutes))
+        message.refresh_from_db()
+        return message
+
+    def _visibles(self, user):
+        return list(MessageChantierService.visibles(user, self.avancement).values_list("message", flat=True))
+
+    def test_clear_chat_is_one_upsert_whatever_the_message_count(self):
+        for minutes in range(30):
+            self._message(minutes)
+        self.client.force_login(self.commercial)
+        url = reverse("clear_chat_chantier", args=[self.avancement.pk])
+        self.client.post(url)
+        self.assertEqual(self._visibles(self.commercial), [])
+        self.assertFalse(MessageChantier.supprime_par.through.objects.exists())
+
+        # Vider à nouveau : même nombre de requêtes, repère mis à jour sur place
+        with self.assertNumQueries(2):  # upsert + purge des suppressions isolées
+            MessageChantierService.vider(self.commercial, self.avancement)
+        self.assertEqual(SuiviMessagesChantier.objects.count(), 1)
+
+        # Nouveaux messages visibles ; le chat n'est vidé que pour le commercial
+        MessageChantier.objects.create(avancement=self.avancement, auteur=self.client_user, message="Nouveau")
+        self.assertEqual(self._visibles(self.commercial), ["Nouveau"])
+        self.assertEqual(len(self._visibles(self.client_user)), 31)
+
+    def test_delete_advances_watermark_or_records_isolated_deletion(self):
+        premier, deuxieme, troisieme, quatrieme = (self._message(minutes) for minutes in range(4))
+
+        # Message au milieu de la conversation : suppression isolée
+        MessageChantierService.supprimer(self.commercial, troisieme)
+        self.assertTrue(troisieme.supprime_par.filter(pk=self.commercial.pk).exists())
+
+        # Plus ancien message visible : repère avancé, suppressions isolées contiguës absorbées
+        MessageChantierService.supprimer(self.commercial, premier)
+        MessageChantierService.supprimer(self.commercial, deuxieme)
+        suivi = SuiviMessagesChantier.objects.get(user=self.commercial, avancement=self.avancement)
+        self.assertEqual(suivi.vide_jusqu_au, troisieme.created_at)
+        self.assertFalse(MessageChantier.supprime_par.through.objects.exists())
+        self.assertEqual(self._visibles(self.commercial), [quatrieme.message])
+
+    def test_unread_counts_in_one_grouped_query(self):
+        autre = AvancementChantierUnite.objects.create(
+            unite=self.avancement.unite, etape="Dalle", date_pointage=date(2025, 6, 1), pourcentage=30
+        )
+        for minutes in range(3):
+            self._message(minutes)
+        self._message(5, auteur=self.commercial)  # ses propres messages ne comptent pas
+        MessageChantier.objects.create(avancement=autre, auteur=self.client_user, message="Dalle ?")
+
+        with self.assertNumQueries(1):
+            non_lus = MessageChantierService.non_lus(self.commercial)
+        self.assertEqual(non_lus, {self.avancement.pk: 3, autre.pk: 1})
+
+        MessageChantierService.marquer_lu(self.commercial, self.avancement)
+        self._message(90)
+        self.assertEqual(
+            MessageChantierService.non_lus(self.commercial, AvancementChantierUnite.objects.filter(pk=self.avancement.pk)),
+            {self.avancement.pk: 1},
+        )
+        MessageChantierService.vider(self.commercial, autre)
+        self.assertNotIn(autre.pk, MessageChantierService.non_lus(self.commercial))
+
+    def test_migration_collapses_supprime_par(self):
+        messages = [self._message(minutes) for minutes in range(4)]
+        for message in messages[:2] + messages[3:]:
+            message.supprime_par.add(self.commercial)
+        for message in messages:
+            message.supprime_par.add(self.client_user)
+
+        migration = importlib.import_module("catalog.migrations.0022_collapse_messages_supprimes")
+        migration.collapse_supprime_par(apps, None)
+
+        self.assertEqual(
+            SuiviMessagesChantier.objects.get(user=self.commercial).vide_jusqu_au, messages[1].created_at
+        )
+        self.assertEqual(
+            SuiviMessagesChantier.objects.get(user=self.client_user).vide_jusqu_au, messages[3].created_at
+        )
+        # Seule la suppression isolée (après un message encore visible) reste dans la M2M
+        self.assertEqual(
+            list(MessageChantier.supprime_par.through.objects.values_list("user_id", "messagechantier_id")),
+            [(self.commercial.pk, messages[3].pk)],
+        )
+        self.assertEqual(self._visibles(self.commercial), [messages[2].message])
+        self.assertEqual(self._visibles(self.client_user), [])
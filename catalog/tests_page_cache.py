@@ -0,0 +1,93 @@
+"""
+Tests pour le cache des pages publiques du catalogue (PageCacheService, CachedPageMixin).
+"""
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from catalog.models import ModeleBien, Programme, TypeBien, Unite
+from core.services.page_cache_service import PageCacheService
+
+
+LOCMEM_CACHE = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class PageCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.programme = Programme.objects.create(nom="Résidences du Lac", statut="actif")
+            modele = ModeleBien.objects.create(
+                type_bien=TypeBien.objects.create(code="VILLA", libelle="Villa"), nom_marketing="F4", prix_base_ttc=1
+            )
+            Unite.objects.create(programme=self.programme, modele_bien=modele, reference_lot="L1", prix_ttc=1)
+
+    def test_anonymous_page_served_from_cache_until_catalogue_changes(self):
+        url = f"/catalogue/programmes/{self.programme.pk}/"
+        self.assertNotIn("X-Page-Cache", self.client.get(url))
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response["X-Page-Cache"], "hit")
+        self.assertContains(response, "Résidences du Lac")
+
+        # Paramètres de requête distincts : entrée distincte
+        self.assertNotIn("X-Page-Cache", self.client.get(url, {"page": 2}))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.programme.nom = "Résidences du Lac Rose"
+            self.programme.save()
+        response = self.client.get(url)
+        self.assertNotIn("X-Page-Cache", response)
+        self.assertContains(response, "Résidences du Lac Rose")
+
+    def test_authenticated_users_bypass_page_cache(self):
+        self.client.force_login(User.objects.create_user(username="u", email="u@example.com", password="pass123"))
+        self.client.get("/catalogue/biens/")
+        self.assertNotIn("X-Page-Cache", self.client.get("/catalogue/biens/"))
+
+    def test_programme_cards_cached_as_fragments(self):
+        self.client.force_login(User.objects.create_user(username="u", email="u@example.com", password="pass123"))
+        for attendu in (1, 0):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get("/catalogue/programmes/")
+            # Carte en cache : plus de comptage des unités du programme
+            self.assertEqual(sum('"catalog_unite"' in query["sql"] for query in queries), attendu)
+        self.assertNotIn("X-Page-Cache", response)
+        self.assertContains(response, "1 au total")
+
+    def test_stampede_waits_for_concurrent_render(self):
+        key = "page_cache:test"
+        cache.add(f"{key}:lock", 1)  # rendu en cours dans une autre requête
+        render = mock.Mock(return_value="rendu local")
+
+        def other_request_finishes(_):
+            cache.set(key, "rendu partagé")
+
+        with mock.patch("core.services.page_cache_service.time.sleep", side_effect=other_request_finishes):
+            self.assertEqual(PageCacheService.get_or_render(key, render, "Test"), "rendu partagé")
+        render.assert_not_called()
+
+        # Verrou jamais libéré : rendu sans mise en cache après l'attente maximale
+        with self.settings(PAGE_CACHE_LOCK_WAIT=0):
+            self.assertEqual(PageCacheService.get_or_render("page_cache:autre", render, "Test"), "rendu local")
+            self.assertEqual(PageCacheService.get_or_render("page_cache:autre", render, "Test"), "rendu local")
+        self.assertEqual(render.call_count, 1)  # le premier a pris le verrou, puis mis en cache
+
+    def test_hit_rate_in_stats_endpoint(self):
+        for _ in range(4):
+            self.client.get("/")
+        api = APIClient()
+        api.force_authenticate(User.objects.create_user(
+            username="admin", email="admin@example.com", password="pass123", is_staff=True
+        ))
+        response = api.get("/api/stats/cache/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["pages"]["HomeView"], {"hits": 3, "misses": 1, "hit_rate": 0.75})
+        self.assertIn("BiensListView", response.data["pages"])
@@ -0,0 +1,131 @@
+"""
+Tests pour l'extraction EXIF et la vérification GPS des photos de chantier.
+"""
+import tempfile
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from io import BytesIO, StringIO
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from PIL import ExifTags, Image
+
+from catalog.models import AvancementChantierUnite, ModeleBien, PhotoChantierUnite, Programme, TypeBien, Unite
+from catalog.services.photo_metadata_service import PhotoMetadataService
+
+
+def jpeg_with_exif(lat=None, lng=None, taken="2025:03:14 09:26:53", offset=None):
+    exif = Image.Exif()
+    details = exif.get_ifd(ExifTags.IFD.Exif)
+    if taken:
+        details[ExifTags.Base.DateTimeOriginal] = taken
+    if offset:
+        details[ExifTags.Base.OffsetTimeOriginal] = offset
+    if lat is not None:
+        gps = exif.get_ifd(ExifTags.IFD.GPSInfo)
+        for ref_tag, value_tag, value, refs in (
+            (ExifTags.GPS.GPSLatitudeRef, ExifTags.GPS.GPSLatitude, lat, "NS"),
+            (ExifTags.GPS.GPSLongitudeRef, ExifTags.GPS.GPSLongitude, lng, "EW"),
+        ):
+            degrees = abs(value)
+            minutes = (degrees - int(degrees)) * 60
+            gps[ref_tag] = refs[0] if value >= 0 else refs[1]
+            gps[value_tag] = (float(int(degrees)), float(int(minutes)), round((minutes - int(minutes)) * 60, 4))
+    buffer = BytesIO()
+    Image.new("RGB", (64, 48), (90, 90, 90)).save(buffer, "JPEG", exif=exif)
+    return SimpleUploadedFile("photo.jpg", buffer.getvalue(), content_type="image/jpeg")
+
+
+@override_settings(IMAGE_DERIVATIVES_ASYNC=False, PHOTO_GEO_RADIUS_KM=2)
+class PhotoMetadataTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # Répertoire média temporaire créé et supprimé avec la classe
+        cls.media_root = cls.enterClassContext(tempfile.TemporaryDirectory())
+        cls.enterClassContext(override_settings(MEDIA_ROOT=cls.media_root))
+        super().setUpClass()
+
+    def setUp(self):
+        programme = Programme.objects.create(nom="Plateau", gps_lat=Decimal("14.669300"), gps_lng=Decimal("-17.437700"))
+        modele = ModeleBien.objects.create(
+            type_bien=TypeBien.objects.create(code="APPT", libelle="Appartement"), nom_marketing="T2", prix_base_ttc=1
+        )
+        unite = Unite.objects.create(programme=programme, modele_bien=modele, reference_lot="A1", prix_ttc=1)
+        self.avancement = AvancementChantierUnite.objects.create(
+            unite=unite, etape="Gros oeuvre", date_pointage=date.today(), pourcentage=10
+        )
+
+    def test_extract_reads_capture_time_and_gps(self):
+        metadata = PhotoMetadataService.extract(jpeg_with_exif(14.6701, -17.4390, offset="+00:00"))
+
+        self.assertEqual(metadata["pris_le"], datetime(2025, 3, 14, 9, 26, 53, tzinfo=dt_timezone.utc))
+        self.assertAlmostEqual(float(metadata["gps_lat"]), 14.6701, places=5)
+        self.assertAlmostEqual(float(metadata["gps_lng"]), -17.4390, places=5)
+
+    def test_exif_fills_empty_values_on_save(self):
+        photo = PhotoChantierUnite.objects.create(avancement=self.avancement, image=jpeg_with_exif(14.6701, -17.4390))
+        photo.refresh_from_db()
+
+        # Sans OffsetTimeOriginal : heure locale (Africa/Dakar, UTC+0)
+        self.assertEqual(photo.pris_le, datetime(2025, 3, 14, 9, 26, 53, tzinfo=dt_timezone.utc))
+        self.assertEqual(photo.gps_lat, Decimal("14.670100"))
+        self.assertFalse(photo.gps_hors_zone)
+        self.assertLess(photo.distance_programme_km, 1)
+        # Le fichier stocké est complet malgré la lecture de l'EXIF
+        with photo.image.open("rb") as handle:
+            self.assertEqual(Image.open(handle).size, (64, 48))
+
+    def test_values_entered_at_upload_kept(self):
+        pris_le = timezone.now().replace(microsecond=0)
+        photo = PhotoChantierUnite.objects.create(
+            avancement=self.avancement, image=jpeg_with_exif(14.6701, -17.4390),
+            pris_le=pris_le, gps_lat=Decimal("14.669400"), gps_lng=Decimal("-17.437800"),
+        )
+        photo.refresh_from_db()
+        self.assertEqual(photo.pris_le, pris_le)
+        self.assertEqual((photo.gps_lat, photo.gps_lng), (Decimal("14.669400"), Decimal("-17.437800")))
+        self.assertLess(photo.distance_programme_km, 0.1)
+
+    def test_location_checked_again_only_when_changed(self):
+        photo = PhotoChantierUnite.objects.create(avancement=self.avancement, image=jpeg_with_exif(14.6701, -17.4390))
+        photo = PhotoChantierUnite.objects.get(pk=photo.pk)
+
+        # Description seule : pas de parcours avancement → unité → programme
+        photo.description = "Façade"
+        with self.assertNumQueries(1):
+            photo.save()
+
+        # Thiès, ~55 km du Plateau
+        photo.gps_lat, photo.gps_lng = Decimal("14.791000"), Decimal("-16.935900")
+        photo.save()
+        self.assertTrue(photo.gps_hors_zone)
+
+    def test_photo_far_from_programme_flagged(self):
+        # Thiès, ~55 km du Plateau
+        photo = PhotoChantierUnite.objects.create(avancement=self.avancement, image=jpeg_with_exif(14.7910, -16.9359))
+
+        self.assertTrue(photo.gps_hors_zone)
+        self.assertGreater(photo.distance_programme_km, 50)
+
+    def test_without_exif_falls_back_to_now(self):
+        photo = PhotoChantierUnite.objects.create(avancement=self.avancement, image=jpeg_with_exif(taken=None))
+
+        self.assertLess(abs(timezone.now() - photo.pris_le), timedelta(minutes=1))
+        self.assertIsNone(photo.gps_lat)
+        self.assertIsNone(photo.gps_hors_zone)
+
+    def test_backfill_command(self):
+        photo = PhotoChantierUnite.objects.create(avancement=self.avancement, image=jpeg_with_exif(14.6701, -17.4390))
+        PhotoChantierUnite.objects.filter(pk=photo.pk).update(
+            gps_lat=None, gps_lng=None, gps_hors_zone=None, distance_programme_km=None, pris_le=timezone.now()
+        )
+
+        call_command("extract_photo_metadata", workers=1, stdout=StringIO())
+
+        photo.refresh_from_db()
+        self.assertEqual(photo.gps_lng, Decimal("-17.439000"))
+        self.assertEqual(photo.pris_le.year, 2025)
+        self.assertFalse(photo.gps_hors_zone)
@@ -0,0 +1,149 @@
+"""
+Tests pour l'avancement global pondéré des programmes et des unités (ProgressService).
+"""
+from datetime import date
+
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from catalog.models import (
+    AvancementChantier,
+    AvancementChantierUnite,
+    EtapeChantier,
+    ModeleBien,
+    Programme,
+    TypeBien,
+    Unite,
+)
+from catalog.services.progress_service import ProgressService
+from core.transactions import on_commit_batch
+
+
+class ProgressRollupTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        # Invalidations regroupées par transaction : exécutées ici pour que chaque test ait les siennes
+        with self.captureOnCommitCallbacks(execute=True):
+            self._fixtures()
+
+    def _fixtures(self):
+        self.programme = Programme.objects.create(nom="Cité des Palmiers", statut="actif")
+        self.fondations = EtapeChantier.objects.create(
+            programme=self.programme, code="FOND", libelle="Fondations", ordre=1, poids=1
+        )
+        self.gros_oeuvre = EtapeChantier.objects.create(
+            programme=self.programme, code="GO", libelle="Gros œuvre", ordre=2, poids=3
+        )
+        modele = ModeleBien.objects.create(
+            type_bien=TypeBien.objects.create(code="VILLA", libelle="Villa"), nom_marketing="F4", prix_base_ttc=1
+        )
+        self.unite = Unite.objects.create(programme=self.programme, modele_bien=modele, reference_lot="V1", prix_ttc=1)
+
+    def _pointage(self, etape, pourcentage, jour):
+        return AvancementChantier.objects.create(etape=etape, date_pointage=date(2025, 6, jour), pourcentage=pourcentage)
+
+    def test_weighted_programme_progress_uses_latest_pointage(self):
+        self._pointage(self.fondations, 100, 1)
+        self._pointage(self.gros_oeuvre, 80, 1)
+        # Dernier pointage retenu même s'il est plus faible (correction de saisie)
+        self._pointage(self.gros_oeuvre, 40, 15)
+
+        progress = ProgressService.programme_progress([self.programme.pk])[self.programme.pk]
+        self.assertEqual(progress, {"avancement": 55.0, "etapes": 2, "etapes_terminees": 1})
+
+    def test_programme_progress_cached_and_invalidated_on_write(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self._pointage(self.fondations, 100, 1)
+        self.assertEqual(ProgressService.programme_progress([self.programme.pk])[self.programme.pk]["avancement"], 25.0)
+
+        with self.assertNumQueries(0):
+            ProgressService.programme_progress([self.programme.pk])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self._pointage(self.gros_oeuvre, 60, 2)
+        self.assertEqual(ProgressService.programme_progress([self.programme.pk])[self.programme.pk]["avancement"], 70.0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.gros_oeuvre.poids = 1
+            self.gros_oeuvre.save()
+        self.assertEqual(ProgressService.programme_progress([self.programme.pk])[self.programme.pk]["avancement"], 80.0)
+
+    def test_unite_progress_matches_programme_etapes(self):
+        for etape, pourcentage, jour in (("fondations", 100, 1), ("GO", 20, 2), ("Gros œuvre", 60, 10)):
+            AvancementChantierUnite.objects.create(
+                unite=self.unite, etape=etape, date_pointage=date(2025, 6, jour), pourcentage=pourcentage
+            )
+        self.assertEqual(ProgressService.unite_progress([self.unite.pk])[self.unite.pk], 70.0)
+
+        # Étapes libres, hors référentiel du programme : pourcentage maximal saisi
+        autre = Unite.objects.create(
+            programme=self.programme, modele_bien=self.unite.modele_bien, reference_lot="V2", prix_ttc=1
+        )
+        AvancementChantierUnite.objects.create(unite=autre, etape="Divers", date_pointage=date(2025, 6, 1), pourcentage=35)
+        self.assertEqual(ProgressService.unite_progress([autre.pk])[autre.pk], 35.0)
+
+    def test_api_lists_active_programmes_in_constant_queries(self):
+        self._pointage(self.fondations, 100, 1)
+        for index in range(5):
+            programme = Programme.objects.create(nom=f"Programme {index}", statut="actif")
+            etape = EtapeChantier.objects.create(programme=programme, code="GO", libelle="Gros œuvre", ordre=1)
+            self._pointage(etape, 10 * index, 1)
+        Programme.objects.create(nom="Brouillon", statut="brouillon")
+
+        api = APIClient()
+        with self.assertNumQueries(3):  # programmes + étapes + derniers pointages
+            response = api.get("/api/avancement/programmes/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 6)
+        palmiers = next(item for item in response.data if item["programme"] == self.programme.pk)
+        self.assertEqual(palmiers["avancement"], 25.0)
+
+        with self.assertNumQueries(1):  # tout en cache
+            api.get("/api/avancement/programmes/")
+
+    def test_api_unites_progress(self):
+        AvancementChantierUnite.objects.create(
+            unite=self.unite, etape="Fondations", date_pointage=date(2025, 6, 1), pourcentage=100
+        )
+        api = APIClient()
+        api.force_authenticate(User.objects.create_user(username="u", email="u@example.com", password="pass123"))
+        response = api.get(f"/api/avancement/programmes/{self.programme.pk}/unites/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, [{"unite": self.unite.pk, "reference_lot": "V1", "avancement": 25.0}])
+
+
+class OnCommitBatchTests(TestCase):
+
+    def test_one_callback_per_transaction(self):
+        calls = []
+        with self.captureOnCommitCallbacks(execute=True):
+            on_commit_batch("test", [1], calls.append)
+            on_commit_batch("test", [2, None], calls.append)
+        self.assertEqual(calls, [{1, 2}])
+
+    def test_batch_survives_savepoint_rollback(self):
+        calls = []
+        with self.captureOnCommitCallbacks(execute=True):
+            # Seul enregistrement du lot annulé avec le savepoint : l'écriture suivante le reprogramme
+            try:
+                with transaction.atomic():
+                    on_commit_batch("test", [1], calls.append)
+                    raise ValueError
+            except ValueError:
+                pass
+            on_commit_batch("test", [2], calls.append)
+        self.assertEqual(len(calls), 1)
+        self.assertIn(2, calls[0])
+
+    def test_batch_left_pending_by_discarded_callbacks(self):
+        calls = []
+        # Callback jamais exécuté (transaction du test annulée à la fin)
+        on_commit_batch("test", [1], calls.append)
+        with self.captureOnCommitCallbacks(execute=True):
+            on_commit_batch("test", [2], calls.append)
+        self.assertEqual(len(calls), 1)
+        self.assertIn(2, calls[0])
@@ -0,0 +1,68 @@
+"""
+Tests pour la recherche plein texte du catalogue (SearchService, FullTextSearchFilter).
+"""
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import override_settings
+from rest_framework.test import APITestCase
+
+from accounts.models import Role
+from catalog.models import Programme, TypeBien, ModeleBien, Unite
+from catalog.services.search_service import SearchService
+
+
+User = get_user_model()
+
+
+class SearchServiceTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="commercial", email="commercial@example.com", password="testpass123")
+        self.user.roles.add(Role.objects.create(code="COMMERCIAL", libelle="Commercial"))
+        self.bayakh = Programme.objects.create(
+            nom="Résidences Mame Diarra", adresse="Bayakh", description="Villas avec jardin", statut="actif"
+        )
+        self.almadies = Programme.objects.create(
+            nom="Les Terrasses", adresse="Almadies, Dakar", description="Appartements vue mer", statut="actif"
+        )
+        type_bien = TypeBien.objects.create(code="VILLA", libelle="Villa")
+        modele = ModeleBien.objects.create(type_bien=type_bien, nom_marketing="Villa Baobab", prix_base_ttc=1000)
+        Unite.objects.create(
+            programme=self.bayakh, modele_bien=modele, reference_lot="B12", prix_ttc=1000,
+            caracteristiques={"orientation": "piscine privée", "chambres": 4},
+        )
+        Unite.objects.create(programme=self.almadies, modele_bien=modele, reference_lot="T01", prix_ttc=1000)
+
+    def test_build_query_keeps_only_words(self):
+        self.assertIsNone(SearchService.build_query("  ' & | !  "))
+        query = SearchService.build_query("villa b12")
+        self.assertEqual(query.get_source_expressions()[-1].value, "villa:* & b12:*")
+
+    def test_programme_endpoint_search(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.get("/api/programmes/", {"search": "Bayakh"})
+        self.assertEqual([p["nom"] for p in response.data], ["Résidences Mame Diarra"])
+        self.assertNotIn("search_vector", response.data[0])
+
+    def test_unite_endpoint_search(self):
+        response = self.client.get("/api/unites/", {"search": "Terrasses"})
+        self.assertEqual([u["reference_lot"] for u in response.data], ["T01"])
+
+    @override_settings(PAGE_CACHE_TIMEOUT=0)  # contexte du rendu inspecté
+    def test_biens_page_search(self):
+        response = self.client.get("/catalogue/biens/", {"search": "B12"})
+        self.assertEqual([u.reference_lot for u in response.context["biens"]], ["B12"])
+
+    @skipUnless(connection.vendor == "postgresql", "Recherche plein texte PostgreSQL")
+    def test_ranked_full_text_search(self):
+        # Racinisation française et valeurs texte des caractéristiques
+        resultats = SearchService.search(Unite.objects.all(), "piscines")
+        self.assertEqual([u.reference_lot for u in resultats], ["B12"])
+
+        # Le renommage d'un programme met à jour l'index de ses unités
+        self.almadies.nom = "Les Jardins de Ngor"
+        self.almadies.save()
+        resultats = SearchService.search(Unite.objects.all(), "jardins")
+        self.assertEqual([u.reference_lot for u in resultats][0], "T01")
@@ -24,6 +24,7 @@ from .views import (
     AvancementChantierUniteCreateView,
     AvancementChantierUniteUpdateView,
 )
+from .views_events import chantier_events
 
 urlpatterns = [
     # Biens disponibles (page publique)
@@ -60,4 +61,8 @@ urlpatterns = [
     path('chantiers/<uuid:pk>/', AvancementChantierUniteDetailView.as_view(), name='avancement_detail'),
     path('chantiers/nouveau/', AvancementChantierUniteCreateView.as_view(), name='avancement_create'),
     path('chantiers/<uuid:pk>/modifier/', AvancementChantierUniteUpdateView.as_view(), name='avancement_edit'),
+
+    # Événements temps réel (SSE) : messages, réponses, photos
+    path('chantiers/evenements/', chantier_events, name='chantier_events'),
+    path('chantiers/<uuid:avancement_id>/evenements/', chantier_events, name='avancement_events'),
 ]
@@ -3,18 +3,21 @@ from django.contrib.auth.mixins import LoginRequiredMixin
 from django.urls import reverse_lazy
 from django.shortcuts import redirect
 from django.contrib import messages
-from django.db.models import Q
 from accounts.mixins import RoleRequiredMixin
+from core.mixins import CachedPageMixin
 from .models import Programme, Unite, TypeBien, ModeleBien, AvancementChantierUnite, PhotoChantierUnite, MessageChantier
 from .forms import ProgrammeForm, AvancementChantierUniteForm
+from .services.inventory_service import InventoryService
+from .services.search_service import SearchService
+from .services.message_chantier_service import MessageChantierService
 from datetime import datetime
 
 
-class HomeView(TemplateView):
+class HomeView(CachedPageMixin, TemplateView):
     template_name = 'public/home.html'
 
 
-class ProgrammeListView(ListView):
+class ProgrammeListView(CachedPageMixin, ListView):
     model = Programme
     template_name = 'catalog/programme_list.html'
     context_object_name = 'programmes'
@@ -24,19 +27,28 @@ class ProgrammeListView(ListView):
         return Programme.objects.all().order_by("nom")
 
 
-class ProgrammeDetailView(DetailView):
+class ProgrammeDetailView(CachedPageMixin, DetailView):
     model = Programme
     template_name = 'catalog/programme_detail.html'
     context_object_name = 'programme'
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        # Statut réel calculé en SQL pour toutes les unités du programme
+        context['unites'] = self.object.unites.with_statut_reel().select_related('modele_bien')
+        return context
+
 
-class UniteDetailView(DetailView):
+class UniteDetailView(CachedPageMixin, DetailView):
     model = Unite
     template_name = 'catalog/unite_detail.html'
     context_object_name = 'unite'
 
+    def get_queryset(self):
+        return Unite.objects.with_statut_reel()
+
 
-class BiensListView(ListView):
+class BiensListView(CachedPageMixin, ListView):
     """
     Page publique pour afficher tous les biens disponibles avec filtrage
     """
@@ -46,56 +58,36 @@ class BiensListView(ListView):
     paginate_by = 12
 
     def get_queryset(self):
-        queryset = Unite.objects.select_related('programme', 'modele_bien', 'modele_bien__type_bien')
+        queryset = Unite.objects.with_statut_reel().select_related('programme', 'modele_bien', 'modele_bien__type_bien')
         
-        # Filtrage par recherche
+        # Filtrage par recherche (plein texte, classé par pertinence)
         search = self.request.GET.get('search', '')
-        if search:
-            queryset = queryset.filter(
-                Q(reference_lot__icontains=search) |
-                Q(programme__nom__icontains=search)
-            )
         
         # Filtrage par programme
         programme_id = self.request.GET.get('programme', '')
         if programme_id:
             queryset = queryset.filter(programme_id=programme_id)
         
-        # Filtrage par statut
+        # Filtrage par statut (statut réel, celui affiché sur les cartes)
         statut = self.request.GET.get('statut', '')
         if statut:
-            queryset = queryset.filter(statut_disponibilite=statut)
+            queryset = queryset.filter(statut_reel=statut)
         
+        if search:
+            return SearchService.search(queryset, search)
         return queryset.order_by('programme', 'reference_lot')
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['programmes'] = Programme.objects.all().order_by('nom')
         
-        # Statistiques globales - basées sur les réservations confirmées
-        from sales.models import Reservation
-        from django.db.models import Q
-        
-        all_biens = Unite.objects.all()
-        context['total_biens'] = all_biens.count()
-        
-        # Biens avec réservation confirmée = "Vendus/Livrés"
-        biens_avec_resa_confirmee = all_biens.filter(
-            reservations__statut='confirmee'
-        ).distinct().count()
-        context['biens_vendus'] = biens_avec_resa_confirmee
-        
-        # Biens avec réservation EN COURS ou non-annulée (mais pas confirmée) = "Réservés"
-        biens_avec_resa_encours = all_biens.filter(
-            Q(reservations__statut='en_cours') | 
-            Q(reservations__statut='reserve')
-        ).exclude(
-            reservations__statut='annulee'
-        ).distinct().count()
-        context['biens_reserves'] = biens_avec_resa_encours
-        
-        # Biens disponibles = biens sans réservation active (ou avec seulement des annulées)
-        context['biens_disponibles'] = context['total_biens'] - context['biens_vendus'] - context['biens_reserves']
+        # Statistiques globales - compteurs dénormalisés par programme (ProgrammeInventory),
+        # selon le statut réel des unités (réservations confirmées = vendus)
+        totals = InventoryService.totals()
+        context['total_biens'] = totals['total']
+        context['biens_vendus'] = totals['nb_vendu'] + totals['nb_livre']
+        context['biens_reserves'] = totals['nb_reserve']
+        context['biens_disponibles'] = totals['nb_disponible']
         
         return context
 
@@ -241,7 +233,7 @@ class UniteListView(RoleRequiredMixin, ListView):
     paginate_by = 20
     
     def get_queryset(self):
-        return Unite.objects.select_related('programme', 'modele_bien', 'modele_bien__type_bien').all()
+        return Unite.objects.with_statut_reel().select_related('programme', 'modele_bien', 'modele_bien__type_bien')
 
 
 class UniteCreateView(RoleRequiredMixin, CreateView):
@@ -291,17 +283,7 @@ class ChantiersUniteListView(RoleRequiredMixin, ListView):
         from core.choices import UniteStatus
         return Unite.objects.filter(
             statut_disponibilite__in=[UniteStatus.RESERVE, UniteStatus.VENDU]
-        ).select_related('programme', 'modele_bien').prefetch_related('avancements_chantier')
-
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        # Pour chaque unité, récupérer le dernier avancement
-        for unite in context['unites']:
-            if unite.avancements_chantier.exists():
-                unite.dernier_avancement = unite.avancements_chantier.first()
-            else:
-                unite.dernier_avancement = None
-        return context
+        ).select_related('programme', 'modele_bien').with_latest_avancement()
 
 
 class AvancementChantierUniteDetailView(RoleRequiredMixin, DetailView):
@@ -325,8 +307,12 @@ class AvancementChantierUniteDetailView(RoleRequiredMixin, DetailView):
         context['historique'] = avancement.unite.avancements_chantier.exclude(
             pk=avancement.pk
         ).order_by('-date_pointage')[:5]
-        # Messages des clients pour cet avancement (exclure les messages supprimés pour cet utilisateur)
-        context['messages'] = avancement.messages.exclude(supprime_par=self.request.user).order_by('created_at')
+        # Messages des clients pour cet avancement (hors messages vidés/supprimés pour cet utilisateur)
+        # select/prefetch des auteurs et de leurs rôles : msg.auteur.is_client sans requête par message
+        context['messages'] = MessageChantierService.visibles(
+            self.request.user, avancement
+        ).select_related('auteur').prefetch_related('auteur__roles').order_by('created_at')
+        MessageChantierService.marquer_lu(self.request.user, avancement)
         return context
 
 
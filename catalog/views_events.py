@@ -0,0 +1,45 @@
+"""
+Flux Server-Sent Events du suivi de chantier (servis par l'application ASGI).
+
+- /catalogue/chantiers/evenements/ : événements de tous les avancements de l'utilisateur
+- /catalogue/chantiers/<avancement_id>/evenements/ : événements d'un avancement
+
+Reprise après coupure : en-tête Last-Event-ID (EventSource) ou paramètre ?since=<ISO-8601>.
+Requête servie sous WSGI : 204, EventSource ne se reconnecte pas.
+"""
+
+from asgiref.sync import sync_to_async
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+
+from catalog.models import AvancementChantierUnite
+from catalog.services.chantier_event_service import (
+    ChantierEventService,
+    avancement_channel,
+    parse_cursor,
+    user_channel,
+)
+
+
+async def chantier_events(request, avancement_id=None):
+    if not ChantierEventService.flux_disponible(request):
+        return HttpResponse(status=204)
+
+    user = await request.auser()
+    if not user.is_authenticated:
+        return HttpResponse(status=401)
+
+    avancement = None
+    if avancement_id is not None:
+        avancement = await AvancementChantierUnite.objects.filter(pk=avancement_id).afirst()
+        if avancement is None or not await sync_to_async(ChantierEventService.peut_acceder)(user, avancement):
+            raise Http404("Avancement non trouvé")
+
+    since = parse_cursor(request.headers.get("Last-Event-ID") or request.GET.get("since"))
+    channel = avancement_channel(avancement.pk) if avancement else user_channel(user.pk)
+    response = StreamingHttpResponse(
+        ChantierEventService.stream(user, channel, since, avancement),
+        content_type="text/event-stream",
+    )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # nginx : pas de mise en tampon du flux
+    return response
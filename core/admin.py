@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Document, JournalAudit
+from .models import Document, JournalAudit, MediaBlob
 
 
 @admin.register(Document)
@@ -13,3 +13,10 @@ class JournalAuditAdmin(admin.ModelAdmin):
     list_display = ('objet_type', 'action', 'acteur', 'created_at')
     search_fields = ('objet_type', 'action', 'acteur__email')
     list_filter = ('action',)
+
+
+@admin.register(MediaBlob)
+class MediaBlobAdmin(admin.ModelAdmin):
+    list_display = ('name', 'size', 'ref_count', 'updated_at')
+    search_fields = ('sha256', 'name')
+    readonly_fields = ('sha256', 'name', 'size', 'ref_count')
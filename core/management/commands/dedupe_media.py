@@ -0,0 +1,43 @@
+"""
+Migre les fichiers existants de media/ vers le stockage dédupliqué (core.storage).
+
+Chaque fichier est haché (SHA-256), copié une seule fois sous cas/ab/cd/<sha256>.<ext>,
+les lignes sont repointées vers ce fichier puis l'original est supprimé.
+Les compteurs de références sont recalculés à la fin.
+
+Usage :
+    python manage.py dedupe_media --dry-run
+    python manage.py dedupe_media
+"""
+
+from django.core.management.base import BaseCommand
+from django.template.defaultfilters import filesizeformat
+
+from core.services.media_blob_service import MediaBlobService
+
+
+class Command(BaseCommand):
+    help = "Déduplique les documents et photos existants (stockage adressé par contenu)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Calculer le gain sans rien déplacer.",
+        )
+
+    def handle(self, *args, **options):
+        stats = MediaBlobService.deduplicate_existing(dry_run=options["dry_run"])
+        if not stats["rows"]:
+            self.stdout.write(self.style.SUCCESS("✅ Aucun fichier à migrer."))
+            return
+
+        self.stdout.write(
+            f"{stats['rows']} ligne(s), {stats['files']} fichier(s) → {stats['blobs']} fichier(s) unique(s)"
+        )
+        saved = filesizeformat(stats["bytes_before"] - stats["bytes_after"])
+        if options["dry_run"]:
+            self.stdout.write(self.style.WARNING(f"⚠️ Gain estimé : {saved} (dry-run)."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"✅ Fichiers migrés, {saved} libéré(s)."))
+            self.stdout.write("Pensez à lancer generate_image_derivatives pour les photos déplacées.")
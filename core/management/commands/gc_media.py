@@ -0,0 +1,47 @@
+"""
+Ramasse-miettes du stockage dédupliqué : recalcule les compteurs de références
+puis supprime les fichiers qui ne sont plus référencés depuis le délai de grâce.
+
+À planifier (cron), par exemple chaque nuit :
+    python manage.py gc_media
+    python manage.py gc_media --grace-hours 48 --dry-run
+"""
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.template.defaultfilters import filesizeformat
+
+from core.services.media_blob_service import MediaBlobService
+
+
+class Command(BaseCommand):
+    help = "Supprime les fichiers dédupliqués qui ne sont plus référencés."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--grace-hours",
+            type=int,
+            default=24,
+            help="Âge minimal d'un fichier sans référence avant suppression (défaut : 24).",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Lister le volume récupérable sans rien supprimer.",
+        )
+
+    def handle(self, *args, **options):
+        drifted = MediaBlobService.recount()
+        if drifted:
+            self.stdout.write(self.style.WARNING(f"⚠️ {drifted} compteur(s) de références corrigé(s)."))
+
+        count, size = MediaBlobService.collect_garbage(
+            grace=timedelta(hours=options["grace_hours"]), dry_run=options["dry_run"]
+        )
+        if not count:
+            self.stdout.write(self.style.SUCCESS("✅ Aucun fichier orphelin."))
+        elif options["dry_run"]:
+            self.stdout.write(self.style.WARNING(f"⚠️ {count} fichier(s) orphelin(s), {filesizeformat(size)} (dry-run)."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"✅ {count} fichier(s) supprimé(s), {filesizeformat(size)} libéré(s)."))
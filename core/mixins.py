@@ -0,0 +1,44 @@
+from django.http import HttpResponse
+
+from core.services.page_cache_service import PageCacheService, registered_pages
+
+
+class CachedPageMixin:
+    """
+    Page publique mise en cache (HTML complet) pour les visiteurs anonymes,
+    par URL et génération du catalogue (voir PageCacheService).
+    Expose aussi `catalogue_generation` au template, pour les fragments {% cache %}.
+    """
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        registered_pages.add(cls.__name__)
+
+    def dispatch(self, request, *args, **kwargs):
+        if not PageCacheService.cacheable(request):
+            return super().dispatch(request, *args, **kwargs)
+
+        rendered = {}
+
+        def render():
+            response = super(CachedPageMixin, self).dispatch(request, *args, **kwargs)
+            if hasattr(response, "render"):
+                response.render()
+            rendered["response"] = response
+            if response.status_code != 200 or response.streaming:
+                return None
+            return (response.content, response["Content-Type"])
+
+        cached = PageCacheService.get_or_render(PageCacheService.page_key(request), render, type(self).__name__)
+        if "response" in rendered:
+            return rendered["response"]
+        content, content_type = cached
+        response = HttpResponse(content, content_type=content_type)
+        response["X-Page-Cache"] = "hit"
+        return response
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["catalogue_generation"] = PageCacheService.generation()
+        context["page_cache_timeout"] = PageCacheService.timeout()
+        return context
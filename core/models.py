@@ -1,6 +1,7 @@
 import uuid
 from django.db import models
 from django.conf import settings
+from core.storage import dedup_storage
 
 
 class TimeStampedModel(models.Model):
@@ -16,7 +17,7 @@ class Document(TimeStampedModel):
     objet_type = models.CharField(max_length=50)
     objet_id = models.UUIDField()
     titre = models.CharField(max_length=255)
-    fichier = models.FileField(upload_to='documents/')
+    fichier = models.FileField(upload_to='documents/', storage=dedup_storage)
     type_mime = models.CharField(max_length=100, blank=True)
     version = models.CharField(max_length=50, blank=True)
 
@@ -41,3 +42,17 @@ class JournalAudit(TimeStampedModel):
 
     def __str__(self):
         return f"{self.action} - {self.objet_type} ({self.objet_id})"
+
+
+class MediaBlob(TimeStampedModel):
+    """
+    Fichier du stockage dédupliqué (core.storage.ContentAddressedStorage),
+    avec le nombre de FileField qui y font référence.
+    """
+    sha256 = models.CharField(max_length=64, unique=True)
+    name = models.CharField(max_length=255, unique=True)
+    size = models.PositiveBigIntegerField()
+    ref_count = models.IntegerField(default=0, db_index=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.ref_count} réf.)"
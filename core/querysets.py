@@ -0,0 +1,133 @@
+"""
+QuerySets partagés : cloisonnement des lignes par utilisateur,
+requêtes géographiques sur les coordonnées GPS (sans PostGIS).
+"""
+
+import math
+
+from django.db import models
+from django.db.models.functions import ASin, Cast, Cos, Least, Power, Radians, Sin, Sqrt
+
+from accounts.services.role_service import RoleService
+from core.choices import UserRole
+
+
+def client_scope_lookup(model):
+    """
+    Lookup ORM vers l'id du Client propriétaire, d'après `model.client_scope`
+    ("pk" pour Client, "client", "reservation__client", ...).
+    """
+    scope = model.client_scope
+    return scope if scope == "pk" else f"{scope}_id"
+
+
+def get_owner_client_id(obj):
+    """
+    Id du Client propriétaire d'un objet, en suivant `client_scope`
+    jusqu'à la clé étrangère (sans charger l'objet Client lui-même).
+    """
+    scope = type(obj).client_scope
+    if scope == "pk":
+        return obj.pk
+    *path, last = scope.split("__")
+    for attr in path:
+        obj = getattr(obj, attr, None)
+        if obj is None:
+            return None
+    return getattr(obj, f"{last}_id", None)
+
+
+class ClientScopedQuerySet(models.QuerySet):
+    """
+    QuerySet des modèles appartenant à un Client.
+
+    Le modèle déclare `client_scope`, le chemin ORM vers son Client.
+    for_user(user) :
+    - ADMIN / COMMERCIAL : toutes les lignes
+    - sinon : les lignes du profil Client de l'utilisateur (aucune s'il n'en a pas)
+    Rôles et id client sont résolus ensemble par RoleService (une requête au plus).
+    """
+
+    def for_user(self, user):
+        if user is None or not user.is_authenticated:
+            return self.none()
+
+        roles, client_id = RoleService.resolve(user)
+        if UserRole.ADMIN in roles or UserRole.COMMERCIAL in roles:
+            return self
+        if not client_id:
+            return self.none()
+        return self.filter(**{client_scope_lookup(self.model): client_id})
+
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = 111.045
+
+
+def haversine_km(lat, lng, lat_field="gps_lat", lng_field="gps_lng"):
+    """
+    Expression SQL : distance orthodromique (km) entre le point (lat, lng)
+    et les coordonnées de la ligne (formule de haversine).
+    """
+    row_lat = Cast(lat_field, models.FloatField())
+    row_lng = Cast(lng_field, models.FloatField())
+    dlat = Radians(row_lat - models.Value(lat))
+    dlng = Radians(row_lng - models.Value(lng))
+    a = (
+        Power(Sin(dlat / 2), 2)
+        + math.cos(math.radians(lat)) * Cos(Radians(row_lat)) * Power(Sin(dlng / 2), 2)
+    )
+    # Least() borne `a` à 1 contre les erreurs d'arrondi (ASin hors domaine)
+    return models.ExpressionWrapper(
+        2 * EARTH_RADIUS_KM * ASin(Sqrt(Least(a, models.Value(1.0)))),
+        output_field=models.FloatField(),
+    )
+
+
+def distance_km(lat1, lng1, lat2, lng2):
+    """Distance orthodromique (km) entre deux points, en Python (même formule que haversine_km)."""
+    lat1, lng1, lat2, lng2 = (math.radians(float(value)) for value in (lat1, lng1, lat2, lng2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(a, 1.0)))
+
+
+def bbox_around(lat, lng, radius_km):
+    """Rectangle (south, west, north, east) englobant le cercle de rayon radius_km."""
+    dlat = radius_km / KM_PER_DEGREE_LAT
+    cos_lat = max(math.cos(math.radians(lat)), 0.01)
+    dlng = min(radius_km / (KM_PER_DEGREE_LAT * cos_lat), 180.0)
+    return lat - dlat, lng - dlng, lat + dlat, lng + dlng
+
+
+class GeoQuerySet(models.QuerySet):
+    """
+    QuerySet des modèles ayant des champs gps_lat / gps_lng (Programme, Unite).
+
+    Le préfiltre rectangulaire s'appuie sur l'index composite (gps_lat, gps_lng) ;
+    la distance exacte (haversine) est calculée en SQL pour le filtre final et le tri.
+    """
+
+    def within_bbox(self, south, west, north, east):
+        """Lignes dont les coordonnées sont dans le rectangle (vue de carte)."""
+        return self.filter(
+            gps_lat__gte=south,
+            gps_lat__lte=north,
+            gps_lng__gte=west,
+            gps_lng__lte=east,
+        )
+
+    def with_distance(self, lat, lng):
+        """Annoter `distance_km` depuis le point (lat, lng)."""
+        return self.annotate(distance_km=haversine_km(lat, lng))
+
+    def near(self, lat, lng, radius_km):
+        """
+        Lignes à moins de radius_km du point, annotées `distance_km`
+        et triées de la plus proche à la plus éloignée.
+        """
+        return (
+            self.within_bbox(*bbox_around(lat, lng, radius_km))
+            .with_distance(lat, lng)
+            .filter(distance_km__lte=radius_km)
+            .order_by("distance_km")
+        )
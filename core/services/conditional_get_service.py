@@ -0,0 +1,80 @@
+"""
+Service de validateurs HTTP (ETag / Last-Modified) pour les requêtes conditionnelles de l'API.
+
+Ce service gère:
+- Validateur de la table principale : Max(updated_at) et Count sur le queryset filtré
+  (une seule requête d'agrégation, sans sérialisation)
+- Horodatage de dernière écriture par modèle (cache), mis à jour après commit par les
+  signaux : couvre les tables liées (statut réel, photos, contrats...) et les suppressions,
+  que l'agrégat sur la table principale ne voit pas
+"""
+
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.db.models import Count, Max
+
+from core.transactions import on_commit_batch
+
+
+KEY_PREFIX = "conditional_get"
+
+
+def _key(label):
+    return f"{KEY_PREFIX}:{label}"
+
+
+class ConditionalGetService:
+    """Service pour les validateurs des réponses de l'API."""
+
+    @staticmethod
+    def touch(label):
+        """Enregistrer une écriture sur le modèle `label` ("app.Model"), une fois par transaction."""
+        on_commit_batch(
+            "conditional_get", [label],
+            lambda labels: cache.set_many({_key(label): time.time() for label in labels}, None),
+        )
+
+    @staticmethod
+    def changed_at(labels):
+        """
+        Horodatage (secondes) de la dernière écriture de chaque modèle.
+        Horodatage perdu (éviction, cache vidé) : repart de maintenant, les clients revalident.
+        """
+        keys = {label: _key(label) for label in labels}
+        values = cache.get_many(keys.values())
+        now = time.time()
+        for label, key in keys.items():
+            if key not in values:
+                cache.add(key, now, None)
+                values[key] = cache.get(key, now)
+        return {label: values[key] for label, key in keys.items()}
+
+    @staticmethod
+    def validators(queryset, related=(), variant=""):
+        """
+        Calculer les validateurs d'une réponse construite à partir de queryset.
+
+        Args:
+            queryset: queryset filtré (liste) ou restreint à l'objet (détail)
+            related: labels des modèles liés dont les écritures modifient la réponse
+            variant: ce qui distingue deux réponses sur les mêmes lignes (URL, format)
+
+        Returns:
+            tuple: (etag, last_modified) ; last_modified en secondes depuis l'epoch, ou None
+        """
+        aggregate = queryset.order_by().aggregate(last=Max("updated_at"), count=Count("pk"))
+        base = queryset.model._meta.label
+        changes = ConditionalGetService.changed_at([base, *related])
+
+        # ETag : table principale par agrégat (précis pour le filtre), tables liées par horodatage
+        parts = [variant, str(aggregate["count"]), aggregate["last"].isoformat() if aggregate["last"] else ""]
+        parts += [f"{label}={changes[label]!r}" for label in related]
+        etag = hashlib.md5("|".join(parts).encode("utf-8")).hexdigest()
+
+        # Last-Modified : inclut la dernière écriture sur la table principale (suppressions)
+        stamps = [aggregate["last"].timestamp()] if aggregate["last"] else []
+        stamps += changes.values()
+        last_modified = int(max(stamps)) if stamps else None
+        return f'"{etag}"', last_modified
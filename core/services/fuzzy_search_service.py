@@ -0,0 +1,90 @@
+"""
+Service de recherche approximative (pg_trgm) : noms mal orthographiés,
+références de lots, numéros de téléphone normalisés.
+
+Ce service gère:
+- Filtrage par similarité de trigrammes (opérateur %>, index GIN gin_trgm_ops) :
+  chaque mot saisi doit correspondre à l'un des champs ("Ndiay Mouhamadu" : nom et prénom)
+- Classement par similarité décroissante (annotation `similarity`, moyenne par mot)
+- Correspondance des téléphones sur la colonne normalisée (chiffres uniquement)
+- Repli sur des filtres icontains hors PostgreSQL (développement local)
+"""
+
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db import connection
+from django.db.models import Case, FloatField, Q, Value, When
+from django.db.models.functions import Greatest
+
+from core.utils import normalize_phone
+
+
+# Nombre minimal de chiffres pour chercher aussi dans les téléphones
+MIN_PHONE_DIGITS = 4
+
+
+class FuzzySearchService:
+    """Service pour la recherche approximative par trigrammes."""
+
+    @staticmethod
+    def is_available():
+        """L'extension pg_trgm nécessite PostgreSQL."""
+        return connection.vendor == "postgresql"
+
+    @staticmethod
+    def search(queryset, terms, fields, phone_field=None, order_by_similarity=True):
+        """
+        Filtrer un queryset par recherche approximative.
+
+        Args:
+            queryset: QuerySet à filtrer
+            terms: Texte saisi par l'utilisateur
+            fields: Champs texte comparés par trigrammes (ex: ["nom", "prenom"])
+            phone_field: Champ téléphone normalisé (chiffres uniquement), optionnel
+            order_by_similarity: Trier par similarité décroissante
+
+        Returns:
+            QuerySet filtré et classé par similarité (inchangé si terms est vide)
+        """
+        terms = (terms or "").strip()
+        if not terms:
+            return queryset
+
+        condition = Q()
+        digits = normalize_phone(terms) if phone_field else ""
+        if len(digits) >= MIN_PHONE_DIGITS:
+            condition |= Q(**{f"{phone_field}__contains": digits})
+
+        # Un mot comparé à la chaîne entière a une similarité trop faible dès deux mots :
+        # chaque mot doit correspondre à l'un des champs
+        words = terms.split()
+        lookup = "trigram_word_similar" if FuzzySearchService.is_available() else "icontains"
+        words_condition = Q()
+        for word in words:
+            # Opérateur %> : sous-chaînes et fautes de frappe, via l'index gin_trgm_ops
+            word_condition = Q()
+            for field in fields:
+                word_condition |= Q(**{f"{field}__{lookup}": word})
+            words_condition &= word_condition
+        condition |= words_condition
+
+        if not FuzzySearchService.is_available():
+            return queryset.filter(condition)
+
+        similarity = None
+        for word in words:
+            similarities = [TrigramWordSimilarity(word, field) for field in fields]
+            best = Greatest(*similarities) if len(similarities) > 1 else similarities[0]
+            similarity = best if similarity is None else similarity + best
+        similarity = similarity / Value(float(len(words)))
+        if len(digits) >= MIN_PHONE_DIGITS:
+            # Un numéro qui correspond vaut une similarité parfaite
+            phone_match = Case(
+                When(**{f"{phone_field}__contains": digits}, then=Value(1.0)),
+                default=Value(0.0),
+                output_field=FloatField(),
+            )
+            similarity = Greatest(similarity, phone_match)
+        queryset = queryset.filter(condition).annotate(similarity=similarity)
+        if order_by_similarity:
+            queryset = queryset.order_by("-similarity", "pk")
+        return queryset
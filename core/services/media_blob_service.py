@@ -0,0 +1,166 @@
+"""
+Service de gestion du stockage dédupliqué (core.storage.ContentAddressedStorage).
+
+Ce service gère:
+- Comptage des références des FileField vers les fichiers (MediaBlob.ref_count)
+- Recalcul complet des références depuis la base (update(), bulk_create... sans signaux)
+- Ramasse-miettes des fichiers qui ne sont plus référencés, après un délai de grâce
+- Migration des fichiers existants de media/ vers le stockage dédupliqué
+"""
+
+import logging
+from collections import Counter
+from datetime import timedelta
+
+from django.apps import apps
+from django.core.files import File
+from django.db import models, transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from core.models import MediaBlob
+from core.storage import CAS_PREFIX, ContentAddressedStorage, blob_name, dedup_storage, file_sha256
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_GRACE = timedelta(hours=24)
+
+
+class MediaBlobService:
+    """Service pour les références et le nettoyage des fichiers dédupliqués."""
+
+    @staticmethod
+    def dedup_fields(model=None):
+        """[(modèle, champ)] des FileField servis par le stockage dédupliqué."""
+        return [
+            (candidate, field)
+            for candidate in ([model] if model else apps.get_models())
+            for field in candidate._meta.concrete_fields
+            if isinstance(field, models.FileField) and isinstance(field.storage, ContentAddressedStorage)
+        ]
+
+    @staticmethod
+    def adjust(names, delta):
+        """Ajouter delta aux compteurs des fichiers nommés (noms vides ignorés)."""
+        for name, count in Counter(name for name in names if name).items():
+            MediaBlob.objects.filter(name=name).update(ref_count=F("ref_count") + delta * count)
+
+    @staticmethod
+    def references(name):
+        """Nombre de lignes qui référencent le fichier nommé."""
+        return sum(
+            model._default_manager.filter(**{field.attname: name}).count()
+            for model, field in MediaBlobService.dedup_fields()
+        )
+
+    @staticmethod
+    def recount():
+        """
+        Recalculer tous les compteurs à partir des lignes qui référencent les fichiers.
+
+        Returns:
+            int: Nombre de compteurs corrigés
+        """
+        references = Counter()
+        for model, field in MediaBlobService.dedup_fields():
+            rows = (
+                model._default_manager.exclude(**{field.attname: ""})
+                .order_by()
+                .values(field.attname)
+                .annotate(n=Count("pk"))
+            )
+            for row in rows:
+                references[row[field.attname]] += row["n"]
+
+        corrected = 0
+        candidates = [
+            blob for blob in MediaBlob.objects.only("pk", "name", "ref_count").iterator()
+            if blob.ref_count != references.get(blob.name, 0)
+        ]
+        for blob in candidates:
+            with transaction.atomic():
+                # Revérifié sous verrou : adjust() s'exécute dans la transaction qui écrit la ligne,
+                # une écriture concurrente est donc soit déjà comptée, soit en attente du verrou
+                locked = MediaBlob.objects.select_for_update().filter(pk=blob.pk).first()
+                if locked is None:
+                    continue
+                expected = MediaBlobService.references(locked.name)
+                if locked.ref_count != expected:
+                    MediaBlob.objects.filter(pk=locked.pk).update(ref_count=expected)
+                    corrected += 1
+        return corrected
+
+    @staticmethod
+    def collect_garbage(grace=DEFAULT_GRACE, dry_run=False):
+        """
+        Supprimer les fichiers sans référence depuis plus de `grace`.
+
+        Le délai protège les fichiers enregistrés dont la ligne n'est pas
+        encore validée (transaction en cours, formulaire en plusieurs étapes).
+
+        Returns:
+            tuple: (nombre de fichiers, octets libérés)
+        """
+        storage = dedup_storage()
+        orphans = MediaBlob.objects.filter(ref_count__lte=0, updated_at__lt=timezone.now() - grace)
+        count, size = 0, 0
+        for blob in orphans.iterator():
+            count += 1
+            size += blob.size
+            if dry_run:
+                continue
+            with transaction.atomic():
+                # Revérifié sous verrou : une référence a pu apparaître entre-temps
+                locked = MediaBlob.objects.select_for_update().filter(pk=blob.pk, ref_count__lte=0).first()
+                if locked is None:
+                    continue
+                locked.delete()
+                transaction.on_commit(lambda name=locked.name: storage.delete_blob(name))
+        return count, size
+
+    @staticmethod
+    def deduplicate_existing(dry_run=False):
+        """
+        Déplacer les fichiers existants (chemins upload_to) vers le stockage dédupliqué.
+
+        Returns:
+            dict: {"rows": lignes migrées, "files": fichiers d'origine, "blobs": fichiers conservés,
+                   "bytes_before": octets, "bytes_after": octets}
+        """
+        storage = dedup_storage()
+        stats = {"rows": 0, "files": 0, "blobs": 0, "bytes_before": 0, "bytes_after": 0}
+        migrated = {}  # chemin d'origine → nom dédupliqué
+        digests = set()
+
+        for model, field in MediaBlobService.dedup_fields():
+            rows = (
+                model._default_manager.exclude(**{field.attname: ""})
+                .exclude(**{f"{field.attname}__startswith": f"{CAS_PREFIX}/"})
+                .values_list("pk", field.attname)
+                .order_by()
+            )
+            for pk, name in rows.iterator():
+                if name not in migrated:
+                    if not storage.exists(name):
+                        logger.warning("Fichier introuvable pour %s %s : %s", model._meta.label, pk, name)
+                        continue
+                    with storage.open(name, "rb") as handle:
+                        content = File(handle, name)
+                        digest = content.sha256 = file_sha256(content)
+                        stats["files"] += 1
+                        stats["bytes_before"] += content.size
+                        if digest not in digests:
+                            digests.add(digest)
+                            stats["blobs"] += 1
+                            stats["bytes_after"] += content.size
+                        migrated[name] = blob_name(digest, name) if dry_run else storage.save(name, content)
+                stats["rows"] += 1
+                if not dry_run:
+                    model._default_manager.filter(pk=pk).update(**{field.attname: migrated[name]})
+
+        if not dry_run:
+            for name in migrated:
+                storage.delete_blob(name)
+            MediaBlobService.recount()
+        return stats
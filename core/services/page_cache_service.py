@@ -0,0 +1,138 @@
+"""
+Service de cache des pages publiques du catalogue (Redis).
+
+Ce service gère:
+- Clés versionnées par un compteur de génération : toute écriture sur le catalogue
+  (Programme, Unite, ModeleBien, Reservation) incrémente la génération, les entrées
+  des générations précédentes ne sont plus lues et expirent d'elles-mêmes
+- HTML par URL (chemin + paramètres) pour les visiteurs anonymes
+- Protection contre l'effet de meute : un seul rendu par clé manquante, les autres
+  requêtes attendent brièvement le résultat
+- Compteurs de succès / échecs par page (taux de succès exposé par /api/stats/cache/)
+"""
+
+import hashlib
+import time
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+
+from core.transactions import on_commit_batch
+
+
+GENERATION_KEY = "page_cache_generation"
+PAGE_PREFIX = "page_cache"
+STATS_PREFIX = "page_cache_stats"
+DEFAULT_TIMEOUT = 600
+DEFAULT_LOCK_TIMEOUT = 30
+DEFAULT_LOCK_WAIT = 5
+POLL_INTERVAL = 0.05
+
+# Noms des pages en cache (vues utilisant CachedPageMixin), pour les statistiques
+registered_pages = set()
+
+
+def _incr(key):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Clé absente (premier appel, ou cache vidé)
+        cache.add(key, int(time.time()) if key == GENERATION_KEY else 0, None)
+        return cache.incr(key)
+
+
+class PageCacheService:
+    """Service pour le cache HTML et fragments des pages publiques."""
+
+    @staticmethod
+    def timeout():
+        return getattr(settings, "PAGE_CACHE_TIMEOUT", DEFAULT_TIMEOUT)
+
+    @staticmethod
+    def generation():
+        # Compteur perdu (éviction, cache vidé) : repart de l'horodatage courant, jamais d'une
+        # valeur déjà utilisée dont les pages seraient encore en cache
+        return cache.get_or_set(GENERATION_KEY, lambda: int(time.time()), None)
+
+    @staticmethod
+    def bump():
+        """Invalider toutes les pages et fragments, une fois par transaction, après commit."""
+        on_commit_batch("page_cache", [GENERATION_KEY], lambda keys: _incr(GENERATION_KEY))
+
+    @staticmethod
+    def cacheable(request):
+        """Requêtes GET/HEAD anonymes, sans message flash à afficher."""
+        return (
+            PageCacheService.timeout() > 0
+            and request.method in ("GET", "HEAD")
+            and not request.user.is_authenticated
+            and not len(get_messages(request))
+        )
+
+    @staticmethod
+    def page_key(request):
+        digest = hashlib.md5(request.get_full_path().encode("utf-8")).hexdigest()
+        return f"{PAGE_PREFIX}:{PageCacheService.generation()}:{digest}"
+
+    @staticmethod
+    def get_or_render(key, render, name, timeout=None):
+        """
+        Valeur en cache pour key, sinon render() ; une valeur None n'est pas mise en cache.
+        Un seul rendu à la fois par clé (verrou cache.add) : les autres requêtes attendent
+        au plus PAGE_CACHE_LOCK_WAIT secondes avant de rendre elles-mêmes.
+        """
+        value = cache.get(key)
+        if value is not None:
+            PageCacheService.record(name, hit=True)
+            return value
+
+        lock_key = f"{key}:lock"
+        if not cache.add(lock_key, 1, getattr(settings, "PAGE_CACHE_LOCK_TIMEOUT", DEFAULT_LOCK_TIMEOUT)):
+            deadline = time.monotonic() + getattr(settings, "PAGE_CACHE_LOCK_WAIT", DEFAULT_LOCK_WAIT)
+            while time.monotonic() < deadline:
+                time.sleep(POLL_INTERVAL)
+                value = cache.get(key)
+                if value is not None:
+                    PageCacheService.record(name, hit=True)
+                    return value
+            # Rendu trop long (ou verrou orphelin) : rendu sans attendre davantage
+            PageCacheService.record(name, hit=False)
+            return render()
+
+        PageCacheService.record(name, hit=False)
+        try:
+            value = render()
+            if value is not None:
+                cache.set(key, value, PageCacheService.timeout() if timeout is None else timeout)
+            return value
+        finally:
+            cache.delete(lock_key)
+
+    @staticmethod
+    def record(name, hit):
+        _incr(f"{STATS_PREFIX}:{name}:{'hits' if hit else 'misses'}")
+
+    @staticmethod
+    def stats(names=None):
+        """
+        Returns:
+            dict: {"generation": n, "pages": {nom: {"hits", "misses", "hit_rate"}}, "total": {...}}
+        """
+        names = sorted(registered_pages if names is None else names)
+        keys = [f"{STATS_PREFIX}:{name}:{kind}" for name in names for kind in ("hits", "misses")]
+        counters = cache.get_many(keys)
+
+        def entry(hits, misses):
+            total = hits + misses
+            return {"hits": hits, "misses": misses, "hit_rate": round(hits / total, 3) if total else None}
+
+        pages = {
+            name: entry(counters.get(f"{STATS_PREFIX}:{name}:hits", 0), counters.get(f"{STATS_PREFIX}:{name}:misses", 0))
+            for name in names
+        }
+        return {
+            "generation": PageCacheService.generation(),
+            "pages": pages,
+            "total": entry(sum(page["hits"] for page in pages.values()), sum(page["misses"] for page in pages.values())),
+        }
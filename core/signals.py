@@ -2,9 +2,10 @@
 Signaux et audit logging automatiques pour les modèles critiques.
 """
 
-from django.db.models.signals import post_save, post_delete
+from django.db.models.signals import post_init, post_save, post_delete
 from django.dispatch import receiver
 from core.utils import audit_log
+from core.services.media_blob_service import MediaBlobService
 from sales.models import Reservation, Contrat, Paiement, Financement, Echeance
 from catalog.models import Programme, Unite
 from core.choices import ReservationStatus, ContratStatus, PaiementStatus, FinancementStatus, UniteStatus
@@ -98,3 +99,44 @@ def audit_financement_save(sender, instance, created, **kwargs):
         "type": instance.type,
     }
     audit_log(None, instance, action, payload)
+
+
+# ============================
+# STOCKAGE DÉDUPLIQUÉ : compteurs de références (voir core.storage)
+# ============================
+
+def _file_names(instance, fields):
+    names = {}
+    for field in fields:
+        value = instance.__dict__.get(field.attname)
+        names[field.attname] = getattr(value, "name", value) or ""
+    return names
+
+
+def _connect_media_references(model, fields):
+    def remember_file_names(sender, instance, **kwargs):
+        instance._media_names = _file_names(instance, fields)
+
+    def update_references(sender, instance, **kwargs):
+        current = _file_names(instance, fields)
+        previous = getattr(instance, "_media_names", {})
+        changed = [attname for attname, name in current.items() if name != previous.get(attname, "")]
+        if changed:
+            MediaBlobService.adjust([current[attname] for attname in changed], +1)
+            MediaBlobService.adjust([previous.get(attname, "") for attname in changed], -1)
+        instance._media_names = current
+
+    def release_references(sender, instance, **kwargs):
+        MediaBlobService.adjust(_file_names(instance, fields).values(), -1)
+
+    # weak=False : les fonctions locales n'ont pas d'autre référence
+    post_init.connect(remember_file_names, sender=model, weak=False)
+    post_save.connect(update_references, sender=model, weak=False)
+    post_delete.connect(release_references, sender=model, weak=False)
+
+
+_media_fields = {}
+for _model, _field in MediaBlobService.dedup_fields():
+    _media_fields.setdefault(_model, []).append(_field)
+for _model, _fields in _media_fields.items():
+    _connect_media_references(_model, _fields)
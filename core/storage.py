@@ -0,0 +1,82 @@
+"""
+Stockage adressé par contenu (dédupliqué) pour les documents et photos.
+
+Chaque fichier est écrit une seule fois sous son empreinte SHA-256
+(cas/ab/cd/<sha256>.<ext>) ; les FileField qui reçoivent le même contenu
+partagent le même fichier. Les références sont comptées dans MediaBlob
+(voir core.signals) et les fichiers qui ne sont plus référencés sont
+supprimés par la commande gc_media, jamais par storage.delete().
+"""
+
+import hashlib
+import os
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage, storages
+from django.utils import timezone
+
+
+CAS_PREFIX = "cas"
+HASH_BLOCK_SIZE = 64 * 1024
+
+
+def dedup_storage():
+    """Stockage des FileField dédupliqués (settings.STORAGES["dedup"])."""
+    return storages["dedup"]
+
+
+def file_sha256(content):
+    """
+    Empreinte SHA-256 d'un fichier. Reprend celle calculée pendant la réception
+    (core.uploads.StreamingUploadHandler) quand elle est disponible.
+    """
+    digest = getattr(content, "sha256", None)
+    if digest:
+        return digest
+    hasher = hashlib.sha256()
+    if hasattr(content, "seek"):
+        content.seek(0)
+    for chunk in content.chunks(HASH_BLOCK_SIZE):
+        hasher.update(chunk)
+    if hasattr(content, "seek"):
+        content.seek(0)
+    return hasher.hexdigest()
+
+
+def blob_name(digest, original_name):
+    """Nom de stockage d'un contenu : l'extension d'origine est conservée (type MIME servi)."""
+    extension = os.path.splitext(original_name or "")[1].lower()
+    if not extension[1:].isalnum() or len(extension) > 10:
+        extension = ""
+    return f"{CAS_PREFIX}/{digest[:2]}/{digest[2:4]}/{digest}{extension}"
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """FileSystemStorage où le nom d'un fichier est dérivé de son contenu."""
+
+    def save(self, name, content, max_length=None):
+        from core.models import MediaBlob
+
+        if name is None:
+            name = content.name
+        if not hasattr(content, "chunks"):
+            content = File(content, name)
+        digest = file_sha256(content)
+
+        blob, created = MediaBlob.objects.get_or_create(
+            sha256=digest,
+            defaults={"name": blob_name(digest, name), "size": content.size},
+        )
+        if not created:
+            # Réutilisation : repousse le délai de grâce du ramasse-miettes
+            MediaBlob.objects.filter(pk=blob.pk).update(updated_at=timezone.now())
+        if not self.exists(blob.name):
+            super()._save(blob.name, content)
+        return blob.name
+
+    def delete(self, name):
+        # Fichier potentiellement partagé : la suppression réelle passe par gc_media
+        pass
+
+    def delete_blob(self, name):
+        super().delete(name)
@@ -0,0 +1,127 @@
+"""
+Tests pour le stockage dédupliqué (core.storage) et ses commandes de maintenance.
+"""
+import hashlib
+import os
+import tempfile
+import uuid
+from io import StringIO
+from unittest import skipUnless
+
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from core.models import Document, MediaBlob
+from core.services.media_blob_service import MediaBlobService
+from core.storage import dedup_storage
+
+
+PDF_BYTES = b"%PDF-1.4\n" + b"1" * 2048
+
+
+class ContentAddressedStorageTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # Répertoire média temporaire créé et supprimé avec la classe
+        cls.media_root = cls.enterClassContext(tempfile.TemporaryDirectory())
+        cls.enterClassContext(override_settings(MEDIA_ROOT=cls.media_root))
+        super().setUpClass()
+
+    def _document(self, content=PDF_BYTES, name="cni.pdf"):
+        document = Document(objet_type="reservation", objet_id=uuid.uuid4(), titre=name)
+        document.fichier.save(name, ContentFile(content), save=True)
+        return document
+
+    def test_same_content_stored_once(self):
+        first = self._document(name="cni_recto.pdf")
+        second = self._document(name="copie.PDF")
+
+        digest = hashlib.sha256(PDF_BYTES).hexdigest()
+        self.assertEqual(first.fichier.name, f"cas/{digest[:2]}/{digest[2:4]}/{digest}.pdf")
+        self.assertEqual(second.fichier.name, first.fichier.name)
+        self.assertTrue(os.path.exists(first.fichier.path))
+
+        blob = MediaBlob.objects.get(sha256=digest)
+        self.assertEqual(blob.ref_count, 2)
+        self.assertEqual(blob.size, len(PDF_BYTES))
+
+    def test_delete_and_replace_release_references(self):
+        first = self._document()
+        second = self._document()
+        blob = MediaBlob.objects.get(name=first.fichier.name)
+
+        second.fichier.save("autre.pdf", ContentFile(b"%PDF-1.4\nautre"), save=True)
+        blob.refresh_from_db()
+        self.assertEqual(blob.ref_count, 1)
+        self.assertEqual(MediaBlob.objects.get(name=second.fichier.name).ref_count, 1)
+
+        first.delete()
+        blob.refresh_from_db()
+        self.assertEqual(blob.ref_count, 0)
+        # Le fichier reste sur disque jusqu'au passage du ramasse-miettes
+        self.assertTrue(dedup_storage().exists(blob.name))
+
+    def test_gc_media_removes_orphans_after_grace(self):
+        document = self._document()
+        name = document.fichier.name
+        document.delete()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("gc_media", "--grace-hours", "1", stdout=StringIO())
+        self.assertTrue(MediaBlob.objects.filter(name=name).exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("gc_media", "--grace-hours", "0", stdout=StringIO())
+        self.assertFalse(MediaBlob.objects.filter(name=name).exists())
+        self.assertFalse(dedup_storage().exists(name))
+
+    def test_recount_fixes_drift_from_bulk_updates(self):
+        document = self._document()
+        Document.objects.filter(pk=document.pk).update(fichier="")
+
+        self.assertEqual(MediaBlobService.recount(), 1)
+        self.assertEqual(MediaBlob.objects.get(name=document.fichier.name).ref_count, 0)
+
+    @skipUnless(connection.features.has_select_for_update, "Verrous de ligne (SELECT ... FOR UPDATE)")
+    def test_recount_locks_blob_before_counting(self):
+        document = self._document()
+        Document.objects.filter(pk=document.pk).update(fichier="")
+        with CaptureQueriesContext(connection) as captured:
+            MediaBlobService.recount()
+        sqls = [query["sql"] for query in captured]
+        lock = next(i for i, sql in enumerate(sqls) if "FOR UPDATE" in sql)
+        count = next(i for i, sql in enumerate(sqls) if "COUNT(" in sql and i > lock)
+        update = next(i for i, sql in enumerate(sqls) if sql.startswith("UPDATE") and i > count)
+        self.assertLess(lock, update)
+
+    def test_dedupe_media_migrates_legacy_files(self):
+        storage = dedup_storage()
+        legacy = []
+        for index in range(2):
+            name = f"documents/legacy_{index}.pdf"
+            path = os.path.join(self.media_root, *name.split("/"))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as handle:
+                handle.write(PDF_BYTES)
+            legacy.append(
+                Document.objects.create(objet_type="contrat", objet_id=uuid.uuid4(), titre=name, fichier=name)
+            )
+
+        out = StringIO()
+        call_command("dedupe_media", "--dry-run", stdout=out)
+        self.assertIn("2 fichier(s) → 1 fichier(s) unique(s)", out.getvalue())
+        self.assertTrue(storage.exists("documents/legacy_0.pdf"))
+
+        call_command("dedupe_media", stdout=StringIO())
+        names = set(Document.objects.filter(pk__in=[d.pk for d in legacy]).values_list("fichier", flat=True))
+        self.assertEqual(len(names), 1)
+        name = names.pop()
+        self.assertTrue(name.startswith("cas/"))
+        self.assertEqual(MediaBlob.objects.get(name=name).ref_count, 2)
+        self.assertFalse(storage.exists("documents/legacy_0.pdf"))
+        self.assertFalse(storage.exists("documents/legacy_1.pdf"))
+
@@ -0,0 +1,119 @@
+"""
+Tests pour la réception des uploads en flux (core.uploads).
+"""
+import hashlib
+import tempfile
+from datetime import date
+from io import BytesIO
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIClient
+
+from accounts.models import Role, User
+from catalog.models import AvancementChantierUnite, ModeleBien, PhotoChantierUnite, Programme, TypeBien, Unite
+from core.uploads import StreamingUploadHandler, sniff_content_type, upload_errors
+from sales.models import Client, Reservation
+
+
+PDF_BYTES = b"%PDF-1.4\n" + b"0" * 4096
+
+
+def jpeg_bytes():
+    buffer = BytesIO()
+    Image.new("RGB", (40, 30), (10, 120, 200)).save(buffer, "JPEG")
+    return buffer.getvalue()
+
+
+class StreamingUploadHandlerTests(TestCase):
+
+    def _parse(self, upload):
+        request = RequestFactory().post("/upload/", {"fichier": upload})
+        request.upload_handlers = [StreamingUploadHandler(request)]
+        return request
+
+    def test_sniff_content_type(self):
+        self.assertEqual(sniff_content_type(PDF_BYTES[:12]), "application/pdf")
+        self.assertEqual(sniff_content_type(jpeg_bytes()[:12]), "image/jpeg")
+        self.assertEqual(sniff_content_type(b"RIFF\x00\x00\x00\x00WEBP"), "image/webp")
+        self.assertIsNone(sniff_content_type(b"MZ\x90\x00"))
+
+    def test_file_streamed_to_disk_with_checksum_and_detected_type(self):
+        request = self._parse(SimpleUploadedFile("cni.pdf", PDF_BYTES, content_type="image/png"))
+        fichier = request.FILES["fichier"]
+
+        self.assertTrue(fichier.temporary_file_path())
+        self.assertEqual(fichier.size, len(PDF_BYTES))
+        self.assertEqual(fichier.sha256, hashlib.sha256(PDF_BYTES).hexdigest())
+        # Le type déclaré par le navigateur est remplacé par le type réel
+        self.assertEqual(fichier.content_type, "application/pdf")
+        self.assertEqual(upload_errors(request), {})
+
+    @override_settings(UPLOAD_MAX_SIZE=1024)
+    def test_oversized_file_skipped(self):
+        request = self._parse(SimpleUploadedFile("cni.pdf", PDF_BYTES, content_type="application/pdf"))
+
+        self.assertNotIn("fichier", request.FILES)
+        self.assertIn("trop volumineux", upload_errors(request)["fichier"])
+
+
+@override_settings(IMAGE_DERIVATIVES_ASYNC=False)
+class UploadPolicyEndpointTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # Répertoire média temporaire créé et supprimé avec la classe
+        cls.media_root = cls.enterClassContext(tempfile.TemporaryDirectory())
+        cls.enterClassContext(override_settings(MEDIA_ROOT=cls.media_root))
+        super().setUpClass()
+
+    def setUp(self):
+        programme = Programme.objects.create(nom="Plateau")
+        modele = ModeleBien.objects.create(
+            type_bien=TypeBien.objects.create(code="APPT", libelle="Appartement"), nom_marketing="T2", prix_base_ttc=1
+        )
+        self.unite = Unite.objects.create(programme=programme, modele_bien=modele, reference_lot="A1", prix_ttc=1)
+        self.avancement = AvancementChantierUnite.objects.create(
+            unite=self.unite, etape="Gros oeuvre", date_pointage=date.today(), pourcentage=10
+        )
+
+    def _add_photo(self, upload):
+        commercial = User.objects.create_user(username="com", email="com@example.com", password="pass123")
+        commercial.roles.add(Role.objects.create(code="COMMERCIAL", libelle="Commercial"))
+        api = APIClient()
+        api.force_authenticate(commercial)
+        return api.post(
+            f"/api/avancements-unites/{self.avancement.pk}/add_photo/",
+            {"avancement": self.avancement.pk, "image": upload, "pris_le": timezone.now().isoformat()},
+            format="multipart",
+        )
+
+    def test_add_photo_rejects_disguised_file(self):
+        response = self._add_photo(SimpleUploadedFile("photo.jpg", PDF_BYTES, content_type="image/jpeg"))
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("Format non autorisé", response.data["image"])
+        self.assertFalse(PhotoChantierUnite.objects.exists())
+
+    def test_add_photo_accepts_image(self):
+        response = self._add_photo(SimpleUploadedFile("photo.jpg", jpeg_bytes(), content_type="image/jpeg"))
+
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertTrue(PhotoChantierUnite.objects.filter(avancement=self.avancement).exists())
+
+    @override_settings(UPLOAD_POLICIES={"start_reservation": {"max_size": 1024}})
+    def test_start_reservation_rejects_oversized_document_before_creating(self):
+        user = User.objects.create_user(username="client", email="client@example.com", password="pass123")
+        Client.objects.create(user=user, nom="Diop", prenom="Awa", telephone="771234567", email="client@example.com")
+        self.client.force_login(user)
+
+        response = self.client.post(
+            f"/ventes/reservation/{self.unite.pk}/demarrer/",
+            {"acompte": "1000", "document_cni": SimpleUploadedFile("cni.pdf", PDF_BYTES, content_type="application/pdf")},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "trop volumineux")
+        self.assertFalse(Reservation.objects.exists())
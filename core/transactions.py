@@ -0,0 +1,54 @@
+"""
+Regroupement des traitements à exécuter après commit.
+
+on_commit_batch(nom, ids, callback) : toutes les valeurs accumulées sous un
+même nom pendant la transaction sont passées en une fois à callback, après
+commit (hors transaction : exécution immédiate).
+
+Chaque appel enregistre le lot auprès de transaction.on_commit : un rollback
+(transaction ou savepoint) supprime certains de ces enregistrements, jamais
+tous ceux d'un lot dont une écriture a été validée. Le premier exécuté traite
+tout le lot, les suivants n'ont plus rien à faire. Les valeurs ajoutées dans
+un bloc annulé peuvent être traitées avec les autres : les callbacks doivent
+être idempotents (invalidations de cache, recalculs depuis la base).
+"""
+
+import threading
+
+from django.db import transaction
+
+
+# Lots par connexion ; les connexions Django sont propres à chaque thread
+_local = threading.local()
+
+
+class _PendingBatch:
+    """Valeurs en attente pour un nom donné, sur une connexion."""
+
+    def __init__(self, name, callback):
+        self.name = name
+        self.callback = callback
+        self.items = set()
+
+    def __call__(self):
+        # Les écritures suivantes remplissent un nouveau lot
+        items, self.items = self.items, set()
+        if items:
+            self.callback(items)
+
+
+def on_commit_batch(name, items, callback, using=None):
+    """
+    Ajouter items au lot `name` de la transaction courante, traité par callback(set) après commit.
+    """
+    items = {item for item in items if item}
+    if not items:
+        return
+    connection = transaction.get_connection(using)
+    batches = _local.__dict__.setdefault(connection.alias, {})
+    batch = batches.get(name)
+    if batch is None:
+        batch = batches[name] = _PendingBatch(name, callback)
+    batch.callback = callback
+    batch.items.update(items)
+    transaction.on_commit(batch, using=using)
@@ -0,0 +1,132 @@
+"""
+Réception des fichiers uploadés en flux, sans les charger en mémoire.
+
+StreamingUploadHandler (settings.FILE_UPLOAD_HANDLERS) :
+- Écrit chaque fichier dans un fichier temporaire, par blocs de UPLOAD_CHUNK_SIZE
+- Calcule le SHA-256 et détecte le type réel (octets magiques) pendant la réception
+- Applique la politique de l'endpoint (settings.UPLOAD_POLICIES, par nom d'URL) :
+  taille maximale et types autorisés, vérifiés dès les premiers blocs
+
+Un fichier refusé est abandonné (absent de request.FILES) et le motif est
+exposé par upload_errors(request), à consulter par la vue.
+"""
+
+import hashlib
+
+from django.conf import settings
+from django.core.files.uploadhandler import SkipFile, TemporaryFileUploadHandler
+from django.template.defaultfilters import filesizeformat
+
+
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+# Octets nécessaires pour reconnaître tous les formats ci-dessous
+SNIFF_BYTES = 12
+
+CONTENT_TYPE_LABELS = {
+    "application/pdf": "PDF",
+    "image/jpeg": "JPG",
+    "image/png": "PNG",
+    "image/webp": "WEBP",
+}
+
+
+def sniff_content_type(head):
+    """Type MIME d'après les premiers octets du fichier, ou None s'il est inconnu."""
+    if head.startswith(b"%PDF-"):
+        return "application/pdf"
+    if head.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+def get_upload_policy(request):
+    """
+    Politique d'upload de l'endpoint appelé.
+
+    Returns:
+        dict: {"max_size": octets, "content_types": liste ou None (tous types)}
+    """
+    match = getattr(request, "resolver_match", None)
+    policies = getattr(settings, "UPLOAD_POLICIES", {})
+    policy = policies.get(match.url_name, {}) if match else {}
+    return {
+        "max_size": policy.get("max_size", getattr(settings, "UPLOAD_MAX_SIZE", 60 * 1024 * 1024)),
+        "content_types": policy.get("content_types"),
+    }
+
+
+def upload_errors(request):
+    """Fichiers refusés pendant la réception : {nom du champ: message}."""
+    # Le corps de la requête est analysé à la première lecture de FILES
+    request.FILES
+    return getattr(request, "upload_errors", {})
+
+
+class StreamingUploadHandler(TemporaryFileUploadHandler):
+    """
+    Upload écrit sur disque au fil de l'eau : la mémoire utilisée par fichier
+    est bornée à un bloc, quelle que soit sa taille.
+
+    Le fichier obtenu (TemporaryUploadedFile) porte en plus :
+        sha256: empreinte hexadécimale du contenu
+        detected_content_type: type détecté (content_type le reprend s'il est connu)
+    """
+
+    chunk_size = UPLOAD_CHUNK_SIZE
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.policy = get_upload_policy(self.request)
+        self.hasher = hashlib.sha256()
+        self.head = b""
+        self.sniffed = False
+        self.detected_content_type = None
+        if self.content_length is not None and self.content_length > self.policy["max_size"]:
+            self._reject(self._size_message())
+
+    def receive_data_chunk(self, raw_data, start):
+        if start + len(raw_data) > self.policy["max_size"]:
+            self._reject(self._size_message())
+        if not self.sniffed:
+            self.head += raw_data[:SNIFF_BYTES - len(self.head)]
+            if len(self.head) >= SNIFF_BYTES:
+                self._check_content_type()
+        self.hasher.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        if not self.sniffed:
+            try:
+                self._check_content_type()
+            except SkipFile:
+                return None
+        super().file_complete(file_size)
+        self.file.sha256 = self.hasher.hexdigest()
+        self.file.detected_content_type = self.detected_content_type
+        if self.detected_content_type:
+            # Le type déclaré par le navigateur n'est pas fiable
+            self.file.content_type = self.detected_content_type
+        return self.file
+
+    def _check_content_type(self):
+        self.sniffed = True
+        self.detected_content_type = sniff_content_type(self.head)
+        allowed = self.policy["content_types"]
+        if allowed and self.detected_content_type not in allowed:
+            labels = ", ".join(CONTENT_TYPE_LABELS.get(content_type, content_type) for content_type in allowed)
+            self._reject(f"Format non autorisé. Accepté: {labels}")
+
+    def _size_message(self):
+        return f"Fichier trop volumineux (maximum {filesizeformat(self.policy['max_size'])})"
+
+    def _reject(self, message):
+        if not hasattr(self.request, "upload_errors"):
+            self.request.upload_errors = {}
+        self.request.upload_errors[self.field_name] = f"{self.file_name} : {message}"
+        self.file.close()
+        raise SkipFile()
@@ -1,7 +1,12 @@
+import re
+
 from .models import JournalAudit
 from django.contrib.contenttypes.models import ContentType
 
 
+SENEGAL_INDICATIF = "221"
+
+
 def get_client_ip(request):
     """
     Récupère l'adresse IP du client depuis la requête.
@@ -22,6 +27,25 @@ def get_client_ip(request):
     return ip
 
 
+def normalize_phone(value):
+    """
+    Normalise un numéro de téléphone : chiffres uniquement, sans l'indicatif
+    du Sénégal, pour que "77 123 45 67" et "+221771234567" soient identiques.
+
+    Args:
+        value: Numéro saisi (espaces, tirets, +, 00 acceptés)
+
+    Returns:
+        str: Chiffres du numéro national ("" si aucun chiffre)
+    """
+    digits = re.sub(r"\D", "", value or "")
+    if digits.startswith("00"):
+        digits = digits[2:]
+    if digits.startswith(SENEGAL_INDICATIF) and len(digits) == len(SENEGAL_INDICATIF) + 9:
+        digits = digits[len(SENEGAL_INDICATIF):]
+    return digits
+
+
 def audit_log(actor, obj, action: str, payload: dict | None = None, request=None):
     payload = payload or {}
     ip = None
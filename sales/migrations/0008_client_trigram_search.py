@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:16
+
+import django.contrib.postgres.indexes
+from django.conf import settings
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+
+def populate_telephone_normalise(apps, schema_editor):
+    """Remplir le téléphone normalisé des clients existants."""
+    from core.utils import normalize_phone
+
+    Client = apps.get_model('sales', 'Client')
+    clients = list(Client.objects.only('pk', 'telephone'))
+    for client in clients:
+        client.telephone_normalise = normalize_phone(client.telephone)
+    Client.objects.bulk_update(clients, ['telephone_normalise'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0007_add_reservation_cancellation_fields'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='client',
+            name='telephone_normalise',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=50),
+        ),
+        migrations.RunPython(populate_telephone_normalise, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='client',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['nom', 'prenom', 'email', 'telephone_normalise'], name='client_trgm_gin', opclasses=['gin_trgm_ops', 'gin_trgm_ops', 'gin_trgm_ops', 'gin_trgm_ops']),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:36
+
+import core.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0008_client_trigram_search'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='contrat',
+            name='pdf',
+            field=models.FileField(blank=True, null=True, storage=core.storage.dedup_storage, upload_to='contrats/'),
+        ),
+        migrations.AlterField(
+            model_name='financementdocument',
+            name='fichier',
+            field=models.FileField(storage=core.storage.dedup_storage, upload_to='documents/financements/%Y/%m/'),
+        ),
+        migrations.AlterField(
+            model_name='reservationdocument',
+            name='fichier',
+            field=models.FileField(storage=core.storage.dedup_storage, upload_to='documents/reservations/%Y/%m/'),
+        ),
+    ]
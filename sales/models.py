@@ -1,6 +1,10 @@
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
 from django.conf import settings
 from core.models import TimeStampedModel
+from core.querysets import ClientScopedQuerySet
+from core.storage import dedup_storage
+from core.utils import normalize_phone
 from catalog.models import Unite
 from core.choices import (
     ReservationStatus,
@@ -12,6 +16,9 @@ from core.choices import (
 
 
 class Client(TimeStampedModel):
+    client_scope = "pk"
+    objects = ClientScopedQuerySet.as_manager()
+
     user = models.OneToOneField(
         settings.AUTH_USER_MODEL,
         on_delete=models.SET_NULL,
@@ -22,14 +29,36 @@ class Client(TimeStampedModel):
     nom = models.CharField(max_length=100)
     prenom = models.CharField(max_length=100)
     telephone = models.CharField(max_length=50)
+    # Chiffres uniquement, sans indicatif (voir core.utils.normalize_phone) ; index propre
+    # pour les recherches exactes et par préfixe (PostgreSQL : btree + varchar_pattern_ops)
+    telephone_normalise = models.CharField(max_length=50, blank=True, editable=False, db_index=True)
     email = models.EmailField()
     kyc_statut = models.CharField(max_length=50, blank=True)
 
+    class Meta:
+        indexes = [
+            GinIndex(
+                fields=["nom", "prenom", "email", "telephone_normalise"],
+                name="client_trgm_gin",
+                opclasses=["gin_trgm_ops"] * 4,
+            ),
+        ]
+
     def __str__(self):
         return f"{self.prenom} {self.nom}"
 
+    def save(self, *args, **kwargs):
+        self.telephone_normalise = normalize_phone(self.telephone)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "telephone" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "telephone_normalise"}
+        super().save(*args, **kwargs)
+
 
 class Reservation(TimeStampedModel):
+    client_scope = "client"
+    objects = ClientScopedQuerySet.as_manager()
+
     client = models.ForeignKey(Client, on_delete=models.PROTECT, related_name='reservations')
     unite = models.ForeignKey(Unite, on_delete=models.PROTECT, related_name='reservations')
     date_reservation = models.DateField(auto_now_add=True)
@@ -122,6 +151,9 @@ class Reservation(TimeStampedModel):
 
 
 class Contrat(TimeStampedModel):
+    client_scope = "reservation__client"
+    objects = ClientScopedQuerySet.as_manager()
+
     reservation = models.OneToOneField(Reservation, on_delete=models.PROTECT, related_name='contrat')
     numero = models.CharField(max_length=100, unique=True)
     statut = models.CharField(
@@ -129,7 +161,7 @@ class Contrat(TimeStampedModel):
         choices=ContratStatus.choices,
         default=ContratStatus.BROUILLON,
     )
-    pdf = models.FileField(upload_to='contrats/', null=True, blank=True)
+    pdf = models.FileField(upload_to='contrats/', storage=dedup_storage, null=True, blank=True)
     signe_le = models.DateTimeField(null=True, blank=True)
     pdf_hash = models.CharField(max_length=128, blank=True)
     otp_logs = models.JSONField(default=dict, blank=True)
@@ -144,6 +176,9 @@ class Contrat(TimeStampedModel):
 
 
 class Paiement(TimeStampedModel):
+    client_scope = "reservation__client"
+    objects = ClientScopedQuerySet.as_manager()
+
     reservation = models.ForeignKey(Reservation, on_delete=models.PROTECT, related_name='paiements')
     montant = models.DecimalField(max_digits=12, decimal_places=2)
     date_paiement = models.DateField(auto_now_add=True)
@@ -173,6 +208,9 @@ class BanquePartenaire(TimeStampedModel):
 
 
 class Financement(TimeStampedModel):
+    client_scope = "reservation__client"
+    objects = ClientScopedQuerySet.as_manager()
+
     reservation = models.OneToOneField(Reservation, on_delete=models.PROTECT, related_name='financement')
     banque = models.ForeignKey(BanquePartenaire, on_delete=models.PROTECT, related_name='financements')
     type = models.CharField(max_length=50)
@@ -191,6 +229,9 @@ class Financement(TimeStampedModel):
 
 
 class Echeance(TimeStampedModel):
+    client_scope = "financement__reservation__client"
+    objects = ClientScopedQuerySet.as_manager()
+
     financement = models.ForeignKey(Financement, on_delete=models.CASCADE, related_name='echeances')
     date_echeance = models.DateField()
     montant_total = models.DecimalField(max_digits=12, decimal_places=2)
@@ -212,6 +253,9 @@ class Echeance(TimeStampedModel):
 class ReservationDocument(TimeStampedModel):
     """Documents requis pour la réservation (CNI, photo, résidence)"""
     
+    client_scope = "reservation__client"
+    objects = ClientScopedQuerySet.as_manager()
+
     DOCUMENT_TYPES = [
         ('cni', 'CNI'),
         ('photo', 'Photo/Selfie'),
@@ -233,7 +277,7 @@ class ReservationDocument(TimeStampedModel):
         max_length=50,
         choices=DOCUMENT_TYPES
     )
-    fichier = models.FileField(upload_to='documents/reservations/%Y/%m/')
+    fichier = models.FileField(upload_to='documents/reservations/%Y/%m/', storage=dedup_storage)
     statut = models.CharField(
         max_length=20,
         choices=STATUS_CHOICES,
@@ -289,7 +333,7 @@ class FinancementDocument(TimeStampedModel):
         default=1,
         help_text="Numéro d'ordre pour les documents multiples (ex: 1er, 2e, 3e bulletin)"
     )
-    fichier = models.FileField(upload_to='documents/financements/%Y/%m/')
+    fichier = models.FileField(upload_to='documents/financements/%Y/%m/', storage=dedup_storage)
     statut = models.CharField(
         max_length=20,
         choices=STATUS_CHOICES,
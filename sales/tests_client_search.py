@@ -0,0 +1,70 @@
+"""
+Tests pour la recherche approximative des clients (FuzzySearchService, FuzzySearchFilter).
+"""
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from rest_framework.test import APITestCase
+
+from accounts.models import Role
+from core.services.fuzzy_search_service import FuzzySearchService
+from core.utils import normalize_phone
+from sales.models import Client
+
+
+User = get_user_model()
+
+
+class ClientFuzzySearchTests(APITestCase):
+
+    def setUp(self):
+        self.commercial = User.objects.create_user(
+            username="commercial", email="commercial@example.com", password="testpass123"
+        )
+        self.commercial.roles.add(Role.objects.create(code="COMMERCIAL", libelle="Commercial"))
+        self.ndiaye = Client.objects.create(
+            nom="Ndiaye", prenom="Mouhamadou", telephone="+221 77 123 45 67", email="m.ndiaye@example.com"
+        )
+        self.diop = Client.objects.create(
+            nom="Diop", prenom="Awa", telephone="70 987 65 43", email="awa.diop@example.com"
+        )
+
+    def test_normalize_phone(self):
+        self.assertEqual(normalize_phone("77 123 45 67"), "771234567")
+        self.assertEqual(normalize_phone("+221771234567"), "771234567")
+        self.assertEqual(normalize_phone("00221-77-123-45-67"), "771234567")
+        self.assertEqual(self.ndiaye.telephone_normalise, "771234567")
+
+    def test_telephone_normalise_follows_update_fields(self):
+        self.diop.telephone = "+221 76 000 00 00"
+        self.diop.save(update_fields=["telephone"])
+        self.diop.refresh_from_db()
+        self.assertEqual(self.diop.telephone_normalise, "760000000")
+
+    def test_api_search_by_phone_any_format(self):
+        self.client.force_authenticate(self.commercial)
+        for terms in ("77 123 45 67", "+221771234567", "1234567"):
+            response = self.client.get("/api/clients/", {"search": terms})
+            self.assertEqual([c["nom"] for c in response.data], ["Ndiaye"], terms)
+
+    def test_commercial_client_list_search(self):
+        self.client.force_login(self.commercial)
+        for terms in ("awa", "Awa Diop"):
+            response = self.client.get("/ventes/commercial/clients/", {"q": terms})
+            self.assertEqual(list(response.context["clients"]), [self.diop], terms)
+
+    @skipUnless(connection.vendor == "postgresql", "Recherche par trigrammes PostgreSQL")
+    def test_misspelled_name_is_ranked_first(self):
+        resultats = FuzzySearchService.search(
+            Client.objects.all(), "Ndiay Mouhamadu", fields=["nom", "prenom", "email"]
+        )
+        self.assertEqual(list(resultats), [self.ndiaye])
+
+    @skipUnless(connection.vendor == "postgresql", "Index varchar_pattern_ops PostgreSQL")
+    def test_normalized_phone_has_its_own_index(self):
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, Client._meta.db_table)
+        indexes = [c for c in constraints.values() if c["index"] and c["columns"] == ["telephone_normalise"]]
+        # Recherche exacte (btree) et par préfixe (varchar_pattern_ops)
+        self.assertEqual(len(indexes), 2)
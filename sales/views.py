@@ -12,6 +12,7 @@ from datetime import datetime
 from accounts.mixins import RoleRequiredMixin
 from accounts.models import User, Role
 from catalog.models import Unite, MessageChantier, AvancementChantierUnite
+from catalog.services.message_chantier_service import MessageChantierService
 from .models import Client, Reservation, ReservationDocument, FinancementDocument, Paiement, Contrat, Financement, BanquePartenaire
 from .forms import ReservationForm, ReservationDocumentForm, FinancementDocumentForm, PaiementForm, ClientForm, FinancementForm, ContratForm, PaymentModeForm, FinancingRequestForm
 from .utils import set_pending_unite
@@ -20,6 +21,8 @@ from .financing_document_service import FinancementDocumentService
 from .mixins import ReservationRequiredMixin, FinancementFormMixin, ContratFormMixin, PaiementFormMixin
 from .services.signature_service import SignatureService
 from core.utils import audit_log
+from core.services.fuzzy_search_service import FuzzySearchService
+from core.uploads import upload_errors
 
 from django.views.generic import TemplateView
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
@@ -297,6 +300,14 @@ class FinancementDocumentsUploadView(RoleRequiredMixin, TemplateView):
     def post(self, request, *args, **kwargs):
         """Uploader un nouveau document"""
         financement = self.get_financement()
+
+        # Fichier refusé pendant la réception (taille, format réel)
+        rejected = upload_errors(request)
+        if rejected:
+            for message in rejected.values():
+                messages.error(request, message)
+            return redirect('financing_documents_upload', financement_id=financement.id)
+
         form = FinancementDocumentForm(request.POST, request.FILES)
         
         if form.is_valid():
@@ -578,7 +589,14 @@ class CommercialDashboardView(RoleRequiredMixin, TemplateView):
         from core.choices import UniteStatus
         ctx["chantiers_unites"] = Unite.objects.filter(
             statut_disponibilite__in=[UniteStatus.RESERVE, UniteStatus.VENDU]
-        ).select_related('programme').prefetch_related('avancements_chantier').order_by('-updated_at')[:20]
+        ).select_related('programme').with_latest_avancement().order_by('-updated_at')[:20]
+
+        # Messages clients non lus sur les chantiers de ses programmes (une requête groupée)
+        non_lus = MessageChantierService.non_lus(
+            self.request.user,
+            AvancementChantierUnite.objects.filter(unite__programme__contact_commercial=self.request.user),
+        )
+        ctx["messages_non_lus_count"] = sum(non_lus.values())
         
         return ctx
 
@@ -639,7 +657,7 @@ class StartReservationView(View):
         unite = get_object_or_404(Unite, id=unite_id)
         # S'assurer que l'utilisateur a le rôle CLIENT
         role_client, _ = Role.objects.get_or_create(code="CLIENT", defaults={"libelle": "Client"})
-        if not request.user.roles.filter(code="CLIENT").exists():
+        if not request.user.has_role("CLIENT"):
             request.user.roles.add(role_client)
 
         client, _ = Client.objects.get_or_create(
@@ -659,6 +677,13 @@ class StartReservationView(View):
         unite = get_object_or_404(Unite, id=unite_id)
         client = request.user.client_profile
         form = ReservationForm(request.POST)
+
+        # Fichiers refusés pendant la réception (taille, format réel) : rien n'est créé
+        rejected = upload_errors(request)
+        if rejected:
+            for message in rejected.values():
+                messages.error(request, message)
+            return render(request, "sales/reservation_form.html", {"form": form, "unite": unite, "client": client})
         
         if form.is_valid():
             # Créer la réservation
@@ -959,7 +984,19 @@ class CommercialClientListView(RoleRequiredMixin, ListView):
     required_roles = ["COMMERCIAL"]
     
     def get_queryset(self):
-        return Client.objects.select_related('user').order_by('-created_at')
+        queryset = Client.objects.select_related('user').order_by('-created_at')
+        # Recherche approximative : noms mal orthographiés, téléphone dans n'importe quel format
+        return FuzzySearchService.search(
+            queryset,
+            self.request.GET.get('q', ''),
+            fields=['nom', 'prenom', 'email'],
+            phone_field='telephone_normalise',
+        )
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['q'] = self.request.GET.get('q', '')
+        return context
 
 
 class CommercialClientCreateView(RoleRequiredMixin, CreateView):
@@ -1985,6 +2022,11 @@ class ClientSuiviChantierView(RoleRequiredMixin, ListView):
         context = super().get_context_data(**kwargs)
         client = self.request.user.client_profile
         from core.choices import ContratStatus
+
+        # Messages non lus par avancement affiché (une requête groupée)
+        non_lus = MessageChantierService.non_lus(self.request.user, self.object_list)
+        for avancement in context['avancements']:
+            avancement.messages_non_lus = non_lus.get(avancement.pk, 0)
         
         # Récupérer les réservations confirmées du client
         context['reservations_confirmees'] = Reservation.objects.filter(
@@ -2027,9 +2069,11 @@ class ClientChantierDetailView(RoleRequiredMixin, TemplateView):
                 reservation__client=client
             ).order_by('-date_pointage')
             
-            # Messages entre client et commercial (exclure les messages supprimés pour cet utilisateur)
-            # Utiliser exclude au lieu de filter Python pour plus de fiabilité
-            context['messages'] = avancement.messages.exclude(supprime_par=self.request.user).order_by('created_at')
+            # Messages entre client et commercial (hors messages vidés/supprimés pour cet utilisateur)
+            context['messages'] = MessageChantierService.visibles(
+                self.request.user, avancement
+            ).select_related('auteur').order_by('created_at')
+            MessageChantierService.marquer_lu(self.request.user, avancement)
             
             # Informations du commercial
             if avancement.unite.programme.contact_commercial:
@@ -2149,9 +2193,9 @@ class DeleteMessageChantierView(RoleRequiredMixin, View):
         avancement = msg.avancement
 
         # Vérifier les permissions
-        is_admin = request.user.is_staff or request.user.is_superuser or request.user.roles.filter(code="ADMIN").exists()
-        is_client = request.user.roles.filter(code="CLIENT").exists()
-        is_commercial = request.user.roles.filter(code="COMMERCIAL").exists()
+        is_admin = request.user.is_staff or request.user.is_superuser or request.user.has_role("ADMIN")
+        is_client = request.user.has_role("CLIENT")
+        is_commercial = request.user.has_role("COMMERCIAL")
         
         redirect_url = None
         
@@ -2177,8 +2221,8 @@ class DeleteMessageChantierView(RoleRequiredMixin, View):
         else:
             raise Http404("Vous n'êtes pas autorisé à accéder à ce message.")
 
-        # Soft delete - Ajouter l'utilisateur à la liste des utilisateurs qui ont supprimé
-        msg.supprime_par.add(request.user)
+        # Soft delete - masqué pour cet utilisateur uniquement
+        MessageChantierService.supprimer(request.user, msg)
         messages.success(request, "✅ Message supprimé de votre vue.")
 
         # Redirection
@@ -2193,9 +2237,9 @@ class ClearChatChantierView(RoleRequiredMixin, View):
         avancement = get_object_or_404(AvancementChantierUnite, id=avancement_id)
 
         # Vérifier les permissions
-        is_admin = request.user.is_staff or request.user.is_superuser or request.user.roles.filter(code="ADMIN").exists()
-        is_client = request.user.roles.filter(code="CLIENT").exists()
-        is_commercial = request.user.roles.filter(code="COMMERCIAL").exists()
+        is_admin = request.user.is_staff or request.user.is_superuser or request.user.has_role("ADMIN")
+        is_client = request.user.has_role("CLIENT")
+        is_commercial = request.user.has_role("COMMERCIAL")
         
         redirect_url = None
         
@@ -2221,9 +2265,8 @@ class ClearChatChantierView(RoleRequiredMixin, View):
         else:
             raise Http404("Vous n'êtes pas autorisé à vider ce chat.")
 
-        # Soft delete - Ajouter l'utilisateur à tous les messages
-        for msg in avancement.messages.all():
-            msg.supprime_par.add(request.user)
-        
+        # Soft delete - un seul repère "vidé jusqu'au" pour cet utilisateur
+        MessageChantierService.vider(request.user, avancement)
+
         messages.success(request, "✅ Chat vidé. Tous les messages sont supprimés de votre vue.")
         return redirect(redirect_url, pk=avancement_id)
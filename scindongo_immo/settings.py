@@ -16,6 +16,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework.authtoken',
     'rest_framework_simplejwt',
@@ -51,6 +52,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'accounts.context_processors.user_roles',
             ],
         },
     },
@@ -82,10 +84,12 @@ AUTH_PASSWORD_VALIDATORS = [
 # ==========================================
 # CACHE CONFIGURATION - Redis for OTP System
 # ==========================================
+REDIS_URL = os.environ.get('REDIS_URL', 'redis://127.0.0.1:6379/0')
+
 CACHES = {
     'default': {
         'BACKEND': 'django_redis.cache.RedisCache',
-        'LOCATION': os.environ.get('REDIS_URL', 'redis://127.0.0.1:6379/0'),
+        'LOCATION': REDIS_URL,
         'OPTIONS': {
             'CLIENT_CLASS': 'django_redis.client.DefaultClient',
         },
@@ -99,6 +103,9 @@ CONTRAT_OTP_EXPIRY = 300  # 5 minutes
 CONTRAT_OTP_MAX_ATTEMPTS = 3
 CONTRAT_OTP_BLOCK_DURATION = 900  # 15 minutes
 
+# Cache des rôles utilisateur (invalidé par signal m2m_changed sur User.roles)
+ROLE_CACHE_TIMEOUT = 3600  # 1 heure
+
 # ==========================================
 # LOCALIZATION
 # ==========================================
@@ -114,11 +121,19 @@ STATICFILES_DIRS = [BASE_DIR / 'static']
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Documents et photos de chantier : stockage dédupliqué par SHA-256 (voir core.storage),
+# fichiers sans référence supprimés par la commande gc_media
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "dedup": {"BACKEND": "core.storage.ContentAddressedStorage"},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.RoleClaimsJWTAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
@@ -126,19 +141,72 @@ REST_FRAMEWORK = {
     ),
 }
 
+# Clés de Unite.caracteristiques exposées comme facettes (/api/unites/search/)
+CATALOGUE_FACET_KEYS = ["chambres", "etage", "terrasse"]
+
+# Durée de cache des clusters de la carte, par (couche, zoom, tuile)
+MAP_CLUSTER_CACHE_TIMEOUT = 600
+
+# Avancement global pondéré des programmes / unités (invalidé à chaque avancement)
+PROGRESS_CACHE_TIMEOUT = 3600
+
+# Pages publiques du catalogue en cache pour les visiteurs anonymes (core.services.page_cache_service),
+# invalidées à chaque écriture sur Programme / Unite / ModeleBien / Reservation ; 0 pour désactiver
+PAGE_CACHE_TIMEOUT = 600
+PAGE_CACHE_LOCK_TIMEOUT = 30  # durée maximale d'un rendu protégé par le verrou anti-meute
+PAGE_CACHE_LOCK_WAIT = 5  # attente maximale du rendu d'une autre requête
+
+# Export statique du catalogue public (commande build_catalogue_snapshot), servi par nginx / CDN
+CATALOGUE_SNAPSHOT_ROOT = BASE_DIR / 'snapshot'
+
+# Dérivés d'images générés en arrière-plan après upload (catalog.services.image_service)
+IMAGE_DERIVATIVES_ASYNC = True
+IMAGE_DERIVATIVES_WORKERS = 2
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=60),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
     "AUTH_HEADER_TYPES": ("Bearer",),
+    # Rôles + client_id + role_version dans le jeton (voir api.authentication)
+    "TOKEN_OBTAIN_SERIALIZER": "api.serializers.RoleClaimsTokenObtainPairSerializer",
 }
 
 SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
 SESSION_COOKIE_SECURE = False  # à passer à True en prod
 CSRF_COOKIE_SECURE = False     # à passer à True en prod
 
-# File Upload Settings - Allow up to 60MB for large documents like brochures
-DATA_UPLOAD_MAX_MEMORY_SIZE = 62914560  # 60MB in bytes
-FILE_UPLOAD_MAX_MEMORY_SIZE = 62914560  # 60MB in bytes
+# File Upload Settings - fichiers écrits sur disque par blocs de 64 Ko (voir core.uploads),
+# jamais chargés en mémoire ; SHA-256 et type réel calculés pendant la réception
+FILE_UPLOAD_HANDLERS = ["core.uploads.StreamingUploadHandler"]
+DATA_UPLOAD_MAX_MEMORY_SIZE = 2621440  # 2.5MB : champs texte uniquement
+UPLOAD_MAX_SIZE = 62914560  # 60MB par fichier par défaut (brochures)
+
+# Limites par endpoint (nom d'URL) : taille maximale et types détectés autorisés
+UPLOAD_DOCUMENT_TYPES = ["application/pdf", "image/jpeg", "image/png"]
+UPLOAD_POLICIES = {
+    "start_reservation": {"max_size": 5242880, "content_types": UPLOAD_DOCUMENT_TYPES},  # 5MB
+    "financing_documents_upload": {"max_size": 62914560, "content_types": UPLOAD_DOCUMENT_TYPES},  # 60MB
+    "avancement-unite-add-photo": {"max_size": 20971520, "content_types": ["image/jpeg", "image/png", "image/webp"]},  # 20MB
+    "avancement-unite-import": {"max_size": 524288000},  # 500MB : CSV/JSON + archive zip des photos
+}
+
+# Import en masse des avancements (catalog.services.avancement_import_service)
+AVANCEMENT_IMPORT_MAX_ROWS = 2000
+
+# Upload reprenable des photos de chantier (api/uploads-photos/, voir catalog.services.chunked_upload_service)
+CHUNKED_UPLOAD_DIR = BASE_DIR / 'tmp' / 'uploads'  # disque local, hors MEDIA_ROOT
+CHUNKED_UPLOAD_MAX_SIZE = 20971520  # 20MB par photo
+CHUNKED_UPLOAD_MAX_CHUNK_SIZE = 5242880  # 5MB par PATCH
+CHUNKED_UPLOAD_EXPIRY_HOURS = 24  # sessions abandonnées : purge_upload_sessions
+
+# Photos de chantier : signalées si leur GPS (EXIF) est à plus de ce rayon du programme
+PHOTO_GEO_RADIUS_KM = 2
+
+# Événements temps réel du suivi de chantier (SSE, catalog.views_events) : Redis pub/sub
+# (REDIS_URL) ; flux asynchrones, à servir par un serveur ASGI (uvicorn scindongo_immo.asgi:application)
+CHANTIER_EVENTS_HEARTBEAT = 15  # secondes entre deux commentaires "ping"
+CHANTIER_EVENTS_MAX_DURATION = 300  # flux fermé puis repris par EventSource (Last-Event-ID)
+CHANTIER_EVENTS_BACKLOG_LIMIT = 200  # événements rattrapés au plus à la reconnexion
 
 # ----- PATCH ÉTAPE 6 -----
 CORS_ALLOWED_ORIGINS = [